@@ -0,0 +1,340 @@
+"""
+benchmark.py
+Medições de desempenho do scanner sobre uma rede simulada.
+
+Nada vai para a rede real e não é preciso ser root: as sondagens usam o
+TransporteIcmpSimulado e os MACs vêm de uma tabela de vizinhos em memória.
+A rede tem quantidade de hosts, proporção de ativos, distribuição de
+latência e taxa de perda configuráveis. São medidos:
+    - varredura (escanear_rede): hosts/s e tempo até cada resultado (p50/p99);
+    - pico de memória da varredura (tracemalloc, em uma segunda passada);
+    - identificar_oui + definir_tipo_dispositivo: consultas/s;
+    - drenagem da fila da interface (coletar_lote_eventos): eventos/s.
+
+Uso:
+    python benchmark.py --hosts 4096 --ativos 0.3 --latencia lognormal:0.005,0.8 --perda 0.01
+    python main.py --benchmark --formato json
+"""
+
+import argparse
+import ipaddress
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from queue import Queue
+
+from net import (
+    CacheVizinhos,
+    ResultadoHost,
+    TransporteIcmpSimulado,
+    definir_tipo_dispositivo,
+    escanear_rede,
+    identificar_oui,
+    obter_caminho_recurso,
+)
+
+REDE_SIMULADA_PADRAO = "10.0.0.0"
+DISTRIBUICAO_LATENCIA_PADRAO = "lognormal:0.005,0.8"
+EVENTOS_DRENAGEM_PADRAO = 200_000
+
+
+# ---------- Distribuições de latência ----------
+def interpretar_distribuicao(especificacao):
+    """
+    Converte "fixa:0.002", "uniforme:0.001,0.02", "exponencial:0.005" ou
+    "lognormal:0.005,0.8" (mediana, sigma) em uma função sorteio -> segundos.
+    """
+    nome, _, parametros = especificacao.partition(":")
+    valores = [float(valor) for valor in parametros.split(",") if valor]
+    nome = nome.lower()
+
+    if nome == "fixa" and len(valores) == 1:
+        return lambda sorteio: valores[0]
+    if nome == "uniforme" and len(valores) == 2:
+        return lambda sorteio: sorteio.uniform(valores[0], valores[1])
+    if nome == "exponencial" and len(valores) == 1:
+        return lambda sorteio: sorteio.expovariate(1 / valores[0])
+    if nome == "lognormal" and len(valores) == 2:
+        return lambda sorteio: sorteio.lognormvariate(math.log(valores[0]), valores[1])
+    raise ValueError(f"Distribuição de latência inválida: {especificacao}")
+
+
+def percentil(valores_ordenados, fracao):
+    if not valores_ordenados:
+        return None
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(fracao * len(valores_ordenados)))]
+
+
+# ---------- Rede simulada ----------
+class RedeSimulada:
+    """
+    Rede fictícia a partir de REDE_SIMULADA_PADRAO: sorteia quais hosts
+    estão ativos, a latência de cada um e um MAC com prefixo conhecido do
+    oui.json (para a identificação do fabricante ter trabalho de verdade).
+    'semente' torna tudo reproduzível.
+    """
+
+    def __init__(self, quantidade_hosts=4096, proporcao_ativos=0.3,
+                 distribuicao_latencia=DISTRIBUICAO_LATENCIA_PADRAO, taxa_perda=0.0, semente=1):
+        self.taxa_perda = taxa_perda
+        self.semente = semente
+        sorteio = random.Random(semente)
+        sortear_latencia = interpretar_distribuicao(distribuicao_latencia)
+
+        prefixo = max(8, 32 - math.ceil(math.log2(quantidade_hosts + 2)))
+        self.rede = ipaddress.ip_network(f"{REDE_SIMULADA_PADRAO}/{prefixo}")
+        self.ip_local = str(self.rede.network_address + 1)
+        self.mascara = str(self.rede.prefixlen)
+        self.alvos = [
+            str(self.rede.network_address + deslocamento)
+            for deslocamento in range(2, quantidade_hosts + 2)
+        ]
+
+        prefixos_oui = list(carregar_prefixos_oui())
+        quantidade_ativos = round(len(self.alvos) * proporcao_ativos)
+        self.latencias = {
+            endereco_ip: sortear_latencia(sorteio)
+            for endereco_ip in sorteio.sample(self.alvos, quantidade_ativos)
+        }
+        self.tabela_vizinhos = {
+            endereco_ip: sortear_mac(sorteio, prefixos_oui) for endereco_ip in self.latencias
+        }
+
+    def especificacao_alvos(self):
+        return [f"{self.alvos[0]}-{self.alvos[-1]}"]
+
+    def criar_transporte(self):
+        return TransporteIcmpSimulado(self.latencias, taxa_perda=self.taxa_perda, semente=self.semente)
+
+    def criar_cache_vizinhos(self):
+        tabela = self.tabela_vizinhos
+        return CacheVizinhos(funcao_leitura=lambda: tabela, intervalo_minimo=float("inf"))
+
+
+def carregar_prefixos_oui():
+    with open(obter_caminho_recurso("oui.json"), "r", encoding="utf-8") as arquivo_oui:
+        return json.load(arquivo_oui).keys()
+
+
+def sortear_mac(sorteio, prefixos_oui):
+    if prefixos_oui and sorteio.random() < 0.9:
+        prefixo = prefixos_oui[sorteio.randrange(len(prefixos_oui))].replace("-", ":")
+    else:
+        prefixo = ":".join(f"{sorteio.randrange(256):02X}" for _ in range(3))
+    return prefixo + "".join(f":{sorteio.randrange(256):02X}" for _ in range(3))
+
+
+# ---------- Medições ----------
+def medir_varredura(rede, tempo_limite=0.2, max_em_voo=256):
+    """
+    Roda escanear_rede sobre a rede simulada e mede vazão e o tempo entre o
+    início e a chegada de cada resultado.
+    """
+    tempos_resultado = []
+    tempos_ativos = []
+    instante_inicio = time.perf_counter()
+
+    def ao_receber(endereco_ip, status, *_):
+        decorrido = time.perf_counter() - instante_inicio
+        tempos_resultado.append(decorrido)
+        if status == "Ativo":
+            tempos_ativos.append(decorrido)
+
+    escanear_rede(
+        rede.ip_local,
+        rede.mascara,
+        funcao_retorno_interface=ao_receber,
+        tempo_limite=tempo_limite,
+        transporte=rede.criar_transporte(),
+        alvos=rede.especificacao_alvos(),
+        cache_vizinhos=rede.criar_cache_vizinhos(),
+        max_em_voo=max_em_voo
+    )
+    duracao = time.perf_counter() - instante_inicio
+
+    tempos_resultado.sort()
+    tempos_ativos.sort()
+    return {
+        "hosts": len(tempos_resultado),
+        "ativos_encontrados": len(tempos_ativos),
+        "ativos_simulados": len(rede.latencias),
+        "duracao_s": duracao,
+        "hosts_por_segundo": len(tempos_resultado) / duracao if duracao else None,
+        "p50_resultado_s": percentil(tempos_resultado, 0.50),
+        "p99_resultado_s": percentil(tempos_resultado, 0.99),
+        "p50_ativo_s": percentil(tempos_ativos, 0.50),
+        "p99_ativo_s": percentil(tempos_ativos, 0.99),
+    }
+
+
+def medir_memoria_varredura(rede, tempo_limite=0.2, max_em_voo=256):
+    """
+    Pico de memória alocada pelo Python durante uma varredura. Fica em uma
+    passada separada porque o tracemalloc deixa tudo mais lento.
+    """
+    tracemalloc.start()
+    try:
+        escanear_rede(
+            rede.ip_local,
+            rede.mascara,
+            tempo_limite=tempo_limite,
+            transporte=rede.criar_transporte(),
+            alvos=rede.especificacao_alvos(),
+            cache_vizinhos=rede.criar_cache_vizinhos(),
+            max_em_voo=max_em_voo
+        )
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"pico_memoria_mib": pico / (1024 * 1024)}
+
+
+def medir_classificacao(rede, repeticoes=5):
+    """
+    Vazão de identificar_oui + definir_tipo_dispositivo sobre os MACs da rede.
+    """
+    pares = list(rede.tabela_vizinhos.items())
+    if not pares:
+        return {"classificacoes_por_segundo": None}
+
+    identificar_oui(pares[0][1])  # abre o índice fora da medição
+    instante_inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for endereco_ip, endereco_mac in pares:
+            definir_tipo_dispositivo(endereco_ip, rede.ip_local, identificar_oui(endereco_mac), rede.mascara)
+    duracao = time.perf_counter() - instante_inicio
+    return {"classificacoes_por_segundo": len(pares) * repeticoes / duracao}
+
+
+def medir_drenagem_interface(quantidade_eventos=EVENTOS_DRENAGEM_PADRAO, quantidade_ips=4096):
+    """
+    Enche uma fila como a da interface e drena com coletar_lote_eventos,
+    quadro a quadro, com o mesmo orçamento de tempo da interface. Não abre
+    janela (só importa o módulo gui).
+    """
+    try:
+        from gui import ORCAMENTO_QUADRO_SEGUNDOS, coletar_lote_eventos
+    except ImportError as erro_importacao:
+        print(f"Drenagem da interface não medida: {erro_importacao}")
+        return {}
+
+    fila = Queue()
+    agora = time.time()
+    for indice in range(quantidade_eventos):
+        fila.put(ResultadoHost(
+            f"10.0.{indice % quantidade_ips // 256}.{indice % 256}", "Ativo", "PC", "Desconhecido",
+            "Desconhecido", 0.001, "icmp", agora, agora
+        ))
+
+    quadros = 0
+    drenados = 0
+    instante_inicio = time.perf_counter()
+    while drenados < quantidade_eventos:
+        _, quantidade_resultados, _, _ = coletar_lote_eventos(fila, ORCAMENTO_QUADRO_SEGUNDOS)
+        drenados += quantidade_resultados
+        quadros += 1
+    duracao = time.perf_counter() - instante_inicio
+    return {
+        "eventos_drenados_por_segundo": quantidade_eventos / duracao,
+        "eventos_por_quadro": quantidade_eventos / quadros,
+    }
+
+
+def executar_benchmark(quantidade_hosts=4096, proporcao_ativos=0.3,
+                       distribuicao_latencia=DISTRIBUICAO_LATENCIA_PADRAO, taxa_perda=0.0,
+                       tempo_limite=0.2, max_em_voo=256, semente=1, medir_memoria=True,
+                       eventos_drenagem=EVENTOS_DRENAGEM_PADRAO):
+    """
+    Roda todas as medições e retorna um dicionário com os números.
+    """
+    rede = RedeSimulada(quantidade_hosts, proporcao_ativos, distribuicao_latencia, taxa_perda, semente)
+    metricas = {
+        "parametros": {
+            "hosts": quantidade_hosts,
+            "proporcao_ativos": proporcao_ativos,
+            "latencia": distribuicao_latencia,
+            "taxa_perda": taxa_perda,
+            "tempo_limite_s": tempo_limite,
+            "max_em_voo": max_em_voo,
+            "semente": semente,
+        }
+    }
+    metricas.update(medir_varredura(rede, tempo_limite, max_em_voo))
+    if medir_memoria:
+        metricas.update(medir_memoria_varredura(rede, tempo_limite, max_em_voo))
+    metricas.update(medir_classificacao(rede))
+    if eventos_drenagem:
+        metricas.update(medir_drenagem_interface(eventos_drenagem, quantidade_hosts))
+    return metricas
+
+
+# ---------- Linha de comando ----------
+def formatar_texto(metricas):
+    linhas = []
+    for nome, valor in metricas.items():
+        if nome == "parametros":
+            linhas.append("  ".join(f"{chave}={parametro}" for chave, parametro in valor.items()))
+            continue
+        if isinstance(valor, float):
+            valor = f"{valor * 1000:.1f} ms" if nome.endswith("_s") else f"{valor:,.1f}"
+        linhas.append(f"{nome:<30} {valor if valor is not None else '—'}")
+    return "\n".join(linhas)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="benchmark.py",
+        description="Mede o desempenho do scanner sobre uma rede simulada (sem rede real, sem root)."
+    )
+    parser.add_argument("--hosts", type=int, default=4096, help="Quantidade de endereços (padrão: 4096).")
+    parser.add_argument("--ativos", type=float, default=0.3, help="Fração de hosts ativos (padrão: 0.3).")
+    parser.add_argument(
+        "--latencia",
+        default=DISTRIBUICAO_LATENCIA_PADRAO,
+        help="fixa:S, uniforme:MIN,MAX, exponencial:MEDIA ou lognormal:MEDIANA,SIGMA (segundos)."
+    )
+    parser.add_argument("--perda", type=float, default=0.0, help="Fração de pacotes perdidos (padrão: 0).")
+    parser.add_argument("--tempo-limite", type=float, default=0.2, help="Timeout máximo da sondagem em segundos.")
+    parser.add_argument("--concorrencia", type=int, default=256, help="Máximo de sondagens pendentes.")
+    parser.add_argument("--semente", type=int, default=1, help="Semente dos sorteios (reprodutível).")
+    parser.add_argument("--sem-memoria", action="store_true", help="Pula a passada com tracemalloc.")
+    parser.add_argument(
+        "--eventos-drenagem",
+        type=int,
+        default=EVENTOS_DRENAGEM_PADRAO,
+        help="Eventos usados na medição da fila da interface (0 pula)."
+    )
+    parser.add_argument("--formato", choices=("texto", "json"), default="texto")
+    return parser
+
+
+def main(argv=None):
+    argumentos = criar_parser().parse_args(argv)
+    try:
+        metricas = executar_benchmark(
+            argumentos.hosts,
+            argumentos.ativos,
+            argumentos.latencia,
+            argumentos.perda,
+            argumentos.tempo_limite,
+            argumentos.concorrencia,
+            argumentos.semente,
+            not argumentos.sem_memoria,
+            argumentos.eventos_drenagem
+        )
+    except ValueError as erro_parametro:
+        print(f"Erro: {erro_parametro}", file=sys.stderr)
+        return 2
+
+    if argumentos.formato == "json":
+        print(json.dumps(metricas, indent=2, ensure_ascii=False))
+    else:
+        print(formatar_texto(metricas))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,558 @@
+"""
+cli.py
+Varredura sem interface gráfica (cron, CI, SSH).
+
+Não importa tkinter nem PIL: a varredura comum usa só o módulo 'net', e os
+módulos das opções (--ipv6, --incremental, --monitorar, --nomes, --retomada,
+--processos) são importados apenas quando elas são usadas. Cada
+resultado é escrito assim que fica pronto, em JSON Lines ou CSV.
+
+Exemplos:
+    python main.py 192.168.0.0/24
+    python main.py 10.8.0.0/20 --excluir 10.8.0.1 --formato csv --somente-ativos
+    python cli.py --metodo auto --tempo-limite 0.5
+    python main.py 192.168.0.0/24 --incremental   (só o que mudou desde a última vez)
+    python main.py --todas-interfaces             (LAN, VPN, docker... em paralelo)
+    python main.py 10.0.0.0/12 --processos 8      (faixa grande dividida entre processos)
+    python main.py 10.0.0.0/20 --metricas fases.prom --perfil varredura.prof
+    python main.py 192.168.0.0/24 --nomes         (DNS reverso, mDNS e NetBIOS)
+    python main.py 192.168.0.0/24 --monitorar     (varreduras periódicas, só mudanças)
+    python main.py 10.0.0.0/16 --retomada 10-0.json  (Ctrl+C e depois continua de onde parou)
+    python main.py 192.168.0.0/24 --ipv6          (também descobre IPv6 no enlace local)
+"""
+
+import argparse
+import csv
+import json
+import os
+import socket
+import sys
+
+from net import (
+    ControleConcorrencia,
+    EstimadorRtt,
+    ResultadoHost,
+    contar_alvos_interfaces,
+    listar_enderecos_rede_locais,
+    montar_alvos,
+    varrer_interfaces,
+    varrer_rede,
+)
+
+FORMATOS_SAIDA = ("jsonl", "csv")
+METODOS_DESCOBERTA = ("icmp", "arp", "auto")
+# No monitoramento, sem --taxa-maxima, os ciclos não passam disso (pacotes/s)
+TAXA_MAXIMA_MONITORAMENTO = 100
+
+
+def criar_analisador_argumentos():
+    analisador = argparse.ArgumentParser(
+        prog="ipscan",
+        description="IP-ScanED sem interface gráfica: varre a rede e escreve os resultados em fluxo."
+    )
+    analisador.add_argument(
+        "alvos", nargs="*",
+        help="CIDR, IP ou faixa (a.b.c.d-e.f.g.h). Sem alvos, varre a rede do IP local."
+    )
+    analisador.add_argument(
+        "--ip-local",
+        help="IP local de referência (padrão: o primeiro IP encontrado nas interfaces)."
+    )
+    analisador.add_argument(
+        "--mascara",
+        help="Máscara da rede local (ex.: 24 ou 255.255.255.0), usada quando não há alvos."
+    )
+    analisador.add_argument(
+        "--interface", action="append", default=[], metavar="IP_LOCAL",
+        help="Varre a rede deste IP local (pode repetir: as redes são varridas em paralelo)."
+    )
+    analisador.add_argument(
+        "--todas-interfaces", action="store_true",
+        help="Varre em paralelo as redes de todos os IPs locais encontrados."
+    )
+    analisador.add_argument(
+        "--excluir", action="append", default=[], metavar="ALVO",
+        help="Endereço, CIDR ou faixa a excluir (pode repetir)."
+    )
+    analisador.add_argument("--metodo", choices=METODOS_DESCOBERTA, default="icmp")
+    analisador.add_argument(
+        "--tempo-limite", type=float, default=1.0, metavar="SEGUNDOS",
+        help="Tempo máximo de espera por resposta (padrão: 1.0); o timeout real "
+             "acompanha o RTT medido durante a varredura."
+    )
+    analisador.add_argument(
+        "--tentativas", type=int, default=2, metavar="N",
+        help="Envios por host antes de considerá-lo inativo (padrão: 2)."
+    )
+    analisador.add_argument(
+        "--concorrencia", type=int, default=256, metavar="N",
+        help="Máximo de sondagens pendentes ao mesmo tempo (padrão: 256); o valor "
+             "usado se ajusta sozinho conforme a perda observada."
+    )
+    analisador.add_argument(
+        "--taxa-maxima", type=float, metavar="PPS",
+        help="Limite de pacotes por segundo (padrão: sem limite)."
+    )
+    analisador.add_argument(
+        "--processos", type=int, default=1, metavar="N",
+        help="Divide os alvos entre N processos (para faixas /16 ou maiores; "
+             "a concorrência e a taxa máxima são repartidas entre eles)."
+    )
+    analisador.add_argument(
+        "--nomes", action="store_true",
+        help="Resolve o nome dos hosts ativos (DNS reverso, mDNS e NetBIOS) durante a "
+             "varredura (com --processos, cada processo resolve os seus)."
+    )
+    analisador.add_argument(
+        "--servidor-dns", metavar="IP[:PORTA]",
+        help="Servidor para o DNS reverso (padrão: o do sistema)."
+    )
+    analisador.add_argument("--formato", choices=FORMATOS_SAIDA, default="jsonl")
+    analisador.add_argument(
+        "--somente-ativos", action="store_true",
+        help="Escreve apenas os hosts que responderam."
+    )
+    analisador.add_argument(
+        "--incremental", action="store_true",
+        help="Usa o histórico de hosts e escreve apenas mudanças (apareceu, desapareceu, MAC alterado)."
+    )
+    analisador.add_argument(
+        "--monitorar", action="store_true",
+        help="Monitora a rede até Ctrl+C: revarre os hosts ativos a cada --intervalo-ativos "
+             "e a rede toda a cada --intervalo-completo, escrevendo só as mudanças "
+             f"(padrão de --taxa-maxima: {TAXA_MAXIMA_MONITORAMENTO} pacotes/s)."
+    )
+    analisador.add_argument(
+        "--intervalo-ativos", type=float, default=30.0, metavar="SEGUNDOS",
+        help="Com --monitorar, intervalo médio entre revarreduras dos hosts ativos (padrão: 30)."
+    )
+    analisador.add_argument(
+        "--intervalo-completo", type=float, default=600.0, metavar="SEGUNDOS",
+        help="Com --monitorar, intervalo médio entre varreduras completas (padrão: 600)."
+    )
+    analisador.add_argument(
+        "--retomada", metavar="ARQUIVO",
+        help="Grava o progresso neste arquivo e, se ele já existir (mesmos alvos), continua "
+             "de onde a varredura parou. Sem a opção, varreduras grandes (milhares "
+             "de alvos) usam ~/.ipscan/retomada/."
+    )
+    analisador.add_argument(
+        "--sem-retomada", action="store_true",
+        help="Não grava nem usa pontos de retomada (recomeça do zero)."
+    )
+    analisador.add_argument(
+        "--ipv6", action="store_true",
+        help="Descobre também os hosts IPv6 do enlace local (eco para ff02::1 e tabela de "
+             "vizinhos) e junta os endereços aos resultados IPv4 pelo MAC."
+    )
+    analisador.add_argument(
+        "--historico", metavar="ARQUIVO",
+        help="Banco SQLite do histórico (padrão: ~/.ipscan/historico.sqlite3)."
+    )
+    analisador.add_argument(
+        "-o", "--saida", metavar="ARQUIVO",
+        help="Arquivo de saída (padrão: saída padrão)."
+    )
+    analisador.add_argument(
+        "--metricas", metavar="ARQUIVO",
+        help="Grava tempos por fase e contadores ao final: .json em JSON, "
+             "outra extensão no formato de texto do Prometheus."
+    )
+    analisador.add_argument(
+        "--perfil", metavar="ARQUIVO",
+        help="Grava um perfil do cProfile da varredura (não vale com --processos)."
+    )
+    return analisador
+
+
+def resolver_ip_local(argumentos):
+    """
+    Retorna (ip_local, mascara) a partir dos argumentos ou da primeira interface.
+    """
+    if argumentos.ip_local:
+        return argumentos.ip_local, argumentos.mascara or "24"
+
+    lista_enderecos = listar_enderecos_rede_locais()
+    if not lista_enderecos:
+        return "0.0.0.0", argumentos.mascara or "24"
+    endereco = lista_enderecos[0]
+    return endereco["ip"], argumentos.mascara or endereco["mascara"]
+
+
+def ip_local_de_saida(alvos):
+    """
+    IP local pelo qual o sistema sairia para o primeiro alvo (connect de um
+    socket UDP só consulta a tabela de rotas; nada é enviado).
+    """
+    primeiro_alvo = next(iter(alvos), None)
+    if primeiro_alvo is None:
+        return "0.0.0.0"
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as socket_rota:
+            socket_rota.connect((primeiro_alvo, 9))
+            return socket_rota.getsockname()[0]
+    except OSError:
+        return "0.0.0.0"
+
+
+def selecionar_interfaces(argumentos):
+    """
+    Retorna a lista de interfaces (dicionários de listar_enderecos_rede_locais)
+    pedidas com --interface/--todas-interfaces, ou None para o modo comum.
+    """
+    if not argumentos.interface and not argumentos.todas_interfaces:
+        return None
+
+    lista_enderecos = listar_enderecos_rede_locais()
+    if argumentos.todas_interfaces:
+        return lista_enderecos
+
+    enderecos_por_ip = {endereco["ip"]: endereco for endereco in lista_enderecos}
+    interfaces = []
+    for endereco_ip in argumentos.interface:
+        endereco = enderecos_por_ip.get(endereco_ip)
+        if endereco is None:
+            # IP fora da lista (ex.: interface que o parser não reconheceu)
+            endereco = {"ip": endereco_ip, "mascara": argumentos.mascara or "24"}
+        interfaces.append(endereco)
+    return interfaces
+
+
+class EscritorResultados:
+    """
+    Escreve ResultadoHost em JSON Lines ou CSV, com flush a cada linha
+    para que quem lê a saída receba os hosts durante a varredura.
+    """
+
+    def __init__(self, arquivo_saida, formato, campos=ResultadoHost._fields):
+        self.arquivo_saida = arquivo_saida
+        self.formato = formato
+        self.campos = campos
+        self.escritor_csv = None
+        if formato == "csv":
+            self.escritor_csv = csv.writer(arquivo_saida)
+            self.escritor_csv.writerow(campos)
+
+    def escrever(self, resultado):
+        if self.escritor_csv is not None:
+            self.escritor_csv.writerow(
+                "" if valor is None else valor for valor in resultado
+            )
+        else:
+            self.arquivo_saida.write(
+                json.dumps(dict(zip(self.campos, resultado)), ensure_ascii=False) + "\n"
+            )
+        self.arquivo_saida.flush()
+
+
+# Uma mudança é escrita como uma linha só: o evento seguido do resultado da sondagem
+CAMPOS_MUDANCA = ("evento", "mac_anterior") + ResultadoHost._fields
+
+
+def linha_mudanca(mudanca):
+    return (mudanca.evento, mudanca.mac_anterior) + tuple(mudanca.resultado)
+
+
+def criar_controle(argumentos):
+    return ControleConcorrencia(
+        janela_maxima=argumentos.concorrencia,
+        taxa_maxima=argumentos.taxa_maxima
+    )
+
+
+def imprimir_estado_varredura(controle, estimador):
+    estado = controle.estado()
+    texto_rtt = (
+        f", RTT médio {estimador.srtt * 1000:.1f} ms, timeout {estimador.tempo_limite() * 1000:.0f} ms"
+        if estimador is not None and estimador.srtt is not None else ""
+    )
+    print(
+        f"taxa média {estado['taxa_atual']:.0f} pacotes/s, janela final {estado['janela']}, "
+        f"perda estimada {estado['estimativa_perda'] * 100:.1f}%{texto_rtt}",
+        file=sys.stderr
+    )
+
+
+def criar_resolvedor_nomes(argumentos):
+    if not argumentos.nomes:
+        return None
+    from nomes import PORTA_DNS, ResolvedorNomes
+
+    servidor_dns = None
+    if argumentos.servidor_dns:
+        endereco, _, porta = argumentos.servidor_dns.partition(":")
+        servidor_dns = (endereco, int(porta or PORTA_DNS))
+    return ResolvedorNomes(servidor_dns=servidor_dns, tempo_limite=min(1.0, argumentos.tempo_limite))
+
+
+def abrir_ponto_retomada(argumentos, alvos, interfaces):
+    """
+    PontoRetomada da varredura comum (uma rede, sem --incremental), ou None.
+    """
+    if interfaces or argumentos.sem_retomada:
+        return None
+    from retomada import LIMIAR_RETOMADA, PontoRetomada, caminho_retomada_padrao
+
+    if not argumentos.retomada and len(alvos) < LIMIAR_RETOMADA:
+        return None
+    ponto = PontoRetomada.abrir(argumentos.retomada or caminho_retomada_padrao(alvos), alvos)
+    if ponto.quantidade_concluidos:
+        print(
+            f"Retomando: {ponto.quantidade_concluidos} de {ponto.quantidade} alvos já sondados "
+            f"({ponto.caminho_arquivo}; --sem-retomada recomeça do zero)",
+            file=sys.stderr
+        )
+    return ponto
+
+
+def salvar_metricas(argumentos):
+    if argumentos.metricas:
+        from metricas import metricas
+
+        metricas.salvar(argumentos.metricas)
+
+
+def main(lista_argumentos=None):
+    argumentos = criar_analisador_argumentos().parse_args(lista_argumentos)
+    interfaces = None if argumentos.alvos else selecionar_interfaces(argumentos)
+    # Com alvos explícitos não é preciso listar as interfaces (ipconfig/ip):
+    # sem --ip-local, vale o IP de saída para o primeiro alvo
+    endereco_ip_local = mascara_rede = None
+    if argumentos.ip_local or not argumentos.alvos:
+        endereco_ip_local, mascara_rede = resolver_ip_local(argumentos)
+
+    try:
+        if interfaces:
+            alvos = None
+            quantidade_alvos = contar_alvos_interfaces(interfaces, argumentos.excluir)
+        else:
+            alvos = montar_alvos(
+                endereco_ip_local,
+                mascara_rede,
+                argumentos.alvos or None,
+                argumentos.excluir
+            )
+            quantidade_alvos = len(alvos)
+    except ValueError as erro_alvos:
+        print(f"Alvo inválido: {erro_alvos}", file=sys.stderr)
+        return 2
+    if endereco_ip_local is None:
+        endereco_ip_local, mascara_rede = ip_local_de_saida(alvos), argumentos.mascara or "24"
+
+    # Com várias interfaces cada rede mede o próprio RTT; só o controle é comum
+    controle = criar_controle(argumentos)
+    estimador = None if interfaces else EstimadorRtt(argumentos.tempo_limite)
+    opcoes_varredura = {
+        "tempo_limite": argumentos.tempo_limite,
+        "metodo": argumentos.metodo,
+        "tentativas": argumentos.tentativas,
+        "controle": controle,
+    }
+    if estimador is not None:
+        opcoes_varredura["estimador"] = estimador
+    if argumentos.perfil:
+        opcoes_varredura["arquivo_perfil"] = argumentos.perfil
+    resolvedor_nomes = criar_resolvedor_nomes(argumentos)
+    if resolvedor_nomes is not None:
+        opcoes_varredura["resolvedor_nomes"] = resolvedor_nomes
+
+    if argumentos.monitorar and interfaces:
+        print("--monitorar vale para uma rede só (sem --interface/--todas-interfaces)", file=sys.stderr)
+        return 2
+    if argumentos.processos > 1 and interfaces:
+        print("--processos vale para uma rede só (sem --interface/--todas-interfaces)", file=sys.stderr)
+        return 2
+    if argumentos.perfil and argumentos.processos > 1:
+        print("--perfil não vale com --processos (o perfil seria só do processo principal)", file=sys.stderr)
+        return 2
+    if argumentos.ipv6 and (argumentos.monitorar or argumentos.incremental):
+        print("--ipv6 não vale com --monitorar/--incremental", file=sys.stderr)
+        return 2
+
+    arquivo_saida = (
+        open(argumentos.saida, "w", encoding="utf-8", newline="")
+        if argumentos.saida else sys.stdout
+    )
+    if argumentos.monitorar:
+        try:
+            return monitorar_mudancas(
+                argumentos, endereco_ip_local, mascara_rede, resolvedor_nomes, arquivo_saida
+            )
+        finally:
+            if arquivo_saida is not sys.stdout:
+                arquivo_saida.close()
+
+    if argumentos.incremental:
+        try:
+            return varrer_mudancas(
+                argumentos, endereco_ip_local, mascara_rede, alvos, interfaces,
+                opcoes_varredura, arquivo_saida
+            )
+        finally:
+            if arquivo_saida is not sys.stdout:
+                arquivo_saida.close()
+
+    escritor = EscritorResultados(arquivo_saida, argumentos.formato)
+    quantidade_ativos = 0
+    ponto_retomada = abrir_ponto_retomada(argumentos, alvos, interfaces)
+
+    def varrer_alvos(alvos_varredura):
+        if argumentos.processos > 1:
+            from varredura_processos import varrer_rede_processos
+
+            return varrer_rede_processos(
+                endereco_ip_local,
+                mascara_rede,
+                alvos=alvos_varredura,
+                processos=argumentos.processos,
+                max_em_voo=argumentos.concorrencia,
+                taxa_maxima=argumentos.taxa_maxima,
+                tempo_limite=argumentos.tempo_limite,
+                metodo=argumentos.metodo,
+                tentativas=argumentos.tentativas,
+                resolvedor_nomes=resolvedor_nomes
+            )
+        return varrer_rede(endereco_ip_local, mascara_rede, alvos=alvos_varredura, **opcoes_varredura)
+
+    if interfaces:
+        resultados = varrer_interfaces(interfaces, exclusoes=argumentos.excluir, **opcoes_varredura)
+    elif ponto_retomada is not None:
+        from retomada import varrer_com_retomada
+
+        resultados = varrer_com_retomada(ponto_retomada, varrer_alvos)
+    else:
+        resultados = varrer_alvos(alvos)
+    if argumentos.ipv6:
+        from descoberta_ipv6 import DescobertaIpv6Paralela, listar_interfaces_ipv6, mesclar_por_mac
+
+        # Começa já, em paralelo com a varredura IPv4
+        interfaces_ipv6 = [interface for interface in listar_interfaces_ipv6() if interface["multicast"]]
+        descoberta_ipv6 = DescobertaIpv6Paralela(
+            interfaces_ipv6, tempo_espera=max(argumentos.tempo_limite, 0.5)
+        )
+        resultados = mesclar_por_mac(resultados, descoberta_ipv6)
+    if argumentos.processos > 1:
+        # Cada processo cria o próprio controle e estimador
+        controle = estimador = None
+
+    try:
+        for resultado in resultados:
+            if resultado.status == "Ativo":
+                quantidade_ativos += 1
+            elif argumentos.somente_ativos:
+                continue
+            escritor.escrever(resultado)
+    except KeyboardInterrupt:
+        if ponto_retomada is not None:
+            print(
+                f"Interrompido; progresso salvo em {ponto_retomada.caminho_arquivo} "
+                "(rode o mesmo comando para continuar)",
+                file=sys.stderr
+            )
+        return 130
+    except BrokenPipeError:
+        # Ex.: saída redirecionada para 'head'; evita novo erro ao encerrar
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        # Encerra a varredura (e grava o ponto de retomada) antes de sair
+        resultados.close()
+        if arquivo_saida is not sys.stdout:
+            arquivo_saida.close()
+
+    print(f"{quantidade_ativos} de {quantidade_alvos} hosts ativos", file=sys.stderr)
+    if controle is not None:
+        imprimir_estado_varredura(controle, estimador)
+    salvar_metricas(argumentos)
+    return 0
+
+
+def varrer_mudancas(argumentos, endereco_ip_local, mascara_rede, alvos, interfaces,
+                    opcoes_varredura, arquivo_saida):
+    """
+    Modo --incremental: escreve só as MudancaHost em relação ao histórico.
+    """
+    from historico import HistoricoHosts, varrer_incremental
+
+    escritor = EscritorResultados(arquivo_saida, argumentos.formato, CAMPOS_MUDANCA)
+    historico = HistoricoHosts(argumentos.historico)
+    contagem = {"apareceu": 0, "desapareceu": 0, "mac_alterado": 0}
+
+    try:
+        for mudanca in varrer_incremental(
+                historico,
+                endereco_ip_local,
+                mascara_rede,
+                alvos=alvos,
+                exclusoes=argumentos.excluir,
+                interfaces=interfaces,
+                **opcoes_varredura):
+            contagem[mudanca.evento] += 1
+            escritor.escrever(linha_mudanca(mudanca))
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        historico.fechar()
+
+    print(
+        f"{contagem['apareceu']} apareceram, {contagem['desapareceu']} desapareceram, "
+        f"{contagem['mac_alterado']} trocaram de MAC",
+        file=sys.stderr
+    )
+    imprimir_estado_varredura(opcoes_varredura["controle"], opcoes_varredura.get("estimador"))
+    salvar_metricas(argumentos)
+    return 0
+
+
+def monitorar_mudancas(argumentos, endereco_ip_local, mascara_rede, resolvedor_nomes, arquivo_saida):
+    """
+    Modo --monitorar: escreve as MudancaHost conforme acontecem e um resumo
+    de cada ciclo na saída de erro, até Ctrl+C.
+    """
+    from historico import HistoricoHosts
+    from monitoramento import CicloMonitoramento, descrever_item, monitorar
+
+    escritor = EscritorResultados(arquivo_saida, argumentos.formato, CAMPOS_MUDANCA)
+    historico = HistoricoHosts(argumentos.historico)
+    opcoes_monitoramento = {}
+    if argumentos.perfil:
+        opcoes_monitoramento["arquivo_perfil"] = argumentos.perfil
+    if resolvedor_nomes is not None:
+        opcoes_monitoramento["resolvedor_nomes"] = resolvedor_nomes
+
+    try:
+        for item in monitorar(
+                historico,
+                endereco_ip_local,
+                mascara_rede,
+                alvos=argumentos.alvos or None,
+                exclusoes=argumentos.excluir,
+                intervalo_ativos=argumentos.intervalo_ativos,
+                intervalo_completo=argumentos.intervalo_completo,
+                taxa_maxima=argumentos.taxa_maxima or TAXA_MAXIMA_MONITORAMENTO,
+                max_em_voo=argumentos.concorrencia,
+                tempo_limite=argumentos.tempo_limite,
+                metodo=argumentos.metodo,
+                tentativas=argumentos.tentativas,
+                **opcoes_monitoramento):
+            if isinstance(item, CicloMonitoramento):
+                print(descrever_item(item), file=sys.stderr)
+                salvar_metricas(argumentos)
+            elif not isinstance(item, ResultadoHost):
+                escritor.escrever(linha_mudanca(item))
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        historico.fechar()
+        salvar_metricas(argumentos)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,663 @@
+"""
+descoberta_ipv6.py
+Descoberta de hosts IPv6 no enlace local.
+
+Uma /64 tem 2^64 endereços: varrer um a um é impossível. Por isso, em cada
+interface:
+  1. um Echo Request ICMPv6 vai para ff02::1 (todos os nós do enlace) e
+     cada host responde do próprio endereço (em geral o link-local);
+  2. quem respondeu recebe um Echo Request unicast: para enviá-lo, o kernel
+     faz a solicitação de vizinho (NS), e o MAC entra na tabela de vizinhos;
+  3. a tabela de vizinhos IPv6 ('ip -6 neigh' / 'netsh ... neighbors') é
+     lida uma vez ao final, o que também traz vizinhos que não respondem a
+     eco para multicast (ex.: Windows) mas já falaram com esta máquina.
+Todos os envios usam um único socket ICMPv6 e as respostas chegam em um só
+laço de recepção. mesclar_por_mac junta os endereços IPv6 aos ResultadoHost
+IPv4 do mesmo MAC; hosts só com IPv6 viram resultados próprios.
+"""
+
+import asyncio
+import itertools
+import os
+import platform
+import re
+import socket
+import struct
+import subprocess
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from metricas import metricas
+from net import (
+    MAC_INCOMPLETO,
+    PADRAO_ENDERECO_MAC,
+    ResultadoHost,
+    definir_tipo_dispositivo,
+    identificar_oui,
+    iterar_em_thread,
+    normalizar_mac,
+)
+
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+DESTINO_TODOS_NOS = "ff02::1"
+CARGA_PACOTE_ECHO_IPV6 = b"IP-ScanED"
+
+FONTE_ECO = "eco"            # respondeu ao eco (multicast ou unicast)
+FONTE_VIZINHOS = "vizinhos"  # só apareceu na tabela de vizinhos
+FONTE_LOCAL = "local"        # endereço da própria máquina
+
+PADRAO_ENDERECO_IPV6 = re.compile(r"([0-9A-Fa-f]{0,4}(?::[0-9A-Fa-f]{0,4}){2,7})(?:%(\w+))?")
+
+
+class HostIpv6(NamedTuple):
+    """
+    Endereço IPv6 encontrado em uma interface. 'rtt' em segundos (None se
+    o endereço veio só da tabela de vizinhos), 'fonte' é "eco", "vizinhos"
+    ou "local" e 'ip_local' o endereço desta máquina naquela interface.
+    """
+    ip: str
+    interface: str
+    mac: str
+    rtt: Optional[float]
+    fonte: str
+    ip_local: str
+    instante: float
+
+
+# ---------- Interfaces IPv6 locais ----------
+def analisar_ip_addr_ipv6(texto):
+    """
+    Interpreta a saída de 'ip addr' e retorna as interfaces com IPv6:
+    [{"interface": "eth0", "indice": 2, "ip": "fe80::1", "enderecos": [...],
+      "mac": "AA:BB:...", "multicast": True, "descricao": "..."}, ...]
+    'ip' é o link-local (de onde saem os ecos); a loopback fica de fora.
+    """
+    interfaces = []
+    atual = None
+    for linha in texto.splitlines():
+        cabecalho = re.match(r"^(\d+):\s+([^:@\s]+)(?:@\S+)?:\s+<([^>]*)>", linha)
+        if cabecalho:
+            sinalizadores = cabecalho.group(3).split(",")
+            atual = {
+                "interface": cabecalho.group(2),
+                "indice": int(cabecalho.group(1)),
+                "ip": None,
+                "enderecos": [],
+                "mac": "Desconhecido",
+                "multicast": "MULTICAST" in sinalizadores,
+                "loopback": "LOOPBACK" in sinalizadores,
+            }
+            interfaces.append(atual)
+            continue
+        if atual is None:
+            continue
+
+        colunas = linha.split()
+        if len(colunas) >= 2 and colunas[0] == "link/ether":
+            atual["mac"] = normalizar_mac(colunas[1])
+        elif len(colunas) >= 2 and colunas[0] == "inet6":
+            endereco_ip, _, prefixo = colunas[1].partition("/")
+            atual["enderecos"].append(endereco_ip)
+            if "link" in colunas and atual["ip"] is None:
+                atual["ip"] = endereco_ip
+                atual["prefixo"] = prefixo
+
+    lista_interfaces = []
+    for interface in interfaces:
+        if interface.pop("loopback") or not interface["enderecos"]:
+            continue
+        if interface["ip"] is None:
+            interface["ip"] = interface["enderecos"][0]
+        interface["descricao"] = f"{interface['ip']} ({interface['interface']})"
+        lista_interfaces.append(interface)
+    return lista_interfaces
+
+
+def analisar_ipconfig_ipv6(texto):
+    """
+    Interpreta a saída de 'ipconfig /all' (Windows). O índice da interface
+    vem do sufixo %N do endereço link-local e também serve de 'interface'.
+    """
+    interfaces = []
+    atual = None
+    for linha in texto.splitlines():
+        if linha and not linha[0].isspace() and linha.rstrip().endswith(":"):
+            atual = {
+                "interface": linha.rstrip().rstrip(":").strip(),
+                "indice": None,
+                "ip": None,
+                "enderecos": [],
+                "mac": "Desconhecido",
+                "multicast": True,
+            }
+            interfaces.append(atual)
+            continue
+        if atual is None:
+            continue
+
+        if "IPv6" in linha:
+            correspondencia = PADRAO_ENDERECO_IPV6.search(linha.split(": ", 1)[-1])
+            if correspondencia and correspondencia.group(1).count(":") >= 2:
+                endereco_ip = correspondencia.group(1)
+                atual["enderecos"].append(endereco_ip)
+                if endereco_ip.lower().startswith("fe80") and correspondencia.group(2):
+                    atual["ip"] = endereco_ip
+                    atual["indice"] = int(correspondencia.group(2))
+        elif "Físico" in linha or "Fisico" in linha or "Physical" in linha:
+            correspondencia_mac = PADRAO_ENDERECO_MAC.search(linha)
+            if correspondencia_mac:
+                atual["mac"] = normalizar_mac(correspondencia_mac.group(1))
+
+    lista_interfaces = []
+    for interface in interfaces:
+        if interface["indice"] is None or not interface["enderecos"]:
+            continue
+        interface["descricao"] = f"{interface['ip']} ({interface['interface']})"
+        # No Windows o escopo de "fe80::1%12" é o índice, não o nome
+        interface["interface"] = str(interface["indice"])
+        lista_interfaces.append(interface)
+    return lista_interfaces
+
+
+def listar_interfaces_ipv6():
+    """
+    Interfaces com IPv6 (ver analisar_ip_addr_ipv6); lista vazia se não
+    for possível consultá-las.
+    """
+    try:
+        if platform.system() == "Windows":
+            return analisar_ipconfig_ipv6(subprocess.check_output(
+                ["ipconfig", "/all"], text=True, encoding="utf-8", errors="ignore"
+            ))
+        return analisar_ip_addr_ipv6(subprocess.check_output(["ip", "addr"], text=True))
+    except Exception as erro_interfaces:
+        print(f"Erro ao listar interfaces IPv6: {erro_interfaces}")
+        return []
+
+
+# ---------- Tabela de vizinhos IPv6 ----------
+def analisar_ip_neigh_ipv6(texto):
+    """
+    Interpreta a saída de 'ip -6 neigh' e retorna [(ip, interface, mac), ...].
+    """
+    vizinhos = []
+    for linha in texto.splitlines():
+        colunas = linha.split()
+        if ("lladdr" not in colunas or "dev" not in colunas or
+                "FAILED" in colunas or "INCOMPLETE" in colunas):
+            continue
+        vizinhos.append((
+            colunas[0],
+            colunas[colunas.index("dev") + 1],
+            normalizar_mac(colunas[colunas.index("lladdr") + 1])
+        ))
+    return vizinhos
+
+
+def analisar_netsh_vizinhos(texto):
+    """
+    Interpreta 'netsh interface ipv6 show neighbors' (Windows). A interface
+    é identificada pelo índice (como texto), igual ao sufixo %N.
+    """
+    vizinhos = []
+    indice_interface = None
+    for linha in texto.splitlines():
+        cabecalho = re.match(r"^\s*Interface\s+(\d+)\s*:", linha)
+        if cabecalho:
+            indice_interface = cabecalho.group(1)
+            continue
+        colunas = linha.split()
+        if indice_interface is None or len(colunas) < 3 or ":" not in colunas[0]:
+            continue
+        correspondencia_mac = PADRAO_ENDERECO_MAC.fullmatch(colunas[1])
+        if not correspondencia_mac or colunas[0].lower().startswith("ff"):
+            continue
+        endereco_mac = normalizar_mac(colunas[1])
+        if endereco_mac == MAC_INCOMPLETO or "Unreachable" in colunas or "Inacess" in linha:
+            continue
+        vizinhos.append((colunas[0], indice_interface, endereco_mac))
+    return vizinhos
+
+
+def ler_vizinhos_ipv6():
+    """
+    Lê a tabela de vizinhos IPv6 do sistema: [(ip, interface, mac), ...].
+    """
+    try:
+        if platform.system() == "Windows":
+            return analisar_netsh_vizinhos(subprocess.check_output(
+                ["netsh", "interface", "ipv6", "show", "neighbors"],
+                text=True, encoding="utf-8", errors="ignore"
+            ))
+        return analisar_ip_neigh_ipv6(subprocess.check_output(["ip", "-6", "neigh"], text=True))
+    except Exception as erro_tabela:
+        print(f"Erro ao ler tabela de vizinhos IPv6: {erro_tabela}")
+        return []
+
+
+# ---------- Transportes ICMPv6 ----------
+def montar_pacote_echo_ipv6(identificador, sequencia, carga=CARGA_PACOTE_ECHO_IPV6):
+    """
+    Echo Request ICMPv6 com checksum zerado: em sockets ICMPv6 o kernel
+    calcula o checksum (ele depende do cabeçalho IPv6, RFC 3542).
+    """
+    return struct.pack("!BBHHH", ICMPV6_ECHO_REQUEST, 0, 0, identificador, sequencia) + carga
+
+
+def interpretar_resposta_echo_ipv6(pacote):
+    """
+    Retorna (identificador, sequencia) se o pacote for um Echo Reply
+    ICMPv6 (sockets ICMPv6 não entregam o cabeçalho IPv6), senão None.
+    """
+    if len(pacote) < 8:
+        return None
+    tipo, _codigo, _checksum, identificador, sequencia = struct.unpack("!BBHHH", pacote[:8])
+    if tipo != ICMPV6_ECHO_REPLY:
+        return None
+    return identificador, sequencia
+
+
+def abrir_socket_icmpv6():
+    """
+    Como net.abrir_socket_icmp: SOCK_DGRAM sem privilégios e, na falta
+    dele, SOCK_RAW. Retorna (socket, modo_datagrama).
+    """
+    try:
+        return socket.socket(socket.AF_INET6, socket.SOCK_DGRAM, socket.IPPROTO_ICMPV6), True
+    except OSError:
+        return socket.socket(socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_ICMPV6), False
+
+
+class TransporteIcmpv6Socket:
+    """
+    Um socket ICMPv6 não bloqueante para toda a descoberta; as respostas são
+    lidas pelo event loop (add_reader) e entregues a
+    funcao_resposta(ip, indice_interface, sequencia).
+    """
+
+    def __init__(self):
+        self.socket_icmp = None
+        self.modo_datagrama = False
+        self.identificador = os.getpid() & 0xFFFF
+        self.loop = None
+        self.funcao_resposta = None
+
+    def abrir(self, loop, funcao_resposta):
+        self.socket_icmp, self.modo_datagrama = abrir_socket_icmpv6()
+        self.socket_icmp.setblocking(False)
+        # Ecos para ff02::1 não passam do enlace
+        self.socket_icmp.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, 1)
+        self.loop = loop
+        self.funcao_resposta = funcao_resposta
+        try:
+            loop.add_reader(self.socket_icmp.fileno(), self._ler_respostas)
+        except NotImplementedError:
+            self.socket_icmp.close()
+            raise
+
+    def enviar(self, destino, indice_interface, sequencia, origem=None):
+        pacote = montar_pacote_echo_ipv6(self.identificador, sequencia)
+        endereco_destino = (destino, 0, 0, indice_interface or 0)
+        try:
+            if origem and hasattr(socket, "IPV6_PKTINFO") and hasattr(self.socket_icmp, "sendmsg"):
+                # in6_pktinfo: endereço de origem + índice da interface
+                informacao = socket.inet_pton(socket.AF_INET6, origem) + struct.pack("@I", indice_interface or 0)
+                self.socket_icmp.sendmsg(
+                    [pacote], [(socket.IPPROTO_IPV6, socket.IPV6_PKTINFO, informacao)], 0, endereco_destino
+                )
+            else:
+                self.socket_icmp.sendto(pacote, endereco_destino)
+        except OSError:
+            return False
+        return True
+
+    def _ler_respostas(self):
+        while True:
+            try:
+                pacote, endereco_origem = self.socket_icmp.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+
+            resposta = interpretar_resposta_echo_ipv6(pacote)
+            if resposta is None:
+                continue
+            identificador, sequencia = resposta
+            if not self.modo_datagrama and identificador != self.identificador:
+                continue
+            self.funcao_resposta(endereco_origem[0].split("%")[0], endereco_origem[3], sequencia)
+
+    def fechar(self):
+        if self.socket_icmp is not None:
+            try:
+                self.loop.remove_reader(self.socket_icmp.fileno())
+            except Exception:
+                pass
+            self.socket_icmp.close()
+            self.socket_icmp = None
+
+
+class TransporteIcmpv6Simulado:
+    """
+    Transporte em memória para testes: 'hosts' é {indice_interface: {ip:
+    latência}}. Um eco para ff02::1 é respondido por todos os endereços
+    link-local da interface (ou pelos globais, se a origem for global); um
+    eco unicast, só pelo dono do endereço.
+    """
+
+    def __init__(self, hosts):
+        self.hosts = {indice: dict(enderecos) for indice, enderecos in hosts.items()}
+        self.loop = None
+        self.funcao_resposta = None
+        self.pacotes_enviados = 0
+
+    def abrir(self, loop, funcao_resposta):
+        self.loop = loop
+        self.funcao_resposta = funcao_resposta
+
+    def enviar(self, destino, indice_interface, sequencia, origem=None):
+        self.pacotes_enviados += 1
+        enderecos = self.hosts.get(indice_interface, {})
+        if destino == DESTINO_TODOS_NOS:
+            # Como nos hosts reais: origem global -> resposta do endereço global
+            respostas = [
+                (endereco_ip, latencia) for endereco_ip, latencia in enderecos.items()
+                if endereco_ip.lower().startswith("fe80") == (not origem or origem.lower().startswith("fe80"))
+            ]
+        else:
+            respostas = [(destino, enderecos[destino])] if destino in enderecos else []
+        for endereco_ip, latencia in respostas:
+            self.loop.call_later(latencia, self.funcao_resposta, endereco_ip, indice_interface, sequencia)
+        return True
+
+    def fechar(self):
+        pass
+
+
+# ---------- Descoberta ----------
+async def descobrir_ipv6_async(interfaces, tempo_espera=1.0, tentativas=2, transporte=None,
+                               funcao_vizinhos=ler_vizinhos_ipv6, destinos=(DESTINO_TODOS_NOS,)):
+    """
+    Gerador assíncrono de HostIpv6 das 'interfaces' (dicionários de
+    listar_interfaces_ipv6). Envia 'tentativas' rodadas de eco para cada
+    destino de 'destinos' em cada interface, espalhadas em 'tempo_espera'
+    segundos, a partir do link-local e de cada endereço global da interface
+    (hosts respondem a ff02::1 com um endereço do mesmo escopo da origem);
+    cada endereço novo que responde recebe um eco unicast (que faz o kernel
+    resolver o MAC). Depois da espera, lê a tabela de vizinhos uma
+    vez e produz os hosts: primeiro os que responderam, depois os que só
+    estavam na tabela. 'destinos' permite sondar endereços fixos (ex.: "::1"
+    para testar na loopback).
+    """
+    loop = asyncio.get_running_loop()
+    diferenca_relogio = time.time() - time.perf_counter()
+    interfaces_por_indice = {interface["indice"]: interface for interface in interfaces}
+    sequencias = itertools.count(1)
+    envios = {}      # sequencia -> (instante, indice_interface, destino)
+    respostas = {}   # (ip, indice_interface) -> (rtt, instante)
+
+    if transporte is None:
+        transporte = TransporteIcmpv6Socket()
+
+    def enviar(destino, indice_interface, origem=None):
+        sequencia = next(sequencias) & 0xFFFF
+        envios[sequencia] = (time.perf_counter(), indice_interface, destino)
+        metricas.incrementar("sondagens_ipv6_enviadas")
+        transporte.enviar(destino, indice_interface, sequencia, origem)
+
+    def receber(endereco_ip, indice_interface, sequencia):
+        envio = envios.get(sequencia)
+        if envio is None:
+            return
+        instante_envio, indice_envio, destino = envio
+        chave = (endereco_ip, indice_interface or indice_envio)
+        if chave in respostas:
+            return
+        agora = time.perf_counter()
+        respostas[chave] = (agora - instante_envio, agora + diferenca_relogio)
+        metricas.incrementar("respostas_ipv6")
+        if destino != endereco_ip:
+            # Eco unicast: o kernel solicita o vizinho (NS) antes de enviar
+            enviar(endereco_ip, chave[1])
+
+    transporte.abrir(loop, receber)
+    try:
+        for _tentativa in range(max(1, tentativas)):
+            for interface in interfaces:
+                origens = [None] + [
+                    endereco_ip for endereco_ip in interface["enderecos"]
+                    if not endereco_ip.lower().startswith("fe80")
+                ]
+                for destino in destinos:
+                    for origem in origens if destino == DESTINO_TODOS_NOS else [None]:
+                        enviar(destino, interface["indice"], origem)
+            await asyncio.sleep(tempo_espera / max(1, tentativas))
+        # Folga para os ecos unicast disparados no fim da janela
+        await asyncio.sleep(tempo_espera / 4)
+    finally:
+        transporte.fechar()
+
+    with metricas.medir("tabela_vizinhos"):
+        vizinhos = funcao_vizinhos()
+    instante_leitura = time.time()
+    mac_por_endereco = {}
+    for endereco_ip, nome_interface, endereco_mac in vizinhos:
+        mac_por_endereco[(endereco_ip.lower(), str(nome_interface))] = endereco_mac
+
+    def procurar_mac(endereco_ip, interface):
+        if endereco_ip in interface["enderecos"]:
+            return interface["mac"]  # a própria máquina
+        for chave_interface in (interface["interface"], str(interface["indice"])):
+            endereco_mac = mac_por_endereco.get((endereco_ip.lower(), chave_interface))
+            if endereco_mac:
+                return endereco_mac
+        return "Desconhecido"
+
+    vistos = set()
+    for (endereco_ip, indice_interface), (rtt, instante) in respostas.items():
+        interface = interfaces_por_indice.get(indice_interface)
+        if interface is None:
+            continue
+        vistos.add((endereco_ip.lower(), indice_interface))
+        fonte = FONTE_LOCAL if endereco_ip in interface["enderecos"] else FONTE_ECO
+        yield HostIpv6(endereco_ip, interface["interface"], procurar_mac(endereco_ip, interface),
+                       rtt, fonte, interface["ip"], instante)
+
+    for endereco_ip, nome_interface, endereco_mac in vizinhos:
+        for interface in interfaces:
+            if str(nome_interface) not in (interface["interface"], str(interface["indice"])):
+                continue
+            if (endereco_ip.lower(), interface["indice"]) in vistos:
+                break
+            vistos.add((endereco_ip.lower(), interface["indice"]))
+            yield HostIpv6(endereco_ip, interface["interface"], endereco_mac, None,
+                           FONTE_VIZINHOS, interface["ip"], instante_leitura)
+            break
+
+
+def descobrir_ipv6(*argumentos, **opcoes):
+    """
+    Versão síncrona de descobrir_ipv6_async (ver net.varrer_rede).
+    """
+    arquivo_perfil = opcoes.pop("arquivo_perfil", None)
+    parada = opcoes.pop("parada", None)
+    return iterar_em_thread(descobrir_ipv6_async, argumentos, opcoes, arquivo_perfil, parada)
+
+
+# ---------- Junção com os resultados IPv4 ----------
+def agrupar_por_mac(hosts_ipv6):
+    """
+    Retorna ({mac: [HostIpv6, ...]}, [HostIpv6 sem MAC conhecido]). Os
+    endereços da própria máquina ficam de fora.
+    """
+    por_mac = {}
+    sem_mac = []
+    for host in hosts_ipv6:
+        if host.fonte == FONTE_LOCAL:
+            continue
+        if host.mac == "Desconhecido":
+            sem_mac.append(host)
+        else:
+            por_mac.setdefault(host.mac, []).append(host)
+    return por_mac, sem_mac
+
+
+def formatar_endereco_ipv6(host):
+    """
+    Link-local precisa da interface para ser usado: "fe80::1%eth0".
+    """
+    if host.ip.lower().startswith("fe80"):
+        return f"{host.ip}%{host.interface}"
+    return host.ip
+
+
+def formatar_enderecos_ipv6(hosts):
+    """
+    Endereços separados por espaço, globais antes dos link-local.
+    """
+    enderecos = dict.fromkeys(
+        formatar_endereco_ipv6(host)
+        for host in sorted(hosts, key=lambda host: (host.ip.lower().startswith("fe80"), host.ip))
+    )
+    return " ".join(enderecos)
+
+
+def montar_resultado_ipv6(hosts):
+    """
+    ResultadoHost de um dispositivo visto só por IPv6 ('hosts' do mesmo
+    MAC). 'ip' é o primeiro endereço (global, se houver) e 'metodo' é
+    "icmpv6" ou, sem resposta ao eco, "vizinhos_ipv6".
+    """
+    ordenados = sorted(hosts, key=lambda host: (host.ip.lower().startswith("fe80"), host.ip))
+    principal = ordenados[0]
+    rtts = [host.rtt for host in hosts if host.rtt is not None]
+    with metricas.medir("oui"):
+        nome_fabricante_oui = identificar_oui(principal.mac)
+    with metricas.medir("classificacao"):
+        tipo_dispositivo = definir_tipo_dispositivo(
+            principal.ip, principal.ip_local, nome_fabricante_oui
+        )
+    return ResultadoHost(
+        formatar_endereco_ipv6(principal),
+        "Ativo",
+        tipo_dispositivo,
+        nome_fabricante_oui,
+        principal.mac,
+        min(rtts) if rtts else None,
+        "icmpv6" if rtts else "vizinhos_ipv6",
+        min(host.instante for host in hosts),
+        max(host.instante for host in hosts),
+        principal.ip_local,
+        None,
+        formatar_enderecos_ipv6(hosts)
+    )
+
+
+def resultados_somente_ipv6(hosts_ipv6, macs_ipv4):
+    """
+    Gera um ResultadoHost por dispositivo IPv6 cujo MAC não está em
+    'macs_ipv4' (endereços sem MAC conhecido saem um a um).
+    """
+    por_mac, sem_mac = agrupar_por_mac(hosts_ipv6)
+    for endereco_mac, hosts in por_mac.items():
+        if endereco_mac not in macs_ipv4:
+            yield montar_resultado_ipv6(hosts)
+    for host in sem_mac:
+        yield montar_resultado_ipv6([host])
+
+
+class DescobertaIpv6Paralela:
+    """
+    Roda descobrir_ipv6 em uma thread própria, a partir da criação, para
+    que a varredura IPv4 não espere por ela (ver mesclar_por_mac). As
+    opções vão para descobrir_ipv6.
+    """
+
+    def __init__(self, interfaces, **opcoes):
+        self.hosts = []
+        self.parada = threading.Event()
+        self.thread = threading.Thread(
+            target=self._executar, args=(interfaces, opcoes), daemon=True
+        )
+        self.thread.start()
+
+    def _executar(self, interfaces, opcoes):
+        if not interfaces:
+            return
+        try:
+            self.hosts.extend(descobrir_ipv6(interfaces, parada=self.parada, **opcoes))
+        except Exception as erro_ipv6:
+            print(f"Erro na descoberta IPv6: {erro_ipv6}")
+
+    def concluida(self):
+        return not self.thread.is_alive()
+
+    def aguardar(self):
+        self.thread.join()
+        return self.hosts
+
+    def parar(self):
+        self.parada.set()
+
+
+def mesclar_por_mac(resultados, hosts_ipv6):
+    """
+    Gerador: repassa os ResultadoHost IPv4 de 'resultados' com o campo
+    'ipv6' preenchido quando o MAC tem endereços IPv6 (os da própria
+    máquina vão para a linha do IP local) e, ao final, os dispositivos
+    vistos só por IPv6.
+
+    'hosts_ipv6' pode ser uma lista de HostIpv6 ou uma
+    DescobertaIpv6Paralela: nesse caso as duas descobertas correm juntas;
+    os inativos passam direto e os ativos esperam só até a descoberta IPv6
+    terminar, para saírem já com o campo preenchido.
+    """
+    descoberta = hosts_ipv6 if isinstance(hosts_ipv6, DescobertaIpv6Paralela) else None
+    resultados = iter(resultados)
+    macs_ipv4 = set()
+    pendentes = []
+    por_mac = enderecos_locais = None
+
+    def preparar(lista_hosts):
+        nonlocal hosts_ipv6, por_mac, enderecos_locais
+        hosts_ipv6 = list(lista_hosts)
+        por_mac, _sem_mac = agrupar_por_mac(hosts_ipv6)
+        enderecos_locais = formatar_enderecos_ipv6(
+            [host for host in hosts_ipv6 if host.fonte == FONTE_LOCAL]
+        ) or None
+
+    def anotar(resultado):
+        if resultado.status == "Ativo" and resultado.mac in por_mac:
+            macs_ipv4.add(resultado.mac)
+            return resultado._replace(ipv6=formatar_enderecos_ipv6(por_mac[resultado.mac]))
+        if resultado.status == "Ativo" and resultado.ip == resultado.origem:
+            return resultado._replace(ipv6=enderecos_locais)
+        return resultado
+
+    try:
+        if descoberta is None:
+            preparar(hosts_ipv6)
+        for resultado in resultados:
+            if por_mac is None and descoberta.concluida():
+                preparar(descoberta.hosts)
+                yield from map(anotar, pendentes)
+                pendentes.clear()
+            if por_mac is None:
+                if resultado.status == "Ativo":
+                    pendentes.append(resultado)
+                else:
+                    yield resultado
+                continue
+            yield anotar(resultado)
+        if por_mac is None:
+            preparar(descoberta.aguardar())
+            yield from map(anotar, pendentes)
+    finally:
+        if hasattr(resultados, "close"):
+            resultados.close()
+        if descoberta is not None:
+            descoberta.parar()
+    yield from resultados_somente_ipv6(hosts_ipv6, macs_ipv4)
@@ -1,14 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
-from net import (
-    listar_enderecos_rede_locais,
-    escanear_rede,
-    obter_mac_local,
-    obter_caminho_recurso,
-)
+import os
+import platform
 import threading
-from queue import Queue
-from PIL import Image, ImageTk
+import time
+from queue import Queue, Empty
+from tabela_virtual import TabelaVirtual
+
+# net, portas, nomes, historico etc. (asyncio, sockets, sqlite, leitura do
+# resolv.conf) são importados dentro das funções que os usam: 'import gui'
+# só carrega o tkinter, e a janela aparece antes deles
 
 # ---------- CORES E CONSTANTES VISUAIS ----------
 COR_FUNDO_JANELA = "#f8f9fa"
@@ -24,91 +25,346 @@ FONTE_SUBTITULO = ("Segoe UI", 9)
 FONTE_SECAO = ("Segoe UI", 14, "bold")
 
 # ---------- FILA E LISTA DE ENDEREÇOS ----------
+# A fila recebe ResultadoHost (um por IP sondado) da thread de varredura,
+# ResultadoPorta (portas abertas) da thread do teste de vulnerabilidade e
+# eventos (tipo, dados): EVENTO_FIM_VARREDURA, EVENTO_ENDERECOS_CARREGADOS,
+# EVENTO_MUDANCAS_HISTORICO, EVENTO_RETOMADA, EVENTO_HOSTS_IPV6,
+# EVENTO_PROGRESSO_PORTAS, EVENTO_FIM_PORTAS e, no monitoramento, EVENTO_MUDANCA_MONITOR,
+# EVENTO_CICLO_MONITOR e EVENTO_FIM_MONITOR
 fila_interface = Queue()
 lista_enderecos_locais = []
 quantidade_dispositivos_ativos = 0  # contador global
+quantidade_alvos_varredura = 0
+quantidade_resultados_recebidos = 0
+resumo_mudancas = ""  # ex.: "+3 / −1 / MAC 1" em relação à varredura anterior
+rtts_hosts_ativos = {}  # IP -> RTT do ping (ponto de partida do timeout das portas)
+enderecos_ipv6_por_mac = {}  # MAC -> "2001:db8::5 fe80::1%eth0" (descoberta IPv6)
+
+# Varredura em andamento: parada (threading.Event) e controle (pausar/retomar)
+parada_varredura = None
+controle_varredura = None
+thread_varredura = None
+
+# Monitoramento contínuo (botão "Monitorar")
+parada_monitoramento = None  # threading.Event do monitoramento em andamento
+thread_monitoramento = None
+contagem_monitoramento = {"apareceu": 0, "desapareceu": 0, "mac_alterado": 0}
+
+# Teste de vulnerabilidade (varredura de portas)
+janela_portas = None
+parada_teste_portas = None  # threading.Event do teste em andamento
+hosts_teste = []            # hosts do último teste (botão "Testar novamente")
+# Criados no primeiro uso (obter_cache_servicos / obter_resolvedor_nomes)
+_cache_servicos = None  # (MAC, porta) -> serviço, válido durante a sessão
+_resolvedor_nomes = None  # cache de nomes entre varreduras
+_trava_objetos_sessao = threading.Lock()
+
+endereco_mac_local = "---"
+imagem_icone = None  # referência mantida para o Tk não perder a imagem
+
+EVENTO_FIM_VARREDURA = "fim_varredura"
+EVENTO_ENDERECOS_CARREGADOS = "enderecos_carregados"
+EVENTO_MUDANCAS_HISTORICO = "mudancas_historico"
+EVENTO_RETOMADA = "retomada"
+EVENTO_HOSTS_IPV6 = "hosts_ipv6"
+EVENTO_PROGRESSO_PORTAS = "progresso_portas"
+EVENTO_FIM_PORTAS = "fim_portas"
+EVENTO_MUDANCA_MONITOR = "mudanca_monitor"
+EVENTO_CICLO_MONITOR = "ciclo_monitor"
+EVENTO_FIM_MONITOR = "fim_monitor"
+
+# Opcionais: ao fim de cada varredura grava as métricas (.json ou Prometheus)
+# e um perfil do cProfile da varredura nesses arquivos
+ARQUIVO_METRICAS = os.environ.get("IPSCAN_METRICAS")
+ARQUIVO_PERFIL = os.environ.get("IPSCAN_PERFIL")
+
+# Ao fechar a janela, quanto esperar as varreduras gravarem histórico e retomada
+TEMPO_ENCERRAMENTO_SEGUNDOS = 2.0
+
+# Meta de tempo até a janela aparecer (python main.py --medir-inicializacao)
+TEMPO_ALVO_INICIALIZACAO_SEGUNDOS = 0.5
+
+# A fila é drenada a cada INTERVALO_QUADRO_MS, gastando no máximo
+# ORCAMENTO_QUADRO_SEGUNDOS e MAX_EVENTOS_QUADRO eventos por quadro; o resto
+# fica para o próximo
+INTERVALO_QUADRO_MS = 80
+ORCAMENTO_QUADRO_SEGUNDOS = 0.015
+MAX_EVENTOS_QUADRO = 2000
+
+
+# ---------- OBJETOS DA SESSÃO ----------
+def obter_cache_servicos():
+    """
+    Cache de serviços identificados, criado no primeiro teste de portas.
+    """
+    global _cache_servicos
+
+    with _trava_objetos_sessao:
+        if _cache_servicos is None:
+            from servicos import CacheServicos
+            _cache_servicos = CacheServicos()
+        return _cache_servicos
+
+
+def obter_resolvedor_nomes():
+    """
+    Resolvedor de nomes compartilhado entre varreduras. Criado no primeiro
+    uso (lê o resolv.conf), normalmente já na thread de carregar_dados_iniciais.
+    """
+    global _resolvedor_nomes
+
+    with _trava_objetos_sessao:
+        if _resolvedor_nomes is None:
+            from nomes import ResolvedorNomes
+            _resolvedor_nomes = ResolvedorNomes(tempo_limite=0.5)
+        return _resolvedor_nomes
 
 
 # ---------- ATUALIZAÇÃO DA INTERFACE ----------
-def atualizar_resultado_interface(endereco_ip, status_ip, tipo_dispositivo,
-                                  nome_fabricante_oui, percentual_progresso, endereco_mac):
-    barra_progresso["value"] = percentual_progresso
-
-    # Atualiza/insere linha na árvore de análise
-    for linha in arvore_ips_em_analise.get_children():
-        if arvore_ips_em_analise.item(linha)["values"][0] == endereco_ip:
-            arvore_ips_em_analise.item(linha, values=(endereco_ip, status_ip))
+def formatar_rtt(rtt):
+    return f"{rtt * 1000:.1f}" if rtt is not None else "—"
+
+
+def atualizar_resultado_interface(resultado):
+    # Atualiza/insere linha na tabela de análise (índice por IP, O(1))
+    tabela_ips_em_analise.inserir_ou_atualizar(resultado.ip, (resultado.ip, resultado.status))
+
+    if resultado.status == "Ativo":
+        rtts_hosts_ativos[resultado.ip] = resultado.rtt
+        tabela_ips_ativos.inserir_ou_atualizar(resultado.ip, (
+            resultado.ip,
+            resultado.tipo,
+            resultado.fabricante,
+            resultado.mac,
+            formatar_rtt(resultado.rtt),
+            resultado.nome or "",
+            resultado.ipv6 or enderecos_ipv6_por_mac.get(resultado.mac, "")
+        ))
+
+
+def atualizar_enderecos_ipv6(hosts_ipv6):
+    """
+    Completa a coluna IPv6 das linhas já exibidas cujo MAC tem endereços IPv6.
+    """
+    from descoberta_ipv6 import agrupar_por_mac, formatar_enderecos_ipv6
+
+    por_mac, _sem_mac = agrupar_por_mac(hosts_ipv6)
+    for endereco_mac, hosts in por_mac.items():
+        enderecos_ipv6_por_mac[endereco_mac] = formatar_enderecos_ipv6(hosts)
+    for chave, linha in zip(list(tabela_ips_ativos.chaves), list(tabela_ips_ativos.linhas)):
+        enderecos = enderecos_ipv6_por_mac.get(linha[3])
+        if enderecos and linha[6] != enderecos:
+            tabela_ips_ativos.inserir_ou_atualizar(chave, linha[:6] + (enderecos,))
+
+
+def agrupar_lote_eventos(eventos, max_eventos=MAX_EVENTOS_QUADRO):
+    """
+    Consome no máximo max_eventos do iterador eventos, fundindo resultados
+    repetidos do mesmo IP (vale o último).
+    Retorna (resultados_por_ip, quantidade_resultados, resultados_portas,
+    eventos_restantes); o consumo para no primeiro evento que não seja um
+    ResultadoHost ou ResultadoPorta, para preservar a ordem em relação aos
+    resultados anteriores. O que não foi consumido continua no iterador.
+    """
+    from net import ResultadoHost
+    from portas import ResultadoPorta
+
+    resultados_por_ip = {}
+    quantidade_resultados = 0
+    resultados_portas = []
+    eventos_restantes = []
+
+    for quantidade_consumida, evento in enumerate(eventos, start=1):
+        if isinstance(evento, ResultadoPorta):
+            resultados_portas.append(evento)
+        elif isinstance(evento, ResultadoHost):
+            resultados_por_ip[evento.ip] = evento
+            quantidade_resultados += 1
+        else:
+            eventos_restantes.append(evento)
+            break
+        if quantidade_consumida >= max_eventos:
+            break
+
+    return resultados_por_ip, quantidade_resultados, resultados_portas, eventos_restantes
+
+
+def drenar_fila(fila, orcamento_segundos):
+    """
+    Gera os eventos da fila até ela esvaziar ou o orçamento de tempo acabar.
+    Só retira um evento quando o próximo é pedido.
+    """
+    limite = time.perf_counter() + orcamento_segundos
+    while time.perf_counter() < limite:
+        try:
+            yield fila.get_nowait()
+        except Empty:
             return
 
-    indice = len(arvore_ips_em_analise.get_children())
-    tag_linha = "linha_impar" if indice % 2 else "linha_par"
-    arvore_ips_em_analise.insert("", "end", values=(endereco_ip, status_ip), tags=(tag_linha,))
 
+def coletar_lote_eventos(fila, orcamento_segundos):
+    """
+    Lote de um quadro: agrupar_lote_eventos sobre a fila drenada dentro do
+    orçamento de tempo.
+    """
+    return agrupar_lote_eventos(drenar_fila(fila, orcamento_segundos), MAX_EVENTOS_QUADRO)
 
-def retorno_thread_seguro(endereco_ip, status_ip, tipo_dispositivo,
-                          nome_fabricante_oui, percentual_progresso, endereco_mac):
-    fila_interface.put((
-        "atualizar_analise",
-        endereco_ip,
-        status_ip,
-        tipo_dispositivo,
-        nome_fabricante_oui,
-        percentual_progresso,
-        endereco_mac
-    ))
+
+def atualizar_contador_ativos():
+    texto = (
+        f"{quantidade_dispositivos_ativos} encontrados"
+        if quantidade_dispositivos_ativos > 0
+        else "Nenhum dispositivo"
+    )
+    if resumo_mudancas:
+        texto += f"  ({resumo_mudancas})"
+    rotulo_contador_ativos.config(text=texto)
 
 
 def processar_fila_interface():
-    global quantidade_dispositivos_ativos
-
-    while not fila_interface.empty():
-        (tipo_evento,
-         valor1,
-         valor2,
-         valor3,
-         valor4,
-         valor5,
-         valor6) = fila_interface.get()
-
-        if tipo_evento == "atualizar_analise":
-            atualizar_resultado_interface(valor1, valor2, valor3, valor4, valor5, valor6)
-
-        elif tipo_evento == "finalizar_lista_ativos":
-            lista_dispositivos_ativos = valor2
-
-            arvore_ips_ativos.delete(*arvore_ips_ativos.get_children())
-            quantidade_dispositivos_ativos = 0
-
-            for dispositivo in lista_dispositivos_ativos:
-                ip_dispositivo, tipo_dispositivo, nome_oui, mac_dispositivo = dispositivo
-                if mac_dispositivo != "Desconhecido":
-                    indice = len(arvore_ips_ativos.get_children())
-                    tag_linha = "linha_impar" if indice % 2 else "linha_par"
-                    arvore_ips_ativos.insert(
-                        "",
-                        "end",
-                        values=(ip_dispositivo, tipo_dispositivo, nome_oui, mac_dispositivo),
-                        tags=(tag_linha,)
-                    )
-                    quantidade_dispositivos_ativos += 1
-
-            # Atualiza contador visual
-            rotulo_contador_ativos.config(
-                text=f"{quantidade_dispositivos_ativos} encontrados"
-                if quantidade_dispositivos_ativos > 0
-                else "Nenhum dispositivo"
+    global quantidade_dispositivos_ativos, quantidade_resultados_recebidos, resumo_mudancas
+    global quantidade_alvos_varredura
+    from metricas import metricas
+
+    instante_quadro = time.perf_counter()
+    metricas.definir("fila_interface_profundidade", fila_interface.qsize())
+    resultados_por_ip, quantidade_resultados, resultados_portas, eventos_restantes = coletar_lote_eventos(
+        fila_interface, ORCAMENTO_QUADRO_SEGUNDOS
+    )
+
+    for resultado in resultados_por_ip.values():
+        atualizar_resultado_interface(resultado)
+
+    if resultados_portas and janela_portas is not None:
+        for resultado_porta in resultados_portas:
+            atualizar_resultado_porta(resultado_porta)
+
+    # Barra de progresso e contador atualizados uma vez por quadro
+    if quantidade_resultados:
+        quantidade_resultados_recebidos += quantidade_resultados
+        barra_progresso["value"] = int(
+            quantidade_resultados_recebidos / max(quantidade_alvos_varredura, 1) * 100
+        )
+        quantidade_dispositivos_ativos = len(tabela_ips_ativos)
+        atualizar_contador_ativos()
+
+    for tipo_evento, dados_evento in eventos_restantes:
+        if tipo_evento == EVENTO_ENDERECOS_CARREGADOS:
+            preencher_lista_enderecos_locais(*dados_evento)
+
+        elif tipo_evento == EVENTO_RETOMADA:
+            # Alvos já sondados antes da interrupção contam no progresso
+            alvos_concluidos, ativos_salvos = dados_evento
+            quantidade_resultados_recebidos += alvos_concluidos - ativos_salvos
+            rotulo_ip_mac_local.config(
+                text=f"Retomando: {alvos_concluidos} de {quantidade_alvos_varredura} já sondados"
+                     f"  •  MAC: {endereco_mac_local}"
+            )
+
+        elif tipo_evento == EVENTO_HOSTS_IPV6:
+            atualizar_enderecos_ipv6(dados_evento)
+
+        elif tipo_evento == EVENTO_MUDANCAS_HISTORICO:
+            contagem = dados_evento
+            resumo_mudancas = (
+                f"+{contagem['apareceu']} / −{contagem['desapareceu']} / MAC {contagem['mac_alterado']}"
+            )
+
+        elif tipo_evento == EVENTO_FIM_VARREDURA:
+            erro_varredura = dados_evento
+            if erro_varredura is not None:
+                print(f"Erro durante a varredura: {erro_varredura}")
+            quantidade_dispositivos_ativos = len(tabela_ips_ativos)
+            atualizar_contador_ativos()
+            botao_escanear_rede.config(text="Escanear Rede", state="normal")
+            botao_pausar.config(text="Pausar", state="disabled")
+            botao_monitorar.config(state="normal")
+            caixa_selecao_ip.config(state="readonly")
+            if ARQUIVO_METRICAS:
+                metricas.salvar(ARQUIVO_METRICAS)
+
+        elif tipo_evento == EVENTO_PROGRESSO_PORTAS:
+            if janela_portas is not None:
+                concluidos, total = dados_evento
+                rotulo_progresso_portas.config(
+                    text=f"{concluidos} de {total} testes  •  {len(tabela_portas)} portas abertas"
+                )
+
+        elif tipo_evento == EVENTO_FIM_PORTAS:
+            if janela_portas is not None:
+                erro_teste = dados_evento
+                rotulo_progresso_portas.config(
+                    text=f"Concluído  •  {len(tabela_portas)} portas abertas"
+                    if erro_teste is None else f"Erro no teste: {erro_teste}"
+                )
+                botao_repetir_portas.config(state="normal")
+
+        elif tipo_evento == EVENTO_MUDANCA_MONITOR:
+            mudanca = dados_evento
+            contagem_monitoramento[mudanca.evento] += 1
+            if mudanca.evento == "desapareceu":
+                tabela_ips_ativos.remover(mudanca.ip)
+                rtts_hosts_ativos.pop(mudanca.ip, None)
+            resumo_mudancas = (
+                f"+{contagem_monitoramento['apareceu']} / −{contagem_monitoramento['desapareceu']}"
+                f" / MAC {contagem_monitoramento['mac_alterado']}"
+            )
+            quantidade_dispositivos_ativos = len(tabela_ips_ativos)
+            atualizar_contador_ativos()
+
+        elif tipo_evento == EVENTO_CICLO_MONITOR:
+            ciclo = dados_evento
+            # A barra recomeça a cada ciclo, com o total do próximo (rápido: só os ativos)
+            quantidade_resultados_recebidos = 0
+            quantidade_alvos_varredura = max(ciclo.proximo_alvos, 1)
+            barra_progresso["value"] = 100
+            botao_monitorar.config(
+                text=f"Parar monitoramento (próximo em {ciclo.proximo_em:.0f} s)"
             )
 
+        elif tipo_evento == EVENTO_FIM_MONITOR:
+            erro_monitoramento = dados_evento
+            if erro_monitoramento is not None:
+                print(f"Erro durante o monitoramento: {erro_monitoramento}")
+            botao_monitorar.config(text="Monitorar", state="normal")
             botao_escanear_rede.config(state="normal")
+            caixa_selecao_ip.config(state="readonly")
+            if ARQUIVO_METRICAS:
+                metricas.salvar(ARQUIVO_METRICAS)
 
-    janela_principal.after(80, processar_fila_interface)
+    metricas.incrementar("eventos_interface", quantidade_resultados + len(resultados_portas))
+    metricas.observar("interface", time.perf_counter() - instante_quadro)
+
+    # Se o orçamento acabou com eventos pendentes, volta logo no próximo ciclo
+    if not fila_interface.empty():
+        janela_principal.after(1, processar_fila_interface)
+    else:
+        janela_principal.after(INTERVALO_QUADRO_MS, processar_fila_interface)
 
 
 # ---------- CARREGAR IPs DISPONÍVEIS ----------
-def carregar_lista_enderecos_locais():
-    global lista_enderecos_locais
+def carregar_dados_iniciais():
+    """
+    Roda em uma thread ao abrir o programa: enumera as interfaces (ip addr /
+    ipconfig), lê o MAC local e abre o índice OUI sem travar a janela.
+    A lista chega à interface pela fila_interface.
+    """
+    from net import listar_enderecos_rede_locais, obter_indice_oui, obter_mac_local
+
+    lista_enderecos = listar_enderecos_rede_locais()
+    endereco_mac = obter_mac_local()
+    fila_interface.put((EVENTO_ENDERECOS_CARREGADOS, (lista_enderecos, endereco_mac)))
 
-    lista_enderecos_locais = listar_enderecos_rede_locais()
+    # Pré-carrega o OUI e o resolvedor para a primeira varredura não pagar por isso
+    obter_indice_oui()
+    obter_resolvedor_nomes()
+
+
+def preencher_lista_enderecos_locais(lista_enderecos, endereco_mac):
+    global lista_enderecos_locais, endereco_mac_local
+
+    lista_enderecos_locais = lista_enderecos
+    endereco_mac_local = endereco_mac
 
     if not lista_enderecos_locais:
         caixa_selecao_ip["values"] = ["Nenhum IP encontrado"]
@@ -118,354 +374,769 @@ def carregar_lista_enderecos_locais():
         return
 
     descricoes = [endereco["descricao"] for endereco in lista_enderecos_locais]
+    # Última opção: varrer todas as interfaces ao mesmo tempo
+    if len(lista_enderecos_locais) > 1:
+        descricoes.append(f"Todas as interfaces ({len(lista_enderecos_locais)})")
     caixa_selecao_ip["values"] = descricoes
+    caixa_selecao_ip.config(state="readonly")
     caixa_selecao_ip.current(0)
+    botao_escanear_rede.config(state="normal")
+    botao_monitorar.config(state="normal")
 
-    endereco_mac_local = obter_mac_local()
     endereco_ip_selecionado = lista_enderecos_locais[0]["ip"]
     rotulo_ip_mac_local.config(
         text=f"IP selecionado: {endereco_ip_selecionado}  •  MAC: {endereco_mac_local}"
     )
 
 
+def carregar_icone():
+    """
+    Define o ícone da janela. No Windows o .ico vai direto; nos demais
+    sistemas o PIL converte o .ico (importado só aqui, fora da abertura).
+    """
+    global imagem_icone
+    from net import obter_caminho_recurso
+
+    try:
+        caminho_icone = obter_caminho_recurso("ipscan.ico")
+        if platform.system() == "Windows":
+            janela_principal.iconbitmap(caminho_icone)
+        else:
+            from PIL import Image, ImageTk
+            imagem_icone = ImageTk.PhotoImage(Image.open(caminho_icone))
+            janela_principal.iconphoto(True, imagem_icone)
+    except Exception as erro:
+        print("Não foi possível definir o ícone da janela:", erro)
+
+
 # ---------- ESCANEAR REDE ----------
 def iniciar_escanear_rede():
+    global quantidade_alvos_varredura, quantidade_resultados_recebidos, resumo_mudancas
+    global parada_varredura, controle_varredura, thread_varredura
+    from descoberta_ipv6 import descobrir_ipv6, listar_interfaces_ipv6, resultados_somente_ipv6
+    from historico import HistoricoHosts
+    from net import ControleConcorrencia, contar_alvos_interfaces, montar_alvos, varrer_interfaces, varrer_rede
+    from retomada import LIMIAR_RETOMADA, PontoRetomada, caminho_retomada_padrao, varrer_com_retomada
+
+    if parada_varredura is not None and not parada_varredura.is_set():
+        # O mesmo botão para a varredura em andamento
+        parar_varredura()
+        return
+
     if not lista_enderecos_locais:
         return
 
     indice_selecionado = caixa_selecao_ip.current()
-    if indice_selecionado < 0 or indice_selecionado >= len(lista_enderecos_locais):
+    if indice_selecionado < 0 or indice_selecionado > len(lista_enderecos_locais):
         return
 
-    endereco_selecionado = lista_enderecos_locais[indice_selecionado]
-    endereco_ip_local = endereco_selecionado["ip"]
-    mascara_rede = endereco_selecionado["mascara"]
+    if indice_selecionado == len(lista_enderecos_locais):
+        # "Todas as interfaces": cada sub-rede a partir do próprio IP, em paralelo
+        interfaces_selecionadas = list(lista_enderecos_locais)
+        rotulo_ip_mac_local.config(
+            text=f"{len(interfaces_selecionadas)} interfaces  •  MAC: {endereco_mac_local}"
+        )
+        quantidade_alvos = contar_alvos_interfaces(interfaces_selecionadas)
+    else:
+        interfaces_selecionadas = [lista_enderecos_locais[indice_selecionado]]
+        endereco_ip_local = interfaces_selecionadas[0]["ip"]
+        mascara_rede = interfaces_selecionadas[0]["mascara"]
+        rotulo_ip_mac_local.config(
+            text=f"IP selecionado: {endereco_ip_local}  •  MAC: {endereco_mac_local}"
+        )
+        alvos = montar_alvos(endereco_ip_local, mascara_rede)
+        quantidade_alvos = len(alvos)
+
+    quantidade_alvos_varredura = quantidade_alvos
+    quantidade_resultados_recebidos = 0
+    resumo_mudancas = ""
+    rtts_hosts_ativos.clear()
+    enderecos_ipv6_por_mac.clear()
+
+    parada = parada_varredura = threading.Event()
+    controle = controle_varredura = ControleConcorrencia()
+    resolvedor_nomes = obter_resolvedor_nomes()
+
+    botao_escanear_rede.config(text="Parar Varredura")
+    botao_pausar.config(text="Pausar", state="normal")
+    botao_monitorar.config(state="disabled")
+    caixa_selecao_ip.config(state="disabled")
+    tabela_ips_em_analise.limpar()
+    tabela_ips_ativos.limpar()
+    barra_progresso["value"] = 0
+    rotulo_contador_ativos.config(text="—")
+
+    def varrer_com_historico(historico):
+        if len(interfaces_selecionadas) > 1:
+            return varrer_interfaces(
+                interfaces_selecionadas,
+                prioritarios=historico.ips_ativos(),
+                tempo_limite_por_alvo=historico.funcao_tempo_limite(1.0),
+                controle=controle,
+                parada=parada,
+                resolvedor_nomes=resolvedor_nomes,
+                arquivo_perfil=ARQUIVO_PERFIL
+            )
+
+        def varrer_alvos(alvos_varredura):
+            alvos_priorizados, tempo_limite_por_alvo = historico.preparar_varredura(alvos_varredura, 1.0)
+            return varrer_rede(
+                endereco_ip_local,
+                mascara_rede,
+                alvos=alvos_priorizados,
+                tempo_limite_por_alvo=tempo_limite_por_alvo,
+                controle=controle,
+                parada=parada,
+                resolvedor_nomes=resolvedor_nomes,
+                arquivo_perfil=ARQUIVO_PERFIL
+            )
+
+        if len(alvos) < LIMIAR_RETOMADA:
+            return varrer_alvos(alvos)
+        # Rede grande: o progresso fica salvo e uma varredura interrompida continua daqui
+        ponto = PontoRetomada.abrir(caminho_retomada_padrao(alvos), alvos)
+        if ponto.quantidade_concluidos:
+            fila_interface.put((EVENTO_RETOMADA, (ponto.quantidade_concluidos, len(ponto.resultados))))
+        return varrer_com_retomada(ponto, varrer_alvos)
 
-    endereco_mac_local = obter_mac_local()
+    hosts_ipv6 = []
+
+    def tarefa_descobrir_ipv6():
+        # Em paralelo com a varredura IPv4: a coluna IPv6 é completada pelo MAC
+        interfaces_ipv6 = [interface for interface in listar_interfaces_ipv6() if interface["multicast"]]
+        if not interfaces_ipv6:
+            return
+        try:
+            hosts_ipv6.extend(descobrir_ipv6(interfaces_ipv6, parada=parada))
+        except Exception as erro_ipv6:
+            print(f"Erro na descoberta IPv6: {erro_ipv6}")
+        fila_interface.put((EVENTO_HOSTS_IPV6, list(hosts_ipv6)))
+
+    def tarefa_escanear():
+        # Histórico: sonda antes quem estava ativo, encurta o timeout de
+        # endereços mortos há muito tempo e conta o que mudou
+        erro_varredura = None
+        historico = None
+        contagem = {"apareceu": 0, "desapareceu": 0, "mac_alterado": 0}
+        macs_ativos = set()
+        thread_ipv6 = threading.Thread(target=tarefa_descobrir_ipv6, daemon=True)
+        thread_ipv6.start()
+        try:
+            historico = HistoricoHosts()
+            resultados = varrer_com_historico(historico)
+            try:
+                for resultado in resultados:
+                    fila_interface.put(resultado)
+                    if resultado.status == "Ativo":
+                        macs_ativos.add(resultado.mac)
+                    for mudanca in historico.registrar(resultado):
+                        contagem[mudanca.evento] += 1
+            finally:
+                resultados.close()
+            # Dispositivos só com IPv6 entram no fim (fora do histórico, que é IPv4)
+            thread_ipv6.join()
+            if not parada.is_set():
+                for resultado in resultados_somente_ipv6(hosts_ipv6, macs_ativos):
+                    fila_interface.put(resultado)
+        except Exception as erro:
+            erro_varredura = erro
+        finally:
+            if historico is not None:
+                historico.fechar()
+        if erro_varredura is None:
+            fila_interface.put((EVENTO_MUDANCAS_HISTORICO, contagem))
+        fila_interface.put((EVENTO_FIM_VARREDURA, erro_varredura))
+
+    thread_varredura = threading.Thread(target=tarefa_escanear, daemon=True)
+    thread_varredura.start()
+
+
+def parar_varredura():
+    """
+    Pede o fim da varredura em andamento; os resultados já recebidos ficam
+    na tela e EVENTO_FIM_VARREDURA libera os botões.
+    """
+    if parada_varredura is None or parada_varredura.is_set():
+        return
+    parada_varredura.set()
+    controle_varredura.retomar()
+    botao_escanear_rede.config(text="Parando...", state="disabled")
+    botao_pausar.config(state="disabled")
+
+
+def alternar_pausa():
+    """
+    Pausa (nenhuma sondagem nova sai) ou continua a varredura em andamento.
+    """
+    if controle_varredura is None or parada_varredura is None or parada_varredura.is_set():
+        return
+    if controle_varredura.pausado:
+        controle_varredura.retomar()
+        botao_pausar.config(text="Pausar")
+        atualizar_contador_ativos()
+    else:
+        controle_varredura.pausar()
+        botao_pausar.config(text="Continuar")
+        rotulo_contador_ativos.config(text="Pausado")
+
+
+# ---------- MONITORAMENTO CONTÍNUO ----------
+def alternar_monitoramento():
+    """
+    Liga o monitoramento da interface selecionada (ciclos rápidos dos hosts
+    ativos e completos da sub-rede, ver monitoramento.py) ou pede a parada.
+    """
+    global parada_monitoramento, quantidade_alvos_varredura, quantidade_resultados_recebidos
+    global resumo_mudancas, thread_monitoramento
+    from historico import HistoricoHosts, MudancaHost
+    from monitoramento import CicloMonitoramento, monitorar
+    from net import montar_alvos
+
+    if parada_monitoramento is not None and not parada_monitoramento.is_set():
+        parada_monitoramento.set()
+        botao_monitorar.config(text="Parando...", state="disabled")
+        return
+
+    indice_selecionado = caixa_selecao_ip.current()
+    if not lista_enderecos_locais or not 0 <= indice_selecionado < len(lista_enderecos_locais):
+        print("Monitoramento: selecione uma única interface.")
+        return
+
+    endereco_ip_local = lista_enderecos_locais[indice_selecionado]["ip"]
+    mascara_rede = lista_enderecos_locais[indice_selecionado]["mascara"]
     rotulo_ip_mac_local.config(
-        text=f"IP selecionado: {endereco_ip_local}  •  MAC: {endereco_mac_local}"
+        text=f"Monitorando: {endereco_ip_local}  •  MAC: {endereco_mac_local}"
     )
 
+    quantidade_alvos_varredura = len(montar_alvos(endereco_ip_local, mascara_rede))
+    quantidade_resultados_recebidos = 0
+    resumo_mudancas = ""
+    for evento in contagem_monitoramento:
+        contagem_monitoramento[evento] = 0
+    rtts_hosts_ativos.clear()
+
     botao_escanear_rede.config(state="disabled")
-    arvore_ips_em_analise.delete(*arvore_ips_em_analise.get_children())
-    arvore_ips_ativos.delete(*arvore_ips_ativos.get_children())
+    caixa_selecao_ip.config(state="disabled")
+    botao_monitorar.config(text="Parar monitoramento")
+    tabela_ips_em_analise.limpar()
+    tabela_ips_ativos.limpar()
     barra_progresso["value"] = 0
     rotulo_contador_ativos.config(text="—")
 
-    def tarefa_escanear():
-        dispositivos_ativos = escanear_rede(
-            endereco_ip_local,
-            mascara_rede,
-            funcao_retorno_interface=retorno_thread_seguro
-        )
-        fila_interface.put((
-            "finalizar_lista_ativos",
-            None,
-            dispositivos_ativos,
-            None,
-            None,
-            None,
-            None
-        ))
-
-    threading.Thread(target=tarefa_escanear, daemon=True).start()
+    parada = parada_monitoramento = threading.Event()
+    resolvedor_nomes = obter_resolvedor_nomes()
+
+    def tarefa_monitorar():
+        erro_monitoramento = None
+        historico = None
+        try:
+            historico = HistoricoHosts()
+            for item in monitorar(historico, endereco_ip_local, mascara_rede, parada=parada,
+                                  resolvedor_nomes=resolvedor_nomes):
+                if isinstance(item, MudancaHost):
+                    fila_interface.put((EVENTO_MUDANCA_MONITOR, item))
+                elif isinstance(item, CicloMonitoramento):
+                    fila_interface.put((EVENTO_CICLO_MONITOR, item))
+                else:
+                    fila_interface.put(item)
+        except Exception as erro:
+            erro_monitoramento = erro
+        finally:
+            if historico is not None:
+                historico.fechar()
+        fila_interface.put((EVENTO_FIM_MONITOR, erro_monitoramento))
+
+    thread_monitoramento = threading.Thread(target=tarefa_monitorar, daemon=True)
+    thread_monitoramento.start()
 
 
 # ---------- TESTE DE VULNERABILIDADE ----------
-def executar_teste_vulnerabilidade(evento):
-    selecao = arvore_ips_ativos.selection()
-    if not selecao:
+def executar_teste_vulnerabilidade(evento=None):
+    """
+    Duplo clique em um host: testa as portas dele. Botão do menu (sem
+    evento): testa todos os hosts ativos da última varredura de uma vez.
+    """
+    if evento is not None:
+        valores = tabela_ips_ativos.valores_selecionados()
+        if not valores:
+            return
+        hosts = [valores[0]]
+    else:
+        hosts = [linha[0] for linha in tabela_ips_ativos.linhas]
+        if not hosts:
+            return
+
+    abrir_janela_portas()
+    iniciar_teste_portas(hosts)
+
+
+def atualizar_resultado_porta(resultado_porta):
+    tabela_portas.inserir_ou_atualizar(
+        (resultado_porta.ip, resultado_porta.porta),
+        (resultado_porta.ip, resultado_porta.porta, resultado_porta.estado,
+         formatar_rtt(resultado_porta.rtt), formatar_servico(resultado_porta))
+    )
+
+
+def formatar_servico(resultado_porta):
+    if not resultado_porta.banner:
+        return resultado_porta.servico or ""
+    return f"{resultado_porta.servico}: {resultado_porta.banner}"
+
+
+def iniciar_teste_portas(hosts):
+    """
+    Roda a varredura de portas em uma thread. Só as portas abertas vão para
+    a fila; o progresso é enviado no máximo a cada quadro.
+    """
+    global parada_teste_portas
+    from portas import ESPECIFICACAO_PORTAS_PADRAO, ESTADO_ABERTA, interpretar_portas, varrer_portas
+
+    try:
+        portas = interpretar_portas(campo_portas.get() or ESPECIFICACAO_PORTAS_PADRAO)
+    except ValueError as erro_portas:
+        rotulo_progresso_portas.config(text=f"Portas inválidas: {erro_portas}")
         return
-    item = selecao[0]
-    endereco_ip = arvore_ips_ativos.item(item, "values")[0]
-    print(f"Iniciando teste de vulnerabilidade em {endereco_ip}...")
+
+    if parada_teste_portas is not None:
+        parada_teste_portas.set()
+    parada_teste_portas = parada = threading.Event()
+
+    hosts_teste[:] = hosts
+    tabela_portas.limpar()
+    botao_repetir_portas.config(state="disabled")
+    total_testes = len(hosts) * len(portas)
+    rotulo_progresso_portas.config(text=f"0 de {total_testes} testes")
+    rtts_iniciais = {endereco_ip: rtts_hosts_ativos.get(endereco_ip) for endereco_ip in hosts}
+    macs = {linha[0]: linha[3] for linha in tabela_ips_ativos.linhas}
+    cache_servicos = obter_cache_servicos()
+
+    def tarefa_portas():
+        erro_teste = None
+        concluidos = 0
+        instante_progresso = time.perf_counter()
+        resultados = varrer_portas(
+            hosts,
+            portas,
+            rtts_iniciais=rtts_iniciais,
+            identificar_servicos=True,
+            cache_servicos=cache_servicos,
+            macs=macs
+        )
+        try:
+            for resultado_porta in resultados:
+                if parada.is_set():
+                    break
+                concluidos += 1
+                if resultado_porta.estado == ESTADO_ABERTA:
+                    fila_interface.put(resultado_porta)
+                if time.perf_counter() - instante_progresso >= INTERVALO_QUADRO_MS / 1000:
+                    instante_progresso = time.perf_counter()
+                    fila_interface.put((EVENTO_PROGRESSO_PORTAS, (concluidos, total_testes)))
+        except Exception as erro:
+            erro_teste = erro
+        finally:
+            resultados.close()
+        if not parada.is_set():
+            fila_interface.put((EVENTO_FIM_PORTAS, erro_teste))
+
+    threading.Thread(target=tarefa_portas, daemon=True).start()
+
+
+def fechar_janela_portas():
+    global janela_portas
+
+    if parada_teste_portas is not None:
+        parada_teste_portas.set()
+    janela_portas.destroy()
+    janela_portas = None
+
+
+def abrir_janela_portas():
+    """
+    Cria (ou traz para frente) a janela de resultados do teste de portas.
+    """
+    global janela_portas, tabela_portas, campo_portas, rotulo_progresso_portas
+    global botao_repetir_portas
+    from portas import ESPECIFICACAO_PORTAS_PADRAO
+
+    if janela_portas is not None:
+        janela_portas.lift()
+        return
+
+    janela_portas = tk.Toplevel(janela_principal)
+    janela_portas.title("Teste de Vulnerabilidade — portas TCP")
+    janela_portas.geometry("860x420")
+    janela_portas.configure(bg=COR_FUNDO_JANELA)
+    janela_portas.protocol("WM_DELETE_WINDOW", fechar_janela_portas)
+
+    quadro_opcoes = tk.Frame(janela_portas, bg=COR_FUNDO_JANELA)
+    quadro_opcoes.pack(fill="x", padx=12, pady=(12, 6))
+
+    tk.Label(
+        quadro_opcoes,
+        text="Portas:",
+        font=FONTE_PADRAO,
+        bg=COR_FUNDO_JANELA
+    ).pack(side="left")
+
+    campo_portas = ttk.Entry(quadro_opcoes, width=30)
+    campo_portas.insert(0, ESPECIFICACAO_PORTAS_PADRAO)
+    campo_portas.pack(side="left", padx=(6, 8))
+
+    botao_repetir_portas = ttk.Button(
+        quadro_opcoes,
+        text="Testar novamente",
+        command=lambda: iniciar_teste_portas(list(hosts_teste))
+    )
+    botao_repetir_portas.pack(side="left")
+
+    rotulo_progresso_portas = tk.Label(
+        janela_portas,
+        text="—",
+        font=FONTE_SUBTITULO,
+        bg=COR_FUNDO_JANELA,
+        fg="#777777"
+    )
+    rotulo_progresso_portas.pack(anchor="w", padx=12)
+
+    quadro_tabela = tk.Frame(janela_portas, bg=COR_CARTAO)
+    quadro_tabela.pack(fill="both", expand=True, padx=12, pady=(6, 12))
+
+    tabela_portas = TabelaVirtual(
+        quadro_tabela,
+        colunas=[("IP", 120), ("Porta", 70), ("Estado", 90), ("RTT (ms)", 80), ("Serviço", 440)]
+    )
+    tabela_portas.tag_configure("linha_par", background="#ffffff")
+    tabela_portas.tag_configure("linha_impar", background=COR_LINHA_IMPAR)
 
 
 # ===========================================================
 #   CONSTRUÇÃO DA JANELA
 # ===========================================================
-janela_principal = tk.Tk()
-janela_principal.title("IP-ScanED")
-janela_principal.geometry("1280x720")
-janela_principal.minsize(1100, 600)
-janela_principal.configure(bg=COR_FUNDO_JANELA)
-
-# --- Ícone da janela (barra de título / barra de tarefas) ---
-try:
-    caminho_icone = obter_caminho_recurso("ipscan.ico")
-    janela_principal.iconbitmap(caminho_icone)
-except Exception as erro:
-    print("Não foi possível definir o ícone da janela:", erro)
-
-# ---------- ESTILOS TTK ----------
-estilo = ttk.Style(janela_principal)
-estilo.theme_use("clam")
-
-estilo.configure(
-    "BotaoPrincipal.TButton",
-    font=("Segoe UI", 11, "bold"),
-    padding=8,
-    foreground="#ffffff",
-    background=COR_VERDE_PRINCIPAL,
-    borderwidth=0
-)
-estilo.map(
-    "BotaoPrincipal.TButton",
-    background=[("active", "#1f8d4d")]
-)
-
-estilo.configure(
-    "BotaoMenu.TButton",
-    font=("Segoe UI", 11, "bold"),
-    padding=10,
-    foreground="#ffffff",
-    background=COR_VERDE_PRINCIPAL,
-    borderwidth=0
-)
-estilo.map(
-    "BotaoMenu.TButton",
-    background=[("active", "#1f8d4d")]
-)
-
-estilo.configure(
-    "TProgressbar",
-    thickness=16,
-    troughcolor="#dfe3e6",
-    borderwidth=0,
-    background=COR_VERDE_PRINCIPAL
-)
-
-estilo.configure(
-    "Treeview",
-    font=("Segoe UI", 9),
-    rowheight=22,
-    background="#ffffff",
-    fieldbackground="#ffffff",
-    borderwidth=0
-)
-estilo.configure(
-    "Treeview.Heading",
-    font=("Segoe UI", 9, "bold"),
-    background=COR_VERDE_PRINCIPAL,
-    foreground="#ffffff"
-)
-
-# ---------- CABEÇALHO SUPERIOR ----------
-quadro_cabecalho = tk.Frame(janela_principal, bg=COR_AZUL_ESCUTO_MENU, height=70)
-quadro_cabecalho.grid(row=0, column=0, columnspan=3, sticky="nsew")
-quadro_cabecalho.grid_columnconfigure(0, weight=1)
-quadro_cabecalho.grid_columnconfigure(1, weight=0)
-
-# bloco de "logo textual"
-quadro_logo_texto = tk.Frame(quadro_cabecalho, bg=COR_AZUL_ESCUTO_MENU)
-quadro_logo_texto.grid(row=0, column=0, sticky="w", padx=20, pady=10)
-
-rotulo_titulo_logo = tk.Label(
-    quadro_logo_texto,
-    text="IP-ScanED",
-    font=FONTE_TITULO,
-    bg=COR_AZUL_ESCUTO_MENU,
-    fg="#ecf0f1"
-)
-rotulo_titulo_logo.pack(anchor="w")
-
-rotulo_ip_mac_local = tk.Label(
-    quadro_cabecalho,
-    text="IP selecionado: ---  •  MAC: ---",
-    font=("Segoe UI", 10, "bold"),
-    bg=COR_AZUL_ESCUTO_MENU,
-    fg=COR_VERDE_CLARO
-)
-rotulo_ip_mac_local.grid(row=0, column=1, sticky="e", padx=20, pady=10)
-
-# ---------- BARRA DE SELEÇÃO DE IP / AÇÃO ----------
-quadro_filtros = tk.Frame(janela_principal, bg=COR_FUNDO_JANELA)
-quadro_filtros.grid(row=1, column=0, columnspan=2, sticky="ew", padx=15, pady=(10, 0))
-quadro_filtros.grid_columnconfigure(0, weight=0)
-quadro_filtros.grid_columnconfigure(1, weight=1)
-quadro_filtros.grid_columnconfigure(2, weight=0)
-
-rotulo_selecao_ip = tk.Label(
-    quadro_filtros,
-    text="Selecione o IP para escanear:",
-    font=FONTE_PADRAO,
-    bg=COR_FUNDO_JANELA,
-    fg="#444444"
-)
-rotulo_selecao_ip.grid(row=0, column=0, sticky="w", padx=(0, 8))
-
-caixa_selecao_ip = ttk.Combobox(
-    quadro_filtros,
-    state="readonly",
-    width=40
-)
-caixa_selecao_ip.grid(row=0, column=1, sticky="ew", padx=(0, 10))
-
-botao_escanear_rede = ttk.Button(
-    quadro_filtros,
-    text="Escanear Rede",
-    style="BotaoPrincipal.TButton",
-    command=iniciar_escanear_rede
-)
-botao_escanear_rede.grid(row=0, column=2, sticky="e")
-
-# ---------- BARRA DE PROGRESSO ----------
-barra_progresso = ttk.Progressbar(
-    janela_principal,
-    orient="horizontal",
-    mode="determinate"
-)
-barra_progresso.grid(row=2, column=0, columnspan=2, sticky="ew", padx=15, pady=(8, 8))
-
-# ---------- AREA PRINCIPAL ----------
-janela_principal.grid_rowconfigure(3, weight=1)
-janela_principal.grid_columnconfigure(0, weight=2)
-janela_principal.grid_columnconfigure(1, weight=3)
-janela_principal.grid_columnconfigure(2, weight=0)
-
-# ----- "CARD" IPs em Análise -----
-quadro_card_analise = tk.Frame(janela_principal, bg=COR_CARTAO, bd=0, highlightthickness=1,
-                               highlightbackground="#dcdfe3")
-quadro_card_analise.grid(row=3, column=0, sticky="nsew", padx=(15, 8), pady=(5, 10))
-
-rotulo_analise = tk.Label(
-    quadro_card_analise,
-    text="IPs em Análise",
-    font=FONTE_SECAO,
-    bg=COR_CARTAO,
-    fg=COR_VERDE_PRINCIPAL
-)
-rotulo_analise.pack(anchor="w", padx=12, pady=(10, 5))
-
-frame_arvore_analise = tk.Frame(quadro_card_analise, bg=COR_CARTAO)
-frame_arvore_analise.pack(fill="both", expand=True, padx=10, pady=(0, 10))
-
-arvore_ips_em_analise = ttk.Treeview(
-    frame_arvore_analise,
-    columns=("IP", "Status"),
-    show="headings"
-)
-arvore_ips_em_analise.heading("IP", text="IP")
-arvore_ips_em_analise.heading("Status", text="Status")
-arvore_ips_em_analise.column("IP", width=100, anchor="center")
-arvore_ips_em_analise.column("Status", width=80, anchor="center")
-
-scroll_analise_y = ttk.Scrollbar(
-    frame_arvore_analise,
-    orient="vertical",
-    command=arvore_ips_em_analise.yview
-)
-arvore_ips_em_analise.configure(yscrollcommand=scroll_analise_y.set)
-
-arvore_ips_em_analise.pack(side="left", fill="both", expand=True)
-scroll_analise_y.pack(side="right", fill="y")
-
-arvore_ips_em_analise.tag_configure("linha_par", background="#ffffff")
-arvore_ips_em_analise.tag_configure("linha_impar", background=COR_LINHA_IMPAR)
-
-# ----- "CARD" IPs Ativos -----
-quadro_card_ativos = tk.Frame(janela_principal, bg=COR_CARTAO, bd=0, highlightthickness=1,
-                              highlightbackground="#dcdfe3")
-quadro_card_ativos.grid(row=3, column=1, sticky="nsew", padx=(8, 15), pady=(5, 10))
-
-# header do card (título + contador)
-frame_header_ativos = tk.Frame(quadro_card_ativos, bg=COR_CARTAO)
-frame_header_ativos.pack(fill="x", padx=12, pady=(10, 5))
-
-rotulo_ativos = tk.Label(
-    frame_header_ativos,
-    text="IPs Ativos",
-    font=FONTE_SECAO,
-    bg=COR_CARTAO,
-    fg=COR_VERDE_PRINCIPAL
-)
-rotulo_ativos.pack(side="left")
-
-rotulo_contador_ativos = tk.Label(
-    frame_header_ativos,
-    text="—",
-    font=("Segoe UI", 10),
-    bg=COR_CARTAO,
-    fg="#777777"
-)
-rotulo_contador_ativos.pack(side="right")
-
-frame_arvore_ativos = tk.Frame(quadro_card_ativos, bg=COR_CARTAO)
-frame_arvore_ativos.pack(fill="both", expand=True, padx=10, pady=(0, 10))
-
-arvore_ips_ativos = ttk.Treeview(
-    frame_arvore_ativos,
-    columns=("IP", "Tipo", "OUI", "MAC"),
-    show="headings"
-)
-arvore_ips_ativos.heading("IP", text="IP")
-arvore_ips_ativos.heading("Tipo", text="Tipo")
-arvore_ips_ativos.heading("OUI", text="OUI")
-arvore_ips_ativos.heading("MAC", text="MAC")
-arvore_ips_ativos.column("IP", width=90, anchor="center")
-arvore_ips_ativos.column("Tipo", width=140, anchor="center")
-arvore_ips_ativos.column("OUI", width=200, anchor="center")
-arvore_ips_ativos.column("MAC", width=130, anchor="center")
-
-scroll_ativos_y = ttk.Scrollbar(
-    frame_arvore_ativos,
-    orient="vertical",
-    command=arvore_ips_ativos.yview
-)
-arvore_ips_ativos.configure(yscrollcommand=scroll_ativos_y.set)
-
-arvore_ips_ativos.pack(side="left", fill="both", expand=True)
-scroll_ativos_y.pack(side="right", fill="y")
-
-arvore_ips_ativos.tag_configure("linha_par", background="#ffffff")
-arvore_ips_ativos.tag_configure("linha_impar", background=COR_LINHA_IMPAR)
-
-arvore_ips_ativos.bind("<Double-1>", executar_teste_vulnerabilidade)
-
-# ---------- MENU LATERAL ----------
-quadro_menu_lateral = tk.Frame(janela_principal, bg=COR_AZUL_ESCUTO_MENU, width=220)
-quadro_menu_lateral.grid(row=3, column=2, sticky="ns", pady=(5, 10))
-quadro_menu_lateral.grid_propagate(False)
-
-rotulo_menu = tk.Label(
-    quadro_menu_lateral,
-    text="Menu",
-    font=("Segoe UI", 16, "bold"),
-    bg=COR_AZUL_ESCUTO_MENU,
-    fg="#ffffff"
-)
-rotulo_menu.pack(pady=(20, 10))
-
-botao_menu_principal = ttk.Button(
-    quadro_menu_lateral,
-    text="Home",
-    style="BotaoMenu.TButton"
-)
-botao_menu_principal.pack(fill="x", padx=20, pady=5)
-
-botao_menu_teste = ttk.Button(
-    quadro_menu_lateral,
-    text="Teste Vulnerabilidade",
-    style="BotaoMenu.TButton"
-)
-botao_menu_teste.pack(fill="x", padx=20, pady=5)
-
-# ---------- RODAPÉ COM ASSINATURA ----------
-quadro_rodape = tk.Frame(janela_principal, bg="#e3e6ea", height=24)
-quadro_rodape.grid(row=4, column=0, columnspan=3, sticky="ew")
-quadro_rodape.grid_propagate(False)
-
-rotulo_rodape = tk.Label(
-    quadro_rodape,
-    text="Desenvolvido por Carlos Eduardo Souza de Lima e Carlos Diego Soares da Silva",
-    font=("Segoe UI", 8),
-    bg="#e3e6ea",
-    fg="#555555"
-)
-rotulo_rodape.pack(side="right", padx=10, pady=4)
-
-janela_principal.grid_rowconfigure(4, weight=0)
+def construir_janela():
+    """
+    Cria a janela principal e todos os widgets. Não faz nenhuma operação
+    lenta (subprocessos, leitura do OUI, PIL): isso fica para depois que a
+    janela estiver na tela.
+    """
+    global janela_principal, rotulo_ip_mac_local, caixa_selecao_ip, botao_escanear_rede
+    global barra_progresso, tabela_ips_em_analise, tabela_ips_ativos, rotulo_contador_ativos
+    global botao_monitorar, botao_pausar
+
+    janela_principal = tk.Tk()
+    janela_principal.title("IP-ScanED")
+    janela_principal.geometry("1280x720")
+    janela_principal.minsize(1100, 600)
+    janela_principal.configure(bg=COR_FUNDO_JANELA)
+
+    # O ícone é carregado depois que a janela aparece (ver carregar_icone)
+
+    # ---------- ESTILOS TTK ----------
+    estilo = ttk.Style(janela_principal)
+    estilo.theme_use("clam")
+
+    estilo.configure(
+        "BotaoPrincipal.TButton",
+        font=("Segoe UI", 11, "bold"),
+        padding=8,
+        foreground="#ffffff",
+        background=COR_VERDE_PRINCIPAL,
+        borderwidth=0
+    )
+    estilo.map(
+        "BotaoPrincipal.TButton",
+        background=[("active", "#1f8d4d")]
+    )
+
+    estilo.configure(
+        "BotaoMenu.TButton",
+        font=("Segoe UI", 11, "bold"),
+        padding=10,
+        foreground="#ffffff",
+        background=COR_VERDE_PRINCIPAL,
+        borderwidth=0
+    )
+    estilo.map(
+        "BotaoMenu.TButton",
+        background=[("active", "#1f8d4d")]
+    )
+
+    estilo.configure(
+        "TProgressbar",
+        thickness=16,
+        troughcolor="#dfe3e6",
+        borderwidth=0,
+        background=COR_VERDE_PRINCIPAL
+    )
+
+    estilo.configure(
+        "Treeview",
+        font=("Segoe UI", 9),
+        rowheight=22,
+        background="#ffffff",
+        fieldbackground="#ffffff",
+        borderwidth=0
+    )
+    estilo.configure(
+        "Treeview.Heading",
+        font=("Segoe UI", 9, "bold"),
+        background=COR_VERDE_PRINCIPAL,
+        foreground="#ffffff"
+    )
+
+    # ---------- CABEÇALHO SUPERIOR ----------
+    quadro_cabecalho = tk.Frame(janela_principal, bg=COR_AZUL_ESCUTO_MENU, height=70)
+    quadro_cabecalho.grid(row=0, column=0, columnspan=3, sticky="nsew")
+    quadro_cabecalho.grid_columnconfigure(0, weight=1)
+    quadro_cabecalho.grid_columnconfigure(1, weight=0)
+
+    # bloco de "logo textual"
+    quadro_logo_texto = tk.Frame(quadro_cabecalho, bg=COR_AZUL_ESCUTO_MENU)
+    quadro_logo_texto.grid(row=0, column=0, sticky="w", padx=20, pady=10)
+
+    rotulo_titulo_logo = tk.Label(
+        quadro_logo_texto,
+        text="IP-ScanED",
+        font=FONTE_TITULO,
+        bg=COR_AZUL_ESCUTO_MENU,
+        fg="#ecf0f1"
+    )
+    rotulo_titulo_logo.pack(anchor="w")
+
+    rotulo_ip_mac_local = tk.Label(
+        quadro_cabecalho,
+        text="IP selecionado: ---  •  MAC: ---",
+        font=("Segoe UI", 10, "bold"),
+        bg=COR_AZUL_ESCUTO_MENU,
+        fg=COR_VERDE_CLARO
+    )
+    rotulo_ip_mac_local.grid(row=0, column=1, sticky="e", padx=20, pady=10)
+
+    # ---------- BARRA DE SELEÇÃO DE IP / AÇÃO ----------
+    quadro_filtros = tk.Frame(janela_principal, bg=COR_FUNDO_JANELA)
+    quadro_filtros.grid(row=1, column=0, columnspan=2, sticky="ew", padx=15, pady=(10, 0))
+    quadro_filtros.grid_columnconfigure(0, weight=0)
+    quadro_filtros.grid_columnconfigure(1, weight=1)
+    quadro_filtros.grid_columnconfigure(2, weight=0)
+    quadro_filtros.grid_columnconfigure(3, weight=0)
+    quadro_filtros.grid_columnconfigure(4, weight=0)
+
+    rotulo_selecao_ip = tk.Label(
+        quadro_filtros,
+        text="Selecione o IP para escanear:",
+        font=FONTE_PADRAO,
+        bg=COR_FUNDO_JANELA,
+        fg="#444444"
+    )
+    rotulo_selecao_ip.grid(row=0, column=0, sticky="w", padx=(0, 8))
+
+    caixa_selecao_ip = ttk.Combobox(
+        quadro_filtros,
+        values=["Carregando interfaces..."],
+        state="readonly",
+        width=40
+    )
+    caixa_selecao_ip.current(0)
+    caixa_selecao_ip.config(state="disabled")
+    caixa_selecao_ip.grid(row=0, column=1, sticky="ew", padx=(0, 10))
+
+    botao_escanear_rede = ttk.Button(
+        quadro_filtros,
+        text="Escanear Rede",
+        style="BotaoPrincipal.TButton",
+        state="disabled",  # liberado quando a lista de IPs chegar
+        command=iniciar_escanear_rede
+    )
+    botao_escanear_rede.grid(row=0, column=2, sticky="e")
+
+    botao_pausar = ttk.Button(
+        quadro_filtros,
+        text="Pausar",
+        style="BotaoPrincipal.TButton",
+        state="disabled",  # só durante uma varredura
+        command=alternar_pausa
+    )
+    botao_pausar.grid(row=0, column=3, sticky="e", padx=(10, 0))
+
+    botao_monitorar = ttk.Button(
+        quadro_filtros,
+        text="Monitorar",
+        style="BotaoPrincipal.TButton",
+        state="disabled",
+        command=alternar_monitoramento
+    )
+    botao_monitorar.grid(row=0, column=4, sticky="e", padx=(10, 0))
+
+    # ---------- BARRA DE PROGRESSO ----------
+    barra_progresso = ttk.Progressbar(
+        janela_principal,
+        orient="horizontal",
+        mode="determinate"
+    )
+    barra_progresso.grid(row=2, column=0, columnspan=2, sticky="ew", padx=15, pady=(8, 8))
+
+    # ---------- AREA PRINCIPAL ----------
+    janela_principal.grid_rowconfigure(3, weight=1)
+    janela_principal.grid_columnconfigure(0, weight=2)
+    janela_principal.grid_columnconfigure(1, weight=3)
+    janela_principal.grid_columnconfigure(2, weight=0)
+
+    # ----- "CARD" IPs em Análise -----
+    quadro_card_analise = tk.Frame(janela_principal, bg=COR_CARTAO, bd=0, highlightthickness=1,
+                                   highlightbackground="#dcdfe3")
+    quadro_card_analise.grid(row=3, column=0, sticky="nsew", padx=(15, 8), pady=(5, 10))
+
+    rotulo_analise = tk.Label(
+        quadro_card_analise,
+        text="IPs em Análise",
+        font=FONTE_SECAO,
+        bg=COR_CARTAO,
+        fg=COR_VERDE_PRINCIPAL
+    )
+    rotulo_analise.pack(anchor="w", padx=12, pady=(10, 5))
+
+    frame_arvore_analise = tk.Frame(quadro_card_analise, bg=COR_CARTAO)
+    frame_arvore_analise.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    tabela_ips_em_analise = TabelaVirtual(
+        frame_arvore_analise,
+        colunas=[("IP", 100), ("Status", 80)]
+    )
+    tabela_ips_em_analise.tag_configure("linha_par", background="#ffffff")
+    tabela_ips_em_analise.tag_configure("linha_impar", background=COR_LINHA_IMPAR)
+
+    # ----- "CARD" IPs Ativos -----
+    quadro_card_ativos = tk.Frame(janela_principal, bg=COR_CARTAO, bd=0, highlightthickness=1,
+                                  highlightbackground="#dcdfe3")
+    quadro_card_ativos.grid(row=3, column=1, sticky="nsew", padx=(8, 15), pady=(5, 10))
+
+    # header do card (título + contador)
+    frame_header_ativos = tk.Frame(quadro_card_ativos, bg=COR_CARTAO)
+    frame_header_ativos.pack(fill="x", padx=12, pady=(10, 5))
+
+    rotulo_ativos = tk.Label(
+        frame_header_ativos,
+        text="IPs Ativos",
+        font=FONTE_SECAO,
+        bg=COR_CARTAO,
+        fg=COR_VERDE_PRINCIPAL
+    )
+    rotulo_ativos.pack(side="left")
+
+    rotulo_contador_ativos = tk.Label(
+        frame_header_ativos,
+        text="—",
+        font=("Segoe UI", 10),
+        bg=COR_CARTAO,
+        fg="#777777"
+    )
+    rotulo_contador_ativos.pack(side="right")
+
+    frame_arvore_ativos = tk.Frame(quadro_card_ativos, bg=COR_CARTAO)
+    frame_arvore_ativos.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    tabela_ips_ativos = TabelaVirtual(
+        frame_arvore_ativos,
+        colunas=[
+            ("IP", 90), ("Tipo", 140), ("OUI", 200), ("MAC", 130), ("RTT (ms)", 70), ("Nome", 160),
+            ("IPv6", 220)
+        ]
+    )
+    tabela_ips_ativos.tag_configure("linha_par", background="#ffffff")
+    tabela_ips_ativos.tag_configure("linha_impar", background=COR_LINHA_IMPAR)
+
+    tabela_ips_ativos.bind("<Double-1>", executar_teste_vulnerabilidade)
+
+    # ---------- MENU LATERAL ----------
+    quadro_menu_lateral = tk.Frame(janela_principal, bg=COR_AZUL_ESCUTO_MENU, width=220)
+    quadro_menu_lateral.grid(row=3, column=2, sticky="ns", pady=(5, 10))
+    quadro_menu_lateral.grid_propagate(False)
+
+    rotulo_menu = tk.Label(
+        quadro_menu_lateral,
+        text="Menu",
+        font=("Segoe UI", 16, "bold"),
+        bg=COR_AZUL_ESCUTO_MENU,
+        fg="#ffffff"
+    )
+    rotulo_menu.pack(pady=(20, 10))
+
+    botao_menu_principal = ttk.Button(
+        quadro_menu_lateral,
+        text="Home",
+        style="BotaoMenu.TButton"
+    )
+    botao_menu_principal.pack(fill="x", padx=20, pady=5)
+
+    botao_menu_teste = ttk.Button(
+        quadro_menu_lateral,
+        text="Teste Vulnerabilidade",
+        style="BotaoMenu.TButton",
+        command=executar_teste_vulnerabilidade
+    )
+    botao_menu_teste.pack(fill="x", padx=20, pady=5)
+
+    # ---------- RODAPÉ COM ASSINATURA ----------
+    quadro_rodape = tk.Frame(janela_principal, bg="#e3e6ea", height=24)
+    quadro_rodape.grid(row=4, column=0, columnspan=3, sticky="ew")
+    quadro_rodape.grid_propagate(False)
+
+    rotulo_rodape = tk.Label(
+        quadro_rodape,
+        text="Desenvolvido por Carlos Eduardo Souza de Lima e Carlos Diego Soares da Silva",
+        font=("Segoe UI", 8),
+        bg="#e3e6ea",
+        fg="#555555"
+    )
+    rotulo_rodape.pack(side="right", padx=10, pady=4)
+
+    janela_principal.grid_rowconfigure(4, weight=0)
+    janela_principal.protocol("WM_DELETE_WINDOW", fechar_janela_principal)
+
+    return janela_principal
+
+
+def fechar_janela_principal():
+    """
+    Para varredura, monitoramento e teste de portas em andamento e espera
+    um pouco as threads gravarem histórico e ponto de retomada antes de
+    fechar.
+    """
+    for parada in (parada_varredura, parada_monitoramento, parada_teste_portas):
+        if parada is not None:
+            parada.set()
+    if controle_varredura is not None:
+        controle_varredura.retomar()
+
+    limite = time.monotonic() + TEMPO_ENCERRAMENTO_SEGUNDOS
+    for thread in (thread_varredura, thread_monitoramento):
+        if thread is not None:
+            thread.join(max(0.0, limite - time.monotonic()))
+    janela_principal.destroy()
+
 
 # ---------- INICIALIZAÇÃO ----------
-carregar_lista_enderecos_locais()
-janela_principal.after(80, processar_fila_interface)
+def iniciar():
+    """
+    Monta a janela e agenda o resto: enumeração das interfaces e leitura do
+    OUI em uma thread, ícone logo após o primeiro desenho.
+    """
+    construir_janela()
+    janela_principal.after(100, carregar_icone)
+    threading.Thread(target=carregar_dados_iniciais, daemon=True).start()
+    janela_principal.after(INTERVALO_QUADRO_MS, processar_fila_interface)
+    return janela_principal
+
+
+def medir_inicializacao(instante_inicio):
+    """
+    Abre a janela, espera o primeiro desenho e fecha. Retorna os segundos
+    entre 'instante_inicio' (time.perf_counter() no início do processo) e a
+    janela pronta na tela.
+    """
+    janela = iniciar()
+    janela.update()
+    tempo_inicializacao = time.perf_counter() - instante_inicio
+    janela.destroy()
+    return tempo_inicializacao
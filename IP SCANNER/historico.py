@@ -0,0 +1,223 @@
+"""
+historico.py
+Histórico persistente de hosts (SQLite) para varreduras incrementais.
+
+Guarda, por IP, o último estado visto (ativo ou não), MAC, fabricante, tipo,
+RTT e os instantes da última resposta e da última sondagem. Com isso uma
+nova varredura:
+  - sonda primeiro os hosts que estavam ativos;
+  - usa timeouts curtos para endereços que não respondem há muito tempo e,
+    para os que estavam ativos, um timeout proporcional ao RTT guardado;
+  - informa só o que mudou (apareceu, desapareceu, MAC alterado).
+"""
+
+import os
+import sqlite3
+import time
+from typing import NamedTuple, Optional
+
+from net import ResultadoHost, montar_alvos, varrer_interfaces, varrer_rede
+
+# Endereço sem resposta há mais que isso é considerado "morto há muito tempo"
+SEGUNDOS_PARA_HOST_MORTO = 24 * 3600
+FATOR_TEMPO_LIMITE_MORTO = 0.3
+TEMPO_LIMITE_MINIMO_MORTO = 0.2
+# Host ativo com RTT conhecido: timeout de FATOR_TEMPO_LIMITE_RTT vezes esse
+# RTT (folga para variação e fila), nunca abaixo de TEMPO_LIMITE_MINIMO_ATIVO
+FATOR_TEMPO_LIMITE_RTT = 8
+TEMPO_LIMITE_MINIMO_ATIVO = 0.25
+
+# Grava no disco a cada tantos registros (e sempre ao final)
+REGISTROS_POR_TRANSACAO = 500
+
+ESQUEMA_HISTORICO = """
+CREATE TABLE IF NOT EXISTS hosts (
+    ip TEXT PRIMARY KEY,
+    ativo INTEGER NOT NULL,
+    mac TEXT,
+    fabricante TEXT,
+    tipo TEXT,
+    rtt REAL,
+    visto_em REAL,
+    sondado_em REAL NOT NULL
+)
+"""
+
+
+class MudancaHost(NamedTuple):
+    """
+    Diferença em relação ao histórico: 'evento' é "apareceu",
+    "desapareceu" ou "mac_alterado".
+    """
+    evento: str
+    ip: str
+    mac_anterior: Optional[str]
+    mac_atual: Optional[str]
+    resultado: ResultadoHost
+
+
+def caminho_historico_padrao():
+    """
+    Retorna ~/.ipscan/historico.sqlite3 (criando a pasta, se preciso).
+    """
+    pasta = os.path.join(os.path.expanduser("~"), ".ipscan")
+    os.makedirs(pasta, exist_ok=True)
+    return os.path.join(pasta, "historico.sqlite3")
+
+
+class HistoricoHosts:
+    """
+    Estado por host guardado em SQLite. Os registros ficam também em um
+    dicionário em memória, carregado uma vez, para consultas O(1) durante
+    a varredura.
+    """
+
+    def __init__(self, caminho_banco=None):
+        self.caminho_banco = caminho_banco or caminho_historico_padrao()
+        # A varredura roda em outra thread; só uma varredura usa o histórico por vez
+        self.conexao = sqlite3.connect(self.caminho_banco, check_same_thread=False)
+        self.conexao.execute(ESQUEMA_HISTORICO)
+        self.conexao.commit()
+
+        self.hosts = {
+            linha[0]: linha
+            for linha in self.conexao.execute(
+                "SELECT ip, ativo, mac, fabricante, tipo, rtt, visto_em, sondado_em FROM hosts"
+            )
+        }
+        self.registros_pendentes = 0
+
+    def ips_ativos(self):
+        """
+        IPs que estavam ativos na última sondagem, do visto mais recente
+        para o mais antigo.
+        """
+        ativos = [linha for linha in self.hosts.values() if linha[1]]
+        ativos.sort(key=lambda linha: linha[6] or 0, reverse=True)
+        return [linha[0] for linha in ativos]
+
+    def funcao_tempo_limite(self, tempo_limite):
+        """
+        Retorna uma função ip -> segundos (tempo_limite_por_alvo de
+        varrer_rede) que reduz o timeout de endereços sem resposta há mais
+        de SEGUNDOS_PARA_HOST_MORTO e ajusta o dos hosts ativos ao RTT
+        guardado. Nunca passa de 'tempo_limite'.
+        """
+        agora = time.time()
+        tempo_limite_morto = max(TEMPO_LIMITE_MINIMO_MORTO, tempo_limite * FATOR_TEMPO_LIMITE_MORTO)
+
+        def tempo_limite_por_alvo(endereco_ip):
+            linha = self.hosts.get(endereco_ip)
+            if linha is None:
+                return tempo_limite
+            if linha[1]:
+                rtt = linha[5]
+                if rtt is None:
+                    return tempo_limite
+                return min(tempo_limite, max(TEMPO_LIMITE_MINIMO_ATIVO, rtt * FATOR_TEMPO_LIMITE_RTT))
+            visto_em = linha[6]
+            if visto_em is None or agora - visto_em > SEGUNDOS_PARA_HOST_MORTO:
+                return min(tempo_limite, tempo_limite_morto)
+            return tempo_limite
+
+        return tempo_limite_por_alvo
+
+    def preparar_varredura(self, alvos, tempo_limite):
+        """
+        Retorna (alvos_priorizados, funcao_tempo_limite) para varrer_rede:
+        hosts ativos primeiro e timeout reduzido para endereços mortos.
+        """
+        return alvos.priorizar(self.ips_ativos()), self.funcao_tempo_limite(tempo_limite)
+
+    def registrar(self, resultado):
+        """
+        Atualiza o histórico com um ResultadoHost e retorna a lista de
+        MudancaHost (vazia quando nada mudou).
+        """
+        anterior = self.hosts.get(resultado.ip)
+        estava_ativo = bool(anterior and anterior[1])
+        mac_anterior = anterior[2] if anterior else None
+        ativo = resultado.status == "Ativo"
+        mudancas = []
+
+        if ativo and not estava_ativo:
+            mudancas.append(MudancaHost("apareceu", resultado.ip, mac_anterior, resultado.mac, resultado))
+        elif estava_ativo and not ativo:
+            mudancas.append(MudancaHost("desapareceu", resultado.ip, mac_anterior, None, resultado))
+
+        if (ativo and mac_anterior not in (None, "Desconhecido") and
+                resultado.mac != "Desconhecido" and resultado.mac != mac_anterior):
+            mudancas.append(MudancaHost("mac_alterado", resultado.ip, mac_anterior, resultado.mac, resultado))
+
+        if ativo:
+            # MAC/fabricante desconhecidos nesta passada não apagam os anteriores
+            mac = resultado.mac if resultado.mac != "Desconhecido" or not anterior else anterior[2]
+            fabricante = (
+                resultado.fabricante if resultado.fabricante != "Desconhecido" or not anterior
+                else anterior[3]
+            )
+            linha = (resultado.ip, 1, mac, fabricante, resultado.tipo, resultado.rtt,
+                     resultado.fim, resultado.fim)
+        elif anterior:
+            linha = (resultado.ip, 0) + anterior[2:7] + (resultado.fim,)
+        else:
+            linha = (resultado.ip, 0, None, None, None, None, None, resultado.fim)
+
+        self.hosts[resultado.ip] = linha
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO hosts "
+            "(ip, ativo, mac, fabricante, tipo, rtt, visto_em, sondado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            linha
+        )
+        self.registros_pendentes += 1
+        if self.registros_pendentes >= REGISTROS_POR_TRANSACAO:
+            self.salvar()
+
+        return mudancas
+
+    def salvar(self):
+        self.conexao.commit()
+        self.registros_pendentes = 0
+
+    def fechar(self):
+        self.salvar()
+        self.conexao.close()
+
+
+def varrer_incremental(historico, endereco_ip_local, mascara_rede, alvos=None, exclusoes=None,
+                       tempo_limite=1.0, interfaces=None, **opcoes):
+    """
+    Varre como varrer_rede (ou varrer_interfaces, se 'interfaces' for
+    informado), mas usando o histórico (ativos primeiro, timeouts curtos
+    para endereços mortos) e produz apenas as MudancaHost.
+    """
+    if interfaces:
+        resultados = varrer_interfaces(
+            interfaces,
+            exclusoes=exclusoes,
+            prioritarios=historico.ips_ativos(),
+            tempo_limite=tempo_limite,
+            tempo_limite_por_alvo=historico.funcao_tempo_limite(tempo_limite),
+            **opcoes
+        )
+    else:
+        alvos_priorizados, tempo_limite_por_alvo = historico.preparar_varredura(
+            montar_alvos(endereco_ip_local, mascara_rede, alvos, exclusoes),
+            tempo_limite
+        )
+        resultados = varrer_rede(
+            endereco_ip_local,
+            mascara_rede,
+            alvos=alvos_priorizados,
+            tempo_limite=tempo_limite,
+            tempo_limite_por_alvo=tempo_limite_por_alvo,
+            **opcoes
+        )
+
+    try:
+        for resultado in resultados:
+            yield from historico.registrar(resultado)
+    finally:
+        resultados.close()
+        historico.salvar()
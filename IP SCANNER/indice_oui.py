@@ -0,0 +1,228 @@
+"""
+indice_oui.py
+Índice compacto de fabricantes por prefixo MAC (OUI).
+
+O arquivo binário guarda chaves inteiras ordenadas para cada tamanho de bloco
+do IEEE (MA-L 24 bits, MA-M 28 bits, MA-S 36 bits), o índice do nome de cada
+chave e uma tabela de nomes sem repetição. Ele é aberto com mmap e consultado
+por busca binária, sem carregar nada para dicionários Python.
+
+Uso para gerar o índice a partir do oui.json:
+    python indice_oui.py oui.json oui.idx
+(para importar os registros do IEEE, ver registro_ieee.py)
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+ASSINATURA_INDICE = b"OUIX"
+VERSAO_INDICE = 1
+FORMATO_CABECALHO = "<4sHHIIIII"
+TAMANHO_CABECALHO = 32
+
+# Tamanho do bloco em bits -> deslocamento aplicado ao MAC de 48 bits
+BITS_BLOCOS = (36, 28, 24)
+
+
+def mac_para_inteiro(endereco_mac):
+    """
+    Converte "AA:BB:CC:DD:EE:FF" (ou com '-', ou só o prefixo) em um inteiro
+    de 48 bits. Prefixos curtos são completados com zeros à direita.
+    """
+    digitos = endereco_mac.replace(":", "").replace("-", "").replace(".", "").strip()
+    if not digitos or len(digitos) > 12:
+        raise ValueError(f"MAC inválido: {endereco_mac}")
+    return int(digitos.ljust(12, "0"), 16)
+
+
+def _alinhar(posicao, alinhamento=8):
+    return (posicao + alinhamento - 1) // alinhamento * alinhamento
+
+
+def _calcular_secoes(quantidade_mal, quantidade_mam, quantidade_mas, quantidade_nomes):
+    """
+    Retorna as posições (em bytes) de cada seção do arquivo.
+    """
+    secoes = {}
+    posicao = TAMANHO_CABECALHO
+    for nome_secao, tamanho in (
+            ("chaves_24", 4 * quantidade_mal),
+            ("nomes_24", 4 * quantidade_mal),
+            ("chaves_28", 4 * quantidade_mam),
+            ("nomes_28", 4 * quantidade_mam),
+            ("chaves_36", 8 * quantidade_mas),
+            ("nomes_36", 4 * quantidade_mas),
+            ("deslocamentos", 4 * (quantidade_nomes + 1))):
+        secoes[nome_secao] = (posicao, tamanho)
+        posicao = _alinhar(posicao + tamanho)
+    secoes["texto"] = (posicao, None)
+    return secoes
+
+
+def montar_indice_oui(entradas):
+    """
+    Recebe (prefixo_inteiro, bits, nome_fabricante) — bits em 24, 28 ou 36 —
+    e retorna o conteúdo binário do índice. Nomes repetidos são guardados
+    uma única vez; se um prefixo aparecer mais de uma vez, vale o primeiro.
+    """
+    blocos = {bits: {} for bits in BITS_BLOCOS}
+    indices_nomes = {}
+    nomes = []
+
+    for prefixo, bits, nome_fabricante in entradas:
+        if bits not in blocos:
+            raise ValueError(f"Tamanho de bloco não suportado: {bits}")
+        if prefixo in blocos[bits]:
+            continue
+        indice_nome = indices_nomes.get(nome_fabricante)
+        if indice_nome is None:
+            indice_nome = indices_nomes[nome_fabricante] = len(nomes)
+            nomes.append(nome_fabricante)
+        blocos[bits][prefixo] = indice_nome
+
+    texto_nomes = bytearray()
+    deslocamentos = array("I", [0])
+    for nome_fabricante in nomes:
+        texto_nomes += nome_fabricante.encode("utf-8")
+        deslocamentos.append(len(texto_nomes))
+
+    secoes = _calcular_secoes(len(blocos[24]), len(blocos[28]), len(blocos[36]), len(nomes))
+    conteudo = bytearray(secoes["texto"][0] + len(texto_nomes))
+    struct.pack_into(
+        FORMATO_CABECALHO, conteudo, 0,
+        ASSINATURA_INDICE, VERSAO_INDICE, 0,
+        len(blocos[24]), len(blocos[28]), len(blocos[36]), len(nomes), len(texto_nomes)
+    )
+
+    def gravar_secao(nome_secao, valores):
+        if sys.byteorder != "little":
+            valores.byteswap()
+        posicao, _tamanho = secoes[nome_secao]
+        dados = valores.tobytes()
+        conteudo[posicao:posicao + len(dados)] = dados
+
+    for bits in BITS_BLOCOS:
+        chaves = sorted(blocos[bits])
+        gravar_secao(f"chaves_{bits}", array("Q" if bits == 36 else "I", chaves))
+        gravar_secao(f"nomes_{bits}", array("I", (blocos[bits][chave] for chave in chaves)))
+    gravar_secao("deslocamentos", deslocamentos)
+
+    posicao_texto = secoes["texto"][0]
+    conteudo[posicao_texto:] = texto_nomes
+    return bytes(conteudo)
+
+
+def gravar_conteudo_indice(conteudo, caminho_saida):
+    """
+    Grava um índice já montado em 'caminho_saida' de forma atômica
+    (arquivo temporário + os.replace): quem está com o índice antigo
+    aberto (mmap) continua lendo o arquivo antigo até reabri-lo.
+    """
+    caminho_temporario = caminho_saida + ".tmp"
+    with open(caminho_temporario, "wb") as arquivo_indice:
+        arquivo_indice.write(conteudo)
+    os.replace(caminho_temporario, caminho_saida)
+    return len(conteudo)
+
+
+def gravar_indice_oui(entradas, caminho_saida):
+    """
+    Gera o índice e grava em 'caminho_saida' de forma atômica.
+    """
+    return gravar_conteudo_indice(montar_indice_oui(entradas), caminho_saida)
+
+
+def entradas_dicionario_oui(dicionario_oui):
+    """
+    Converte o formato antigo {"AA-BB-CC": "Fabricante"} em entradas do índice.
+    """
+    for prefixo_texto, nome_fabricante in dicionario_oui.items():
+        digitos = prefixo_texto.replace(":", "").replace("-", "")
+        yield int(digitos, 16), len(digitos) * 4, nome_fabricante
+
+
+class IndiceOui:
+    """
+    Leitor do índice binário. Aceita bytes ou um mmap; as seções são vistas
+    como memoryview tipadas, sem cópia.
+    """
+
+    def __init__(self, dados):
+        self.dados = dados
+        (assinatura, versao, _reservado, quantidade_mal, quantidade_mam, quantidade_mas,
+         quantidade_nomes, _tamanho_texto) = struct.unpack_from(FORMATO_CABECALHO, dados, 0)
+        if assinatura != ASSINATURA_INDICE or versao != VERSAO_INDICE:
+            raise ValueError("Arquivo de índice OUI inválido")
+
+        secoes = _calcular_secoes(quantidade_mal, quantidade_mam, quantidade_mas, quantidade_nomes)
+        visao = memoryview(dados)
+
+        def ler_secao(nome_secao, formato):
+            posicao, tamanho = secoes[nome_secao]
+            valores = visao[posicao:posicao + tamanho]
+            if sys.byteorder != "little":
+                valores = array(formato, valores.tobytes())
+                valores.byteswap()
+                return valores
+            return valores.cast(formato)
+
+        self.blocos = [
+            (bits, 48 - bits,
+             ler_secao(f"chaves_{bits}", "Q" if bits == 36 else "I"),
+             ler_secao(f"nomes_{bits}", "I"))
+            for bits in BITS_BLOCOS
+        ]
+        self.deslocamentos = ler_secao("deslocamentos", "I")
+        self.texto_nomes = visao[secoes["texto"][0]:]
+        self.quantidade_prefixos = quantidade_mal + quantidade_mam + quantidade_mas
+
+    @classmethod
+    def abrir(cls, caminho_indice):
+        with open(caminho_indice, "rb") as arquivo_indice:
+            dados = mmap.mmap(arquivo_indice.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(dados)
+
+    def __len__(self):
+        return self.quantidade_prefixos
+
+    def nome(self, indice_nome):
+        inicio = self.deslocamentos[indice_nome]
+        fim = self.deslocamentos[indice_nome + 1]
+        return bytes(self.texto_nomes[inicio:fim]).decode("utf-8")
+
+    def entradas(self):
+        """
+        Gera (prefixo_inteiro, bits, nome_fabricante) de todas as chaves,
+        no formato aceito por montar_indice_oui.
+        """
+        for bits, _deslocamento, chaves, nomes in self.blocos:
+            for chave, indice_nome in zip(chaves, nomes):
+                yield chave, bits, self.nome(indice_nome)
+
+    def buscar(self, mac_inteiro):
+        """
+        Procura o bloco mais específico (MA-S, depois MA-M, depois MA-L)
+        que contém o MAC. Retorna o nome do fabricante ou None.
+        """
+        for _bits, deslocamento, chaves, nomes in self.blocos:
+            prefixo = mac_inteiro >> deslocamento
+            posicao = bisect.bisect_left(chaves, prefixo)
+            if posicao < len(chaves) and chaves[posicao] == prefixo:
+                return self.nome(nomes[posicao])
+        return None
+
+
+if __name__ == "__main__":
+    caminho_json = sys.argv[1] if len(sys.argv) > 1 else "oui.json"
+    caminho_indice = sys.argv[2] if len(sys.argv) > 2 else "oui.idx"
+
+    with open(caminho_json, "r", encoding="utf-8") as arquivo_oui:
+        dicionario_oui = json.load(arquivo_oui)
+
+    tamanho = gravar_indice_oui(entradas_dicionario_oui(dicionario_oui), caminho_indice)
+    print(f"{len(dicionario_oui)} prefixos gravados em {caminho_indice} ({tamanho} bytes)")
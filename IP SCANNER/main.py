@@ -1,9 +1,34 @@
 """
 main.py
 Ponto de entrada do IP Scanner Carlos Lima
+
+Sem argumentos abre a interface gráfica; com argumentos (ex.: alvos,
+--formato, --help) executa a varredura sem interface, pelo cli.py.
+'--medir-inicializacao' abre a janela, mede quanto ela levou para aparecer
+e termina com erro se passar da meta (verificação de regressão).
+'--benchmark' mede o desempenho sobre uma rede simulada (benchmark.py).
 """
 
-from gui import janela_principal  # Importa a janela principal da interface gráfica
+import sys
+import time
+
+INSTANTE_INICIO = time.perf_counter()
 
 if __name__ == "__main__":
-    janela_principal.mainloop()   # Inicia o loop principal da interface
+    if sys.argv[1:] == ["--medir-inicializacao"]:
+        import gui
+        tempo_inicializacao = gui.medir_inicializacao(INSTANTE_INICIO)
+        tempo_alvo = gui.TEMPO_ALVO_INICIALIZACAO_SEGUNDOS
+        print(f"Janela visível em {tempo_inicializacao * 1000:.0f} ms (meta: {tempo_alvo * 1000:.0f} ms)")
+        sys.exit(0 if tempo_inicializacao <= tempo_alvo else 1)
+
+    if sys.argv[1:2] == ["--benchmark"]:
+        from benchmark import main
+        sys.exit(main(sys.argv[2:]))
+
+    if len(sys.argv) > 1:
+        from cli import main        # Modo sem interface: não carrega tkinter/PIL
+        sys.exit(main())
+
+    import gui                      # Importar não cria a janela
+    gui.iniciar().mainloop()        # Monta a janela e inicia o loop principal da interface
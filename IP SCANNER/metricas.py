@@ -0,0 +1,210 @@
+"""
+metricas.py
+Instrumentação da varredura: tempo por fase, contadores e medidores.
+
+As fases medidas (ver 'FASES') ficam em histogramas de duração; os
+contadores somam sondagens enviadas, respostas, expirações etc.; os
+medidores guardam o último valor e o máximo (ex.: profundidade da
+fila_interface). Tudo vai para um registro global ('metricas'), que pode
+ser exportado em JSON ou no formato de texto do Prometheus.
+
+'perfilar' é o gancho opcional de profiling: roda um trecho (uma
+varredura) sob o cProfile e grava o resultado em um arquivo .prof
+(abra com 'python -m pstats arquivo.prof' ou snakeviz).
+"""
+
+import bisect
+import cProfile
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Fases conhecidas, na ordem em que aparecem numa varredura
+FASES = (
+    "ping_subprocesso",   # um 'ping' do sistema (TransporteIcmpSubprocesso)
+    "rtt",                # tempo de ida e volta das sondagens respondidas
+    "tabela_vizinhos",    # leitura da tabela ARP (CacheVizinhos / obter_mac_arp)
+    "oui",                # identificar_oui
+    "classificacao",      # definir_tipo_dispositivo
+    "nomes",              # resolução de nome de um host (nomes.py), sem cache
+    "interface",          # um quadro de processar_fila_interface no Tk
+)
+
+# Limites superiores dos baldes dos histogramas, em segundos
+LIMITES_HISTOGRAMA = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0
+)
+
+
+class Histograma:
+    """
+    Contagem de observações por balde (cada uma cai no primeiro limite
+    maior ou igual a ela; acima do último vai para "+Inf"), mais soma,
+    quantidade e máximo.
+    """
+
+    def __init__(self, limites=LIMITES_HISTOGRAMA):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.quantidade = 0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.quantidade += 1
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def percentil(self, fracao):
+        """
+        Estimativa pelo limite do balde onde o percentil cai.
+        """
+        if not self.quantidade:
+            return None
+        alvo = fracao * self.quantidade
+        acumulado = 0
+        for limite, contagem in zip(self.limites, self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def como_dict(self):
+        return {
+            "quantidade": self.quantidade,
+            "soma_s": self.soma,
+            "media_s": self.soma / self.quantidade if self.quantidade else None,
+            "maximo_s": self.maximo,
+            "p50_s": self.percentil(0.50),
+            "p99_s": self.percentil(0.99),
+            "baldes": {
+                **{str(limite): contagem for limite, contagem in zip(self.limites, self.contagens)},
+                "+Inf": self.contagens[-1],
+            },
+        }
+
+
+class MetricasVarredura:
+    """
+    Registro de métricas usado por várias threads ao mesmo tempo (event loop
+    da varredura e interface).
+    """
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+        self.medidores = {}
+
+    def incrementar(self, nome, valor=1):
+        with self.trava:
+            self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    def observar(self, fase, segundos):
+        with self.trava:
+            histograma = self.histogramas.get(fase)
+            if histograma is None:
+                histograma = self.histogramas[fase] = Histograma()
+            histograma.observar(segundos)
+
+    @contextmanager
+    def medir(self, fase):
+        instante_inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(fase, time.perf_counter() - instante_inicio)
+
+    def definir(self, nome, valor):
+        """
+        Atualiza um medidor e o máximo dele ('<nome>_maximo').
+        """
+        with self.trava:
+            self.medidores[nome] = valor
+            nome_maximo = f"{nome}_maximo"
+            if valor > self.medidores.get(nome_maximo, valor - 1):
+                self.medidores[nome_maximo] = valor
+
+    def zerar(self):
+        with self.trava:
+            self.contadores.clear()
+            self.histogramas.clear()
+            self.medidores.clear()
+
+    # ---------- Exportação ----------
+    def como_dict(self):
+        with self.trava:
+            return {
+                "contadores": dict(self.contadores),
+                "medidores": dict(self.medidores),
+                "fases": {fase: histograma.como_dict() for fase, histograma in self.histogramas.items()},
+            }
+
+    def exportar_json(self):
+        return json.dumps(self.como_dict(), indent=2, ensure_ascii=False)
+
+    def exportar_prometheus(self, prefixo="ipscan"):
+        """
+        Formato de texto do Prometheus: contadores como '<prefixo>_<nome>_total',
+        medidores como gauge e as fases em um único histograma
+        '<prefixo>_fase_segundos' com o rótulo 'fase'.
+        """
+        linhas = []
+        with self.trava:
+            for nome, valor in sorted(self.contadores.items()):
+                linhas.append(f"# TYPE {prefixo}_{nome}_total counter")
+                linhas.append(f"{prefixo}_{nome}_total {valor}")
+
+            for nome, valor in sorted(self.medidores.items()):
+                linhas.append(f"# TYPE {prefixo}_{nome} gauge")
+                linhas.append(f"{prefixo}_{nome} {valor}")
+
+            if self.histogramas:
+                nome_histograma = f"{prefixo}_fase_segundos"
+                linhas.append(f"# HELP {nome_histograma} Duração de cada fase da varredura.")
+                linhas.append(f"# TYPE {nome_histograma} histogram")
+                for fase, histograma in sorted(self.histogramas.items()):
+                    acumulado = 0
+                    for limite, contagem in zip(histograma.limites, histograma.contagens):
+                        acumulado += contagem
+                        linhas.append(f'{nome_histograma}_bucket{{fase="{fase}",le="{limite}"}} {acumulado}')
+                    linhas.append(
+                        f'{nome_histograma}_bucket{{fase="{fase}",le="+Inf"}} {histograma.quantidade}'
+                    )
+                    linhas.append(f'{nome_histograma}_sum{{fase="{fase}"}} {histograma.soma}')
+                    linhas.append(f'{nome_histograma}_count{{fase="{fase}"}} {histograma.quantidade}')
+        return "\n".join(linhas) + "\n"
+
+    def salvar(self, caminho_arquivo, formato=None):
+        """
+        Grava as métricas em JSON ou Prometheus; sem 'formato', decide pela
+        extensão (.json -> JSON, qualquer outra -> Prometheus).
+        """
+        if formato is None:
+            formato = "json" if caminho_arquivo.lower().endswith(".json") else "prometheus"
+        conteudo = self.exportar_json() if formato == "json" else self.exportar_prometheus()
+        with open(caminho_arquivo, "w", encoding="utf-8") as arquivo_metricas:
+            arquivo_metricas.write(conteudo)
+
+
+# Registro global usado pela instrumentação de net.py e gui.py
+metricas = MetricasVarredura()
+
+
+@contextmanager
+def perfilar(caminho_saida):
+    """
+    Roda o bloco sob o cProfile e grava o resultado em 'caminho_saida'.
+    Perfila só a thread atual: para uma varredura, use o parâmetro
+    'arquivo_perfil' de varrer_rede, que liga o perfil na thread do event loop.
+    """
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        perfil.dump_stats(caminho_saida)
@@ -0,0 +1,193 @@
+"""
+monitoramento.py
+Monitoramento contínuo de uma rede, com varreduras periódicas de baixo custo.
+
+O agendador alterna dois tipos de ciclo, com intervalos sorteados em
+torno do valor pedido (±'variacao') para não sincronizar com outros
+monitores nem gerar rajadas previsíveis:
+    - rápido: só os hosts que estavam ativos ('intervalo_ativos');
+    - completo: todos os alvos, ativos primeiro e timeout curto para
+      endereços mortos há muito tempo ('intervalo_completo').
+Todos os ciclos rodam no mesmo event loop e dividem um ControleConcorrencia
+com teto de pacotes por segundo ('taxa_maxima') e um EstimadorRtt, que já
+chega afinado a cada ciclo. As mudanças vêm do HistoricoHosts (apareceu,
+desapareceu, MAC alterado); um host só é dado como desaparecido depois de
+'falhas_para_queda' ciclos seguidos sem resposta.
+"""
+
+import asyncio
+import random
+import time
+from typing import NamedTuple
+
+from historico import MudancaHost
+from net import (
+    CacheVizinhos,
+    ControleConcorrencia,
+    EstimadorRtt,
+    iterar_em_thread,
+    montar_alvos,
+    varrer_rede_async,
+)
+
+CICLO_RAPIDO = "rapido"
+CICLO_COMPLETO = "completo"
+
+# Intervalo entre as verificações do pedido de parada enquanto espera
+INTERVALO_VERIFICACAO_PARADA = 0.25
+# Com um host ativo sem resposta, o próximo ciclo rápido vem no máximo nisso
+INTERVALO_CONFIRMACAO_QUEDA = 5.0
+
+
+class CicloMonitoramento(NamedTuple):
+    """
+    Resumo de um ciclo concluído: 'tipo' é "rapido" ou "completo",
+    'proximo_em' quantos segundos faltam para o próximo ciclo e
+    'proximo_tipo'/'proximo_alvos' o tipo e quantos alvos ele vai ter
+    (contados agora; num ciclo rápido, os ativos podem mudar até lá).
+    """
+    tipo: str
+    alvos: int
+    ativos: int
+    mudancas: int
+    duracao: float
+    proximo_em: float
+    proximo_tipo: str
+    proximo_alvos: int
+
+
+async def monitorar_async(historico, endereco_ip_local, mascara_rede, alvos=None, exclusoes=None,
+                          intervalo_ativos=30.0, intervalo_completo=600.0, variacao=0.2,
+                          falhas_para_queda=2, taxa_maxima=100, max_em_voo=64, tempo_limite=1.0,
+                          parada=None, semente=None, **opcoes):
+    """
+    Gerador assíncrono sem fim (até 'parada', um threading.Event, ser
+    acionado) que produz, na ordem em que acontecem:
+        - ResultadoHost de cada host sondado (menos os desaparecimentos
+          ainda não confirmados);
+        - MudancaHost de cada mudança em relação ao 'historico';
+        - CicloMonitoramento ao fim de cada ciclo.
+    As demais opções vão para varrer_rede_async.
+    """
+    loop = asyncio.get_running_loop()
+    sorteio = random.Random(semente)
+    todos_alvos = montar_alvos(endereco_ip_local, mascara_rede, alvos, exclusoes)
+    controle = opcoes.pop("controle", None) or ControleConcorrencia(
+        janela_inicial=min(32, max_em_voo), janela_maxima=max_em_voo, taxa_maxima=taxa_maxima
+    )
+    estimador = opcoes.pop("estimador", None) or EstimadorRtt(tempo_limite)
+    cache_vizinhos = opcoes.pop("cache_vizinhos", None) or CacheVizinhos()
+    falhas_seguidas = {}
+
+    def alvos_rapidos():
+        return [endereco_ip for endereco_ip in historico.ips_ativos() if endereco_ip in todos_alvos]
+
+    def sortear_intervalo(intervalo):
+        return intervalo * sorteio.uniform(1 - variacao, 1 + variacao)
+
+    async def esperar_ate(instante):
+        while not (parada is not None and parada.is_set()):
+            restante = instante - loop.time()
+            if restante <= 0:
+                return True
+            await asyncio.sleep(min(restante, INTERVALO_VERIFICACAO_PARADA))
+        return False
+
+    proximo_completo = loop.time()
+    proximo_rapido = loop.time() + sortear_intervalo(intervalo_ativos)
+
+    while True:
+        if not await esperar_ate(min(proximo_completo, proximo_rapido)):
+            return
+
+        instante_ciclo = loop.time()
+        if instante_ciclo >= proximo_completo:
+            tipo = CICLO_COMPLETO
+            alvos_ciclo, tempo_limite_por_alvo = historico.preparar_varredura(todos_alvos, tempo_limite)
+        else:
+            tipo = CICLO_RAPIDO
+            alvos_ciclo = alvos_rapidos()
+            tempo_limite_por_alvo = None
+
+        # O cache só relê a tabela para IPs ausentes; sem isso, MAC trocado não aparece
+        cache_vizinhos.atualizar()
+        quantidade_ativos = 0
+        quantidade_mudancas = 0
+        resultados = varrer_rede_async(
+            endereco_ip_local,
+            mascara_rede,
+            alvos=alvos_ciclo,
+            tempo_limite=tempo_limite,
+            tempo_limite_por_alvo=tempo_limite_por_alvo,
+            controle=controle,
+            estimador=estimador,
+            cache_vizinhos=cache_vizinhos,
+            **opcoes
+        )
+        try:
+            async for resultado in resultados:
+                if parada is not None and parada.is_set():
+                    return
+                if resultado.status == "Ativo":
+                    quantidade_ativos += 1
+                    falhas_seguidas.pop(resultado.ip, None)
+                elif resultado.ip in falhas_seguidas or historico.hosts.get(resultado.ip, (None, 0))[1]:
+                    # Estava ativo: só conta como desaparecido depois de algumas falhas
+                    falhas_seguidas[resultado.ip] = falhas_seguidas.get(resultado.ip, 0) + 1
+                    if falhas_seguidas[resultado.ip] < falhas_para_queda:
+                        continue
+                    del falhas_seguidas[resultado.ip]
+
+                yield resultado
+                for mudanca in historico.registrar(resultado):
+                    quantidade_mudancas += 1
+                    yield mudanca
+        finally:
+            await resultados.aclose()
+            historico.salvar()
+
+        agora = loop.time()
+        if tipo == CICLO_COMPLETO:
+            proximo_completo = agora + sortear_intervalo(intervalo_completo)
+        # Hosts com falha pendente são verificados de novo logo
+        proximo_rapido = agora + sortear_intervalo(
+            min(intervalo_ativos, INTERVALO_CONFIRMACAO_QUEDA) if falhas_seguidas else intervalo_ativos
+        )
+        if proximo_completo <= proximo_rapido:
+            proximo_tipo, proximo_alvos = CICLO_COMPLETO, len(todos_alvos)
+        else:
+            proximo_tipo, proximo_alvos = CICLO_RAPIDO, len(alvos_rapidos())
+        yield CicloMonitoramento(
+            tipo,
+            len(alvos_ciclo),
+            quantidade_ativos,
+            quantidade_mudancas,
+            agora - instante_ciclo,
+            min(proximo_completo, proximo_rapido) - agora,
+            proximo_tipo,
+            proximo_alvos
+        )
+
+
+def monitorar(*argumentos, **opcoes):
+    """
+    Versão síncrona de monitorar_async (ver net.varrer_rede). Para parar,
+    acione 'parada' ou interrompa a iteração.
+    """
+    arquivo_perfil = opcoes.pop("arquivo_perfil", None)
+    return iterar_em_thread(monitorar_async, argumentos, opcoes, arquivo_perfil)
+
+
+def descrever_item(item):
+    """
+    Linha de texto curta para logs (modo sem interface).
+    """
+    if isinstance(item, MudancaHost):
+        detalhe = f" ({item.mac_anterior} -> {item.mac_atual})" if item.evento == "mac_alterado" else ""
+        return f"{time.strftime('%H:%M:%S')} {item.evento} {item.ip}{detalhe}"
+    if isinstance(item, CicloMonitoramento):
+        return (
+            f"{time.strftime('%H:%M:%S')} ciclo {item.tipo}: {item.ativos}/{item.alvos} ativos, "
+            f"{item.mudancas} mudanças em {item.duracao:.1f} s; próximo em {item.proximo_em:.0f} s"
+        )
+    return str(item)
@@ -4,7 +4,22 @@ import json
 import platform
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+import socket
+import struct
+import asyncio
+import collections
+import errno
+import itertools
+import ipaddress
+import random
+import threading
+import functools
+from queue import Queue
+from typing import NamedTuple, Optional
+
+from indice_oui import IndiceOui, mac_para_inteiro, montar_indice_oui, entradas_dicionario_oui
+from metricas import metricas, perfilar
 
 
 def obter_caminho_recurso(nome_arquivo: str) -> str:
@@ -22,15 +37,38 @@ def obter_caminho_recurso(nome_arquivo: str) -> str:
 
     return os.path.join(base, nome_arquivo)
 
-# ---------- Carrega base de dados OUI ----------
+# ---------- Base de dados OUI (carregada sob demanda) ----------
+CAMINHO_INDICE_OUI = obter_caminho_recurso("oui.idx")
 CAMINHO_ARQUIVO_OUI = obter_caminho_recurso("oui.json")
 
-try:
-    with open(CAMINHO_ARQUIVO_OUI, "r", encoding="utf-8") as arquivo_oui:
-        DICIONARIO_OUI = json.load(arquivo_oui)
-except Exception as erro_carregar_oui:
-    print(f"Erro ao carregar arquivo OUI.json ({CAMINHO_ARQUIVO_OUI}): {erro_carregar_oui}")
-    DICIONARIO_OUI = {}
+_indice_oui = None
+_trava_indice_oui = threading.Lock()
+
+
+def obter_indice_oui():
+    """
+    Abre o índice compacto de OUIs na primeira consulta (mmap do oui.idx).
+    Se o índice não existir, monta-o em memória a partir do oui.json.
+    """
+    global _indice_oui
+
+    if _indice_oui is not None:
+        return _indice_oui
+
+    with _trava_indice_oui:
+        if _indice_oui is None:
+            try:
+                _indice_oui = IndiceOui.abrir(CAMINHO_INDICE_OUI)
+            except Exception:
+                try:
+                    with open(CAMINHO_ARQUIVO_OUI, "r", encoding="utf-8") as arquivo_oui:
+                        dicionario_oui = json.load(arquivo_oui)
+                except Exception as erro_carregar_oui:
+                    print(f"Erro ao carregar arquivo OUI.json ({CAMINHO_ARQUIVO_OUI}): {erro_carregar_oui}")
+                    dicionario_oui = {}
+                _indice_oui = IndiceOui(montar_indice_oui(entradas_dicionario_oui(dicionario_oui)))
+
+    return _indice_oui
 
 
 # ---------- Listar todos os IPs locais disponíveis ----------
@@ -174,192 +212,1852 @@ def obter_mac_local():
 # ---------- Identificar fabricante pelo OUI ----------
 def identificar_oui(endereco_mac):
     """
-    Recebe um MAC e tenta identificar o fabricante pelo prefixo OUI.
+    Recebe um MAC e tenta identificar o fabricante pelo prefixo OUI,
+    escolhendo o bloco mais específico (MA-S, MA-M ou MA-L).
     """
     if not endereco_mac or endereco_mac == "Desconhecido":
         return "Desconhecido"
 
-    prefixo_oui = endereco_mac.upper()[0:8].replace(":", "-")  # primeiros 3 bytes
-    return DICIONARIO_OUI.get(prefixo_oui, "Desconhecido")
+    try:
+        mac_inteiro = mac_para_inteiro(endereco_mac)
+    except ValueError:
+        return "Desconhecido"
+
+    return obter_indice_oui().buscar(mac_inteiro) or "Desconhecido"
 
 
 # ---------- Definir tipo de dispositivo baseado no OUI + IP ----------
-def definir_tipo_dispositivo(endereco_ip, endereco_ip_local, nome_fabricante_oui):
-    """
-    Retorna uma descrição do tipo de dispositivo (roteador, celular, PC, etc).
-    """
-    if endereco_ip == endereco_ip_local:
-        return "Dispositivo Local"
-    if endereco_ip.endswith(".1"):
-        return "Roteador/Switch"
-
-    if nome_fabricante_oui == "Desconhecido":
-        return "Host"
-
-    nome_fabricante_minusculo = nome_fabricante_oui.lower()
-
-    # Apple
-    if "apple" in nome_fabricante_minusculo:
-        return "iPhone / iPad / Mac"
-
-    # Celulares
-    if "samsung" in nome_fabricante_minusculo:
-        return "Celular Samsung"
-    if "huawei" in nome_fabricante_minusculo:
-        return "Celular Huawei"
-    if "xiaomi" in nome_fabricante_minusculo or "redmi" in nome_fabricante_minusculo:
-        return "Celular Xiaomi"
-    if "motorola" in nome_fabricante_minusculo or "lenovo" in nome_fabricante_minusculo:
-        return "Celular Motorola/Lenovo"
-    if ("oppo" in nome_fabricante_minusculo or
-        "realme" in nome_fabricante_minusculo or
-        "oneplus" in nome_fabricante_minusculo):
-        return "Celular Oppo/Realme/OnePlus"
-
-    # Roteadores e switches
-    if "tp-link" in nome_fabricante_minusculo or "tplink" in nome_fabricante_minusculo:
-        return "Roteador TP-Link"
-    if "d-link" in nome_fabricante_minusculo:
-        return "Roteador D-Link"
-    if "cisco" in nome_fabricante_minusculo:
-        return "Roteador Cisco"
-    if "zte" in nome_fabricante_minusculo:
-        return "Roteador ZTE"
-
-    # Computadores
-    if ("intel" in nome_fabricante_minusculo or
-        "hewlett" in nome_fabricante_minusculo or
-        "dell" in nome_fabricante_minusculo or
-        "asus" in nome_fabricante_minusculo or
-        "micro-star" in nome_fabricante_minusculo or
-        "msi" in nome_fabricante_minusculo):
-        return "Computador/Notebook"
-
-    if ("realtek" in nome_fabricante_minusculo or
-        "broadcom" in nome_fabricante_minusculo or
-        "qualcomm" in nome_fabricante_minusculo):
-        return "Placa de Rede (PC/Notebook)"
-
-    # Consoles
-    if "xbox" in nome_fabricante_minusculo:
-        return "Console Xbox"
-    if "sony" in nome_fabricante_minusculo or "playstation" in nome_fabricante_minusculo:
-        return "Console PlayStation"
-    if "nintendo" in nome_fabricante_minusculo:
-        return "Console Nintendo"
-
-    # IoT / Dispositivos inteligentes
-    if ("gaoshengda" in nome_fabricante_minusculo or
-        "shenzhen" in nome_fabricante_minusculo or
-        "semiconductor" in nome_fabricante_minusculo):
-        return "Dispositivo IoT"
-
-    return "Host"
+CAMINHO_REGRAS_DISPOSITIVO = obter_caminho_recurso("tipos_dispositivo.json")
+CAMINHO_PROC_ROTAS = "/proc/net/route"
+CONDICOES_IP = ("ip_local", "gateway")
+
+
+class ClassificadorDispositivos:
+    """
+    Tabela de regras compilada. Regras com "condicao" ("ip_local" ou
+    "gateway") olham o IP; regras com "fabricantes" procuram trechos no nome
+    do fabricante. Vence a regra de menor "prioridade".
+
+    Todos os trechos viram uma única expressão regular (uma alternativa por
+    trecho, em ordem de prioridade, dentro de um lookahead para achar
+    também ocorrências sobrepostas), e o resultado por fabricante é
+    memorizado em um cache limitado.
+    """
+
+    def __init__(self, regras, tipo_padrao="Host", tamanho_cache=4096):
+        regras_ordenadas = sorted(regras, key=lambda regra: regra.get("prioridade", 1000))
+        self.tipo_padrao = tipo_padrao
+        self.regras_ip = [
+            (regra["condicao"], regra["tipo"], regra.get("prioridade", 1000))
+            for regra in regras_ordenadas if "condicao" in regra
+        ]
+        for condicao, _tipo, _prioridade in self.regras_ip:
+            if condicao not in CONDICOES_IP:
+                raise ValueError(f"Condição de regra desconhecida: {condicao}")
+
+        # Cada grupo da expressão corresponde a um trecho; guardamos
+        # (prioridade, tipo) por número de grupo
+        alternativas = []
+        self.regras_por_grupo = [None]
+        for regra in regras_ordenadas:
+            for trecho in regra.get("fabricantes", []):
+                alternativas.append(f"({re.escape(trecho.lower())})")
+                self.regras_por_grupo.append((regra.get("prioridade", 1000), regra["tipo"]))
+
+        self.expressao_fabricantes = (
+            re.compile("(?=" + "|".join(alternativas) + ")") if alternativas else None
+        )
+        self.classificar_fabricante = functools.lru_cache(maxsize=tamanho_cache)(
+            self._classificar_fabricante
+        )
+
+    def _classificar_fabricante(self, nome_fabricante_oui):
+        """
+        Retorna (prioridade, tipo) da regra de fabricante vencedora, ou None.
+        """
+        if self.expressao_fabricantes is None or nome_fabricante_oui == "Desconhecido":
+            return None
+
+        melhor_regra = None
+        for correspondencia in self.expressao_fabricantes.finditer(nome_fabricante_oui.lower()):
+            regra = self.regras_por_grupo[correspondencia.lastindex]
+            if melhor_regra is None or regra[0] < melhor_regra[0]:
+                melhor_regra = regra
+        return melhor_regra
+
+    def classificar(self, endereco_ip, endereco_ip_local, nome_fabricante_oui, mascara_rede=None):
+        regra_fabricante = self.classificar_fabricante(nome_fabricante_oui)
+
+        for condicao, tipo, prioridade in self.regras_ip:
+            if regra_fabricante is not None and regra_fabricante[0] < prioridade:
+                break
+            if condicao == "ip_local" and endereco_ip == endereco_ip_local:
+                return tipo
+            if condicao == "gateway" and eh_gateway(endereco_ip, endereco_ip_local, mascara_rede):
+                return tipo
+
+        return regra_fabricante[1] if regra_fabricante else self.tipo_padrao
+
+
+def carregar_regras_dispositivo(caminho_regras):
+    """
+    Lê um arquivo JSON de regras: {"padrao": "...", "regras": [...]}.
+    """
+    with open(caminho_regras, "r", encoding="utf-8") as arquivo_regras:
+        conteudo = json.load(arquivo_regras)
+    return conteudo.get("regras", []), conteudo.get("padrao", "Host")
+
+
+def configurar_classificador(caminhos_regras=None):
+    """
+    Monta o classificador com as regras padrão (tipos_dispositivo.json) e,
+    opcionalmente, regras extras de outros arquivos — por padrão, do arquivo
+    indicado na variável de ambiente IPSCAN_REGRAS_DISPOSITIVO.
+    """
+    global _classificador_dispositivos
+
+    if caminhos_regras is None:
+        caminhos_regras = [CAMINHO_REGRAS_DISPOSITIVO]
+        if os.environ.get("IPSCAN_REGRAS_DISPOSITIVO"):
+            caminhos_regras.append(os.environ["IPSCAN_REGRAS_DISPOSITIVO"])
+
+    regras = []
+    tipo_padrao = "Host"
+    for caminho_regras in caminhos_regras:
+        try:
+            regras_arquivo, tipo_padrao = carregar_regras_dispositivo(caminho_regras)
+            regras.extend(regras_arquivo)
+        except Exception as erro_regras:
+            print(f"Erro ao carregar regras de dispositivo ({caminho_regras}): {erro_regras}")
+
+    _classificador_dispositivos = ClassificadorDispositivos(regras, tipo_padrao)
+    return _classificador_dispositivos
+
+
+_classificador_dispositivos = None
+_trava_classificador = threading.Lock()
+
+
+def obter_classificador():
+    if _classificador_dispositivos is None:
+        with _trava_classificador:
+            if _classificador_dispositivos is None:
+                configurar_classificador()
+    return _classificador_dispositivos
+
+
+# A classificação consulta o gateway a cada host: a rota padrão é relida no
+# máximo a cada VALIDADE_GATEWAY_PADRAO segundos, o que ainda acompanha uma
+# troca de rede ou VPN durante o monitoramento e entre varreduras da interface
+VALIDADE_GATEWAY_PADRAO = 5.0
+_leitura_gateway_padrao = (None, None)  # (instante time.monotonic(), gateway)
+
+
+def ler_gateway_padrao():
+    """
+    Retorna o IPv4 do gateway padrão do sistema (Linux, via /proc/net/route),
+    ou None quando não for possível descobrir.
+    """
+    try:
+        with open(CAMINHO_PROC_ROTAS, "r", encoding="utf-8") as arquivo_rotas:
+            for linha in arquivo_rotas.readlines()[1:]:
+                colunas = linha.split()
+                if len(colunas) >= 3 and colunas[1] == "00000000" and colunas[2] != "00000000":
+                    return socket.inet_ntoa(struct.pack("<I", int(colunas[2], 16)))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def obter_gateway_padrao():
+    """
+    ler_gateway_padrao com a última leitura reaproveitada por
+    VALIDADE_GATEWAY_PADRAO segundos.
+    """
+    global _leitura_gateway_padrao
+
+    instante_leitura, gateway_padrao = _leitura_gateway_padrao
+    agora = time.monotonic()
+    if instante_leitura is None or agora - instante_leitura >= VALIDADE_GATEWAY_PADRAO:
+        gateway_padrao = ler_gateway_padrao()
+        _leitura_gateway_padrao = (agora, gateway_padrao)
+    return gateway_padrao
+
+
+@functools.lru_cache(maxsize=64)
+def obter_primeiro_host(endereco_ip_local, mascara_rede):
+    return socket.inet_ntoa(
+        intervalo_hosts_rede(interpretar_rede(endereco_ip_local, mascara_rede))[0].to_bytes(4, "big")
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _gateway_na_rede(endereco_ip_local, mascara_rede, gateway_padrao):
+    try:
+        rede = interpretar_rede(endereco_ip_local, mascara_rede)
+    except ValueError:
+        return None
+    if gateway_padrao is not None and ipaddress.IPv4Address(gateway_padrao) in rede:
+        return gateway_padrao
+    return obter_primeiro_host(endereco_ip_local, mascara_rede)
+
+
+def obter_gateway_rede(endereco_ip_local, mascara_rede):
+    """
+    Gateway da sub-rede varrida: o roteador padrão do sistema, se ele estiver
+    dentro dela, senão o primeiro host. None se a rede for inválida.
+    """
+    return _gateway_na_rede(endereco_ip_local, mascara_rede, obter_gateway_padrao())
+
+
+def eh_gateway(endereco_ip, endereco_ip_local, mascara_rede=None):
+    """
+    Considera gateway o roteador padrão do sistema quando ele está na
+    sub-rede local ou, na falta dele, o primeiro host dessa sub-rede (sem
+    máscara, assume /24).
+    """
+    return endereco_ip == obter_gateway_rede(endereco_ip_local, mascara_rede or "24")
+
+
+def definir_tipo_dispositivo(endereco_ip, endereco_ip_local, nome_fabricante_oui, mascara_rede=None):
+    """
+    Retorna uma descrição do tipo de dispositivo (roteador, celular, PC, etc),
+    conforme a tabela de regras (tipos_dispositivo.json).
+    """
+    return obter_classificador().classificar(
+        endereco_ip, endereco_ip_local, nome_fabricante_oui, mascara_rede
+    )
+
+
+# ---------- Tabela de vizinhos (cache ARP do sistema) ----------
+CAMINHO_PROC_ARP = "/proc/net/arp"
+PADRAO_ENDERECO_MAC = re.compile(r"([0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5})")
+PADRAO_ENDERECO_IPV4 = re.compile(r"\b(\d{1,3}(?:\.\d{1,3}){3})\b")
+MAC_INCOMPLETO = "00:00:00:00:00:00"
+
+
+def normalizar_mac(endereco_mac):
+    """
+    Padroniza um MAC como "AA:BB:CC:DD:EE:FF".
+    """
+    return endereco_mac.upper().replace("-", ":")
+
+
+def analisar_tabela_proc_arp(texto):
+    """
+    Interpreta o conteúdo de /proc/net/arp e retorna {ip: mac}.
+    Entradas incompletas (flags 0x0) são ignoradas.
+    """
+    tabela = {}
+    for linha in texto.splitlines()[1:]:
+        colunas = linha.split()
+        if len(colunas) < 4:
+            continue
+        endereco_ip, _tipo_hw, flags, endereco_mac = colunas[:4]
+        if int(flags, 16) & 0x2 == 0 or endereco_mac == MAC_INCOMPLETO:
+            continue
+        tabela[endereco_ip] = normalizar_mac(endereco_mac)
+    return tabela
+
+
+def analisar_ip_neigh(texto):
+    """
+    Interpreta a saída de 'ip neigh' e retorna {ip: mac}.
+    """
+    tabela = {}
+    for linha in texto.splitlines():
+        colunas = linha.split()
+        if "lladdr" not in colunas or "FAILED" in colunas or "INCOMPLETE" in colunas:
+            continue
+        tabela[colunas[0]] = normalizar_mac(colunas[colunas.index("lladdr") + 1])
+    return tabela
+
+
+def analisar_arp_a(texto):
+    """
+    Interpreta a saída de 'arp -a' (Windows, macOS, BSD) e retorna {ip: mac}.
+    """
+    tabela = {}
+    for linha in texto.splitlines():
+        correspondencia_ip = PADRAO_ENDERECO_IPV4.search(linha)
+        correspondencia_mac = PADRAO_ENDERECO_MAC.search(linha)
+        if correspondencia_ip and correspondencia_mac:
+            endereco_mac = normalizar_mac(correspondencia_mac.group(1))
+            if endereco_mac not in (MAC_INCOMPLETO, "FF:FF:FF:FF:FF:FF"):
+                tabela[correspondencia_ip.group(1)] = endereco_mac
+    return tabela
+
+
+def analisar_tabela_vizinhos(texto):
+    """
+    Detecta o formato (/proc/net/arp, 'ip neigh' ou 'arp -a') e interpreta a tabela.
+    Útil também para alimentar testes com uma tabela capturada.
+    """
+    if texto.startswith("IP address"):
+        return analisar_tabela_proc_arp(texto)
+    if " lladdr " in texto:
+        return analisar_ip_neigh(texto)
+    return analisar_arp_a(texto)
+
+
+def ler_tabela_vizinhos():
+    """
+    Lê de uma só vez a tabela de vizinhos do sistema e retorna {ip: mac}.
+    No Linux usa /proc/net/arp (sem subprocesso) e, na falta dele, 'ip neigh'.
+    """
+    try:
+        if platform.system() == "Windows":
+            return analisar_arp_a(subprocess.check_output(
+                ["arp", "-a"], text=True, encoding="utf-8", errors="ignore"
+            ))
+
+        if os.path.exists(CAMINHO_PROC_ARP):
+            with open(CAMINHO_PROC_ARP, "r", encoding="utf-8") as arquivo_arp:
+                return analisar_tabela_proc_arp(arquivo_arp.read())
+
+        try:
+            return analisar_ip_neigh(subprocess.check_output(["ip", "neigh"], text=True))
+        except (OSError, subprocess.CalledProcessError):
+            return analisar_arp_a(subprocess.check_output(["arp", "-a"], text=True))
+
+    except Exception as erro_tabela:
+        print(f"Erro ao ler tabela de vizinhos: {erro_tabela}")
+        return {}
+
+
+class CacheVizinhos:
+    """
+    Índice IP -> MAC montado a partir da tabela de vizinhos do sistema.
+    A tabela é lida inteira de uma vez; consultas a IPs ausentes só provocam
+    nova leitura se a última tiver mais de 'intervalo_minimo' segundos.
+    """
+
+    def __init__(self, funcao_leitura=ler_tabela_vizinhos, intervalo_minimo=0.25):
+        self.funcao_leitura = funcao_leitura
+        self.intervalo_minimo = intervalo_minimo
+        self.tabela = {}
+        self.instante_leitura = None
+
+    @classmethod
+    def de_arquivo(cls, caminho_arquivo):
+        """
+        Cria um cache fixo a partir de uma tabela capturada em arquivo.
+        """
+        with open(caminho_arquivo, "r", encoding="utf-8") as arquivo_tabela:
+            tabela = analisar_tabela_vizinhos(arquivo_tabela.read())
+        return cls(funcao_leitura=lambda: tabela, intervalo_minimo=float("inf"))
+
+    def atualizar(self):
+        with metricas.medir("tabela_vizinhos"):
+            self.tabela = self.funcao_leitura()
+        self.instante_leitura = time.monotonic()
+
+    def obter(self, endereco_ip, atualizar_se_ausente=True):
+        endereco_mac = self.tabela.get(endereco_ip)
+        if endereco_mac is None and atualizar_se_ausente and (
+                self.instante_leitura is None or
+                time.monotonic() - self.instante_leitura >= self.intervalo_minimo):
+            self.atualizar()
+            endereco_mac = self.tabela.get(endereco_ip)
+        return endereco_mac or "Desconhecido"
 
 
 # ---------- Obter MAC de um IP via ARP ----------
 def obter_mac_arp(endereco_ip):
     """
-    Envia um ping e consulta a tabela ARP para obter o MAC do IP informado.
+    Consulta a tabela de vizinhos do sistema para obter o MAC do IP informado.
+    Para vários IPs, prefira um único CacheVizinhos.
+    """
+    with metricas.medir("tabela_vizinhos"):
+        tabela = ler_tabela_vizinhos()
+    return tabela.get(endereco_ip, "Desconhecido")
+
+
+# ---------- Alvos da varredura (CIDR, faixas e exclusões) ----------
+def interpretar_rede(endereco_ip, mascara_rede):
+    """
+    Converte IP + máscara em uma rede IPv4. Aceita máscara pontuada
+    ("255.255.240.0"), prefixo ("20") ou prefixo com barra ("/20").
+    """
+    mascara_rede = str(mascara_rede).strip().lstrip("/")
+    return ipaddress.IPv4Network(f"{endereco_ip}/{mascara_rede}", strict=False)
+
+
+def intervalo_hosts_rede(rede, somente_hosts=True):
+    """
+    Retorna (primeiro, último) endereço de host da rede como inteiros.
+    Redes /31 e /32 não têm endereço de rede nem de broadcast reservados.
+    Com 'somente_hosts=False' devolve o bloco inteiro.
+    """
+    inicio = int(rede.network_address)
+    fim = int(rede.broadcast_address)
+    if somente_hosts and rede.prefixlen <= 30:
+        inicio += 1
+        fim -= 1
+    return inicio, fim
+
+
+def interpretar_especificacao_alvo(especificacao, somente_hosts=True):
+    """
+    Converte um alvo em um intervalo (inicio, fim) de inteiros. Formatos:
+    "10.0.0.5", "10.0.0.0/16", "10.0.0.0/255.255.0.0",
+    "10.0.0.10-10.0.0.50" e "10.0.0.10-50" (último octeto).
+    """
+    especificacao = especificacao.strip()
+
+    if "/" in especificacao:
+        endereco_ip, mascara_rede = especificacao.split("/", 1)
+        return intervalo_hosts_rede(interpretar_rede(endereco_ip, mascara_rede), somente_hosts)
+
+    if "-" in especificacao:
+        texto_inicio, texto_fim = (parte.strip() for parte in especificacao.split("-", 1))
+        inicio = int(ipaddress.IPv4Address(texto_inicio))
+        if "." in texto_fim:
+            fim = int(ipaddress.IPv4Address(texto_fim))
+        else:
+            ultimo_octeto = int(texto_fim)
+            if not 0 <= ultimo_octeto <= 255:
+                raise ValueError(f"Faixa inválida: {especificacao}")
+            fim = (inicio & 0xFFFFFF00) | ultimo_octeto
+        if fim < inicio:
+            raise ValueError(f"Faixa inválida: {especificacao}")
+        return inicio, fim
+
+    endereco = int(ipaddress.IPv4Address(especificacao))
+    return endereco, endereco
+
+
+def unir_intervalos(intervalos):
+    """
+    Ordena e funde intervalos (inicio, fim) sobrepostos ou adjacentes.
+    """
+    intervalos_unidos = []
+    for inicio, fim in sorted(intervalos):
+        if intervalos_unidos and inicio <= intervalos_unidos[-1][1] + 1:
+            if fim > intervalos_unidos[-1][1]:
+                intervalos_unidos[-1][1] = fim
+        else:
+            intervalos_unidos.append([inicio, fim])
+    return [(inicio, fim) for inicio, fim in intervalos_unidos]
+
+
+def subtrair_intervalos(intervalos, intervalos_excluidos):
+    """
+    Remove dos intervalos (já unidos) os trechos cobertos pelas exclusões.
+    """
+    resultado = []
+    exclusoes = unir_intervalos(intervalos_excluidos)
+
+    for inicio, fim in intervalos:
+        atual = inicio
+        for inicio_exclusao, fim_exclusao in exclusoes:
+            if fim_exclusao < atual:
+                continue
+            if inicio_exclusao > fim:
+                break
+            if inicio_exclusao > atual:
+                resultado.append((atual, inicio_exclusao - 1))
+            atual = max(atual, fim_exclusao + 1)
+            if atual > fim:
+                break
+        if atual <= fim:
+            resultado.append((atual, fim))
+
+    return resultado
+
+
+class AlvosVarredura:
+    """
+    Conjunto de endereços a sondar, guardado como intervalos de inteiros.
+    A iteração gera os IPs sob demanda, então uma /16 nunca é materializada
+    por inteiro; len() devolve a quantidade real de hosts.
+    """
+
+    def __init__(self, especificacoes, exclusoes=None):
+        if isinstance(especificacoes, str):
+            especificacoes = [especificacoes]
+        intervalos = unir_intervalos(
+            interpretar_especificacao_alvo(especificacao) for especificacao in especificacoes
+        )
+        intervalos_excluidos = [
+            interpretar_especificacao_alvo(especificacao, somente_hosts=False)
+            for especificacao in (exclusoes or [])
+        ]
+        self.intervalos = subtrair_intervalos(intervalos, intervalos_excluidos)
+        self.quantidade = sum(fim - inicio + 1 for inicio, fim in self.intervalos)
+
+    @classmethod
+    def da_rede_local(cls, endereco_ip_local, mascara_rede, exclusoes=None):
+        rede = interpretar_rede(endereco_ip_local, mascara_rede)
+        return cls([f"{rede.network_address}/{rede.prefixlen}"], exclusoes)
+
+    @classmethod
+    def de_intervalos(cls, intervalos):
+        """
+        Cria os alvos direto de intervalos (inicio, fim) de inteiros.
+        """
+        alvos = cls.__new__(cls)
+        alvos.intervalos = unir_intervalos(intervalos)
+        alvos.quantidade = sum(fim - inicio + 1 for inicio, fim in alvos.intervalos)
+        return alvos
+
+    def dividir(self, quantidade_partes, tamanho_bloco=256):
+        """
+        Divide os alvos em até 'quantidade_partes' listas de intervalos,
+        distribuindo blocos de 'tamanho_bloco' endereços em rodízio: hosts
+        costumam se concentrar no começo das faixas, e o rodízio espalha
+        essa carga entre as partes.
+        """
+        partes = [[] for _ in range(max(1, quantidade_partes))]
+        indice_bloco = 0
+        for inicio, fim in self.intervalos:
+            while inicio <= fim:
+                fim_bloco = min(fim, inicio + tamanho_bloco - 1)
+                partes[indice_bloco % len(partes)].append((inicio, fim_bloco))
+                indice_bloco += 1
+                inicio = fim_bloco + 1
+        return [parte for parte in partes if parte]
+
+    def __len__(self):
+        return self.quantidade
+
+    def __iter__(self):
+        for inicio, fim in self.intervalos:
+            for endereco in range(inicio, fim + 1):
+                yield socket.inet_ntoa(endereco.to_bytes(4, "big"))
+
+    def __contains__(self, endereco_ip):
+        endereco = int(ipaddress.IPv4Address(endereco_ip))
+        return any(inicio <= endereco <= fim for inicio, fim in self.intervalos)
+
+    def priorizar(self, enderecos_prioritarios):
+        """
+        Retorna os mesmos alvos, mas iterando primeiro os endereços
+        prioritários (os que não pertencem aos alvos são ignorados).
+        """
+        return AlvosPriorizados(self, enderecos_prioritarios)
+
+
+class AlvosPriorizados(AlvosVarredura):
+    """
+    AlvosVarredura cuja iteração começa por uma lista de endereços
+    prioritários (ex.: hosts ativos na última varredura).
+    """
+
+    def __init__(self, alvos, enderecos_prioritarios):
+        self.intervalos = alvos.intervalos
+        self.quantidade = alvos.quantidade
+        self.prioritarios = [
+            endereco_ip for endereco_ip in dict.fromkeys(enderecos_prioritarios)
+            if AlvosVarredura.__contains__(self, endereco_ip)
+        ]
+
+    def __iter__(self):
+        conjunto_prioritarios = set(self.prioritarios)
+        yield from self.prioritarios
+        for endereco_ip in AlvosVarredura.__iter__(self):
+            if endereco_ip not in conjunto_prioritarios:
+                yield endereco_ip
+
+
+# ---------- Motor de sondagem ICMP assíncrono ----------
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+CARGA_PACOTE_ECHO = b"IP-ScanED"
+MAXIMO_SONDAGENS_EXPIRADAS = 4096
+
+
+def calcular_checksum_icmp(dados):
+    """
+    Calcula o checksum da internet (RFC 1071) usado no cabeçalho ICMP.
+    """
+    if len(dados) % 2:
+        dados += b"\x00"
+    soma = sum(struct.unpack(f"!{len(dados) // 2}H", dados))
+    soma = (soma >> 16) + (soma & 0xFFFF)
+    soma += soma >> 16
+    return ~soma & 0xFFFF
+
+
+def montar_pacote_echo(identificador, sequencia, carga=CARGA_PACOTE_ECHO):
+    """
+    Monta um pacote ICMP Echo Request (sem cabeçalho IP).
+    """
+    cabecalho = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identificador, sequencia)
+    checksum = calcular_checksum_icmp(cabecalho + carga)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identificador, sequencia) + carga
+
+
+def interpretar_resposta_echo(pacote, possui_cabecalho_ip):
+    """
+    Retorna (identificador, sequencia) se o pacote for um Echo Reply, senão None.
+    Sockets RAW entregam o cabeçalho IP junto; sockets DGRAM não.
+    """
+    if possui_cabecalho_ip:
+        if not pacote:
+            return None
+        pacote = pacote[(pacote[0] & 0x0F) * 4:]
+    if len(pacote) < 8:
+        return None
+
+    tipo, _codigo, _checksum, identificador, sequencia = struct.unpack("!BBHHH", pacote[:8])
+    if tipo != ICMP_ECHO_REPLY:
+        return None
+    return identificador, sequencia
+
+
+def abrir_socket_icmp(ip_origem=None):
+    """
+    Abre um socket ICMP: primeiro tenta o modo sem privilégios (SOCK_DGRAM,
+    liberado por net.ipv4.ping_group_range no Linux) e depois SOCK_RAW.
+    Com 'ip_origem', o socket é vinculado a esse endereço local: os pacotes
+    saem por ele e só as respostas destinadas a ele são recebidas.
+    Retorna (socket, possui_cabecalho_ip).
     """
     try:
+        socket_icmp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        possui_cabecalho_ip = False
+    except OSError:
+        socket_icmp = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        possui_cabecalho_ip = True
+
+    if ip_origem:
+        try:
+            socket_icmp.bind((ip_origem, 0))
+        except OSError:
+            socket_icmp.close()
+            raise
+    return socket_icmp, possui_cabecalho_ip
+
+
+class TransporteIcmpSocket:
+    """
+    Transporte real: um único socket ICMP não bloqueante para toda a varredura.
+    As respostas são lidas pelo próprio event loop (add_reader).
+    'ip_origem' vincula o socket a um endereço local (ver abrir_socket_icmp).
+    """
+
+    def __init__(self, ip_origem=None):
+        self.ip_origem = ip_origem
+        self.socket_icmp = None
+        self.possui_cabecalho_ip = False
+        self.identificador = os.getpid() & 0xFFFF
+        self.loop = None
+        self.funcao_resposta = None
+
+    def abrir(self, loop, funcao_resposta):
+        self.socket_icmp, self.possui_cabecalho_ip = abrir_socket_icmp(self.ip_origem)
+        self.socket_icmp.setblocking(False)
+        self.loop = loop
+        self.funcao_resposta = funcao_resposta
+        try:
+            loop.add_reader(self.socket_icmp.fileno(), self._ler_respostas)
+        except NotImplementedError:
+            # Ex.: ProactorEventLoop no Windows
+            self.socket_icmp.close()
+            raise
+
+    def enviar(self, endereco_ip, sequencia, tempo_limite):
+        """
+        Retorna False se o kernel recusou o pacote por falta de buffer
+        (sinal de congestionamento para o ControleConcorrencia).
+        """
+        pacote = montar_pacote_echo(self.identificador, sequencia)
+        try:
+            self.socket_icmp.sendto(pacote, (endereco_ip, 0))
+        except OSError as erro_envio:
+            # Rota inexistente etc.: o timeout trata como sem resposta
+            return erro_envio.errno not in (errno.ENOBUFS, errno.EAGAIN, errno.EWOULDBLOCK)
+        return True
+
+    def _ler_respostas(self):
+        while True:
+            try:
+                pacote, endereco_origem = self.socket_icmp.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+
+            resposta = interpretar_resposta_echo(pacote, self.possui_cabecalho_ip)
+            if resposta is None:
+                continue
+
+            identificador, sequencia = resposta
+            # No modo DGRAM o kernel reescreve o identificador e já filtra por socket
+            if self.possui_cabecalho_ip and identificador != self.identificador:
+                continue
+
+            self.funcao_resposta(endereco_origem[0], sequencia)
+
+    def fechar(self):
+        if self.socket_icmp is not None:
+            try:
+                self.loop.remove_reader(self.socket_icmp.fileno())
+            except Exception:
+                pass
+            self.socket_icmp.close()
+            self.socket_icmp = None
+
+
+class TransporteIcmpSubprocesso:
+    """
+    Alternativa quando não há socket ICMP disponível (ex.: Windows sem
+    privilégios de administrador): executa o 'ping' do sistema, sem shell.
+    """
+
+    def __init__(self, ip_origem=None):
+        self.ip_origem = ip_origem
+        self.loop = None
+        self.funcao_resposta = None
+        self.tarefas = set()
+
+    def abrir(self, loop, funcao_resposta):
+        self.loop = loop
+        self.funcao_resposta = funcao_resposta
+
+    def enviar(self, endereco_ip, sequencia, tempo_limite):
+        tarefa = self.loop.create_task(self._executar_ping(endereco_ip, sequencia, tempo_limite))
+        self.tarefas.add(tarefa)
+        tarefa.add_done_callback(self.tarefas.discard)
+
+    async def _executar_ping(self, endereco_ip, sequencia, tempo_limite):
         if platform.system() == "Windows":
-            subprocess.run(
-                f"ping -n 1 {endereco_ip}",
-                shell=True,
-                stdout=subprocess.DEVNULL
-            )
-            resultado_comando = subprocess.check_output(
-                f"arp -a {endereco_ip}",
-                shell=True,
-                text=True
-            )
+            argumentos = ["ping", "-n", "1", "-w", str(max(1, int(tempo_limite * 1000)))]
+            opcao_origem = "-S"
         else:
-            subprocess.run(
-                f"ping -c 1 {endereco_ip}",
-                shell=True,
-                stdout=subprocess.DEVNULL
-            )
-            resultado_comando = subprocess.check_output(
-                f"arp {endereco_ip}",
-                shell=True,
-                text=True
-            )
+            argumentos = ["ping", "-c", "1", "-W", str(max(1, round(tempo_limite)))]
+            opcao_origem = "-I"
+        if self.ip_origem:
+            argumentos += [opcao_origem, self.ip_origem]
+        argumentos.append(endereco_ip)
 
-        correspondencia_mac = re.search(
-            r"([0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5})",
-            resultado_comando
-        )
-        if correspondencia_mac:
-            return correspondencia_mac.group(1).upper()
+        try:
+            with metricas.medir("ping_subprocesso"):
+                processo = await asyncio.create_subprocess_exec(
+                    *argumentos,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL
+                )
+                codigo_retorno = await processo.wait()
+        except Exception:
+            return
 
-    except Exception:
+        if codigo_retorno == 0:
+            self.funcao_resposta(endereco_ip, sequencia)
+
+    def fechar(self):
+        for tarefa in self.tarefas:
+            tarefa.cancel()
+        self.tarefas.clear()
+
+
+class TransporteIcmpSimulado:
+    """
+    Transporte em memória para testes: responde apenas pelos IPs de
+    'hosts_ativos' (dict ip -> latência em segundos, ou um conjunto de IPs).
+    'taxa_perda' descarta essa fração dos pacotes, ao acaso ('semente'
+    torna o sorteio reproduzível).
+    """
+
+    def __init__(self, hosts_ativos, latencia_padrao=0.001, taxa_perda=0.0, semente=None):
+        if isinstance(hosts_ativos, dict):
+            self.hosts_ativos = dict(hosts_ativos)
+        else:
+            self.hosts_ativos = {endereco_ip: latencia_padrao for endereco_ip in hosts_ativos}
+        self.taxa_perda = taxa_perda
+        self.sorteio = random.Random(semente)
+        self.loop = None
+        self.funcao_resposta = None
+        self.pacotes_enviados = 0
+
+    def abrir(self, loop, funcao_resposta):
+        self.loop = loop
+        self.funcao_resposta = funcao_resposta
+
+    def enviar(self, endereco_ip, sequencia, tempo_limite):
+        self.pacotes_enviados += 1
+        latencia = self.hosts_ativos.get(endereco_ip)
+        if latencia is not None and not (self.taxa_perda and self.sorteio.random() < self.taxa_perda):
+            self.loop.call_later(latencia, self.funcao_resposta, endereco_ip, sequencia)
+
+    def fechar(self):
         pass
 
-    return "Desconhecido"
+
+def abrir_transporte_icmp(loop, funcao_resposta, transporte=None, ip_origem=None):
+    """
+    Abre o transporte informado ou, se nenhum for passado, o melhor
+    disponível: socket ICMP próprio e, em último caso, o 'ping' do sistema.
+    'ip_origem' escolhe o endereço local de onde as sondagens saem.
+    """
+    if transporte is not None:
+        transporte.abrir(loop, funcao_resposta)
+        return transporte
+
+    try:
+        transporte = TransporteIcmpSocket(ip_origem)
+        transporte.abrir(loop, funcao_resposta)
+    except (OSError, NotImplementedError):
+        transporte = TransporteIcmpSubprocesso(ip_origem)
+        transporte.abrir(loop, funcao_resposta)
+    return transporte
 
 
-# ---------- Escanear rede ----------
-def escanear_rede(endereco_ip_local, mascara_rede, funcao_retorno_interface=None):
+# ---------- Controle de concorrência (AIMD) ----------
+# Com a varredura pausada (ou com pedido de parada), intervalo entre verificações
+INTERVALO_VERIFICACAO_PAUSA = 0.1
+
+
+class ControleConcorrencia:
     """
-    Escaneia a rede /24 do IP informado e retorna uma lista de dispositivos ativos:
-    [(ip, tipo_dispositivo, nome_oui, mac), ...]
-    Também chama 'funcao_retorno_interface' a cada IP processado (se fornecida).
+    Decide quantas sondagens podem ficar pendentes ao mesmo tempo (a
+    "janela"), no estilo AIMD do TCP: a janela cresce a cada sondagem
+    concluída (dobra por rodada até 'limiar', depois +1 por rodada) e cai
+    pela metade, no máximo uma vez por rodada, quando a perda estimada passa
+    de 'perda_tolerada' ou o kernel recusa um envio (buffer cheio).
+    Opcionalmente limita os envios a 'taxa_maxima' pacotes por segundo.
+
+    A perda é estimada só entre hosts que respondem: resposta na primeira
+    tentativa conta 0, resposta apenas na retentativa conta 1. Timeouts
+    sozinhos não entram, porque endereços sem host também expiram; a
+    proporção deles fica em 'taxa_expiracao'. A tolerância evita que uma
+    perda de fundo constante (Wi-Fi, VPN) derrube a janela.
+
+    'janela', 'taxa_atual', 'estimativa_perda' e 'taxa_expiracao' podem ser
+    lidos a qualquer momento (ver estado()). pausar() e retomar() podem ser
+    chamados de qualquer thread: enquanto pausado, nenhum envio novo sai (as
+    sondagens já enviadas terminam normalmente).
+    """
+
+    def __init__(self, janela_inicial=32, janela_minima=4, janela_maxima=256,
+                 taxa_maxima=None, perda_tolerada=0.05, peso_media=0.01):
+        self.janela_minima = max(1, janela_minima)
+        self.janela_maxima = max(self.janela_minima, janela_maxima)
+        self.janela = float(min(max(janela_inicial, self.janela_minima), self.janela_maxima))
+        self.limiar = float(self.janela_maxima)
+        self.taxa_maxima = taxa_maxima
+        self.perda_tolerada = perda_tolerada
+        self.peso_media = peso_media
+
+        self.em_voo = 0
+        self.pacotes_enviados = 0
+        self.estimativa_perda = 0.0
+        self.taxa_expiracao = 0.0
+        self.instante_inicio = None
+        # Ainda sem redução, a primeira perda já pode reduzir: na partida
+        # lenta a janela cresce junto com as conclusões e nunca seria alcançada
+        self.conclusoes_desde_reducao = float("inf")
+        self.proximo_envio = 0.0
+        self.esperando = collections.deque()
+        self.liberado = threading.Event()
+        self.liberado.set()
+
+    def __getstate__(self):
+        # varredura_processos manda um controle para cada processo: o Event
+        # não é serializável e vai só como o estado "pausado"
+        estado = dict(self.__dict__, liberado=self.liberado.is_set())
+        estado["esperando"] = collections.deque()
+        return estado
+
+    def __setstate__(self, estado):
+        liberado = estado.pop("liberado")
+        self.__dict__.update(estado)
+        self.liberado = threading.Event()
+        if liberado:
+            self.liberado.set()
+
+    @property
+    def taxa_atual(self):
+        """
+        Pacotes por segundo enviados desde o primeiro envio.
+        """
+        if self.instante_inicio is None:
+            return 0.0
+        decorrido = time.monotonic() - self.instante_inicio
+        return self.pacotes_enviados / decorrido if decorrido > 0 else 0.0
+
+    @property
+    def pausado(self):
+        return not self.liberado.is_set()
+
+    def pausar(self):
+        self.liberado.clear()
+
+    def retomar(self):
+        self.liberado.set()
+
+    async def aguardar_liberacao(self):
+        """
+        Retorna logo se não estiver pausado; senão, espera o retomar().
+        """
+        while not self.liberado.is_set():
+            await asyncio.sleep(INTERVALO_VERIFICACAO_PAUSA)
+
+    def estado(self):
+        return {
+            "pausado": self.pausado,
+            "janela": int(self.janela),
+            "em_voo": self.em_voo,
+            "pacotes_enviados": self.pacotes_enviados,
+            "taxa_atual": round(self.taxa_atual, 1),
+            "taxa_maxima": self.taxa_maxima,
+            "estimativa_perda": round(self.estimativa_perda, 4),
+            "taxa_expiracao": round(self.taxa_expiracao, 4),
+        }
+
+    async def adquirir(self):
+        """
+        Espera uma vaga na janela (e, com 'taxa_maxima', a vez do próximo
+        pacote). Cada adquirir() deve ter um liberar() correspondente.
+        """
+        await self.aguardar_liberacao()
+        loop = asyncio.get_running_loop()
+        while self.em_voo >= int(self.janela):
+            futuro = loop.create_future()
+            self.esperando.append(futuro)
+            await futuro
+        self.em_voo += 1
+
+        agora = time.monotonic()
+        if self.instante_inicio is None:
+            self.instante_inicio = agora
+        if self.taxa_maxima:
+            espera = self.proximo_envio - agora
+            self.proximo_envio = max(agora, self.proximo_envio) + 1.0 / self.taxa_maxima
+            if espera > 0:
+                try:
+                    await asyncio.sleep(espera)
+                except asyncio.CancelledError:
+                    self.liberar()
+                    raise
+        self.pacotes_enviados += 1
+
+    def liberar(self):
+        self.em_voo -= 1
+        self._acordar()
+
+    def _acordar(self):
+        vagas = int(self.janela) - self.em_voo
+        while vagas > 0 and self.esperando:
+            futuro = self.esperando.popleft()
+            if not futuro.done():
+                futuro.set_result(None)
+                vagas -= 1
+
+    def _aumentar(self):
+        self.conclusoes_desde_reducao += 1
+        if self.janela < self.limiar:
+            self.janela += 1.0
+        else:
+            self.janela += 1.0 / self.janela
+        self.janela = min(self.janela, float(self.janela_maxima))
+        self._acordar()
+
+    def registrar_resposta(self):
+        self.estimativa_perda *= 1.0 - self.peso_media
+        self.taxa_expiracao *= 1.0 - self.peso_media
+        self._aumentar()
+
+    def registrar_expiracao(self):
+        self.taxa_expiracao += self.peso_media * (1.0 - self.taxa_expiracao)
+        self._aumentar()
+
+    def registrar_perda(self, envio_recusado=False):
+        """
+        'envio_recusado' indica que o próprio kernel descartou o pacote:
+        a janela é reduzida mesmo abaixo da perda tolerada.
+        """
+        if not envio_recusado:
+            self.estimativa_perda += self.peso_media * (1.0 - self.estimativa_perda)
+            self.taxa_expiracao *= 1.0 - self.peso_media
+            self._aumentar()
+            if self.estimativa_perda <= self.perda_tolerada:
+                return
+
+        # No máximo uma redução por rodada (uma janela inteira de sondagens
+        # concluídas): as perdas de uma mesma rajada contam como um evento
+        if self.conclusoes_desde_reducao < self.janela:
+            return
+        self.conclusoes_desde_reducao = 0
+        self.janela = max(float(self.janela_minima), self.janela / 2)
+        self.limiar = self.janela
+
+
+# ---------- Estimativa de RTT (timeouts adaptativos) ----------
+class EstimadorRtt:
+    """
+    Estima o RTT da varredura como o TCP (RFC 6298): média suavizada (SRTT)
+    e variação (RTTVAR) a cada resposta. O timeout de cada sondagem é
+    SRTT + 4 * RTTVAR, entre 'tempo_limite_minimo' e 'tempo_limite_maximo',
+    multiplicado por 'fator_retentativa' a cada nova tentativa. Antes da
+    primeira resposta vale o máximo.
+    """
+
+    ALFA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, tempo_limite_maximo=1.0, tempo_limite_minimo=0.1, fator_retentativa=2.0):
+        self.tempo_limite_maximo = tempo_limite_maximo
+        self.tempo_limite_minimo = min(tempo_limite_minimo, tempo_limite_maximo)
+        self.fator_retentativa = fator_retentativa
+        self.srtt = None
+        self.rttvar = None
+        self.amostras = 0
+
+    def registrar(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALFA) * self.srtt + self.ALFA * rtt
+        self.amostras += 1
+
+    def tempo_limite(self, tentativa=0):
+        if self.srtt is None:
+            return self.tempo_limite_maximo
+        base = max(self.tempo_limite_minimo, self.srtt + self.K * self.rttvar)
+        return min(self.tempo_limite_maximo, base * self.fator_retentativa ** tentativa)
+
+    def estado(self):
+        return {
+            "srtt": None if self.srtt is None else round(self.srtt, 6),
+            "rttvar": None if self.rttvar is None else round(self.rttvar, 6),
+            "tempo_limite": round(self.tempo_limite(), 6),
+            "amostras": self.amostras,
+        }
+
+
+async def sondar_enderecos_async(enderecos, tempo_limite=1.0, tentativas=1,
+                                 max_em_voo=256, transporte=None, tempo_limite_por_alvo=None,
+                                 controle=None, estimador=None, ip_origem=None):
     """
-    lista_dispositivos_ativos = []
+    Gerador assíncrono que envia ICMP Echo para cada endereço e produz
+    (ip, rtt, inicio) conforme cada host é concluído. 'rtt' é o tempo de ida
+    e volta em segundos, ou None sem resposta; 'inicio' é o instante
+    (time.time()) do primeiro envio.
+
+    O timeout de cada tentativa vem de 'estimador' (um EstimadorRtt; por
+    padrão um novo, com 'tempo_limite' como teto), que aprende o RTT da rede
+    durante a varredura. 'tempo_limite_por_alvo', se informado, é uma função
+    ip -> segundos que limita o timeout de cada endereço.
+
+    Quantas sondagens ficam pendentes é decidido por 'controle' (um
+    ControleConcorrencia; por padrão um novo, com janela máxima 'max_em_voo').
+    Um mesmo controle pode ser dividido entre várias varreduras simultâneas.
+    'ip_origem' vincula as sondagens a um endereço local.
+    """
+    loop = asyncio.get_running_loop()
+    pendentes = {}
+    # Sondagens que já expiraram: uma resposta tardia ainda ensina o estimador
+    expiradas = collections.OrderedDict()
+    contador_sequencia = itertools.count(1)
+
+    if estimador is None:
+        estimador = EstimadorRtt(tempo_limite)
+
+    def registrar_resposta(endereco_ip, sequencia):
+        instante_resposta = time.perf_counter()
+        futuro = pendentes.get((endereco_ip, sequencia))
+        if futuro is not None and not futuro.done():
+            futuro.set_result(instante_resposta)
+            return
+        instante_envio = expiradas.pop((endereco_ip, sequencia), None)
+        if instante_envio is not None:
+            metricas.incrementar("respostas_tardias")
+            estimador.registrar(instante_resposta - instante_envio)
+
+    def expirar(futuro):
+        if not futuro.done():
+            futuro.set_result(None)
+
+    if controle is None:
+        controle = ControleConcorrencia(janela_maxima=max_em_voo)
+    max_em_voo = controle.janela_maxima
+
+    transporte = abrir_transporte_icmp(loop, registrar_resposta, transporte, ip_origem)
+
+    async def sondar(endereco_ip):
+        instante_inicio = time.time()
+        limite_alvo = tempo_limite_por_alvo(endereco_ip) if tempo_limite_por_alvo else None
+        for tentativa in range(tentativas):
+            await controle.adquirir()
+            try:
+                tempo_limite_alvo = estimador.tempo_limite(tentativa)
+                if limite_alvo is not None:
+                    tempo_limite_alvo = min(tempo_limite_alvo, limite_alvo)
+                sequencia = next(contador_sequencia) & 0xFFFF
+                futuro = loop.create_future()
+                pendentes[(endereco_ip, sequencia)] = futuro
+                instante_envio = time.perf_counter()
+                metricas.incrementar("sondagens_enviadas")
+                if transporte.enviar(endereco_ip, sequencia, tempo_limite_alvo) is False:
+                    metricas.incrementar("envios_recusados")
+                    controle.registrar_perda(envio_recusado=True)
+                temporizador = loop.call_later(tempo_limite_alvo, expirar, futuro)
+                try:
+                    instante_resposta = await futuro
+                finally:
+                    temporizador.cancel()
+                    pendentes.pop((endereco_ip, sequencia), None)
+            finally:
+                controle.liberar()
+
+            if instante_resposta is not None:
+                rtt = instante_resposta - instante_envio
+                estimador.registrar(rtt)
+                metricas.incrementar("respostas_recebidas")
+                metricas.observar("rtt", rtt)
+
+                # Resposta só na retentativa: a primeira se perdeu no caminho
+                if tentativa > 0:
+                    controle.registrar_perda()
+                else:
+                    controle.registrar_resposta()
+                return endereco_ip, rtt, instante_inicio
+
+            metricas.incrementar("sondagens_expiradas")
+            expiradas[(endereco_ip, sequencia)] = instante_envio
+            if len(expiradas) > MAXIMO_SONDAGENS_EXPIRADAS:
+                expiradas.popitem(last=False)
+            controle.registrar_expiracao()
+        return endereco_ip, None, instante_inicio
 
-    partes_ip = endereco_ip_local.split(".")
-    base_rede = f"{partes_ip[0]}.{partes_ip[1]}.{partes_ip[2]}."
+    # Os trabalhadores puxam os endereços do mesmo iterador, sem materializar
+    # a lista de alvos; o controle decide quantos deles enviam ao mesmo tempo
+    iterador_enderecos = iter(enderecos)
+    fila_resultados = asyncio.Queue()
 
-    def ping_dispositivo(indice_host):
-        endereco_ip = f"{base_rede}{indice_host}"
+    async def trabalhador():
         try:
-            if platform.system() == "Windows":
-                resultado_ping = subprocess.run(
-                    f"ping -n 1 -w 100 {endereco_ip}",
-                    shell=True,
-                    stdout=subprocess.DEVNULL
-                )
+            for endereco_ip in iterador_enderecos:
+                fila_resultados.put_nowait(await sondar(endereco_ip))
+        finally:
+            fila_resultados.put_nowait(None)
+
+    trabalhadores = [loop.create_task(trabalhador()) for _ in range(max_em_voo)]
+    trabalhadores_ativos = len(trabalhadores)
+
+    try:
+        while trabalhadores_ativos:
+            resultado = await fila_resultados.get()
+            if resultado is None:
+                trabalhadores_ativos -= 1
+                continue
+            yield resultado
+    finally:
+        for tarefa in trabalhadores:
+            tarefa.cancel()
+        await asyncio.gather(*trabalhadores, return_exceptions=True)
+        transporte.fechar()
+
+
+# ---------- Varredura ARP (hosts no mesmo enlace) ----------
+ETH_P_ARP = 0x0806
+ARP_REQUISICAO = 1
+ARP_RESPOSTA = 2
+MAC_BROADCAST = b"\xff" * 6
+SIOCGIFADDR = 0x8915
+SIOCGIFHWADDR = 0x8927
+
+
+def montar_quadro_arp(operacao, mac_origem, ip_origem, mac_destino, ip_destino):
+    """
+    Monta um quadro Ethernet com um pacote ARP (IPv4 sobre Ethernet).
+    Os endereços MAC são bytes (6) e os IPs, strings.
+    """
+    mac_ethernet_destino = MAC_BROADCAST if operacao == ARP_REQUISICAO else mac_destino
+    return (
+        mac_ethernet_destino + mac_origem + struct.pack("!H", ETH_P_ARP) +
+        struct.pack("!HHBBH", 1, 0x0800, 6, 4, operacao) +
+        mac_origem + socket.inet_aton(ip_origem) +
+        mac_destino + socket.inet_aton(ip_destino)
+    )
+
+
+def interpretar_quadro_arp(quadro):
+    """
+    Retorna (operacao, ip_remetente, mac_remetente) de um quadro ARP, ou None.
+    """
+    if len(quadro) < 42 or quadro[12:14] != b"\x08\x06":
+        return None
+    _hw, protocolo, tamanho_hw, tamanho_protocolo, operacao = struct.unpack("!HHBBH", quadro[14:22])
+    if protocolo != 0x0800 or tamanho_hw != 6 or tamanho_protocolo != 4:
+        return None
+    mac_remetente = quadro[22:28].hex(":").upper()
+    ip_remetente = socket.inet_ntoa(quadro[28:32])
+    return operacao, ip_remetente, mac_remetente
+
+
+def obter_interface_do_ip(endereco_ip_local):
+    """
+    Linux: retorna (nome_interface, mac_em_bytes) da interface que possui o IP.
+    """
+    import fcntl
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as socket_consulta:
+        for _indice, nome_interface in socket.if_nameindex():
+            requisicao = struct.pack("256s", nome_interface.encode()[:15])
+            try:
+                resposta_ip = fcntl.ioctl(socket_consulta.fileno(), SIOCGIFADDR, requisicao)
+            except OSError:
+                continue
+            if socket.inet_ntoa(resposta_ip[20:24]) != endereco_ip_local:
+                continue
+            resposta_mac = fcntl.ioctl(socket_consulta.fileno(), SIOCGIFHWADDR, requisicao)
+            return nome_interface, resposta_mac[18:24]
+
+    raise OSError(f"Nenhuma interface com o IP {endereco_ip_local}")
+
+
+class TransporteQuadrosPacket:
+    """
+    Transporte real de quadros Ethernet: socket AF_PACKET (Linux, requer
+    CAP_NET_RAW) ligado à interface e filtrado para ARP. 'mac_origem'
+    (bytes) é o MAC da interface, usado nas requisições.
+    """
+
+    def __init__(self, nome_interface, mac_origem):
+        # O socket é criado já aqui para que a falta de permissão apareça
+        # antes de a varredura começar
+        self.nome_interface = nome_interface
+        self.mac_origem = mac_origem
+        self.socket_quadros = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+        self.socket_quadros.bind((nome_interface, ETH_P_ARP))
+        self.socket_quadros.setblocking(False)
+        self.loop = None
+        self.funcao_quadro = None
+
+    def abrir(self, loop, funcao_quadro):
+        self.loop = loop
+        self.funcao_quadro = funcao_quadro
+        loop.add_reader(self.socket_quadros.fileno(), self._ler_quadros)
+
+    def enviar(self, quadro):
+        try:
+            self.socket_quadros.send(quadro)
+        except OSError:
+            pass
+
+    def _ler_quadros(self):
+        while True:
+            try:
+                quadro = self.socket_quadros.recv(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            self.funcao_quadro(quadro)
+
+    def fechar(self):
+        if self.socket_quadros is not None:
+            try:
+                self.loop.remove_reader(self.socket_quadros.fileno())
+            except Exception:
+                pass
+            self.socket_quadros.close()
+            self.socket_quadros = None
+
+
+MAC_ORIGEM_SIMULADO = "02:00:00:00:00:01"
+
+
+class TransporteQuadrosSimulado:
+    """
+    Transporte de quadros em memória para testes: responde às requisições ARP
+    dos IPs em 'hosts_ativos' (dict ip -> mac "AA:BB:..") após 'latencia'.
+    Quadros gravados podem ser injetados com 'injetar'. 'mac_origem' é o MAC
+    da interface simulada (não depende da máquina onde o teste roda).
+    """
+
+    def __init__(self, hosts_ativos, latencia=0.001, mac_origem=MAC_ORIGEM_SIMULADO):
+        self.mac_origem = bytes.fromhex(mac_origem.replace(":", "").replace("-", ""))
+        self.hosts_ativos = {
+            endereco_ip: bytes.fromhex(endereco_mac.replace(":", "").replace("-", ""))
+            for endereco_ip, endereco_mac in hosts_ativos.items()
+        }
+        self.latencia = latencia
+        self.loop = None
+        self.funcao_quadro = None
+        self.quadros_enviados = 0
+
+    def abrir(self, loop, funcao_quadro):
+        self.loop = loop
+        self.funcao_quadro = funcao_quadro
+
+    def enviar(self, quadro):
+        self.quadros_enviados += 1
+        mac_solicitante = quadro[22:28]
+        ip_solicitante = socket.inet_ntoa(quadro[28:32])
+        ip_alvo = socket.inet_ntoa(quadro[38:42])
+        mac_alvo = self.hosts_ativos.get(ip_alvo)
+        if mac_alvo is not None:
+            resposta = montar_quadro_arp(ARP_RESPOSTA, mac_alvo, ip_alvo, mac_solicitante, ip_solicitante)
+            self.loop.call_later(self.latencia, self.funcao_quadro, resposta)
+
+    def injetar(self, quadro):
+        self.loop.call_soon(self.funcao_quadro, quadro)
+
+    def fechar(self):
+        pass
+
+
+async def varrer_arp_async(enderecos, ip_origem, mac_origem, transporte,
+                           taxa_pacotes=2000, tempo_espera=0.5, tentativas=2, estimador=None,
+                           controle=None):
+    """
+    Gerador assíncrono de varredura ARP: envia as requisições em rajada
+    cadenciada ('taxa_pacotes' por segundo), recebe todas as respostas em um
+    único laço e produz (ip, rtt, mac, inicio) conforme chegam. Ao final,
+    produz (ip, None, None, inicio) para quem não respondeu. 'enderecos'
+    precisa ser iterável mais de uma vez (ex.: AlvosVarredura).
+
+    A espera depois de cada rajada vem de 'estimador' (EstimadorRtt), com
+    'tempo_espera' como teto: as respostas da própria rajada ensinam quanto
+    tempo vale a pena esperar pelos que faltam. Com 'controle', a rajada
+    para enquanto ele estiver pausado.
+    """
+    loop = asyncio.get_running_loop()
+    diferenca_relogio = time.time() - time.perf_counter()
+    instantes_envio = {}
+    respondidos = set()
+    fila_respostas = asyncio.Queue()
+    rodada = {"atual": 0}
+
+    if estimador is None:
+        estimador = EstimadorRtt(tempo_espera)
+
+    def receber_quadro(quadro):
+        resposta = interpretar_quadro_arp(quadro)
+        if resposta is None:
+            return
+        operacao, endereco_ip, endereco_mac = resposta
+        if operacao != ARP_RESPOSTA or endereco_ip in respondidos:
+            return
+        instante_envio = instantes_envio.get(endereco_ip)
+        if instante_envio is None:
+            return
+        respondidos.add(endereco_ip)
+        metricas.incrementar("respostas_arp")
+        rtt = time.perf_counter() - instante_envio
+        # Depois da primeira rodada não se sabe a qual requisição a resposta se refere
+        if rodada["atual"] == 0:
+            estimador.registrar(rtt)
+        fila_respostas.put_nowait((endereco_ip, rtt, endereco_mac, instante_envio + diferenca_relogio))
+
+    transporte.abrir(loop, receber_quadro)
+
+    async def enviar_rajada():
+        lote = max(1, int(taxa_pacotes * 0.01))
+        for tentativa in range(tentativas):
+            rodada["atual"] = tentativa
+            enviados_no_lote = 0
+            for endereco_ip in enderecos:
+                if endereco_ip in respondidos or endereco_ip == ip_origem:
+                    continue
+                if tentativa == 0:
+                    instantes_envio[endereco_ip] = time.perf_counter()
+                transporte.enviar(montar_quadro_arp(
+                    ARP_REQUISICAO, mac_origem, ip_origem, b"\x00" * 6, endereco_ip
+                ))
+                metricas.incrementar("requisicoes_arp_enviadas")
+                enviados_no_lote += 1
+                if enviados_no_lote >= lote:
+                    enviados_no_lote = 0
+                    await asyncio.sleep(0.01)
+                    if controle is not None:
+                        await controle.aguardar_liberacao()
+            await asyncio.sleep(estimador.tempo_limite(tentativa))
+        fila_respostas.put_nowait(None)
+
+    tarefa_envio = loop.create_task(enviar_rajada())
+
+    try:
+        if ip_origem in enderecos:
+            yield ip_origem, 0.0, mac_origem.hex(":").upper(), time.time()
+
+        while True:
+            resposta = await fila_respostas.get()
+            if resposta is None:
+                break
+            yield resposta
+
+        for endereco_ip in enderecos:
+            if endereco_ip not in respondidos and endereco_ip != ip_origem:
+                yield endereco_ip, None, None, instantes_envio[endereco_ip] + diferenca_relogio
+    finally:
+        tarefa_envio.cancel()
+        await asyncio.gather(tarefa_envio, return_exceptions=True)
+        transporte.fechar()
+
+
+# ---------- Varredura em fluxo (resultados tipados) ----------
+class ResultadoHost(NamedTuple):
+    """
+    Resultado de um host sondado. 'rtt' em segundos (None sem resposta),
+    'metodo' é "icmp" ou "arp", 'inicio'/'fim' são instantes time.time(),
+    'origem' é o IP local pelo qual o host foi sondado, 'nome' o nome do
+    host (DNS reverso, mDNS ou NetBIOS), quando a resolução está ligada, e
+    'ipv6' os endereços IPv6 do mesmo MAC separados por espaço (ver
+    descoberta_ipv6.mesclar_por_mac).
+    """
+    ip: str
+    status: str
+    tipo: str
+    fabricante: str
+    mac: str
+    rtt: Optional[float]
+    metodo: str
+    inicio: float
+    fim: float
+    origem: Optional[str] = None
+    nome: Optional[str] = None
+    ipv6: Optional[str] = None
+
+
+def montar_alvos(endereco_ip_local, mascara_rede, alvos=None, exclusoes=None):
+    """
+    Retorna o AlvosVarredura de uma varredura: a rede local (IP + máscara)
+    ou, se informados, os 'alvos' explícitos, menos as 'exclusoes'.
+    """
+    if isinstance(alvos, AlvosVarredura):
+        return alvos
+    if alvos is None:
+        return AlvosVarredura.da_rede_local(endereco_ip_local, mascara_rede, exclusoes)
+    return AlvosVarredura(alvos, exclusoes)
+
+
+async def _fonte_icmp_async(enderecos, tempo_limite, transporte, opcoes_sondagem):
+    sondagens = sondar_enderecos_async(
+        enderecos, tempo_limite=tempo_limite, transporte=transporte, **opcoes_sondagem
+    )
+    try:
+        async for endereco_ip, rtt, instante_inicio in sondagens:
+            yield endereco_ip, rtt, None, instante_inicio
+    finally:
+        await sondagens.aclose()
+
+
+def _abrir_fonte_resultados(enderecos, endereco_ip_local, tempo_limite, transporte, metodo,
+                            opcoes_sondagem):
+    """
+    Escolhe o motor de descoberta. Retorna (gerador, metodo_usado); o
+    gerador produz (ip, rtt, mac ou None, inicio). 'opcoes_sondagem' vai
+    para sondar_enderecos_async (max_em_voo, controle, ...).
+    """
+    # Transporte injetado: é de quadros (ARP) se trouxer o próprio MAC de origem
+    transporte_de_quadros = transporte is not None and hasattr(transporte, "mac_origem")
+    if metodo == "arp" and transporte is not None and not transporte_de_quadros:
+        raise ValueError("A varredura ARP precisa de um transporte de quadros (com mac_origem)")
+    if metodo == "arp" or (metodo == "auto" and (transporte is None or transporte_de_quadros)):
+        try:
+            if transporte is None:
+                nome_interface, mac_origem = obter_interface_do_ip(endereco_ip_local)
+                transporte_quadros = TransporteQuadrosPacket(nome_interface, mac_origem)
             else:
-                resultado_ping = subprocess.run(
-                    f"ping -c 1 -W 1 {endereco_ip}",
-                    shell=True,
-                    stdout=subprocess.DEVNULL
-                )
+                transporte_quadros = transporte
+            mac_origem = transporte_quadros.mac_origem
+            controle = opcoes_sondagem.get("controle")
+            taxa_pacotes = controle.taxa_maxima if controle and controle.taxa_maxima else 2000
+            return varrer_arp_async(
+                enderecos,
+                endereco_ip_local,
+                mac_origem,
+                transporte_quadros,
+                taxa_pacotes=taxa_pacotes,
+                tempo_espera=tempo_limite / 2,
+                tentativas=opcoes_sondagem.get("tentativas", 2),
+                estimador=opcoes_sondagem.get("estimador"),
+                controle=controle
+            ), "arp"
+        except (OSError, ImportError, AttributeError, ValueError) as erro_arp:
+            if metodo == "arp":
+                raise
+            print(f"Varredura ARP indisponível, usando ICMP: {erro_arp}")
 
-            status_ip = "Ativo" if resultado_ping.returncode == 0 else "Inativo"
-            endereco_mac = obter_mac_arp(endereco_ip) if status_ip == "Ativo" else "Desconhecido"
-            nome_fabricante_oui = identificar_oui(endereco_mac)
-            tipo_dispositivo = definir_tipo_dispositivo(endereco_ip, endereco_ip_local, nome_fabricante_oui)
+    return _fonte_icmp_async(enderecos, tempo_limite, transporte, opcoes_sondagem), "icmp"
 
-            return (endereco_ip, tipo_dispositivo, nome_fabricante_oui, endereco_mac)
 
-        except Exception:
-            return (endereco_ip, "Desconhecido", "Desconhecido", "Desconhecido")
+async def varrer_rede_async(endereco_ip_local, mascara_rede, alvos=None, exclusoes=None,
+                            tempo_limite=1.0, transporte=None, cache_vizinhos=None,
+                            metodo="icmp", max_em_voo=256, tempo_limite_por_alvo=None,
+                            controle=None, estimador=None, tentativas=2, ip_origem=None,
+                            resolvedor_nomes=None):
+    """
+    Gerador assíncrono que produz um ResultadoHost por alvo, na ordem em que
+    as sondagens terminam. Os parâmetros são os mesmos de escanear_rede;
+    'max_em_voo' limita quantas sondagens ICMP ficam pendentes ao mesmo tempo,
+    'controle' (ControleConcorrencia) ajusta esse número conforme a perda
+    observada e 'tempo_limite_por_alvo' (ip -> segundos) ajusta o timeout de
+    cada host. 'tempo_limite' é o teto: o timeout real de cada uma das
+    'tentativas' vem de 'estimador' (EstimadorRtt), que mede o RTT da rede
+    durante a varredura. 'ip_origem' vincula as sondagens ICMP a um endereço
+    local (útil com várias interfaces, ver varrer_interfaces_async).
+    'resolvedor_nomes' (nomes.ResolvedorNomes) preenche o nome dos hosts
+    ativos em paralelo com as sondagens.
+    """
+    enderecos = montar_alvos(endereco_ip_local, mascara_rede, alvos, exclusoes)
+    if cache_vizinhos is None:
+        cache_vizinhos = CacheVizinhos()
 
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        tarefas_futuras = [
-            executor.submit(ping_dispositivo, indice_host)
-            for indice_host in range(1, 255)
-        ]
+    fonte_resultados, metodo_usado = _abrir_fonte_resultados(
+        enderecos, endereco_ip_local, tempo_limite, transporte, metodo,
+        {"max_em_voo": max_em_voo, "tempo_limite_por_alvo": tempo_limite_por_alvo,
+         "controle": controle, "estimador": estimador, "tentativas": tentativas,
+         "ip_origem": ip_origem}
+    )
 
-        for indice_concluido, tarefa_concluida in enumerate(as_completed(tarefas_futuras), start=1):
-            ip_dispositivo, tipo_dispositivo, nome_fabricante_oui, endereco_mac = tarefa_concluida.result()
-            lista_dispositivos_ativos.append(
-                (ip_dispositivo, tipo_dispositivo, nome_fabricante_oui, endereco_mac)
+    def montar_resultado(endereco_ip, rtt, endereco_mac, instante_inicio):
+        with metricas.medir("oui"):
+            nome_fabricante_oui = identificar_oui(endereco_mac)
+        with metricas.medir("classificacao"):
+            tipo_dispositivo = definir_tipo_dispositivo(
+                endereco_ip, endereco_ip_local, nome_fabricante_oui, mascara_rede
             )
+        metricas.incrementar("hosts_ativos" if rtt is not None else "hosts_inativos")
+        return ResultadoHost(
+            endereco_ip,
+            "Ativo" if rtt is not None else "Inativo",
+            tipo_dispositivo,
+            nome_fabricante_oui,
+            endereco_mac,
+            rtt,
+            metodo_usado,
+            instante_inicio,
+            time.time(),
+            endereco_ip_local
+        )
 
-            if funcao_retorno_interface:
-                percentual_progresso = int(indice_concluido / 254 * 100)
-                status_ip = "Ativo" if endereco_mac != "Desconhecido" else "Inativo"
-
-                funcao_retorno_interface(
-                    ip_dispositivo,
-                    status_ip,
-                    tipo_dispositivo,
-                    nome_fabricante_oui,
-                    percentual_progresso,
-                    endereco_mac
-                )
+    # Hosts que responderam mas ainda não apareciam na última leitura da
+    # tabela de vizinhos; saem na próxima releitura (ou no final)
+    hosts_sem_mac = []
+
+    def liberar_hosts_sem_mac():
+        cache_vizinhos.atualizar()
+        pendentes = list(hosts_sem_mac)
+        hosts_sem_mac.clear()
+        for endereco_ip, rtt, instante_inicio in pendentes:
+            yield montar_resultado(
+                endereco_ip, rtt, cache_vizinhos.obter(endereco_ip, atualizar_se_ausente=False),
+                instante_inicio
+            )
+
+    async def produzir_resultados():
+        instante_sem_mac = None
+        try:
+            async for endereco_ip, rtt, endereco_mac, instante_inicio in fonte_resultados:
+                if rtt is not None and endereco_mac is None:
+                    endereco_mac = cache_vizinhos.obter(endereco_ip)
+                if endereco_mac == "Desconhecido":
+                    # A entrada pode ainda não estar na tabela: espera a próxima leitura
+                    if not hosts_sem_mac:
+                        instante_sem_mac = time.monotonic()
+                    hosts_sem_mac.append((endereco_ip, rtt, instante_inicio))
+                else:
+                    yield montar_resultado(endereco_ip, rtt, endereco_mac or "Desconhecido", instante_inicio)
+
+                # Hosts sem MAC (ex.: fora do enlace) não ficam retidos até o fim
+                if (hosts_sem_mac and
+                        time.monotonic() - instante_sem_mac >= cache_vizinhos.intervalo_minimo):
+                    for resultado in liberar_hosts_sem_mac():
+                        yield resultado
+        finally:
+            # Fechada antes do fim (aclose), a fonte também precisa parar as sondagens
+            await fonte_resultados.aclose()
+
+        if hosts_sem_mac:
+            for resultado in liberar_hosts_sem_mac():
+                yield resultado
+
+    resultados = produzir_resultados()
+    if resolvedor_nomes is not None:
+        resultados = resolvedor_nomes.anotar(resultados)
+    try:
+        async for resultado in resultados:
+            yield resultado
+    finally:
+        await resultados.aclose()
+
+
+def iterar_em_thread(funcao_async, argumentos, opcoes, arquivo_perfil=None, parada=None):
+    """
+    Roda o gerador assíncrono funcao_async(*argumentos, **opcoes) em um event
+    loop de uma thread própria e entrega os itens como um gerador comum.
+    Interromper a iteração (break/close) cancela o gerador assíncrono; de
+    outra thread, acione 'parada' (threading.Event): o gerador assíncrono é
+    cancelado e a iteração termina normalmente, sem esperar o próximo item.
+    Com 'arquivo_perfil', a thread do event loop roda sob o cProfile e o
+    resultado é gravado nesse arquivo ao final.
+    """
+    fila_resultados = Queue()
+    fim_varredura = object()
+    estado = {"loop": None, "tarefa": None}
+    pronto = threading.Event()
+
+    async def produzir():
+        try:
+            async for resultado in funcao_async(*argumentos, **opcoes):
+                fila_resultados.put(resultado)
+        except Exception as erro_varredura:
+            fila_resultados.put(erro_varredura)
+        finally:
+            fila_resultados.put(fim_varredura)
+
+    def verificar_parada():
+        if parada.is_set():
+            estado["tarefa"].cancel()
+        elif not estado["tarefa"].done():
+            estado["loop"].call_later(INTERVALO_VERIFICACAO_PAUSA, verificar_parada)
+
+    def executar():
+        loop = asyncio.new_event_loop()
+        estado["loop"] = loop
+        estado["tarefa"] = loop.create_task(produzir())
+        if parada is not None:
+            loop.call_soon(verificar_parada)
+        pronto.set()
+        try:
+            loop.run_until_complete(estado["tarefa"])
+        except asyncio.CancelledError:
+            fila_resultados.put(fim_varredura)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def executar_com_perfil():
+        with perfilar(arquivo_perfil):
+            executar()
+
+    thread_varredura = threading.Thread(
+        target=executar_com_perfil if arquivo_perfil else executar,
+        daemon=True
+    )
+    thread_varredura.start()
+    pronto.wait()
+
+    try:
+        while True:
+            item = fila_resultados.get()
+            if item is fim_varredura:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if thread_varredura.is_alive():
+            try:
+                estado["loop"].call_soon_threadsafe(estado["tarefa"].cancel)
+            except RuntimeError:
+                pass  # o loop já terminou
+        thread_varredura.join()
+
+
+def varrer_rede(*argumentos, **opcoes):
+    """
+    Versão síncrona de varrer_rede_async: um gerador comum que produz cada
+    ResultadoHost assim que fica pronto. O event loop roda em uma thread
+    própria, então o consumidor pode demorar sem atrasar as sondagens.
+    Interromper a iteração (break/close) cancela a varredura.
+    'arquivo_perfil' grava um perfil do cProfile da varredura (ver metricas.py)
+    e 'parada' (threading.Event) encerra a varredura de outra thread.
+    """
+    arquivo_perfil = opcoes.pop("arquivo_perfil", None)
+    parada = opcoes.pop("parada", None)
+    return iterar_em_thread(varrer_rede_async, argumentos, opcoes, arquivo_perfil, parada)
+
+
+# ---------- Varredura de várias interfaces ----------
+def contar_alvos_interfaces(interfaces, exclusoes=None):
+    """
+    Quantos IPs distintos as redes de 'interfaces' cobrem juntas (sub-redes
+    sobrepostas contam uma vez só).
+    """
+    intervalos = []
+    for interface in interfaces:
+        if isinstance(interface, dict):
+            endereco_ip_local, mascara_rede = interface["ip"], interface["mascara"]
+        else:
+            endereco_ip_local, mascara_rede = interface
+        intervalos.extend(montar_alvos(endereco_ip_local, mascara_rede, exclusoes=exclusoes).intervalos)
+    return sum(fim - inicio + 1 for inicio, fim in unir_intervalos(intervalos))
+
+
+async def varrer_interfaces_async(interfaces, exclusoes=None, controle=None, max_em_voo=256,
+                                  transportes=None, cache_vizinhos=None, prioritarios=None,
+                                  **opcoes):
+    """
+    Varre as redes de várias interfaces locais ao mesmo tempo, em um único
+    event loop: o tempo total fica perto do da maior sub-rede, e não da soma.
+
+    'interfaces' é uma lista de dicionários de listar_enderecos_rede_locais
+    (ou pares (ip_local, mascara)). Cada sub-rede é sondada a partir do seu
+    próprio IP local (ip_origem); todas dividem o mesmo 'controle'
+    (ControleConcorrencia, com janela máxima 'max_em_voo'), mas cada uma
+    mede o próprio RTT. 'transportes' (dict ip_local -> transporte) permite
+    injetar transportes simulados; 'prioritarios' são sondados primeiro.
+    As demais opções vão para varrer_rede_async.
+
+    Um IP coberto por mais de uma interface (ex.: cabo e Wi-Fi na mesma
+    LAN) é sondado por todos os caminhos, mas sai uma única vez: ativo assim
+    que algum caminho responder, inativo só depois que todos desistirem.
+    """
+    if controle is None:
+        controle = ControleConcorrencia(janela_maxima=max_em_voo)
+    if cache_vizinhos is None:
+        cache_vizinhos = CacheVizinhos()
+    transportes = transportes or {}
+
+    caminhos = []
+    for interface in interfaces:
+        if isinstance(interface, dict):
+            endereco_ip_local, mascara_rede = interface["ip"], interface["mascara"]
+        else:
+            endereco_ip_local, mascara_rede = interface
+        alvos = montar_alvos(endereco_ip_local, mascara_rede, exclusoes=exclusoes)
+        if prioritarios:
+            alvos = alvos.priorizar(prioritarios)
+        caminhos.append((endereco_ip_local, mascara_rede, alvos))
+
+    def quantidade_caminhos(endereco_ip):
+        return sum(1 for _ip, _mascara, alvos in caminhos if endereco_ip in alvos)
+
+    fila_resultados = asyncio.Queue()
+
+    async def varrer_caminho(endereco_ip_local, mascara_rede, alvos):
+        try:
+            async for resultado in varrer_rede_async(
+                    endereco_ip_local,
+                    mascara_rede,
+                    alvos=alvos,
+                    transporte=transportes.get(endereco_ip_local),
+                    cache_vizinhos=cache_vizinhos,
+                    controle=controle,
+                    ip_origem=endereco_ip_local,
+                    **opcoes):
+                fila_resultados.put_nowait(resultado)
+        except Exception as erro_caminho:
+            # Uma interface com problema (ex.: sem permissão) não derruba as outras
+            print(f"Erro ao varrer a partir de {endereco_ip_local}: {erro_caminho}")
+        finally:
+            fila_resultados.put_nowait(None)
+
+    loop = asyncio.get_running_loop()
+    tarefas = [loop.create_task(varrer_caminho(*caminho)) for caminho in caminhos]
+    caminhos_ativos = len(tarefas)
+
+    # IP -> [caminhos que ainda não responderam, resultado inativo guardado]
+    # (só para IPs em mais de um caminho); IPs já produzidos como ativos
+    aguardando = {}
+    produzidos = set()
+
+    try:
+        while caminhos_ativos:
+            resultado = await fila_resultados.get()
+            if resultado is None:
+                caminhos_ativos -= 1
+                continue
+            if resultado.ip in produzidos:
+                continue
+
+            if len(caminhos) > 1 and resultado.ip not in aguardando:
+                total = quantidade_caminhos(resultado.ip)
+                if total > 1:
+                    aguardando[resultado.ip] = [total, None]
+
+            pendencia = aguardando.get(resultado.ip)
+            if pendencia is None:
+                yield resultado
+                continue
+
+            pendencia[0] -= 1
+            if resultado.status == "Ativo" or pendencia[0] == 0:
+                del aguardando[resultado.ip]
+                produzidos.add(resultado.ip)
+                yield resultado
+            elif pendencia[1] is None:
+                pendencia[1] = resultado
+
+        # Caminhos que falharam: o que ficou guardado sai como inativo
+        for _restantes, resultado in aguardando.values():
+            if resultado is not None:
+                yield resultado
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+def varrer_interfaces(*argumentos, **opcoes):
+    """
+    Versão síncrona de varrer_interfaces_async (ver varrer_rede).
+    """
+    arquivo_perfil = opcoes.pop("arquivo_perfil", None)
+    parada = opcoes.pop("parada", None)
+    return iterar_em_thread(varrer_interfaces_async, argumentos, opcoes, arquivo_perfil, parada)
+
+
+# ---------- Escanear rede ----------
+def escanear_rede(endereco_ip_local, mascara_rede, funcao_retorno_interface=None,
+                  tempo_limite=1.0, transporte=None, alvos=None, exclusoes=None,
+                  cache_vizinhos=None, metodo="icmp", max_em_voo=256, controle=None,
+                  parada=None):
+    """
+    Escaneia a rede do IP informado (respeitando a máscara, ex.: /16, /20,
+    255.255.255.0) e retorna uma lista com todos os hosts sondados:
+    [(ip, tipo_dispositivo, nome_oui, mac), ...]
+    Também chama 'funcao_retorno_interface' a cada IP processado (se fornecida).
+    Para receber os resultados conforme chegam, prefira varrer_rede.
+
+    'alvos' substitui a rede local por uma lista de especificações
+    (CIDR, IP único ou faixa "a.b.c.d-e.f.g.h") e 'exclusoes' remove
+    endereços/faixas da varredura.
+
+    A sondagem usa o motor ICMP assíncrono (um único socket para toda a rede);
+    'transporte' permite trocar o backend de rede (ex.: TransporteIcmpSimulado).
+    Os MACs vêm da tabela de vizinhos do sistema, lida em bloco por um
+    CacheVizinhos ('cache_vizinhos' permite injetar um, ex.: de arquivo).
+
+    'metodo' escolhe a descoberta: "icmp", "arp" (requisições ARP pela
+    interface do IP local, só para hosts no mesmo enlace; o MAC vem na
+    própria resposta) ou "auto" (ARP quando possível, senão ICMP). No modo
+    ARP, 'transporte' é um transporte de quadros (ex.: TransporteQuadrosSimulado).
+
+    'controle' (ControleConcorrencia) ajusta quantas sondagens ficam
+    pendentes (até 'max_em_voo') e pode limitar os pacotes por segundo;
+    depois da varredura, controle.estado() mostra a taxa e a perda estimada;
+    controle.pausar()/retomar() suspendem os envios. 'parada'
+    (threading.Event) interrompe a varredura: a lista traz só os hosts
+    sondados até ali.
+    """
+    enderecos = montar_alvos(endereco_ip_local, mascara_rede, alvos, exclusoes)
+    quantidade_total = max(len(enderecos), 1)
+    lista_dispositivos = []
+
+    for indice_concluido, resultado in enumerate(varrer_rede(
+            endereco_ip_local,
+            mascara_rede,
+            alvos=enderecos,
+            tempo_limite=tempo_limite,
+            transporte=transporte,
+            cache_vizinhos=cache_vizinhos,
+            metodo=metodo,
+            max_em_voo=max_em_voo,
+            controle=controle,
+            parada=parada), start=1):
+        lista_dispositivos.append(
+            (resultado.ip, resultado.tipo, resultado.fabricante, resultado.mac)
+        )
+
+        if funcao_retorno_interface:
+            funcao_retorno_interface(
+                resultado.ip,
+                resultado.status,
+                resultado.tipo,
+                resultado.fabricante,
+                int(indice_concluido / quantidade_total * 100),
+                resultado.mac
+            )
 
-    return lista_dispositivos_ativos
+    return lista_dispositivos
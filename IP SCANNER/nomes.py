@@ -0,0 +1,427 @@
+"""
+nomes.py
+Resolução dos nomes dos hosts ativos: DNS reverso (PTR), mDNS e NetBIOS.
+
+Roda como um estágio da varredura, no mesmo event loop das sondagens:
+cada host ativo que chega é resolvido em uma tarefa separada (no máximo
+'max_paralelo' ao mesmo tempo) enquanto as sondagens continuam. As três
+consultas saem de um único socket UDP, multiplexadas pelo identificador
+da mensagem DNS:
+    - PTR no servidor DNS do sistema (ou no informado);
+    - PTR em mDNS, direto no host (porta 5353, resposta unicast);
+    - NBSTAT do NetBIOS, direto no host (porta 137).
+Sem servidor DNS conhecido (ex.: Windows), o PTR usa o resolvedor do
+sistema (getnameinfo) em thread, com o mesmo limite de tempo.
+
+Respostas positivas e negativas ficam em um CacheNomes com validade (o TTL
+do registro DNS, limitado, para as positivas).
+"""
+
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from metricas import metricas
+
+PORTA_DNS = 53
+PORTA_MDNS = 5353
+PORTA_NETBIOS = 137
+
+TIPO_PTR = 12
+TIPO_NBSTAT = 0x21
+CLASSE_IN = 1
+BANDEIRA_RECURSAO = 0x0100
+
+CAMINHO_RESOLV_CONF = "/etc/resolv.conf"
+
+# "*" seguido de 15 bytes nulos, na codificação de nomes do NetBIOS
+NOME_NETBIOS_CURINGA = "CK" + "A" * 30
+SUFIXOS_NETBIOS_ESTACAO = (0x00, 0x20)
+BANDEIRA_NETBIOS_GRUPO = 0x8000
+
+TTL_MAXIMO_POSITIVO = 3600.0
+TTL_NEGATIVO = 300.0
+MAXIMO_SALTOS_COMPRESSAO = 32
+
+
+# ---------- Mensagens DNS ----------
+def nome_reverso(endereco_ip):
+    """
+    "192.168.0.10" -> "10.0.168.192.in-addr.arpa"
+    """
+    return ".".join(reversed(endereco_ip.split("."))) + ".in-addr.arpa"
+
+
+def codificar_nome_dns(nome):
+    rotulos = [rotulo.encode("ascii") for rotulo in nome.strip(".").split(".") if rotulo]
+    return b"".join(bytes([len(rotulo)]) + rotulo for rotulo in rotulos) + b"\x00"
+
+
+def montar_consulta_dns(identificador, nome, tipo=TIPO_PTR, recursiva=True):
+    cabecalho = struct.pack(
+        ">HHHHHH", identificador, BANDEIRA_RECURSAO if recursiva else 0, 1, 0, 0, 0
+    )
+    return cabecalho + codificar_nome_dns(nome) + struct.pack(">HH", tipo, CLASSE_IN)
+
+
+def ler_nome_dns(dados, posicao):
+    """
+    Lê um nome (com ponteiros de compressão) a partir de 'posicao'.
+    Retorna (nome, posicao_seguinte).
+    """
+    rotulos = []
+    posicao_seguinte = None
+    for _ in range(MAXIMO_SALTOS_COMPRESSAO):
+        tamanho = dados[posicao]
+        if tamanho & 0xC0 == 0xC0:
+            if posicao_seguinte is None:
+                posicao_seguinte = posicao + 2
+            posicao = struct.unpack_from(">H", dados, posicao)[0] & 0x3FFF
+            continue
+        if tamanho == 0:
+            if posicao_seguinte is None:
+                posicao_seguinte = posicao + 1
+            return ".".join(rotulos), posicao_seguinte
+        rotulos.append(dados[posicao + 1:posicao + 1 + tamanho].decode("utf-8", errors="replace"))
+        posicao += 1 + tamanho
+    raise ValueError("Nome DNS com compressão em laço")
+
+
+def interpretar_resposta_dns(dados):
+    """
+    Retorna (identificador, codigo_resposta, respostas), onde cada resposta
+    é (tipo, ttl, valor): o nome apontado nos PTR, os bytes do rdata nos
+    demais tipos.
+    """
+    identificador, bandeiras, quantidade_perguntas, quantidade_respostas = struct.unpack_from(">HHHH", dados)
+    posicao = 12
+    for _ in range(quantidade_perguntas):
+        _, posicao = ler_nome_dns(dados, posicao)
+        posicao += 4
+
+    respostas = []
+    for _ in range(quantidade_respostas):
+        _, posicao = ler_nome_dns(dados, posicao)
+        tipo, _, ttl, tamanho = struct.unpack_from(">HHIH", dados, posicao)
+        posicao += 10
+        if tipo == TIPO_PTR:
+            valor = ler_nome_dns(dados, posicao)[0]
+        else:
+            valor = dados[posicao:posicao + tamanho]
+        respostas.append((tipo, ttl, valor))
+        posicao += tamanho
+    return identificador, bandeiras & 0x000F, respostas
+
+
+def interpretar_nbstat(dados_registro):
+    """
+    Tabela de nomes de uma resposta NBSTAT -> nome da máquina (o primeiro
+    nome único de estação de trabalho), ou None.
+    """
+    quantidade_nomes = dados_registro[0] if dados_registro else 0
+    for indice in range(quantidade_nomes):
+        entrada = dados_registro[1 + 18 * indice:19 + 18 * indice]
+        if len(entrada) < 18:
+            break
+        nome = entrada[:15].decode("ascii", errors="ignore").strip()
+        sufixo = entrada[15]
+        bandeiras = struct.unpack_from(">H", entrada, 16)[0]
+        if nome and sufixo in SUFIXOS_NETBIOS_ESTACAO and not bandeiras & BANDEIRA_NETBIOS_GRUPO:
+            return nome
+    return None
+
+
+def obter_servidor_dns(caminho_resolv_conf=CAMINHO_RESOLV_CONF):
+    """
+    Primeiro 'nameserver' IPv4 do resolv.conf, ou None (ex.: Windows).
+    """
+    try:
+        with open(caminho_resolv_conf, "r", encoding="utf-8") as arquivo_resolv:
+            for linha in arquivo_resolv:
+                partes = linha.split()
+                if len(partes) >= 2 and partes[0] == "nameserver" and "." in partes[1]:
+                    return partes[1], PORTA_DNS
+    except OSError:
+        pass
+    return None
+
+
+# ---------- Socket UDP compartilhado ----------
+class ConsultorUdp(asyncio.DatagramProtocol):
+    """
+    Um socket UDP para todas as consultas: cada uma recebe um identificador
+    livre e a resposta só é aceita se vier do endereço consultado.
+    """
+
+    def __init__(self):
+        self.transporte = None
+        self.pendentes = {}
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def datagram_received(self, dados, endereco):
+        if len(dados) < 12:
+            return
+        pendente = self.pendentes.get(int.from_bytes(dados[:2], "big"))
+        if pendente is not None and pendente[0] == endereco[0] and not pendente[1].done():
+            pendente[1].set_result(dados)
+
+    def error_received(self, erro):
+        pass  # ex.: porta inalcançável; a consulta expira sozinha
+
+    async def consultar(self, destino, montar_pacote, tempo_limite):
+        """
+        Envia montar_pacote(identificador) para 'destino' e espera a
+        resposta. Retorna os bytes, ou None se não houver resposta a tempo.
+        """
+        identificador = random.randrange(0x10000)
+        while identificador in self.pendentes:
+            identificador = random.randrange(0x10000)
+        futuro = asyncio.get_running_loop().create_future()
+        self.pendentes[identificador] = (destino[0], futuro)
+        try:
+            self.transporte.sendto(montar_pacote(identificador), destino)
+            return await asyncio.wait_for(futuro, tempo_limite)
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            del self.pendentes[identificador]
+
+
+# ---------- Cache ----------
+class CacheNomes:
+    """
+    Cache ip -> nome (None = sem nome) com validade por entrada. Positivos
+    valem o TTL informado (limitado a 'tempo_vida_maximo'); negativos valem
+    'tempo_vida_negativo'. Acima de 'capacidade', sai o mais antigo.
+    Pode ser usado por várias threads.
+    """
+
+    def __init__(self, tempo_vida_maximo=TTL_MAXIMO_POSITIVO, tempo_vida_negativo=TTL_NEGATIVO,
+                 capacidade=65536):
+        self.tempo_vida_maximo = tempo_vida_maximo
+        self.tempo_vida_negativo = tempo_vida_negativo
+        self.capacidade = capacidade
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+
+    def __getstate__(self):
+        # Levado para outro processo (varredura_processos): vai uma cópia das
+        # entradas, e a trava é recriada do outro lado
+        with self.trava:
+            estado = dict(self.__dict__, entradas=OrderedDict(self.entradas))
+        del estado["trava"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.trava = threading.Lock()
+
+    def obter(self, endereco_ip):
+        """
+        Retorna (encontrado, nome); 'nome' None com encontrado=True é um
+        resultado negativo ainda válido.
+        """
+        with self.trava:
+            entrada = self.entradas.get(endereco_ip)
+            if entrada is None:
+                return False, None
+            if time.monotonic() >= entrada[0]:
+                del self.entradas[endereco_ip]
+                return False, None
+            self.entradas.move_to_end(endereco_ip)
+            return True, entrada[1]
+
+    def guardar(self, endereco_ip, nome, ttl=None):
+        if nome is None:
+            tempo_vida = self.tempo_vida_negativo
+        else:
+            tempo_vida = min(self.tempo_vida_maximo, ttl if ttl is not None else self.tempo_vida_maximo)
+        with self.trava:
+            self.entradas[endereco_ip] = (time.monotonic() + tempo_vida, nome)
+            self.entradas.move_to_end(endereco_ip)
+            while len(self.entradas) > self.capacidade:
+                self.entradas.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+# ---------- Resolvedor ----------
+class ResolvedorNomes:
+    """
+    Resolve nomes de hosts com DNS reverso, mDNS e NetBIOS, nessa ordem de
+    preferência. 'servidor_dns' é (ip, porta); por padrão vem do
+    resolv.conf. Cada consulta espera no máximo 'tempo_limite' segundos.
+
+    O resolvedor pode ser reaproveitado entre varreduras (inclusive em
+    event loops diferentes): só o cache fica guardado nele.
+    """
+
+    def __init__(self, servidor_dns=None, tempo_limite=1.0, max_paralelo=64,
+                 mdns=True, netbios=True, cache=None):
+        self.servidor_dns = servidor_dns if servidor_dns is not None else obter_servidor_dns()
+        self.tempo_limite = tempo_limite
+        self.max_paralelo = max_paralelo
+        self.mdns = mdns
+        self.netbios = netbios
+        self.cache = cache if cache is not None else CacheNomes()
+
+    async def _consultar_ptr(self, consultor, destino, endereco_ip, recursiva=True):
+        """
+        Retorna (nome, ttl), (None, None) para resposta negativa ou None sem resposta.
+        """
+        resposta = await consultor.consultar(
+            destino,
+            lambda identificador: montar_consulta_dns(
+                identificador, nome_reverso(endereco_ip), TIPO_PTR, recursiva
+            ),
+            self.tempo_limite
+        )
+        if resposta is None:
+            return None
+        try:
+            _, _, respostas = interpretar_resposta_dns(resposta)
+        except (ValueError, IndexError, struct.error):
+            return None
+        for tipo, ttl, valor in respostas:
+            if tipo == TIPO_PTR and valor:
+                return valor.rstrip("."), ttl
+        return None, None
+
+    async def _ptr_sistema(self, endereco_ip):
+        loop = asyncio.get_running_loop()
+        try:
+            nome, _ = await asyncio.wait_for(
+                loop.getnameinfo((endereco_ip, 0), socket.NI_NAMEREQD), self.tempo_limite
+            )
+            return nome, None
+        except (asyncio.TimeoutError, OSError):
+            return None, None
+
+    async def _consultar_netbios(self, consultor, endereco_ip):
+        resposta = await consultor.consultar(
+            (endereco_ip, PORTA_NETBIOS),
+            lambda identificador: montar_consulta_dns(
+                identificador, NOME_NETBIOS_CURINGA, TIPO_NBSTAT, recursiva=False
+            ),
+            self.tempo_limite
+        )
+        if resposta is None:
+            return None
+        try:
+            _, _, respostas = interpretar_resposta_dns(resposta)
+        except (ValueError, IndexError, struct.error):
+            return None
+        for tipo, _, valor in respostas:
+            if tipo == TIPO_NBSTAT:
+                return interpretar_nbstat(valor)
+        return None
+
+    async def resolver(self, consultor, endereco_ip):
+        """
+        Nome do host (ou None), consultando e preenchendo o cache.
+        """
+        encontrado, nome = self.cache.obter(endereco_ip)
+        if encontrado:
+            metricas.incrementar("nomes_cache")
+            return nome
+
+        with metricas.medir("nomes"):
+            if self.servidor_dns is not None:
+                resultado_dns = await self._consultar_ptr(consultor, self.servidor_dns, endereco_ip)
+            else:
+                resultado_dns = await self._ptr_sistema(endereco_ip)
+            if resultado_dns and resultado_dns[0]:
+                self.cache.guardar(endereco_ip, *resultado_dns)
+                metricas.incrementar("nomes_dns")
+                return resultado_dns[0]
+
+            # Sem PTR: pergunta ao próprio host, por mDNS e NetBIOS ao mesmo tempo
+            consultas = []
+            if self.mdns:
+                consultas.append(self._consultar_ptr(
+                    consultor, (endereco_ip, PORTA_MDNS), endereco_ip, recursiva=False
+                ))
+            if self.netbios:
+                consultas.append(self._consultar_netbios(consultor, endereco_ip))
+            for resultado in await asyncio.gather(*consultas):
+                if isinstance(resultado, tuple):
+                    resultado = resultado[0]
+                if resultado:
+                    self.cache.guardar(endereco_ip, resultado)
+                    metricas.incrementar("nomes_locais")
+                    return resultado
+
+        self.cache.guardar(endereco_ip, None)
+        metricas.incrementar("nomes_ausentes")
+        return None
+
+    async def anotar(self, resultados):
+        """
+        Gerador assíncrono que repassa os ResultadoHost de 'resultados'
+        (outro gerador assíncrono, ex.: as sondagens). Inativos passam na
+        hora; ativos saem com 'nome' preenchido quando a resolução termina,
+        sem segurar os demais.
+        """
+        loop = asyncio.get_running_loop()
+        transporte, consultor = await loop.create_datagram_endpoint(ConsultorUdp, local_addr=("0.0.0.0", 0))
+        limite_paralelo = asyncio.Semaphore(self.max_paralelo)
+        # Itens (resolvido, conteúdo): resolvido=True vem de uma resolução,
+        # False é um resultado repassado direto, o fim da entrada ou um erro
+        fila = asyncio.Queue()
+        fim_entrada = object()
+        # Só as resoluções em andamento: cada tarefa sai do conjunto ao terminar
+        resolucoes = set()
+        quantidade_iniciados = 0
+
+        async def resolver_e_repassar(resultado):
+            nome = None
+            try:
+                async with limite_paralelo:
+                    nome = await self.resolver(consultor, resultado.ip)
+            finally:
+                fila.put_nowait((True, resultado._replace(nome=nome)))
+
+        async def ler_entrada():
+            nonlocal quantidade_iniciados
+            try:
+                async for resultado in resultados:
+                    encontrado, nome = self.cache.obter(resultado.ip)
+                    if resultado.status != "Ativo" or encontrado:
+                        fila.put_nowait((False, resultado._replace(nome=nome)))
+                        continue
+                    tarefa = loop.create_task(resolver_e_repassar(resultado))
+                    resolucoes.add(tarefa)
+                    tarefa.add_done_callback(resolucoes.discard)
+                    quantidade_iniciados += 1
+                fila.put_nowait((False, fim_entrada))
+            except Exception as erro_entrada:
+                fila.put_nowait((False, erro_entrada))
+
+        tarefa_entrada = loop.create_task(ler_entrada())
+        entrada_terminou = False
+        quantidade_resolvidos = 0
+        try:
+            while not entrada_terminou or quantidade_resolvidos < quantidade_iniciados:
+                resolvido, item = await fila.get()
+                if item is fim_entrada:
+                    entrada_terminou = True
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                if resolvido:
+                    quantidade_resolvidos += 1
+                yield item
+        finally:
+            tarefa_entrada.cancel()
+            pendentes = list(resolucoes)
+            for tarefa in pendentes:
+                tarefa.cancel()
+            await asyncio.gather(tarefa_entrada, *pendentes, return_exceptions=True)
+            transporte.close()
@@ -0,0 +1,226 @@
+"""
+portas.py
+Varredura de portas TCP (connect) assíncrona, usada pelo teste de vulnerabilidade.
+
+Cada porta é testada com um connect() não bloqueante no event loop:
+    - conexão aceita  -> "aberta"
+    - conexão recusada (RST) -> "fechada"
+    - sem resposta dentro do timeout -> "filtrada"
+O timeout de cada host acompanha o RTT medido nas próprias conexões (e, se
+houver, no ping da varredura), com um EstimadorRtt por host. A
+concorrência é limitada por host e no total. Opcionalmente, cada porta
+aberta passa pela identificação de serviço (servicos.py), com cache.
+"""
+
+import asyncio
+import errno
+import socket
+import time
+from typing import NamedTuple, Optional
+
+from net import EstimadorRtt, iterar_em_thread
+from servicos import TEMPO_LIMITE_SERVICO, identificar_servico_async
+
+# As 100 portas TCP mais encontradas abertas, da mais para a menos frequente
+PORTAS_FREQUENTES = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111,
+    995, 993, 5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514,
+    5060, 179, 1026, 2000, 8443, 8000, 32768, 554, 26, 1433, 49152, 2001, 515, 8008,
+    49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106, 2121,
+    1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144, 7, 389, 8009,
+    3128, 444, 9999, 5009, 7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646,
+    49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+)
+
+ESPECIFICACAO_PORTAS_PADRAO = "top100"
+
+ESTADO_ABERTA = "aberta"
+ESTADO_FECHADA = "fechada"
+ESTADO_FILTRADA = "filtrada"
+
+
+class ResultadoPorta(NamedTuple):
+    """
+    Resultado do teste de uma porta. 'rtt' é o tempo do connect em segundos
+    (None quando não houve resposta). 'servico' e 'banner' só são
+    preenchidos em portas abertas quando a identificação está ligada.
+    """
+    ip: str
+    porta: int
+    estado: str
+    rtt: Optional[float]
+    servico: Optional[str] = None
+    banner: Optional[str] = None
+
+
+def interpretar_portas(especificacao):
+    """
+    Converte "top20", "22,80,443", "8000-8100" ou combinações
+    ("top10,8080-8090") em uma lista de portas sem repetição, na ordem dada.
+    """
+    portas = []
+    for parte in especificacao.replace(" ", "").split(","):
+        if not parte:
+            continue
+        if parte.lower().startswith("top"):
+            quantidade = int(parte[3:] or len(PORTAS_FREQUENTES))
+            portas.extend(PORTAS_FREQUENTES[:quantidade])
+        elif "-" in parte:
+            inicio, fim = (int(valor) for valor in parte.split("-", 1))
+            if inicio > fim:
+                inicio, fim = fim, inicio
+            portas.extend(range(inicio, fim + 1))
+        else:
+            portas.append(int(parte))
+
+    for porta in portas:
+        if not 1 <= porta <= 65535:
+            raise ValueError(f"Porta inválida: {porta}")
+    return list(dict.fromkeys(portas))
+
+
+async def testar_porta(endereco_ip, porta, tempo_limite):
+    """
+    Faz um connect() não bloqueante. Retorna (estado, rtt).
+    """
+    loop = asyncio.get_running_loop()
+    # Hosts só com IPv6 (descoberta_ipv6) chegam como "fe80::1%eth0"
+    familia = socket.AF_INET6 if ":" in endereco_ip else socket.AF_INET
+    socket_tcp = socket.socket(familia, socket.SOCK_STREAM)
+    socket_tcp.setblocking(False)
+    instante_inicio = time.perf_counter()
+    try:
+        await asyncio.wait_for(loop.sock_connect(socket_tcp, (endereco_ip, porta)), tempo_limite)
+        return ESTADO_ABERTA, time.perf_counter() - instante_inicio
+    except ConnectionRefusedError:
+        return ESTADO_FECHADA, time.perf_counter() - instante_inicio
+    except asyncio.TimeoutError:
+        return ESTADO_FILTRADA, None
+    except OSError as erro_conexao:
+        # Ex.: host inalcançável (ICMP de erro): também não dá para dizer se há serviço
+        if erro_conexao.errno == errno.ECONNREFUSED:
+            return ESTADO_FECHADA, time.perf_counter() - instante_inicio
+        return ESTADO_FILTRADA, None
+    finally:
+        socket_tcp.close()
+
+
+async def varrer_portas_async(hosts, portas, tempo_limite=1.0, max_por_host=32, max_total=512,
+                              rtts_iniciais=None, identificar_servicos=False, cache_servicos=None,
+                              macs=None, max_identificacoes=32, tempo_limite_servico=TEMPO_LIMITE_SERVICO):
+    """
+    Gerador assíncrono que testa cada porta de cada host e produz um
+    ResultadoPorta por teste, na ordem em que terminam.
+
+    'hosts' é uma lista de IPs; 'portas', uma lista de inteiros (ver
+    interpretar_portas). Os pares são distribuídos porta a porta entre os
+    hosts, para que o limite por host ('max_por_host') não segure o limite
+    total ('max_total'). 'tempo_limite' é o teto do timeout; o valor real
+    vem do RTT de cada host, que pode começar de 'rtts_iniciais'
+    (dict ip -> rtt do ping, em segundos).
+
+    Com 'identificar_servicos', cada porta aberta é examinada em uma
+    tarefa separada (no máximo 'max_identificacoes' ao mesmo tempo, sem
+    segurar os testes de porta) e o ResultadoPorta sai com serviço e
+    banner. Um 'cache_servicos' (CacheServicos) evita repetir o exame de
+    hosts já vistos; 'macs' (dict ip -> MAC) dá a chave do cache.
+    """
+    hosts = list(dict.fromkeys(hosts))
+    estimadores = {}
+    for endereco_ip in hosts:
+        estimador = EstimadorRtt(tempo_limite)
+        rtt_inicial = (rtts_iniciais or {}).get(endereco_ip)
+        if rtt_inicial is not None:
+            estimador.registrar(rtt_inicial)
+        estimadores[endereco_ip] = estimador
+    limites_por_host = {endereco_ip: asyncio.Semaphore(max_por_host) for endereco_ip in hosts}
+
+    pares = ((endereco_ip, porta) for porta in portas for endereco_ip in hosts)
+    fila_resultados = asyncio.Queue()
+    limite_identificacoes = asyncio.Semaphore(max_identificacoes)
+    identificacoes = set()
+
+    async def testar(endereco_ip, porta):
+        estimador = estimadores[endereco_ip]
+        async with limites_por_host[endereco_ip]:
+            estado, rtt = await testar_porta(endereco_ip, porta, estimador.tempo_limite())
+        if rtt is not None:
+            estimador.registrar(rtt)
+        return ResultadoPorta(endereco_ip, porta, estado, rtt)
+
+    async def identificar(resultado):
+        endereco_mac = (macs or {}).get(resultado.ip)
+        async with limite_identificacoes:
+            servico_porta = await identificar_servico_async(
+                resultado.ip, resultado.porta, tempo_limite_servico
+            )
+        if cache_servicos is not None and servico_porta.servico != "indisponivel":
+            cache_servicos.guardar(resultado.ip, endereco_mac, resultado.porta, servico_porta)
+        return resultado._replace(servico=servico_porta.servico, banner=servico_porta.banner)
+
+    async def repassar_identificacao(resultado):
+        try:
+            try:
+                resultado = await identificar(resultado)
+            except asyncio.CancelledError:
+                raise
+            except Exception as erro_identificacao:
+                # A porta continua aberta, com o serviço marcado como não identificado
+                print(f"Erro ao identificar {resultado.ip}:{resultado.porta}: {erro_identificacao}")
+                resultado = resultado._replace(servico="indisponivel", banner="")
+            fila_resultados.put_nowait(resultado)
+        finally:
+            fila_resultados.put_nowait(None)
+
+    def encaminhar(resultado):
+        """
+        Coloca o resultado na fila; portas abertas ainda sem serviço vão
+        antes para a identificação.
+        """
+        nonlocal tarefas_pendentes
+        if not identificar_servicos or resultado.estado != ESTADO_ABERTA:
+            fila_resultados.put_nowait(resultado)
+            return
+        if cache_servicos is not None:
+            servico_porta = cache_servicos.obter(resultado.ip, (macs or {}).get(resultado.ip), resultado.porta)
+            if servico_porta is not None:
+                fila_resultados.put_nowait(
+                    resultado._replace(servico=servico_porta.servico, banner=servico_porta.banner)
+                )
+                return
+        identificacoes.add(loop.create_task(repassar_identificacao(resultado)))
+        tarefas_pendentes += 1
+
+    async def trabalhador():
+        try:
+            for endereco_ip, porta in pares:
+                encaminhar(await testar(endereco_ip, porta))
+        finally:
+            fila_resultados.put_nowait(None)
+
+    loop = asyncio.get_running_loop()
+    quantidade_trabalhadores = max(1, min(max_total, len(hosts) * len(portas)))
+    trabalhadores = [loop.create_task(trabalhador()) for _ in range(quantidade_trabalhadores)]
+    # Tarefas (trabalhadores e identificações) que ainda vão mandar o seu None
+    tarefas_pendentes = len(trabalhadores)
+
+    try:
+        while tarefas_pendentes:
+            resultado = await fila_resultados.get()
+            if resultado is None:
+                tarefas_pendentes -= 1
+                continue
+            yield resultado
+    finally:
+        tarefas = trabalhadores + list(identificacoes)
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+def varrer_portas(*argumentos, **opcoes):
+    """
+    Versão síncrona de varrer_portas_async (event loop em thread própria;
+    interromper a iteração cancela os testes pendentes).
+    """
+    return iterar_em_thread(varrer_portas_async, argumentos, opcoes)
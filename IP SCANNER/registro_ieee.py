@@ -0,0 +1,212 @@
+"""
+registro_ieee.py
+Importa os registros públicos do IEEE (MA-L, MA-M e MA-S) para o oui.idx.
+
+Os CSV (oui.csv, mam.csv, oui36.csv, baixados de standards-oui.ieee.org)
+são lidos linha a linha, sem carregar o arquivo; a memória cresce com o
+número de prefixos do índice (montar_indice_oui precisa de todos para
+ordenar as chaves), não com o tamanho dos CSV. Os nomes são normalizados (espaços
+repetidos, aspas soltas) e unificados pela grafia: "Cisco Systems, Inc" e
+"Cisco Systems, Inc." viram um só nome na tabela de nomes do índice.
+
+As entradas do oui.json entram primeiro e têm precedência (montar_indice_oui
+fica com a primeira ocorrência de cada prefixo), então toda chave que já
+existia continua com o mesmo nome. Se o índice já existir, a importação
+informa os prefixos adicionados, removidos e renomeados em relação a ele e
+não regrava nada quando não há mudança; a gravação é sempre atômica
+(temporário + os.replace), segura com o scanner aberto.
+
+Uso:
+    python registro_ieee.py oui.csv mam.csv oui36.csv --json oui.json --saida oui.idx
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from typing import NamedTuple
+
+from indice_oui import IndiceOui, entradas_dicionario_oui, gravar_conteudo_indice, montar_indice_oui
+
+# Coluna "Registry" -> tamanho do bloco em bits
+BITS_REGISTRO = {"MA-L": 24, "MA-M": 28, "MA-S": 36}
+
+COLUNA_REGISTRO = "registry"
+COLUNA_PREFIXO = "assignment"
+COLUNA_FABRICANTE = "organization name"
+
+PADRAO_HEXADECIMAL = re.compile(r"[0-9A-Fa-f]+")
+PADRAO_NAO_ALFANUMERICO = re.compile(r"[\W_]+")
+
+
+class DiferencaIndice(NamedTuple):
+    """
+    Mudanças de uma importação em relação ao índice anterior, em número de
+    prefixos. 'gravado' é False quando o índice já estava igual.
+    """
+    prefixos: int
+    adicionados: int
+    removidos: int
+    renomeados: int
+    gravado: bool
+
+
+def normalizar_nome_fabricante(nome_fabricante):
+    """
+    Remove espaços nas pontas e repetidos e aspas soltas.
+    Retorna None para nomes vazios.
+    """
+    nome_fabricante = " ".join(nome_fabricante.split()).strip("\"' ")
+    return nome_fabricante or None
+
+
+def chave_nome_fabricante(nome_fabricante):
+    """
+    Chave de comparação de nomes: sem caixa, pontuação nem espaços.
+    """
+    return PADRAO_NAO_ALFANUMERICO.sub("", nome_fabricante.casefold())
+
+
+def ler_registro_ieee(caminho_csv):
+    """
+    Gerador de (prefixo_inteiro, bits, nome_fabricante) de um CSV do IEEE.
+    Linhas de registros desconhecidos (ex.: CID) ou malformadas são puladas.
+    """
+    with open(caminho_csv, "r", encoding="utf-8-sig", errors="replace", newline="") as arquivo_csv:
+        leitor = csv.reader(arquivo_csv)
+        cabecalho = [coluna.strip().lower() for coluna in next(leitor, [])]
+        try:
+            coluna_registro = cabecalho.index(COLUNA_REGISTRO)
+            coluna_prefixo = cabecalho.index(COLUNA_PREFIXO)
+            coluna_fabricante = cabecalho.index(COLUNA_FABRICANTE)
+        except ValueError:
+            raise ValueError(f"{caminho_csv}: cabeçalho do IEEE não encontrado") from None
+        quantidade_colunas = max(coluna_registro, coluna_prefixo, coluna_fabricante) + 1
+
+        for linha in leitor:
+            if len(linha) < quantidade_colunas:
+                continue
+            bits = BITS_REGISTRO.get(linha[coluna_registro].strip().upper())
+            prefixo_texto = linha[coluna_prefixo].strip()
+            if (bits is None or len(prefixo_texto) * 4 != bits or
+                    not PADRAO_HEXADECIMAL.fullmatch(prefixo_texto)):
+                continue
+            nome_fabricante = normalizar_nome_fabricante(linha[coluna_fabricante])
+            if nome_fabricante is not None:
+                yield int(prefixo_texto, 16), bits, nome_fabricante
+
+
+def entradas_importacao(caminhos_csv, dicionario_legado=None):
+    """
+    Gerador de entradas para montar_indice_oui: primeiro as do dicionário
+    antigo (nomes como estão), depois as dos CSV, cada nome trocado pela
+    primeira grafia já vista com a mesma chave_nome_fabricante.
+    """
+    grafias = {}
+    for prefixo, bits, nome_fabricante in entradas_dicionario_oui(dicionario_legado or {}):
+        grafias.setdefault(chave_nome_fabricante(nome_fabricante), nome_fabricante)
+        yield prefixo, bits, nome_fabricante
+
+    for caminho_csv in caminhos_csv:
+        for prefixo, bits, nome_fabricante in ler_registro_ieee(caminho_csv):
+            yield prefixo, bits, grafias.setdefault(chave_nome_fabricante(nome_fabricante), nome_fabricante)
+
+
+def comparar_indices(indice_anterior, indice_novo):
+    """
+    Retorna (adicionados, removidos, renomeados) entre dois IndiceOui,
+    contando prefixos (um prefixo é o par valor + tamanho do bloco).
+    """
+    nomes_anteriores = {
+        (prefixo, bits): nome_fabricante for prefixo, bits, nome_fabricante in indice_anterior.entradas()
+    }
+    adicionados = renomeados = 0
+    for prefixo, bits, nome_fabricante in indice_novo.entradas():
+        nome_anterior = nomes_anteriores.pop((prefixo, bits), None)
+        if nome_anterior is None:
+            adicionados += 1
+        elif nome_anterior != nome_fabricante:
+            renomeados += 1
+    return adicionados, len(nomes_anteriores), renomeados
+
+
+def abrir_indice_anterior(caminho_indice):
+    """
+    Lê o índice existente para a comparação (em bytes, sem mmap, para não
+    segurar o arquivo aberto durante o os.replace). None se não houver.
+    """
+    try:
+        with open(caminho_indice, "rb") as arquivo_indice:
+            return IndiceOui(arquivo_indice.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as erro:
+        print(f"Índice anterior ilegível, gerando do zero: {erro}")
+        return None
+
+
+def importar_registros(caminhos_csv, caminho_saida, caminho_json=None):
+    """
+    Monta o índice a partir dos CSV (e do oui.json, se informado),
+    compara com o índice em 'caminho_saida' e grava (atomicamente) só se
+    algo mudou. Retorna um DiferencaIndice.
+    """
+    dicionario_legado = {}
+    if caminho_json:
+        with open(caminho_json, "r", encoding="utf-8") as arquivo_oui:
+            dicionario_legado = json.load(arquivo_oui)
+
+    conteudo = montar_indice_oui(entradas_importacao(caminhos_csv, dicionario_legado))
+    indice_novo = IndiceOui(conteudo)
+    indice_anterior = abrir_indice_anterior(caminho_saida)
+    if indice_anterior is None:
+        adicionados, removidos, renomeados = len(indice_novo), 0, 0
+    else:
+        adicionados, removidos, renomeados = comparar_indices(indice_anterior, indice_novo)
+
+    gravado = indice_anterior is None or bytes(indice_anterior.dados) != conteudo
+    if gravado:
+        gravar_conteudo_indice(conteudo, caminho_saida)
+    return DiferencaIndice(len(indice_novo), adicionados, removidos, renomeados, gravado)
+
+
+def criar_analisador_argumentos():
+    analisador = argparse.ArgumentParser(
+        description="Gera o oui.idx a partir dos registros MA-L/MA-M/MA-S do IEEE (CSV)."
+    )
+    analisador.add_argument(
+        "registros", nargs="+", metavar="CSV",
+        help="Arquivos do IEEE (oui.csv, mam.csv, oui36.csv)."
+    )
+    analisador.add_argument(
+        "--json", metavar="ARQUIVO",
+        help="oui.json antigo: as chaves dele têm precedência sobre os CSV."
+    )
+    analisador.add_argument(
+        "--saida", default="oui.idx", metavar="ARQUIVO",
+        help="Índice gerado/atualizado (padrão: oui.idx)."
+    )
+    return analisador
+
+
+def main(lista_argumentos=None):
+    argumentos = criar_analisador_argumentos().parse_args(lista_argumentos)
+    instante_inicio = time.perf_counter()
+    try:
+        diferenca = importar_registros(argumentos.registros, argumentos.saida, argumentos.json)
+    except (OSError, ValueError) as erro_importacao:
+        print(f"Erro na importação: {erro_importacao}", file=sys.stderr)
+        return 1
+    situacao = "gravado" if diferenca.gravado else "sem mudanças"
+    print(
+        f"{diferenca.prefixos} prefixos em {argumentos.saida} ({situacao}): "
+        f"+{diferenca.adicionados} / −{diferenca.removidos} / {diferenca.renomeados} renomeados "
+        f"em {time.perf_counter() - instante_inicio:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+retomada.py
+Pontos de retomada para varreduras grandes (/16 ou maiores).
+
+Durante a varredura, um PontoRetomada marca cada alvo concluído em um mapa
+de bits (um bit por endereço, na ordem de AlvosVarredura.intervalos) e
+guarda os hosts ativos encontrados. A cada INTERVALO_GRAVACAO segundos, e
+quando a varredura é interrompida, tudo é gravado em um arquivo JSON (mapa
+comprimido com zlib; uma /16 inteira ocupa poucos KB). Ao varrer os mesmos
+alvos de novo, os ativos já encontrados são entregues primeiro e só os
+endereços que faltam são sondados. Terminada a varredura, o arquivo é apagado.
+"""
+
+import base64
+import bisect
+import hashlib
+import json
+import os
+import socket
+import time
+import zlib
+
+from net import AlvosVarredura, ResultadoHost
+
+VERSAO_FORMATO = 1
+
+# A partir de quantos alvos a CLI e a interface gravam pontos de retomada
+LIMIAR_RETOMADA = 4096
+# Intervalo mínimo entre gravações durante a varredura
+INTERVALO_GRAVACAO = 5.0
+# Pontos mais velhos que isso são ignorados (a rede já mudou)
+VALIDADE_PONTO = 24 * 3600
+
+
+def identificar_alvos(alvos):
+    """
+    Identificador estável de um conjunto de alvos (hash dos intervalos).
+    """
+    texto = ",".join(f"{inicio}-{fim}" for inicio, fim in alvos.intervalos)
+    return hashlib.sha1(texto.encode("ascii")).hexdigest()
+
+
+def caminho_retomada_padrao(alvos):
+    """
+    Retorna ~/.ipscan/retomada/<identificador>.json (criando a pasta, se preciso).
+    """
+    pasta = os.path.join(os.path.expanduser("~"), ".ipscan", "retomada")
+    os.makedirs(pasta, exist_ok=True)
+    return os.path.join(pasta, f"{identificar_alvos(alvos)[:16]}.json")
+
+
+class PontoRetomada:
+    """
+    Progresso de uma varredura: alvos concluídos (mapa de bits) e hosts
+    ativos encontrados até agora. Use PontoRetomada.abrir para continuar de
+    um arquivo existente.
+    """
+
+    def __init__(self, caminho_arquivo, alvos):
+        self.caminho_arquivo = caminho_arquivo
+        self.alvos = alvos
+        self.identificador = identificar_alvos(alvos)
+        self.quantidade = len(alvos)
+        self.concluidos = bytearray((self.quantidade + 7) // 8)
+        self.quantidade_concluidos = 0
+        self.resultados = []  # ResultadoHost dos hosts ativos
+        self.instante_gravacao = time.monotonic()
+
+        # Posição de cada intervalo no mapa de bits, para achar o bit de um IP
+        self.inicios = []
+        self.deslocamentos = []
+        deslocamento = 0
+        for inicio, fim in alvos.intervalos:
+            self.inicios.append(inicio)
+            self.deslocamentos.append(deslocamento)
+            deslocamento += fim - inicio + 1
+
+    @classmethod
+    def abrir(cls, caminho_arquivo, alvos):
+        """
+        Carrega o ponto gravado em 'caminho_arquivo' se ele for dos mesmos
+        alvos e ainda estiver válido; senão, começa um ponto vazio.
+        """
+        ponto = cls(caminho_arquivo, alvos)
+        try:
+            with open(caminho_arquivo, "r", encoding="utf-8") as arquivo_ponto:
+                dados = json.load(arquivo_ponto)
+        except FileNotFoundError:
+            return ponto
+        except (OSError, ValueError) as erro:
+            print(f"Ponto de retomada ilegível, recomeçando: {erro}")
+            return ponto
+
+        if (not isinstance(dados, dict) or
+                dados.get("versao") != VERSAO_FORMATO or
+                dados.get("identificador") != ponto.identificador or
+                dados.get("campos") != list(ResultadoHost._fields) or
+                time.time() - dados.get("atualizado_em", 0) > VALIDADE_PONTO):
+            return ponto
+
+        try:
+            concluidos = zlib.decompress(base64.b64decode(dados["concluidos"]))
+            resultados = [ResultadoHost(*valores) for valores in dados["resultados"]]
+        except (KeyError, TypeError, ValueError, zlib.error) as erro:
+            print(f"Ponto de retomada corrompido, recomeçando: {erro}")
+            return ponto
+        if len(concluidos) != len(ponto.concluidos):
+            return ponto
+        ponto.concluidos = bytearray(concluidos)
+        ponto.quantidade_concluidos = sum(bin(byte).count("1") for byte in concluidos)
+        ponto.resultados = resultados
+        return ponto
+
+    def _posicao(self, endereco_ip):
+        endereco = int.from_bytes(socket.inet_aton(endereco_ip), "big")
+        indice = bisect.bisect_right(self.inicios, endereco) - 1
+        if indice < 0:
+            return None
+        inicio, fim = self.alvos.intervalos[indice]
+        if endereco > fim:
+            return None
+        return self.deslocamentos[indice] + endereco - inicio
+
+    def concluido(self, endereco_ip):
+        posicao = self._posicao(endereco_ip)
+        return posicao is not None and bool(self.concluidos[posicao >> 3] & (1 << (posicao & 7)))
+
+    @property
+    def completo(self):
+        return self.quantidade_concluidos >= self.quantidade
+
+    def registrar(self, resultado):
+        """
+        Marca o alvo do ResultadoHost como concluído e grava o arquivo se
+        a última gravação tiver mais de INTERVALO_GRAVACAO segundos.
+        """
+        posicao = self._posicao(resultado.ip)
+        if posicao is None:
+            return
+        mascara_bit = 1 << (posicao & 7)
+        if self.concluidos[posicao >> 3] & mascara_bit:
+            return
+        self.concluidos[posicao >> 3] |= mascara_bit
+        self.quantidade_concluidos += 1
+        if resultado.status == "Ativo":
+            self.resultados.append(resultado)
+
+        if time.monotonic() - self.instante_gravacao >= INTERVALO_GRAVACAO:
+            self.salvar()
+
+    def pendentes(self):
+        """
+        AlvosVarredura só com os endereços ainda não concluídos.
+        """
+        intervalos = []
+        inicio_pendente = None
+        for indice, (inicio, fim) in enumerate(self.alvos.intervalos):
+            deslocamento = self.deslocamentos[indice]
+            posicao = 0
+            tamanho = fim - inicio + 1
+            while posicao < tamanho:
+                bit = deslocamento + posicao
+                # Bytes inteiros (todos concluídos ou todos pendentes) de uma vez
+                if bit & 7 == 0 and posicao + 8 <= tamanho and self.concluidos[bit >> 3] in (0, 0xFF):
+                    if self.concluidos[bit >> 3]:
+                        if inicio_pendente is not None:
+                            intervalos.append((inicio_pendente, inicio + posicao - 1))
+                            inicio_pendente = None
+                    elif inicio_pendente is None:
+                        inicio_pendente = inicio + posicao
+                    posicao += 8
+                    continue
+                if self.concluidos[bit >> 3] & (1 << (bit & 7)):
+                    if inicio_pendente is not None:
+                        intervalos.append((inicio_pendente, inicio + posicao - 1))
+                        inicio_pendente = None
+                elif inicio_pendente is None:
+                    inicio_pendente = inicio + posicao
+                posicao += 1
+            if inicio_pendente is not None:
+                intervalos.append((inicio_pendente, fim))
+                inicio_pendente = None
+        return AlvosVarredura.de_intervalos(intervalos)
+
+    def salvar(self):
+        """
+        Grava o ponto (arquivo temporário + os.replace, para nunca deixar um
+        arquivo pela metade).
+        """
+        dados = {
+            "versao": VERSAO_FORMATO,
+            "identificador": self.identificador,
+            "atualizado_em": time.time(),
+            "quantidade": self.quantidade,
+            "concluidos": base64.b64encode(zlib.compress(bytes(self.concluidos))).decode("ascii"),
+            "campos": list(ResultadoHost._fields),
+            "resultados": [list(resultado) for resultado in self.resultados],
+        }
+        caminho_temporario = f"{self.caminho_arquivo}.tmp"
+        try:
+            with open(caminho_temporario, "w", encoding="utf-8") as arquivo_ponto:
+                json.dump(dados, arquivo_ponto, ensure_ascii=False)
+            os.replace(caminho_temporario, self.caminho_arquivo)
+        except OSError as erro:
+            print(f"Não foi possível gravar o ponto de retomada: {erro}")
+        self.instante_gravacao = time.monotonic()
+
+    def remover(self):
+        try:
+            os.remove(self.caminho_arquivo)
+        except FileNotFoundError:
+            pass
+
+
+def varrer_com_retomada(ponto, funcao_varredura):
+    """
+    Gerador: entrega os hosts ativos já salvos em 'ponto' e depois os
+    resultados de funcao_varredura(alvos_pendentes), registrando cada um.
+    Se a varredura terminar com todos os alvos concluídos, o arquivo é
+    apagado; se for interrompida (parada, Ctrl+C, erro), é gravado.
+    """
+    yield from ponto.resultados
+    try:
+        for resultado in funcao_varredura(ponto.pendentes()):
+            ponto.registrar(resultado)
+            yield resultado
+    finally:
+        if ponto.completo:
+            ponto.remover()
+        else:
+            ponto.salvar()
@@ -0,0 +1,231 @@
+"""
+servicos.py
+Identificação do serviço em portas abertas (banner grabbing).
+
+Para cada porta aberta é feita uma única conexão:
+    - em portas onde o cliente fala primeiro (HTTP, SMB) a sonda do
+      protocolo é enviada logo após o connect;
+    - nas demais, o banner é lido passivamente (SSH, FTP, SMTP...) e, se o
+      servidor ficar calado, uma sonda HTTP é enviada na mesma conexão.
+Toda leitura tem limite de bytes e de tempo. Os resultados ficam em um
+CacheServicos indexado por (MAC, porta), com validade e descarte LRU, para
+que hosts já conhecidos não sejam examinados de novo a cada varredura.
+"""
+
+import asyncio
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+LIMITE_BYTES_BANNER = 2048
+TEMPO_LIMITE_SERVICO = 3.0
+ESPERA_BANNER_PASSIVO = 0.6
+TAMANHO_MAXIMO_BANNER = 120
+
+SONDA_HTTP = "http"
+SONDA_SMB = "smb"
+
+PORTAS_SONDA = {
+    80: SONDA_HTTP, 81: SONDA_HTTP, 591: SONDA_HTTP, 3000: SONDA_HTTP, 5000: SONDA_HTTP,
+    8000: SONDA_HTTP, 8008: SONDA_HTTP, 8080: SONDA_HTTP, 8081: SONDA_HTTP, 8888: SONDA_HTTP,
+    9000: SONDA_HTTP,
+    139: SONDA_SMB, 445: SONDA_SMB,
+}
+
+# Onde parar de ler: fim da primeira linha (banners) ou fim dos cabeçalhos (HTTP)
+TERMINADORES = {None: b"\n", SONDA_HTTP: b"\r\n\r\n", SONDA_SMB: None}
+
+DIALETOS_SMB = (b"NT LM 0.12", b"SMB 2.002", b"SMB 2.???")
+PADRAO_SERVIDOR_HTTP = re.compile(rb"^server:[ \t]*(.+?)\r?$", re.IGNORECASE | re.MULTILINE)
+
+
+class ServicoPorta(NamedTuple):
+    """
+    'servico' é "ssh", "http", "smb", "desconhecido" (respondeu algo não
+    reconhecido), "sem_banner" ou "indisponivel" (não foi possível conectar).
+    """
+    servico: str
+    banner: str
+
+
+# ---------- Sondas ----------
+def montar_sonda_http(endereco_ip):
+    return (
+        f"HEAD / HTTP/1.0\r\nHost: {endereco_ip}\r\nUser-Agent: IP-ScanED\r\n\r\n"
+    ).encode("ascii")
+
+
+def montar_sonda_smb():
+    """
+    SMB_COM_NEGOTIATE oferecendo SMB1 e SMB2; servidores modernos respondem
+    com um cabeçalho SMB2 (\\xfeSMB), os antigos com SMB1 (\\xffSMB).
+    """
+    dialetos = b"".join(b"\x02" + dialeto + b"\x00" for dialeto in DIALETOS_SMB)
+    cabecalho = struct.pack(
+        "<4sBIBHH8sHHHHH",
+        b"\xffSMB", 0x72, 0, 0x18, 0xC853, 0, b"\x00" * 8, 0, 0, 0xFEFF, 0, 0
+    )
+    mensagem = cabecalho + b"\x00" + struct.pack("<H", len(dialetos)) + dialetos
+    return b"\x00" + len(mensagem).to_bytes(3, "big") + mensagem
+
+
+def montar_sonda(tipo_sonda, endereco_ip):
+    if tipo_sonda == SONDA_SMB:
+        return montar_sonda_smb()
+    return montar_sonda_http(endereco_ip)
+
+
+# ---------- Interpretação ----------
+def limpar_banner(dados):
+    texto = dados.decode("latin-1")
+    texto = "".join(caractere if caractere.isprintable() else " " for caractere in texto)
+    return " ".join(texto.split())[:TAMANHO_MAXIMO_BANNER]
+
+
+def interpretar_resposta(dados):
+    """
+    Reconhece o protocolo pelos primeiros bytes da resposta.
+    """
+    if not dados:
+        return ServicoPorta("sem_banner", "")
+
+    if dados.startswith(b"SSH-"):
+        return ServicoPorta("ssh", limpar_banner(dados.split(b"\n", 1)[0]))
+
+    if dados.startswith(b"HTTP/"):
+        linha_status = limpar_banner(dados.split(b"\n", 1)[0])
+        correspondencia = PADRAO_SERVIDOR_HTTP.search(dados)
+        if correspondencia:
+            linha_status += f" | {limpar_banner(correspondencia.group(1))}"
+        return ServicoPorta("http", linha_status[:TAMANHO_MAXIMO_BANNER])
+
+    if len(dados) >= 8 and dados[4:8] == b"\xfeSMB":
+        # Cabeçalho SMB2 de 64 bytes; DialectRevision fica 4 bytes depois dele
+        if len(dados) >= 74:
+            dialeto = struct.unpack_from("<H", dados, 4 + 64 + 4)[0]
+            return ServicoPorta("smb", f"SMB2 (dialeto 0x{dialeto:04x})")
+        return ServicoPorta("smb", "SMB2")
+    if len(dados) >= 8 and dados[4:8] == b"\xffSMB":
+        return ServicoPorta("smb", "SMB1")
+
+    return ServicoPorta("desconhecido", limpar_banner(dados.split(b"\n", 1)[0]))
+
+
+# ---------- Leitura com limites ----------
+async def ler_com_limite(leitor, limite_bytes, instante_limite, terminador=None):
+    """
+    Lê até 'limite_bytes', até o 'terminador' aparecer, até o outro lado
+    fechar ou até 'instante_limite' (relógio do event loop), o que vier antes.
+    """
+    loop = asyncio.get_running_loop()
+    dados = b""
+    while len(dados) < limite_bytes:
+        restante = instante_limite - loop.time()
+        if restante <= 0:
+            break
+        try:
+            bloco = await asyncio.wait_for(leitor.read(limite_bytes - len(dados)), restante)
+        except asyncio.TimeoutError:
+            break
+        if not bloco:
+            break
+        dados += bloco
+        if terminador and terminador in dados:
+            break
+    return dados
+
+
+async def identificar_servico_async(endereco_ip, porta, tempo_limite=TEMPO_LIMITE_SERVICO,
+                                    limite_bytes=LIMITE_BYTES_BANNER):
+    """
+    Conecta uma vez em (ip, porta) e retorna um ServicoPorta. O tempo total
+    (conexão, espera e leituras) nunca passa de 'tempo_limite'.
+    """
+    loop = asyncio.get_running_loop()
+    instante_limite = loop.time() + tempo_limite
+    try:
+        leitor, escritor = await asyncio.wait_for(
+            asyncio.open_connection(endereco_ip, porta), tempo_limite
+        )
+    except (OSError, asyncio.TimeoutError):
+        return ServicoPorta("indisponivel", "")
+
+    try:
+        tipo_sonda = PORTAS_SONDA.get(porta)
+        dados = b""
+        if tipo_sonda is None:
+            dados = await ler_com_limite(
+                leitor,
+                limite_bytes,
+                min(instante_limite, loop.time() + ESPERA_BANNER_PASSIVO),
+                TERMINADORES[None]
+            )
+            if not dados:
+                tipo_sonda = SONDA_HTTP
+
+        if tipo_sonda is not None:
+            escritor.write(montar_sonda(tipo_sonda, endereco_ip))
+            await escritor.drain()
+            dados = await ler_com_limite(leitor, limite_bytes, instante_limite, TERMINADORES[tipo_sonda])
+    except OSError:
+        pass
+    finally:
+        escritor.close()
+        # Espera o socket fechar de fato (sem passar do prazo da identificação)
+        try:
+            await asyncio.wait_for(escritor.wait_closed(), max(0.0, instante_limite - loop.time()))
+        except (OSError, asyncio.TimeoutError):
+            pass
+
+    return interpretar_resposta(dados)
+
+
+# ---------- Cache ----------
+class CacheServicos:
+    """
+    Cache (MAC, porta) -> ServicoPorta com validade ('tempo_vida', em
+    segundos) e no máximo 'capacidade' entradas; ao encher, sai a usada há
+    mais tempo. Hosts sem MAC conhecido (ex.: via VPN) usam o IP no lugar.
+    Pode ser usado por várias threads.
+    """
+
+    def __init__(self, tempo_vida=3600.0, capacidade=4096):
+        self.tempo_vida = tempo_vida
+        self.capacidade = capacidade
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(endereco_ip, endereco_mac, porta):
+        if endereco_mac and endereco_mac != "Desconhecido":
+            return endereco_mac.upper(), porta
+        return endereco_ip, porta
+
+    def obter(self, endereco_ip, endereco_mac, porta):
+        chave = self.chave(endereco_ip, endereco_mac, porta)
+        with self.trava:
+            entrada = self.entradas.get(chave)
+            if entrada is None or time.monotonic() - entrada[0] > self.tempo_vida:
+                if entrada is not None:
+                    del self.entradas[chave]
+                self.falhas += 1
+                return None
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+    def guardar(self, endereco_ip, endereco_mac, porta, servico_porta):
+        chave = self.chave(endereco_ip, endereco_mac, porta)
+        with self.trava:
+            self.entradas[chave] = (time.monotonic(), servico_porta)
+            self.entradas.move_to_end(chave)
+            while len(self.entradas) > self.capacidade:
+                self.entradas.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entradas)
@@ -0,0 +1,331 @@
+"""
+tabela_virtual.py
+Tabela com rolagem virtual para listas com dezenas de milhares de linhas.
+
+Os dados ficam em uma lista Python (DadosTabela, sem nada de Tk); o
+ttk.Treeview só tem os itens que cabem na área visível, e esses itens são
+reaproveitados (apenas os valores mudam) quando a tabela rola ou é
+redimensionada.
+"""
+
+import ipaddress
+from tkinter import ttk
+
+ALTURA_LINHA_PADRAO = 22
+
+
+def chave_natural(valor):
+    """
+    Chave de ordenação de uma célula: IPs pelo valor numérico, números como
+    números e o resto como texto (sem diferenciar maiúsculas).
+    """
+    texto = str(valor)
+    try:
+        endereco = ipaddress.ip_address(texto)
+        return (0, endereco.version, int(endereco), "")
+    except ValueError:
+        pass
+    try:
+        return (1, 0, float(texto.split()[0]), "")
+    except (ValueError, IndexError):
+        return (2, 0, 0, texto.lower())
+
+
+class DadosTabela:
+    """
+    Linhas da tabela, na ordem de exibição, e o índice chave -> posição.
+    Inserir, atualizar e remover por chave são O(1).
+    """
+
+    def __init__(self):
+        self.linhas = []            # valores de cada linha, na ordem de exibição
+        self.chaves = []            # chave de cada linha
+        self.indice_por_chave = {}  # chave -> posição em self.linhas
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def inserir_ou_atualizar(self, chave, valores):
+        """
+        Atualiza a linha da chave no lugar ou a acrescenta no fim.
+        Retorna a posição da linha.
+        """
+        posicao = self.indice_por_chave.get(chave)
+        if posicao is None:
+            posicao = len(self.linhas)
+            self.indice_por_chave[chave] = posicao
+            self.linhas.append(valores)
+            self.chaves.append(chave)
+        else:
+            self.linhas[posicao] = valores
+        return posicao
+
+    def definir_linhas(self, linhas_com_chave):
+        """
+        Substitui todo o conteúdo por uma sequência de (chave, valores).
+        """
+        self.linhas = []
+        self.chaves = []
+        self.indice_por_chave = {}
+        for chave, valores in linhas_com_chave:
+            self.inserir_ou_atualizar(chave, valores)
+
+    def remover(self, chave):
+        """
+        Remove a linha da chave: a última linha passa a ocupar o lugar dela.
+        Retorna (posicao_removida, posicao_anterior_da_ultima), ou None se
+        a chave não existir.
+        """
+        posicao = self.indice_por_chave.pop(chave, None)
+        if posicao is None:
+            return None
+        ultima = len(self.linhas) - 1
+        if posicao != ultima:
+            chave_ultima = self.chaves[ultima]
+            self.linhas[posicao] = self.linhas[ultima]
+            self.chaves[posicao] = chave_ultima
+            self.indice_por_chave[chave_ultima] = posicao
+        self.linhas.pop()
+        self.chaves.pop()
+        return posicao, ultima
+
+    def ordenar(self, coluna, decrescente=False):
+        """
+        Ordena as linhas pela coluna (índice em 'valores'), com chave_natural.
+        """
+        ordem = sorted(
+            range(len(self.linhas)),
+            key=lambda posicao: chave_natural(self.linhas[posicao][coluna]),
+            reverse=decrescente
+        )
+        self.definir_linhas([(self.chaves[posicao], self.linhas[posicao]) for posicao in ordem])
+
+    def limitar_primeira_linha(self, primeira_linha, quantidade_visivel):
+        maximo = max(0, len(self.linhas) - quantidade_visivel)
+        return min(max(0, int(primeira_linha)), maximo)
+
+    def janela(self, primeira_linha, quantidade_visivel):
+        """
+        Linhas visíveis a partir de primeira_linha: lista de (posicao, valores).
+        """
+        fim = min(len(self.linhas), primeira_linha + quantidade_visivel)
+        return [(posicao, self.linhas[posicao]) for posicao in range(primeira_linha, fim)]
+
+
+class TabelaVirtual:
+    """
+    Cria um Treeview + Scrollbar dentro de 'pai'. 'colunas' é uma lista de
+    (nome, largura). As linhas são identificadas por uma chave (ex.: o IP),
+    o que permite atualizar uma linha existente em O(1). Clicar no
+    cabeçalho ordena pela coluna (um segundo clique inverte a ordem).
+    """
+
+    def __init__(self, pai, colunas, altura_linha=ALTURA_LINHA_PADRAO):
+        nomes_colunas = [nome for nome, _largura in colunas]
+        self.quantidade_colunas = len(nomes_colunas)
+        self.altura_linha = altura_linha
+
+        self.arvore = ttk.Treeview(pai, columns=nomes_colunas, show="headings", selectmode="browse")
+        for indice_coluna, (nome_coluna, largura) in enumerate(colunas):
+            self.arvore.heading(
+                nome_coluna, text=nome_coluna,
+                command=lambda coluna=indice_coluna: self._ordenar_por_coluna(coluna)
+            )
+            self.arvore.column(nome_coluna, width=largura, anchor="center")
+
+        self.barra_rolagem = ttk.Scrollbar(pai, orient="vertical", command=self._comando_barra)
+
+        self.arvore.pack(side="left", fill="both", expand=True)
+        self.barra_rolagem.pack(side="right", fill="y")
+
+        self.dados = DadosTabela()
+        self.coluna_ordenada = None
+        self.ordem_decrescente = False
+        self.itens = []             # itens Tk reciclados (um por linha visível)
+        self.primeira_linha = 0
+        self.linha_selecionada = None
+        self.renderizacao_agendada = False
+
+        self.arvore.bind("<Configure>", self._redimensionar)
+        self.arvore.bind("<<TreeviewSelect>>", self._ao_selecionar)
+        self.arvore.bind("<MouseWheel>", self._rolar_roda)
+        self.arvore.bind("<Button-4>", lambda evento: self._rolar_linhas(-3))
+        self.arvore.bind("<Button-5>", lambda evento: self._rolar_linhas(3))
+        self.arvore.bind("<Up>", lambda evento: self._mover_selecao(-1))
+        self.arvore.bind("<Down>", lambda evento: self._mover_selecao(1))
+        self.arvore.bind("<Prior>", lambda evento: self._rolar_linhas(-len(self.itens)))
+        self.arvore.bind("<Next>", lambda evento: self._rolar_linhas(len(self.itens)))
+        self.arvore.bind("<Home>", lambda evento: self._rolar_para(0))
+        self.arvore.bind("<End>", lambda evento: self._rolar_para(len(self.linhas)))
+
+    # ---------- Dados ----------
+    @property
+    def linhas(self):
+        return self.dados.linhas
+
+    @property
+    def chaves(self):
+        return self.dados.chaves
+
+    def __len__(self):
+        return len(self.dados)
+
+    def inserir_ou_atualizar(self, chave, valores):
+        self.dados.inserir_ou_atualizar(chave, valores)
+        # Uma única renderização (só das linhas visíveis) por ciclo ocioso
+        self._agendar_renderizacao()
+
+    def definir_linhas(self, linhas_com_chave):
+        """
+        Substitui todo o conteúdo por uma sequência de (chave, valores).
+        """
+        self.dados.definir_linhas(linhas_com_chave)
+        self.primeira_linha = 0
+        self.linha_selecionada = None
+        self._agendar_renderizacao()
+
+    def remover(self, chave):
+        """
+        Remove a linha da chave (se existir), mantendo a rolagem e a seleção.
+        """
+        removida = self.dados.remover(chave)
+        if removida is None:
+            return
+        posicao, ultima = removida
+        if self.linha_selecionada == posicao:
+            self.linha_selecionada = None
+        elif self.linha_selecionada == ultima:
+            self.linha_selecionada = posicao
+        self._limitar_primeira_linha()
+        self._agendar_renderizacao()
+
+    def ordenar(self, coluna, decrescente=False):
+        """
+        Ordena pela coluna (índice), mantendo selecionada a mesma linha.
+        """
+        chave_selecionada = None
+        if self.linha_selecionada is not None and self.linha_selecionada < len(self.dados):
+            chave_selecionada = self.dados.chaves[self.linha_selecionada]
+        self.dados.ordenar(coluna, decrescente)
+        self.linha_selecionada = self.dados.indice_por_chave.get(chave_selecionada)
+        self.coluna_ordenada, self.ordem_decrescente = coluna, decrescente
+        self._agendar_renderizacao()
+
+    def _ordenar_por_coluna(self, coluna):
+        decrescente = self.coluna_ordenada == coluna and not self.ordem_decrescente
+        self.ordenar(coluna, decrescente)
+
+    def limpar(self):
+        self.definir_linhas([])
+
+    def valores_selecionados(self):
+        if self.linha_selecionada is None or self.linha_selecionada >= len(self.linhas):
+            return None
+        return self.linhas[self.linha_selecionada]
+
+    def bind(self, sequencia, funcao):
+        self.arvore.bind(sequencia, funcao)
+
+    def tag_configure(self, nome_tag, **opcoes):
+        self.arvore.tag_configure(nome_tag, **opcoes)
+
+    # ---------- Renderização ----------
+    def _agendar_renderizacao(self):
+        if not self.renderizacao_agendada:
+            self.renderizacao_agendada = True
+            self.arvore.after_idle(self._renderizar)
+
+    def _quantidade_visivel(self):
+        altura = self.arvore.winfo_height()
+        if self.itens:
+            caixa = self.arvore.bbox(self.itens[0])
+            if caixa:
+                return max(1, (altura - caixa[1]) // max(1, caixa[3]))
+        # Antes do primeiro desenho: desconta aproximadamente o cabeçalho
+        return max(1, (altura - self.altura_linha - 4) // self.altura_linha)
+
+    def _redimensionar(self, evento=None):
+        quantidade = self._quantidade_visivel()
+
+        while len(self.itens) < quantidade:
+            self.itens.append(self.arvore.insert("", "end", values=("",) * self.quantidade_colunas))
+        if len(self.itens) > quantidade:
+            self.arvore.delete(*self.itens[quantidade:])
+            del self.itens[quantidade:]
+
+        self._agendar_renderizacao()
+
+    def _limitar_primeira_linha(self):
+        self.primeira_linha = self.dados.limitar_primeira_linha(self.primeira_linha, len(self.itens))
+
+    def _renderizar(self):
+        self.renderizacao_agendada = False
+        self._limitar_primeira_linha()
+
+        item_selecionado = None
+        janela = self.dados.janela(self.primeira_linha, len(self.itens))
+        for deslocamento, item in enumerate(self.itens):
+            if deslocamento < len(janela):
+                posicao, valores = janela[deslocamento]
+                tag_linha = "linha_impar" if posicao % 2 else "linha_par"
+                self.arvore.item(item, values=valores, tags=(tag_linha,))
+                if posicao == self.linha_selecionada:
+                    item_selecionado = item
+            else:
+                self.arvore.item(item, values=("",) * self.quantidade_colunas, tags=())
+
+        if item_selecionado is not None:
+            self.arvore.selection_set(item_selecionado)
+        else:
+            self.arvore.selection_remove(*self.arvore.selection())
+
+        total = len(self.linhas)
+        if total <= len(self.itens) or total == 0:
+            self.barra_rolagem.set(0.0, 1.0)
+        else:
+            self.barra_rolagem.set(
+                self.primeira_linha / total,
+                (self.primeira_linha + len(self.itens)) / total
+            )
+
+    # ---------- Rolagem e seleção ----------
+    def _rolar_para(self, primeira_linha):
+        self.primeira_linha = int(primeira_linha)
+        self._limitar_primeira_linha()
+        self._agendar_renderizacao()
+        return "break"
+
+    def _rolar_linhas(self, quantidade):
+        return self._rolar_para(self.primeira_linha + quantidade)
+
+    def _rolar_roda(self, evento):
+        passos = -int(evento.delta / 120) if abs(evento.delta) >= 120 else -evento.delta
+        return self._rolar_linhas(passos * 3)
+
+    def _comando_barra(self, acao, *argumentos):
+        if acao == "moveto":
+            self._rolar_para(float(argumentos[0]) * len(self.linhas))
+        elif acao == "scroll":
+            quantidade, unidade = int(argumentos[0]), argumentos[1]
+            passo = len(self.itens) if unidade == "pages" else 1
+            self._rolar_linhas(quantidade * passo)
+
+    def _ao_selecionar(self, evento=None):
+        selecao = self.arvore.selection()
+        if selecao and selecao[0] in self.itens:
+            posicao = self.primeira_linha + self.itens.index(selecao[0])
+            if posicao < len(self.linhas):
+                self.linha_selecionada = posicao
+
+    def _mover_selecao(self, passo):
+        if not self.linhas:
+            return "break"
+        atual = self.linha_selecionada if self.linha_selecionada is not None else self.primeira_linha - passo
+        self.linha_selecionada = min(max(0, atual + passo), len(self.linhas) - 1)
+
+        if self.linha_selecionada < self.primeira_linha:
+            self.primeira_linha = self.linha_selecionada
+        elif self.linha_selecionada >= self.primeira_linha + len(self.itens):
+            self.primeira_linha = self.linha_selecionada - len(self.itens) + 1
+        self._agendar_renderizacao()
+        return "break"
@@ -0,0 +1,55 @@
+"""
+Os módulos do scanner ficam soltos na pasta "IP SCANNER" (sem pacote):
+os testes importam a partir dela, como o main.py. Os recursos (oui.idx,
+tipos_dispositivo.json) são procurados na pasta atual, então os testes
+também rodam de dentro dela.
+"""
+
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+PASTA_SCANNER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if PASTA_SCANNER not in sys.path:
+    sys.path.insert(0, PASTA_SCANNER)
+os.chdir(PASTA_SCANNER)
+
+# ---------- Servidor TCP local (portas e serviços) ----------
+BANNER_SSH = b"SSH-2.0-OpenSSH_9.6 Ubuntu\r\n"
+
+
+@pytest.fixture
+def servidor_banner():
+    """
+    Servidor que manda um banner SSH a cada conexão. Retorna a porta.
+    """
+    servidor = socket.create_server(("127.0.0.1", 0))
+    servidor.settimeout(0.1)
+    parada = threading.Event()
+
+    def atender():
+        while not parada.is_set():
+            try:
+                conexao, _endereco = servidor.accept()
+            except OSError:
+                continue
+            with conexao:
+                conexao.sendall(BANNER_SSH)
+
+    thread = threading.Thread(target=atender, daemon=True)
+    thread.start()
+    yield servidor.getsockname()[1]
+    parada.set()
+    thread.join()
+    servidor.close()
+
+
+@pytest.fixture
+def porta_fechada():
+    with socket.socket() as socket_livre:
+        socket_livre.bind(("127.0.0.1", 0))
+        return socket_livre.getsockname()[1]
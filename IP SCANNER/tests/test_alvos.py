@@ -0,0 +1,108 @@
+"""
+Interpretação dos alvos: especificações, exclusões, divisão
+em fragmentos e priorização.
+"""
+
+import pytest
+
+from net import (
+    AlvosVarredura,
+    CacheVizinhos,
+    TransporteIcmpSimulado,
+    interpretar_especificacao_alvo,
+    montar_alvos,
+    varrer_rede,
+)
+
+
+def inteiro(endereco_ip):
+    partes = [int(parte) for parte in endereco_ip.split(".")]
+    return (partes[0] << 24) | (partes[1] << 16) | (partes[2] << 8) | partes[3]
+
+
+@pytest.mark.parametrize("especificacao, esperado", [
+    ("10.0.0.5", ("10.0.0.5", "10.0.0.5")),
+    ("10.0.0.0/30", ("10.0.0.1", "10.0.0.2")),
+    ("10.0.0.0/255.255.255.252", ("10.0.0.1", "10.0.0.2")),
+    ("10.0.0.8/31", ("10.0.0.8", "10.0.0.9")),
+    ("10.0.0.10-10.0.1.2", ("10.0.0.10", "10.0.1.2")),
+    ("10.0.0.10-50", ("10.0.0.10", "10.0.0.50")),
+    (" 10.0.0.7 ", ("10.0.0.7", "10.0.0.7")),
+])
+def test_interpretar_especificacao(especificacao, esperado):
+    assert interpretar_especificacao_alvo(especificacao) == tuple(inteiro(ip) for ip in esperado)
+
+
+def test_bloco_inteiro_nas_exclusoes():
+    assert interpretar_especificacao_alvo("10.0.0.0/30", somente_hosts=False) == (
+        inteiro("10.0.0.0"), inteiro("10.0.0.3")
+    )
+
+
+@pytest.mark.parametrize("especificacao", ["10.0.0.50-10", "10.0.0.1-256", "10.0.0.300", "rede"])
+def test_especificacao_invalida(especificacao):
+    with pytest.raises(ValueError):
+        interpretar_especificacao_alvo(especificacao)
+
+
+def test_alvos_unidos_e_sem_exclusoes():
+    alvos = AlvosVarredura(
+        ["10.0.0.1-4", "10.0.0.3-6", "10.0.0.20"],
+        exclusoes=["10.0.0.2", "10.0.0.5-10.0.0.30"]
+    )
+    assert list(alvos) == ["10.0.0.1", "10.0.0.3", "10.0.0.4"]
+    assert len(alvos) == 3
+    assert "10.0.0.3" in alvos
+    assert "10.0.0.20" not in alvos
+
+
+def test_rede_local_pela_mascara():
+    alvos = montar_alvos("192.168.10.77", "255.255.254.0")
+    assert len(alvos) == 510
+    assert next(iter(alvos)) == "192.168.10.1"
+    assert "192.168.11.254" in alvos
+    assert "192.168.11.255" not in alvos
+    assert len(montar_alvos("192.168.10.77", "/20")) == 4094
+
+
+def test_rede_grande_nao_e_materializada():
+    alvos = AlvosVarredura("10.0.0.0/8")
+    assert len(alvos) == 2 ** 24 - 2
+    assert alvos.intervalos == [(inteiro("10.0.0.1"), inteiro("10.255.255.254"))]
+
+
+def test_dividir_em_rodizio_cobre_todos_os_alvos():
+    alvos = AlvosVarredura("10.0.0.0/22")
+    partes = alvos.dividir(3, tamanho_bloco=256)
+    assert len(partes) == 3
+    # Blocos de 256 a partir do primeiro host, em rodízio: o 1º e o 4º na primeira parte
+    assert partes[0][0][0] == inteiro("10.0.0.1")
+    assert partes[0][1][0] == inteiro("10.0.3.1")
+    reunidos = [
+        endereco for parte in partes for endereco in AlvosVarredura.de_intervalos(parte)
+    ]
+    assert sorted(reunidos, key=inteiro) == list(alvos)
+
+
+def test_priorizar_sem_repetir():
+    alvos = AlvosVarredura("10.0.0.0/29").priorizar(["10.0.0.5", "10.9.9.9", "10.0.0.5", "10.0.0.2"])
+    enderecos = list(alvos)
+    assert enderecos[:2] == ["10.0.0.5", "10.0.0.2"]
+    assert sorted(enderecos, key=inteiro) == [f"10.0.0.{final}" for final in range(1, 7)]
+    assert len(alvos) == 6
+
+
+def test_varredura_so_dos_alvos_informados():
+    transporte = TransporteIcmpSimulado({"10.0.0.20"})
+    resultados = {resultado.ip: resultado for resultado in varrer_rede(
+        "10.0.0.1", "24",
+        alvos=["10.0.0.10-20"],
+        exclusoes=["10.0.0.12-19"],
+        transporte=transporte,
+        cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+        tempo_limite=0.1,
+        tentativas=1
+    )}
+    assert sorted(resultados) == ["10.0.0.10", "10.0.0.11", "10.0.0.20"]
+    assert resultados["10.0.0.20"].status == "Ativo"
+    assert transporte.pacotes_enviados == 3
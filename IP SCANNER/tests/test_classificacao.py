@@ -0,0 +1,84 @@
+"""
+Classificação de dispositivos: regras por IP e por fabricante.
+"""
+
+import pytest
+
+import net
+from net import ClassificadorDispositivos, definir_tipo_dispositivo, eh_gateway
+
+ROTAS_COM_GATEWAY = """\
+Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT
+eth0\t00000000\t0100A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0
+eth0\t0000A8C0\t00000000\t0001\t0\t0\t100\t00FFFFFF\t0\t0\t0
+"""
+
+
+@pytest.fixture
+def rotas(tmp_path, monkeypatch):
+    """
+    Aponta o /proc/net/route para um arquivo do teste (ausente por padrão).
+    """
+    caminho_rotas = tmp_path / "route"
+    monkeypatch.setattr(net, "CAMINHO_PROC_ROTAS", str(caminho_rotas))
+    monkeypatch.setattr(net, "_leitura_gateway_padrao", (None, None))
+    return caminho_rotas
+
+
+def test_gateway_padrao_dentro_da_rede(rotas):
+    rotas.write_text(ROTAS_COM_GATEWAY.replace("0100A8C0", "FE00A8C0"), encoding="utf-8")
+    assert eh_gateway("192.168.0.254", "192.168.0.10", "24")
+    # Com o roteador conhecido, o primeiro host não é mais gateway
+    assert not eh_gateway("192.168.0.1", "192.168.0.10", "24")
+
+
+def test_gateway_padrao_fora_da_rede_usa_o_primeiro_host(rotas):
+    rotas.write_text(ROTAS_COM_GATEWAY, encoding="utf-8")
+    assert eh_gateway("10.0.0.1", "10.0.0.20", "255.255.255.0")
+    assert not eh_gateway("192.168.0.1", "10.0.0.20", "255.255.255.0")
+
+
+def test_sem_gateway_padrao_usa_o_primeiro_host(rotas):
+    assert eh_gateway("172.16.0.1", "172.16.5.5", "16")
+    assert eh_gateway("172.16.5.1", "172.16.5.5")  # sem máscara: /24
+    assert not eh_gateway("172.16.5.1", "172.16.5.5", "16")
+
+
+def test_troca_de_rota_vale_depois_da_validade(rotas, monkeypatch):
+    rotas.write_text(ROTAS_COM_GATEWAY, encoding="utf-8")
+    assert eh_gateway("192.168.0.1", "192.168.0.10", "24")
+
+    rotas.write_text(ROTAS_COM_GATEWAY.replace("0100A8C0", "FE00A8C0"), encoding="utf-8")
+    # Dentro da validade a leitura anterior é reaproveitada
+    assert eh_gateway("192.168.0.1", "192.168.0.10", "24")
+
+    monkeypatch.setattr(net, "VALIDADE_GATEWAY_PADRAO", 0.0)
+    assert eh_gateway("192.168.0.254", "192.168.0.10", "24")
+    assert not eh_gateway("192.168.0.1", "192.168.0.10", "24")
+
+
+def test_regras_por_ip_e_por_fabricante(rotas):
+    assert definir_tipo_dispositivo("10.0.0.5", "10.0.0.5", "Apple, Inc.", "24") == "Dispositivo Local"
+    assert definir_tipo_dispositivo("10.0.0.1", "10.0.0.5", "Desconhecido", "24") == "Roteador/Switch"
+    assert definir_tipo_dispositivo("10.0.0.7", "10.0.0.5", "Apple, Inc.", "24") == "iPhone / iPad / Mac"
+    assert definir_tipo_dispositivo("10.0.0.8", "10.0.0.5", "Fabricante Qualquer", "24") == "Host"
+
+
+def test_regra_de_menor_prioridade_vence():
+    classificador = ClassificadorDispositivos([
+        {"tipo": "Local", "condicao": "ip_local", "prioridade": 0},
+        {"tipo": "Roteador", "fabricantes": ["link"], "prioridade": 30},
+        {"tipo": "Roteador TP-Link", "fabricantes": ["tp-link"], "prioridade": 20},
+        {"tipo": "Apple", "fabricantes": ["apple"], "prioridade": 10},
+    ], tipo_padrao="Outro")
+
+    # Trechos sobrepostos ("tp-link" contém "link"): vale a prioridade
+    assert classificador.classificar("10.0.0.9", "10.0.0.5", "TP-LINK Technologies") == "Roteador TP-Link"
+    assert classificador.classificar("10.0.0.9", "10.0.0.5", "D-Link Corp") == "Roteador"
+    assert classificador.classificar("10.0.0.5", "10.0.0.5", "Apple") == "Local"
+    assert classificador.classificar("10.0.0.9", "10.0.0.5", "Desconhecido") == "Outro"
+
+
+def test_condicao_desconhecida():
+    with pytest.raises(ValueError):
+        ClassificadorDispositivos([{"tipo": "X", "condicao": "vizinho"}])
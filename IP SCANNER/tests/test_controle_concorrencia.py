@@ -0,0 +1,117 @@
+"""
+Controle de concorrência AIMD: partida lenta, redução por perda, janela
+mínima, limite de sondagens em voo, pausa e cadência.
+"""
+
+import asyncio
+import pickle
+import time
+
+import pytest
+
+from net import ControleConcorrencia
+
+
+def test_partida_lenta_ate_a_janela_maxima():
+    controle = ControleConcorrencia(janela_inicial=4, janela_maxima=10)
+    for _ in range(3):
+        controle.registrar_resposta()
+    assert controle.janela == 7
+    for _ in range(10):
+        controle.registrar_expiracao()
+    assert controle.janela == 10
+
+
+def test_perda_reduz_pela_metade_uma_vez_por_rodada():
+    controle = ControleConcorrencia(janela_inicial=32, janela_minima=4, perda_tolerada=0.0)
+    controle.registrar_perda()
+    assert controle.janela == pytest.approx(33 / 2)
+
+    # Perdas da mesma rajada contam como um único evento
+    janela = controle.janela
+    for _ in range(5):
+        controle.registrar_perda()
+    assert controle.janela > janela
+
+    # Depois da redução, crescimento linear (+1 por janela de conclusões)
+    controle = ControleConcorrencia(janela_inicial=16, perda_tolerada=0.0)
+    controle.registrar_perda(envio_recusado=True)
+    assert controle.janela == 8
+    for _ in range(8):
+        controle.registrar_resposta()
+    assert 8.9 < controle.janela < 9.1
+
+
+def test_janela_minima():
+    controle = ControleConcorrencia(janela_inicial=16, janela_minima=10, perda_tolerada=0.0)
+    controle.registrar_perda(envio_recusado=True)
+    assert controle.janela == 10
+    assert controle.limiar == 10
+
+
+def test_perda_de_fundo_tolerada_e_expiracoes_nao_reduzem():
+    controle = ControleConcorrencia(janela_inicial=32, perda_tolerada=0.05)
+    for _ in range(3):
+        controle.registrar_perda()
+    assert controle.janela == 35
+    assert 0 < controle.estimativa_perda <= 0.05
+
+    # Endereços sem host expiram: só a taxa de expiração sobe
+    for _ in range(50):
+        controle.registrar_expiracao()
+    assert controle.janela == 85
+    assert controle.taxa_expiracao > 0.3
+
+
+def test_janela_limita_sondagens_em_voo():
+    async def cenario():
+        controle = ControleConcorrencia(janela_inicial=2, janela_minima=1)
+        await controle.adquirir()
+        await controle.adquirir()
+        terceira = asyncio.ensure_future(controle.adquirir())
+        await asyncio.sleep(0.01)
+        assert not terceira.done()
+        controle.liberar()
+        await asyncio.wait_for(terceira, 1.0)
+        assert controle.em_voo == 2
+        assert controle.pacotes_enviados == 3
+
+    asyncio.run(cenario())
+
+
+def test_pausa_segura_novos_envios():
+    async def cenario():
+        controle = ControleConcorrencia()
+        controle.pausar()
+        envio = asyncio.ensure_future(controle.adquirir())
+        await asyncio.sleep(0.15)
+        assert not envio.done()
+        controle.retomar()
+        await asyncio.wait_for(envio, 1.0)
+        assert controle.em_voo == 1
+
+    asyncio.run(cenario())
+
+
+def test_taxa_maxima_cadencia_os_envios():
+    async def cenario():
+        controle = ControleConcorrencia(taxa_maxima=100)
+        instante_inicio = time.monotonic()
+        for _ in range(6):
+            await controle.adquirir()
+            controle.liberar()
+        return time.monotonic() - instante_inicio
+
+    # 6 envios a 100/s: o primeiro sai na hora, os outros a cada 10 ms
+    assert asyncio.run(cenario()) >= 0.045
+
+
+def test_controle_serializavel_mantem_a_pausa():
+    controle = ControleConcorrencia(janela_inicial=20)
+    controle.pausar()
+    copia = pickle.loads(pickle.dumps(controle))
+    assert copia.pausado
+    assert copia.janela == 20
+    copia.retomar()
+    assert not copia.pausado
+    assert controle.pausado
@@ -0,0 +1,183 @@
+"""
+Descoberta IPv6 no enlace local: interfaces e vizinhos lidos de saídas
+capturadas, eco ICMPv6 sobre o transporte simulado e a fusão com os
+resultados IPv4 pelo MAC.
+"""
+
+from descoberta_ipv6 import (
+    FONTE_ECO,
+    FONTE_LOCAL,
+    FONTE_VIZINHOS,
+    TransporteIcmpv6Simulado,
+    analisar_ip_addr_ipv6,
+    analisar_ip_neigh_ipv6,
+    analisar_ipconfig_ipv6,
+    analisar_netsh_vizinhos,
+    descobrir_ipv6,
+    mesclar_por_mac,
+)
+from net import CacheVizinhos, TransporteIcmpSimulado, varrer_rede
+
+TEMPO_LIMITE = 0.2
+
+# ---------- Interfaces e vizinhos ----------
+IP_ADDR = """\
+1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN group default qlen 1000
+    link/loopback 00:00:00:00:00:00 brd 00:00:00:00:00:00
+    inet 127.0.0.1/8 scope host lo
+    inet6 ::1/128 scope host
+2: eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc fq_codel state UP group default qlen 1000
+    link/ether 02:00:00:00:00:01 brd ff:ff:ff:ff:ff:ff
+    inet 192.168.0.10/24 brd 192.168.0.255 scope global eth0
+    inet6 2001:db8::10/64 scope global dynamic mngtmpaddr
+    inet6 fe80::1/64 scope link
+3: wg0@NONE: <POINTOPOINT,NOARP,UP,LOWER_UP> mtu 1420 qdisc noqueue state UNKNOWN group default
+    inet6 fd00::2/64 scope global
+4: docker0: <NO-CARRIER,BROADCAST,MULTICAST,UP> mtu 1500 qdisc noqueue state DOWN group default
+    link/ether 02:42:00:00:00:02 brd ff:ff:ff:ff:ff:ff
+    inet 172.17.0.1/16 brd 172.17.255.255 scope global docker0
+"""
+
+IPCONFIG_ALL = """\
+Configuração de IP do Windows
+
+Adaptador Ethernet Ethernet:
+
+   Descrição . . . . . . . . . . . . : Intel(R) Ethernet
+   Endereço Físico . . . . . . . . . : 02-00-00-00-00-01
+   Endereço IPv6 . . . . . . . . . . : 2001:db8::10(Preferencial)
+   Endereço IPv6 de link local . . . : fe80::1%12(Preferencial)
+   Endereço IPv4. . . . . . . . . . . : 192.168.0.10(Preferencial)
+
+Adaptador Ethernet vEthernet:
+
+   Endereço Físico . . . . . . . . . : 02-00-00-00-00-02
+   Endereço IPv4. . . . . . . . . . . : 172.20.0.1(Preferencial)
+"""
+
+IP_NEIGH_IPV6 = """\
+fe80::2 dev eth0 lladdr aa:bb:cc:00:00:02 router STALE
+2001:db8::2 dev eth0 lladdr aa:bb:cc:00:00:02 REACHABLE
+fe80::7 dev eth0  FAILED
+fe80::8 dev eth0  INCOMPLETE
+"""
+
+NETSH_VIZINHOS = """\
+
+Interface 12: Ethernet
+
+
+Endereço da Internet                          Endereço Físico   Tipo
+--------------------------------------------  -----------------  -----------
+fe80::2                                       aa-bb-cc-00-00-02  Obsoleto (roteador)
+fe80::7                                       00-00-00-00-00-00  Inacessível
+ff02::1                                       33-33-00-00-00-01  Permanente
+
+Interface 1: Loopback Pseudo-Interface 1
+
+"""
+
+def test_ip_addr_ipv6():
+    interfaces = analisar_ip_addr_ipv6(IP_ADDR)
+    assert [interface["interface"] for interface in interfaces] == ["eth0", "wg0"]
+
+    eth0, wg0 = interfaces
+    assert eth0["indice"] == 2
+    assert eth0["ip"] == "fe80::1"
+    assert eth0["enderecos"] == ["2001:db8::10", "fe80::1"]
+    assert eth0["mac"] == "02:00:00:00:00:01"
+    assert eth0["multicast"] is True
+    # Sem link-local, o primeiro endereço vira a origem; túnel sem multicast
+    assert wg0["ip"] == "fd00::2"
+    assert wg0["multicast"] is False
+
+
+def test_ipconfig_ipv6_usa_o_indice_como_interface():
+    interfaces = analisar_ipconfig_ipv6(IPCONFIG_ALL)
+    assert len(interfaces) == 1
+    interface = interfaces[0]
+    assert interface["indice"] == 12
+    assert interface["interface"] == "12"
+    assert interface["ip"] == "fe80::1"
+    assert interface["enderecos"] == ["2001:db8::10", "fe80::1"]
+    assert interface["mac"] == "02:00:00:00:00:01"
+
+
+def test_ip_neigh_ipv6():
+    assert analisar_ip_neigh_ipv6(IP_NEIGH_IPV6) == [
+        ("fe80::2", "eth0", "AA:BB:CC:00:00:02"),
+        ("2001:db8::2", "eth0", "AA:BB:CC:00:00:02"),
+    ]
+
+
+def test_netsh_vizinhos_ignora_multicast_e_inacessiveis():
+    assert analisar_netsh_vizinhos(NETSH_VIZINHOS) == [("fe80::2", "12", "AA:BB:CC:00:00:02")]
+
+
+# ---------- Descoberta ----------
+INTERFACE_IPV6 = {
+    "interface": "eth0",
+    "indice": 2,
+    "ip": "fe80::1",
+    "enderecos": ["2001:db8::1", "fe80::1"],
+    "mac": "02:00:00:00:00:01",
+    "multicast": True,
+    "descricao": "fe80::1 (eth0)",
+}
+
+VIZINHOS_IPV6 = [
+    ("fe80::2", "eth0", "AA:BB:CC:00:00:02"),
+    ("2001:db8::2", "eth0", "AA:BB:CC:00:00:02"),
+    ("fe80::9", "eth0", "AA:BB:CC:00:00:09"),
+]
+
+
+def descobrir_simulado():
+    transporte = TransporteIcmpv6Simulado({
+        2: {"fe80::1": 0.0, "fe80::2": 0.001, "2001:db8::2": 0.001},
+        3: {"fe80::3": 0.001},  # outra interface: não é consultada
+    })
+    return list(descobrir_ipv6(
+        [INTERFACE_IPV6],
+        transporte=transporte,
+        tempo_espera=0.1,
+        tentativas=1,
+        funcao_vizinhos=lambda: VIZINHOS_IPV6
+    ))
+
+
+def test_descoberta_ipv6_por_eco_e_vizinhos():
+    hosts = {host.ip: host for host in descobrir_simulado()}
+
+    assert set(hosts) == {"fe80::1", "fe80::2", "2001:db8::2", "fe80::9"}
+    assert hosts["fe80::1"].fonte == FONTE_LOCAL
+    assert hosts["fe80::1"].mac == "02:00:00:00:00:01"
+    # O global responde ao eco enviado a partir do endereço global da interface
+    assert hosts["2001:db8::2"].fonte == FONTE_ECO
+    assert hosts["fe80::2"].mac == "AA:BB:CC:00:00:02"
+    assert hosts["fe80::2"].rtt is not None
+    assert hosts["fe80::9"].fonte == FONTE_VIZINHOS
+    assert hosts["fe80::9"].rtt is None
+
+
+def test_mesclar_por_mac():
+    hosts_ipv6 = descobrir_simulado()
+    resultados_ipv4 = list(varrer_rede(
+        "10.0.0.1", "30",
+        transporte=TransporteIcmpSimulado({"10.0.0.1", "10.0.0.2"}),
+        cache_vizinhos=CacheVizinhos(
+            funcao_leitura=lambda: {"10.0.0.1": "02:00:00:00:00:01", "10.0.0.2": "AA:BB:CC:00:00:02"}
+        ),
+        tempo_limite=TEMPO_LIMITE,
+        tentativas=1
+    ))
+
+    mesclados = {resultado.ip: resultado for resultado in mesclar_por_mac(resultados_ipv4, hosts_ipv6)}
+
+    assert mesclados["10.0.0.2"].ipv6 == "2001:db8::2 fe80::2%eth0"
+    assert mesclados["10.0.0.1"].ipv6 == "fe80::1%eth0"
+    # Visto só por IPv6: vira uma linha própria
+    somente_ipv6 = mesclados["fe80::9%eth0"]
+    assert somente_ipv6.mac == "AA:BB:CC:00:00:09"
+    assert somente_ipv6.metodo == "vizinhos_ipv6"
+    assert len(mesclados) == 3
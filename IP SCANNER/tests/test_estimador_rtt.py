@@ -0,0 +1,37 @@
+"""
+Estimativa de RTT (RFC 6298) e timeout de cada tentativa.
+"""
+
+import pytest
+
+from net import EstimadorRtt
+
+
+def test_estimador_sem_amostras_usa_o_maximo():
+    estimador = EstimadorRtt(tempo_limite_maximo=1.0)
+    assert estimador.tempo_limite() == 1.0
+    assert estimador.tempo_limite(tentativa=2) == 1.0
+
+
+def test_estimador_segue_a_rfc_6298():
+    estimador = EstimadorRtt(tempo_limite_maximo=1.0, tempo_limite_minimo=0.001)
+    estimador.registrar(0.010)
+    assert estimador.srtt == pytest.approx(0.010)
+    assert estimador.rttvar == pytest.approx(0.005)
+    assert estimador.tempo_limite() == pytest.approx(0.010 + 4 * 0.005)
+
+    estimador.registrar(0.030)
+    assert estimador.rttvar == pytest.approx(0.75 * 0.005 + 0.25 * 0.020)
+    assert estimador.srtt == pytest.approx(0.875 * 0.010 + 0.125 * 0.030)
+    assert estimador.amostras == 2
+
+
+def test_estimador_limites_e_retentativas():
+    estimador = EstimadorRtt(tempo_limite_maximo=0.5, tempo_limite_minimo=0.1, fator_retentativa=2.0)
+    estimador.registrar(0.001)
+    assert estimador.tempo_limite() == pytest.approx(0.1)
+    assert estimador.tempo_limite(tentativa=1) == pytest.approx(0.2)
+    assert estimador.tempo_limite(tentativa=5) == pytest.approx(0.5)
+
+    estimador.registrar(2.0)
+    assert estimador.tempo_limite() == 0.5
@@ -0,0 +1,113 @@
+"""
+Histórico de hosts em SQLite: mudanças entre varreduras, timeouts por host
+e a varredura incremental sobre o transporte simulado.
+"""
+
+import time
+
+import pytest
+
+import historico
+from historico import HistoricoHosts, varrer_incremental
+from net import CacheVizinhos, ResultadoHost, TransporteIcmpSimulado, montar_alvos
+
+TEMPO_LIMITE = 1.0
+
+
+@pytest.fixture
+def banco(tmp_path):
+    caminho = str(tmp_path / "historico.sqlite3")
+    historico_hosts = HistoricoHosts(caminho)
+    yield historico_hosts
+    historico_hosts.fechar()
+
+
+def resultado(ip, ativo=True, mac="AA:BB:CC:00:00:01", rtt=0.01, fim=None):
+    return ResultadoHost(
+        ip, "Ativo" if ativo else "Inativo", "Host", "Fabricante", mac if ativo else "Desconhecido",
+        rtt if ativo else None, "icmp", 0.0, time.time() if fim is None else fim
+    )
+
+
+def eventos(mudancas):
+    return [(mudanca.evento, mudanca.ip) for mudanca in mudancas]
+
+
+def test_apareceu_desapareceu_e_mac_alterado(banco):
+    assert eventos(banco.registrar(resultado("10.0.0.2"))) == [("apareceu", "10.0.0.2")]
+    assert banco.registrar(resultado("10.0.0.2")) == []
+    assert banco.registrar(resultado("10.0.0.3", ativo=False)) == []
+
+    mudancas = banco.registrar(resultado("10.0.0.2", mac="AA:BB:CC:00:00:99"))
+    assert eventos(mudancas) == [("mac_alterado", "10.0.0.2")]
+    assert (mudancas[0].mac_anterior, mudancas[0].mac_atual) == ("AA:BB:CC:00:00:01", "AA:BB:CC:00:00:99")
+
+    mudancas = banco.registrar(resultado("10.0.0.2", ativo=False))
+    assert eventos(mudancas) == [("desapareceu", "10.0.0.2")]
+    assert mudancas[0].mac_anterior == "AA:BB:CC:00:00:99"
+
+
+def test_mac_desconhecido_nao_apaga_o_anterior_nem_conta_como_troca(banco):
+    banco.registrar(resultado("10.0.0.2"))
+    assert banco.registrar(resultado("10.0.0.2", mac="Desconhecido")) == []
+    assert banco.hosts["10.0.0.2"][2] == "AA:BB:CC:00:00:01"
+
+
+def test_estado_persiste_entre_aberturas(tmp_path):
+    caminho = str(tmp_path / "historico.sqlite3")
+    primeiro = HistoricoHosts(caminho)
+    primeiro.registrar(resultado("10.0.0.2"))
+    primeiro.registrar(resultado("10.0.0.3", ativo=False))
+    primeiro.fechar()
+
+    reaberto = HistoricoHosts(caminho)
+    try:
+        assert reaberto.ips_ativos() == ["10.0.0.2"]
+        assert eventos(reaberto.registrar(resultado("10.0.0.2", ativo=False))) == [("desapareceu", "10.0.0.2")]
+    finally:
+        reaberto.fechar()
+
+
+def test_tempo_limite_por_host(banco):
+    agora = time.time()
+    banco.registrar(resultado("10.0.0.2", rtt=0.002))    # LAN: fica no mínimo
+    banco.registrar(resultado("10.0.0.3", rtt=0.05))     # remoto: 8 × RTT
+    banco.registrar(resultado("10.0.0.4", rtt=None))     # ativo sem RTT
+    banco.registrar(resultado("10.0.0.5", ativo=False))  # nunca respondeu
+    banco.registrar(resultado("10.0.0.6", fim=agora - 60))
+    banco.registrar(resultado("10.0.0.6", ativo=False))  # caiu há pouco
+    banco.registrar(resultado("10.0.0.7", fim=agora - historico.SEGUNDOS_PARA_HOST_MORTO - 60))
+    banco.registrar(resultado("10.0.0.7", ativo=False))  # morto há muito tempo
+
+    tempo_limite_por_alvo = banco.funcao_tempo_limite(TEMPO_LIMITE)
+    assert tempo_limite_por_alvo("10.0.0.2") == historico.TEMPO_LIMITE_MINIMO_ATIVO
+    assert tempo_limite_por_alvo("10.0.0.3") == pytest.approx(0.4)
+    assert tempo_limite_por_alvo("10.0.0.4") == TEMPO_LIMITE
+    assert tempo_limite_por_alvo("10.0.0.5") == pytest.approx(0.3)
+    assert tempo_limite_por_alvo("10.0.0.6") == TEMPO_LIMITE
+    assert tempo_limite_por_alvo("10.0.0.7") == pytest.approx(0.3)
+    assert tempo_limite_por_alvo("10.0.0.99") == TEMPO_LIMITE
+    # Nunca acima do teto pedido
+    assert banco.funcao_tempo_limite(0.1)("10.0.0.3") == 0.1
+
+
+def test_ativos_sao_sondados_primeiro(banco):
+    banco.registrar(resultado("10.0.0.9", fim=100.0))
+    banco.registrar(resultado("10.0.0.5", fim=200.0))
+    alvos, _ = banco.preparar_varredura(montar_alvos("10.0.0.1", "28"), TEMPO_LIMITE)
+    assert list(alvos)[:2] == ["10.0.0.5", "10.0.0.9"]
+
+
+def test_varredura_incremental_so_informa_mudancas(banco):
+    def varrer(hosts_ativos):
+        return eventos(varrer_incremental(
+            banco, "10.0.0.1", "29",
+            transporte=TransporteIcmpSimulado(hosts_ativos),
+            cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+            tempo_limite=0.2,
+            tentativas=1,
+        ))
+
+    assert sorted(varrer({"10.0.0.2", "10.0.0.3"})) == [("apareceu", "10.0.0.2"), ("apareceu", "10.0.0.3")]
+    assert varrer({"10.0.0.2", "10.0.0.3"}) == []
+    assert sorted(varrer({"10.0.0.3", "10.0.0.5"})) == [("apareceu", "10.0.0.5"), ("desapareceu", "10.0.0.2")]
@@ -0,0 +1,75 @@
+"""
+Índice OUI binário: montagem, gravação, abertura com mmap e busca pelo
+bloco mais específico.
+"""
+
+import pytest
+
+import net
+from indice_oui import (
+    IndiceOui,
+    entradas_dicionario_oui,
+    gravar_indice_oui,
+    mac_para_inteiro,
+    montar_indice_oui,
+)
+
+ENTRADAS = [
+    (0x001122, 24, "Fabricante Grande"),
+    (0x0011225, 28, "Fabricante Médio"),
+    (0x001122567, 36, "Fabricante Pequeno"),
+    (0xAABBCC, 24, "Fabricante Grande"),
+]
+
+
+def test_mac_para_inteiro():
+    assert mac_para_inteiro("00:11:22:33:44:55") == 0x001122334455
+    assert mac_para_inteiro("00-11-22-33-44-55") == 0x001122334455
+    assert mac_para_inteiro("0011.2233.4455") == 0x001122334455
+    assert mac_para_inteiro("00:11:22") == 0x001122000000
+    with pytest.raises(ValueError):
+        mac_para_inteiro("")
+    with pytest.raises(ValueError):
+        mac_para_inteiro("00:11:22:33:44:55:66")
+
+
+def test_busca_pelo_bloco_mais_especifico(tmp_path):
+    caminho_indice = str(tmp_path / "oui.idx")
+    gravar_indice_oui(ENTRADAS, caminho_indice)
+    indice = IndiceOui.abrir(caminho_indice)
+
+    assert len(indice) == 4
+    assert indice.buscar(mac_para_inteiro("00:11:22:56:78:9A")) == "Fabricante Pequeno"
+    assert indice.buscar(mac_para_inteiro("00:11:22:55:00:00")) == "Fabricante Médio"
+    assert indice.buscar(mac_para_inteiro("00:11:22:00:00:01")) == "Fabricante Grande"
+    assert indice.buscar(mac_para_inteiro("AA:BB:CC:00:00:01")) == "Fabricante Grande"
+    assert indice.buscar(mac_para_inteiro("00:11:23:00:00:01")) is None
+
+
+def test_nomes_sem_repeticao_e_primeira_ocorrencia_vale():
+    conteudo = montar_indice_oui(ENTRADAS + [(0x001122, 24, "Repetido")])
+    indice = IndiceOui(conteudo)
+    assert sorted(indice.entradas()) == sorted(ENTRADAS)
+    # "Fabricante Grande" aparece duas vezes, mas é gravado uma só
+    assert conteudo.count("Fabricante Grande".encode("utf-8")) == 1
+    assert b"Repetido" not in conteudo
+
+
+def test_dicionario_antigo():
+    entradas = list(entradas_dicionario_oui({"00-11-22": "A", "00:11:22:5": "B", "001122567": "C"}))
+    assert entradas == [(0x001122, 24, "A"), (0x0011225, 28, "B"), (0x001122567, 36, "C")]
+
+
+def test_arquivo_invalido():
+    with pytest.raises(ValueError):
+        IndiceOui(b"XXXX" + bytes(28))
+    with pytest.raises(ValueError):
+        montar_indice_oui([(0x0011, 16, "Bloco inexistente")])
+
+
+def test_identificar_oui_usa_o_indice(monkeypatch):
+    monkeypatch.setattr(net, "_indice_oui", IndiceOui(montar_indice_oui(ENTRADAS)))
+    assert net.identificar_oui("00:11:22:56:78:9a") == "Fabricante Pequeno"
+    assert net.identificar_oui("02:00:00:00:00:01") == "Desconhecido"
+    assert net.identificar_oui("Desconhecido") == "Desconhecido"
+    assert net.identificar_oui("inválido") == "Desconhecido"
@@ -0,0 +1,83 @@
+"""
+Regressão do tempo de abertura: 'import gui' (feito em um processo novo,
+como no main.py) não pode carregar os módulos de varredura, que só são
+importados no primeiro uso. A medição do tempo depende da máquina e só roda
+com IPSCAN_TESTE_TEMPO=1.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+PASTA_SCANNER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar o gui pode gastar no máximo esta fração da meta da janela visível
+FRACAO_META_IMPORTACAO = 0.5
+
+MODULOS_PESADOS = (
+    "asyncio",
+    "descoberta_ipv6",
+    "historico",
+    "metricas",
+    "monitoramento",
+    "net",
+    "nomes",
+    "portas",
+    "retomada",
+    "servicos",
+    "sqlite3",
+    "PIL",
+)
+
+CODIGO_MEDICAO = """
+import json, sys, time
+instante_inicio = time.perf_counter()
+import gui
+tempo_importacao = time.perf_counter() - instante_inicio
+print(json.dumps({
+    "tempo": tempo_importacao,
+    "meta": gui.TEMPO_ALVO_INICIALIZACAO_SEGUNDOS,
+    "modulos": sorted(sys.modules),
+    "objetos": [gui._cache_servicos is None, gui._resolvedor_nomes is None],
+}))
+"""
+
+
+def medir_importacao_gui():
+    processo = subprocess.run(
+        [sys.executable, "-c", CODIGO_MEDICAO],
+        cwd=PASTA_SCANNER,
+        capture_output=True,
+        text=True,
+        timeout=30,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    assert processo.returncode == 0, processo.stderr
+    return json.loads(processo.stdout.splitlines()[-1])
+
+
+def test_importar_gui_nao_carrega_modulos_de_varredura():
+    medicao = medir_importacao_gui()
+    carregados = [
+        modulo for modulo in MODULOS_PESADOS
+        if any(nome == modulo or nome.startswith(modulo + ".") for nome in medicao["modulos"])
+    ]
+    assert carregados == []
+    assert medicao["objetos"] == [True, True]
+
+
+@pytest.mark.skipif(
+    os.environ.get("IPSCAN_TESTE_TEMPO") != "1",
+    reason="medição de tempo: rode com IPSCAN_TESTE_TEMPO=1"
+)
+def test_importar_gui_dentro_da_meta():
+    # A melhor de três medições: descarta ruído do disco frio / máquina ocupada
+    medicoes = [medir_importacao_gui() for _ in range(3)]
+    melhor_tempo = min(medicao["tempo"] for medicao in medicoes)
+    orcamento = medicoes[0]["meta"] * FRACAO_META_IMPORTACAO
+    assert melhor_tempo <= orcamento, f"import gui levou {melhor_tempo * 1000:.0f} ms (orçamento: {orcamento * 1000:.0f} ms)"
@@ -0,0 +1,51 @@
+"""
+Lote de eventos da fila da interface: fusão por IP e limite por quadro.
+"""
+
+from queue import Queue
+
+import gui
+from net import ResultadoHost
+from portas import ResultadoPorta
+
+
+def resultado(ip, status="Ativo"):
+    return ResultadoHost(ip, status, "Host", "Desconhecido", "", 0.001, "icmp", 0.0, 0.0)
+
+
+def test_resultados_do_mesmo_ip_sao_fundidos():
+    eventos = [resultado("10.0.0.1", "Inativo"), resultado("10.0.0.2"), resultado("10.0.0.1")]
+    resultados_por_ip, quantidade, portas, restantes = gui.agrupar_lote_eventos(iter(eventos))
+    assert list(resultados_por_ip) == ["10.0.0.1", "10.0.0.2"]
+    assert resultados_por_ip["10.0.0.1"].status == "Ativo"  # vale o último
+    assert quantidade == 3
+    assert portas == [] and restantes == []
+
+
+def test_lote_limitado_deixa_o_resto_no_iterador():
+    eventos = iter([resultado(f"10.0.0.{i}") for i in range(1, 11)])
+    resultados_por_ip, quantidade, _, _ = gui.agrupar_lote_eventos(eventos, max_eventos=4)
+    assert quantidade == 4
+    assert list(resultados_por_ip) == ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"]
+    assert [evento.ip for evento in eventos][0] == "10.0.0.5"
+
+
+def test_para_no_primeiro_evento_de_controle():
+    porta = ResultadoPorta("10.0.0.1", 22, "aberta", 0.002)
+    fim = (gui.EVENTO_FIM_VARREDURA, None)
+    eventos = iter([resultado("10.0.0.1"), porta, fim, resultado("10.0.0.2")])
+    resultados_por_ip, quantidade, portas, restantes = gui.agrupar_lote_eventos(eventos)
+    assert list(resultados_por_ip) == ["10.0.0.1"] and quantidade == 1
+    assert portas == [porta]
+    assert restantes == [fim]
+    assert next(eventos).ip == "10.0.0.2"
+
+
+def test_coleta_da_fila_nao_retira_alem_do_limite(monkeypatch):
+    monkeypatch.setattr(gui, "MAX_EVENTOS_QUADRO", 3)
+    fila = Queue()
+    for i in range(1, 6):
+        fila.put(resultado(f"10.0.0.{i}"))
+    _, quantidade, _, _ = gui.coletar_lote_eventos(fila, orcamento_segundos=1.0)
+    assert quantidade == 3
+    assert fila.qsize() == 2
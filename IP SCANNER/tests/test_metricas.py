@@ -0,0 +1,123 @@
+"""
+Métricas da varredura: histogramas, medidores e exportação em JSON e no
+formato de texto do Prometheus.
+"""
+
+import json
+import re
+
+import pytest
+
+from metricas import Histograma, MetricasVarredura
+
+# Linha de amostra do formato de texto: nome{rótulos} valor
+PADRAO_AMOSTRA = re.compile(
+    r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? '
+    r'(-?[0-9.e+-]+|\+Inf)$'
+)
+PADRAO_COMENTARIO = re.compile(r"^# (HELP [a-zA-Z_:][a-zA-Z0-9_:]* .+|TYPE [a-zA-Z_:][a-zA-Z0-9_:]* "
+                               r"(counter|gauge|histogram))$")
+
+
+@pytest.fixture
+def registro():
+    metricas = MetricasVarredura()
+    for _ in range(9):
+        metricas.observar("rtt", 0.002)
+    metricas.observar("rtt", 3.0)
+    metricas.observar("oui", 0.00003)
+    metricas.observar("oui", 12.0)  # acima do último limite
+    metricas.incrementar("sondagens_enviadas", 10)
+    metricas.incrementar("sondagens_enviadas")
+    metricas.definir("fila_interface_profundidade", 40)
+    return metricas
+
+
+def test_percentil_pelo_balde():
+    histograma = Histograma()
+    assert histograma.percentil(0.5) is None
+    for _ in range(9):
+        histograma.observar(0.002)
+    histograma.observar(3.0)
+    assert histograma.percentil(0.50) == 0.005
+    # O limite do balde (5 s) nunca passa do máximo observado
+    assert histograma.percentil(0.99) == 3.0
+    histograma.observar(60.0)
+    assert histograma.percentil(1.0) == 60.0
+    assert histograma.contagens[-1] == 1
+
+
+def test_medidor_guarda_o_maximo():
+    metricas = MetricasVarredura()
+    metricas.definir("fila", 5)
+    metricas.definir("fila", 12)
+    metricas.definir("fila", 3)
+    assert metricas.medidores == {"fila": 3, "fila_maximo": 12}
+    metricas.definir("negativo", -4)
+    assert metricas.medidores["negativo_maximo"] == -4
+
+
+def test_baldes_prometheus_acumulados(registro):
+    texto = registro.exportar_prometheus()
+    baldes = {}
+    for linha in texto.splitlines():
+        encontrado = re.match(r'ipscan_fase_segundos_bucket\{fase="(\w+)",le="([^"]+)"\} (\d+)$', linha)
+        if encontrado:
+            baldes.setdefault(encontrado.group(1), []).append((encontrado.group(2), int(encontrado.group(3))))
+
+    for fase, quantidade in (("rtt", 10), ("oui", 2)):
+        contagens = [contagem for _limite, contagem in baldes[fase]]
+        assert contagens == sorted(contagens)
+        assert baldes[fase][-1] == ("+Inf", quantidade)
+        assert f'ipscan_fase_segundos_count{{fase="{fase}"}} {quantidade}' in texto
+    # 12 s fica só no +Inf
+    assert baldes["oui"][-2] == ("5.0", 1)
+
+
+def test_formato_de_exposicao_valido(registro):
+    texto = registro.exportar_prometheus()
+    assert texto.endswith("\n")
+    tipos = {}
+    for linha in texto.splitlines():
+        if linha.startswith("#"):
+            assert PADRAO_COMENTARIO.match(linha), linha
+            if linha.startswith("# TYPE"):
+                _, _, nome, tipo = linha.split()
+                assert nome not in tipos  # um TYPE por métrica
+                tipos[nome] = tipo
+        else:
+            assert PADRAO_AMOSTRA.match(linha), linha
+            nome = linha.split("{")[0].split()[0]
+            familia = nome if nome in tipos else re.sub(r"_(bucket|sum|count)$", "", nome)
+            assert familia in tipos, linha
+    assert tipos["ipscan_sondagens_enviadas_total"] == "counter"
+    assert tipos["ipscan_fila_interface_profundidade_maximo"] == "gauge"
+    assert tipos["ipscan_fase_segundos"] == "histogram"
+    assert "ipscan_sondagens_enviadas_total 11" in texto
+
+
+def test_exportar_json(registro):
+    dados = json.loads(registro.exportar_json())
+    assert dados["contadores"] == {"sondagens_enviadas": 11}
+    assert dados["medidores"]["fila_interface_profundidade_maximo"] == 40
+    rtt = dados["fases"]["rtt"]
+    assert rtt["quantidade"] == 10
+    assert rtt["maximo_s"] == 3.0
+    assert rtt["soma_s"] == pytest.approx(3.018)
+    assert sum(rtt["baldes"].values()) == 10
+    assert dados["fases"]["oui"]["baldes"]["+Inf"] == 1
+
+
+def test_salvar_escolhe_o_formato_pela_extensao(registro, tmp_path):
+    caminho_json = tmp_path / "fases.JSON"
+    caminho_prometheus = tmp_path / "fases.prom"
+    registro.salvar(str(caminho_json))
+    registro.salvar(str(caminho_prometheus))
+
+    assert json.loads(caminho_json.read_text(encoding="utf-8"))["contadores"]["sondagens_enviadas"] == 11
+    assert caminho_prometheus.read_text(encoding="utf-8").startswith("# TYPE ipscan_")
+
+    # Formato explícito vale mais que a extensão
+    caminho_forcado = tmp_path / "fases.txt"
+    registro.salvar(str(caminho_forcado), formato="json")
+    assert json.loads(caminho_forcado.read_text(encoding="utf-8"))["medidores"]
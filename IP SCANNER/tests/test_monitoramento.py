@@ -0,0 +1,121 @@
+"""
+Monitoramento contínuo sobre o transporte ICMP simulado: confirmação de
+queda, ciclos completos e o agendamento com variação.
+"""
+
+import asyncio
+
+import pytest
+
+from historico import HistoricoHosts, MudancaHost
+from monitoramento import CICLO_COMPLETO, CICLO_RAPIDO, CicloMonitoramento, monitorar_async
+from net import CacheVizinhos, TransporteIcmpSimulado
+
+INTERVALO_ATIVOS = 0.05
+INTERVALO_COMPLETO = 0.25
+VARIACAO = 0.2
+
+
+@pytest.fixture
+def historico(tmp_path):
+    historico_hosts = HistoricoHosts(str(tmp_path / "historico.sqlite3"))
+    yield historico_hosts
+    historico_hosts.fechar()
+
+
+def monitorar_ciclos(historico, transporte, quantidade_ciclos, ao_fim_do_ciclo=None):
+    """
+    Roda o monitoramento de 10.0.0.0/29 por 'quantidade_ciclos' ciclos.
+    Retorna a lista de ciclos, cada um como (CicloMonitoramento, mudanças).
+    """
+    async def rodar():
+        ciclos = []
+        mudancas = []
+        itens = monitorar_async(
+            historico, "10.0.0.1", "29",
+            intervalo_ativos=INTERVALO_ATIVOS,
+            intervalo_completo=INTERVALO_COMPLETO,
+            variacao=VARIACAO,
+            falhas_para_queda=2,
+            tempo_limite=0.1,
+            tentativas=1,
+            semente=1,
+            transporte=transporte,
+            cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+        )
+        try:
+            async for item in itens:
+                if isinstance(item, MudancaHost):
+                    mudancas.append((item.evento, item.ip))
+                elif isinstance(item, CicloMonitoramento):
+                    ciclos.append((item, mudancas))
+                    mudancas = []
+                    if len(ciclos) == quantidade_ciclos:
+                        break
+                    if ao_fim_do_ciclo is not None:
+                        ao_fim_do_ciclo(len(ciclos), item)
+        finally:
+            await itens.aclose()
+        return ciclos
+
+    return asyncio.run(rodar())
+
+
+def test_queda_so_depois_de_dois_ciclos_rapidos_sem_resposta(historico):
+    transporte = TransporteIcmpSimulado({"10.0.0.2", "10.0.0.3"})
+
+    def ao_fim_do_ciclo(numero, _ciclo):
+        if numero == 1:
+            del transporte.hosts_ativos["10.0.0.3"]
+
+    ciclos = monitorar_ciclos(historico, transporte, 3, ao_fim_do_ciclo)
+
+    assert [ciclo.tipo for ciclo, _ in ciclos] == [CICLO_COMPLETO, CICLO_RAPIDO, CICLO_RAPIDO]
+    assert sorted(ciclos[0][1]) == [("apareceu", "10.0.0.2"), ("apareceu", "10.0.0.3")]
+    # Primeira falha: ainda não conta, e o próximo rápido vem logo
+    assert ciclos[1][1] == []
+    assert ciclos[1][0].ativos == 1
+    assert ciclos[2][1] == [("desapareceu", "10.0.0.3")]
+    assert historico.ips_ativos() == ["10.0.0.2"]
+
+
+def test_ciclo_completo_encontra_hosts_novos(historico):
+    transporte = TransporteIcmpSimulado({"10.0.0.2"})
+
+    def ao_fim_do_ciclo(numero, _ciclo):
+        if numero == 1:
+            transporte.hosts_ativos["10.0.0.5"] = 0.001
+
+    ciclos = monitorar_ciclos(historico, transporte, 12, ao_fim_do_ciclo)
+    tipos = [ciclo.tipo for ciclo, _ in ciclos]
+    segundo_completo = tipos.index(CICLO_COMPLETO, 1)
+
+    # Os rápidos só sondam quem já estava ativo
+    for ciclo, mudancas in ciclos[1:segundo_completo]:
+        assert ciclo.alvos == 1
+        assert mudancas == []
+    assert ciclos[segundo_completo][0].alvos == 6
+    assert ciclos[segundo_completo][1] == [("apareceu", "10.0.0.5")]
+    assert ciclos[segundo_completo + 1][0].alvos == 2
+
+
+def test_agenda_alterna_rapidos_e_completos_com_variacao(historico):
+    transporte = TransporteIcmpSimulado({"10.0.0.2", "10.0.0.4"})
+    ciclos = [ciclo for ciclo, _ in monitorar_ciclos(historico, transporte, 14)]
+
+    tipos = [ciclo.tipo for ciclo in ciclos]
+    segundo_completo = tipos.index(CICLO_COMPLETO, 1)
+    assert tipos[0] == CICLO_COMPLETO
+    # Entre dois completos (~0,25 s), vários rápidos (~0,05 s cada)
+    assert 2 <= segundo_completo - 1 <= 9
+    assert set(tipos[1:segundo_completo]) == {CICLO_RAPIDO}
+    assert tipos[segundo_completo + 1] == CICLO_RAPIDO
+
+    for atual, seguinte in zip(ciclos, ciclos[1:]):
+        # O ciclo anuncia o tipo e o total de alvos do próximo
+        assert (atual.proximo_tipo, atual.proximo_alvos) == (seguinte.tipo, seguinte.alvos)
+        if atual.proximo_tipo == CICLO_RAPIDO:
+            assert INTERVALO_ATIVOS * (1 - VARIACAO) - 1e-6 <= atual.proximo_em
+            assert atual.proximo_em <= INTERVALO_ATIVOS * (1 + VARIACAO) + 1e-6
+    intervalos_rapidos = {round(ciclo.proximo_em, 4) for ciclo in ciclos if ciclo.proximo_tipo == CICLO_RAPIDO}
+    assert len(intervalos_rapidos) > 1  # sorteados, não fixos
@@ -0,0 +1,143 @@
+"""
+Mensagens DNS/NetBIOS, cache de nomes e a anotação dos resultados.
+"""
+
+import asyncio
+import pickle
+import struct
+import time
+
+from net import ResultadoHost
+from nomes import (
+    TIPO_NBSTAT,
+    TIPO_PTR,
+    CacheNomes,
+    ResolvedorNomes,
+    codificar_nome_dns,
+    interpretar_nbstat,
+    interpretar_resposta_dns,
+    montar_consulta_dns,
+    nome_reverso,
+    obter_servidor_dns,
+)
+
+
+def montar_resposta_ptr(identificador, endereco_ip, nome, ttl):
+    """
+    Resposta a montar_consulta_dns com um PTR; o nome da resposta aponta
+    para a pergunta (compressão, deslocamento 12).
+    """
+    consulta = montar_consulta_dns(identificador, nome_reverso(endereco_ip))
+    cabecalho = struct.pack(">HHHHHH", identificador, 0x8180, 1, 1, 0, 0)
+    dados_nome = codificar_nome_dns(nome)
+    resposta = struct.pack(">HHHIH", 0xC00C, TIPO_PTR, 1, ttl, len(dados_nome)) + dados_nome
+    return cabecalho + consulta[12:] + resposta
+
+
+def test_nome_reverso():
+    assert nome_reverso("192.168.0.10") == "10.0.168.192.in-addr.arpa"
+
+
+def test_consulta_dns():
+    consulta = montar_consulta_dns(0x1234, "10.0.168.192.in-addr.arpa")
+    assert consulta[:12] == struct.pack(">HHHHHH", 0x1234, 0x0100, 1, 0, 0, 0)
+    assert consulta[12:] == (
+        b"\x0210\x010\x03168\x03192\x07in-addr\x04arpa\x00" + struct.pack(">HH", TIPO_PTR, 1)
+    )
+    assert montar_consulta_dns(1, "x.local", recursiva=False)[2:4] == b"\x00\x00"
+
+
+def test_resposta_ptr_com_compressao():
+    dados = montar_resposta_ptr(0x4321, "192.168.0.10", "impressora.lan", 600)
+    identificador, codigo_resposta, respostas = interpretar_resposta_dns(dados)
+    assert identificador == 0x4321
+    assert codigo_resposta == 0
+    assert respostas == [(TIPO_PTR, 600, "impressora.lan")]
+
+
+def test_resposta_sem_nome():
+    cabecalho = struct.pack(">HHHHHH", 7, 0x8183, 1, 0, 0, 0)
+    dados = cabecalho + montar_consulta_dns(7, nome_reverso("10.0.0.1"))[12:]
+    assert interpretar_resposta_dns(dados) == (7, 3, [])
+
+
+def test_nbstat_primeiro_nome_unico_de_estacao():
+    def entrada(nome, sufixo, bandeiras):
+        return nome.ljust(15).encode("ascii") + bytes([sufixo]) + struct.pack(">H", bandeiras)
+
+    dados_registro = bytes([3]) + (
+        entrada("WORKGROUP", 0x00, 0x8400) +   # grupo
+        entrada("NOTEBOOK", 0x03, 0x0400) +    # serviço de mensagens
+        entrada("NOTEBOOK", 0x00, 0x0400)
+    )
+    assert interpretar_nbstat(dados_registro) == "NOTEBOOK"
+    assert interpretar_nbstat(bytes([1]) + entrada("WORKGROUP", 0x00, 0x8400)) is None
+    assert interpretar_nbstat(b"") is None
+    assert TIPO_NBSTAT == 0x21
+
+
+def test_servidor_dns_do_resolv_conf(tmp_path):
+    resolv_conf = tmp_path / "resolv.conf"
+    resolv_conf.write_text("# comentário\nnameserver fd00::1\nnameserver 10.0.0.53\n", encoding="utf-8")
+    assert obter_servidor_dns(str(resolv_conf)) == ("10.0.0.53", 53)
+    assert obter_servidor_dns(str(tmp_path / "inexistente")) is None
+
+
+def test_cache_nomes_validade(monkeypatch):
+    instante = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: instante[0])
+    cache = CacheNomes(tempo_vida_maximo=3600.0, tempo_vida_negativo=300.0, capacidade=2)
+
+    cache.guardar("10.0.0.1", "roteador.lan", ttl=60)
+    cache.guardar("10.0.0.2", None)
+    assert cache.obter("10.0.0.1") == (True, "roteador.lan")
+    assert cache.obter("10.0.0.2") == (True, None)
+    assert cache.obter("10.0.0.3") == (False, None)
+
+    instante[0] += 61.0
+    assert cache.obter("10.0.0.1") == (False, None)
+    assert cache.obter("10.0.0.2") == (True, None)
+
+    cache.guardar("10.0.0.4", "a", ttl=10 ** 6)
+    cache.guardar("10.0.0.5", "b")
+    assert len(cache) == 2
+    instante[0] += 3601.0
+    assert cache.obter("10.0.0.4") == (False, None)
+
+
+def test_cache_nomes_serializavel():
+    cache = CacheNomes()
+    cache.guardar("10.0.0.1", "roteador.lan")
+    copia = pickle.loads(pickle.dumps(cache))
+    assert copia.obter("10.0.0.1") == (True, "roteador.lan")
+    copia.guardar("10.0.0.2", "outro")
+    assert len(cache) == 1
+
+
+def test_anotar_preenche_os_ativos_sem_segurar_os_demais():
+    resolvedor = ResolvedorNomes(servidor_dns=("127.0.0.1", 9), max_paralelo=4)
+    resolvedor.cache.guardar("10.0.0.3", "em-cache.lan")
+    consultados = []
+
+    async def resolver(_consultor, endereco_ip):
+        consultados.append(endereco_ip)
+        await asyncio.sleep(0.01 if endereco_ip.endswith("0") else 0.0)
+        return f"host-{endereco_ip.split('.')[-1]}.lan"
+
+    resolvedor.resolver = resolver
+
+    async def sondagens():
+        for final in range(1, 101):
+            status = "Ativo" if final % 2 == 0 or final == 3 else "Inativo"
+            yield ResultadoHost(f"10.0.0.{final}", status, "Host", "", "", None, "icmp", 0.0, 0.0)
+
+    async def anotar():
+        return [resultado async for resultado in resolvedor.anotar(sondagens())]
+
+    resultados = {resultado.ip: resultado for resultado in asyncio.run(anotar())}
+    assert len(resultados) == 100
+    assert resultados["10.0.0.1"].nome is None
+    assert resultados["10.0.0.3"].nome == "em-cache.lan"
+    assert resultados["10.0.0.10"].nome == "host-10.lan"
+    assert resultados["10.0.0.100"].nome == "host-100.lan"
+    assert len(consultados) == 50
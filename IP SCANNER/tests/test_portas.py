@@ -0,0 +1,53 @@
+"""
+Teste de portas contra um servidor TCP local em 127.0.0.1 (fixtures
+servidor_banner e porta_fechada, do conftest).
+"""
+
+import pytest
+
+import portas
+from portas import (
+    ESTADO_ABERTA,
+    ESTADO_FECHADA,
+    PORTAS_FREQUENTES,
+    interpretar_portas,
+    varrer_portas,
+)
+
+# ---------- interpretar_portas ----------
+def test_interpretar_portas():
+    assert interpretar_portas("22,80,443") == [22, 80, 443]
+    assert interpretar_portas("8000-8003") == [8000, 8001, 8002, 8003]
+    assert interpretar_portas("10-8") == [8, 9, 10]
+    assert interpretar_portas("top5") == list(PORTAS_FREQUENTES[:5])
+    assert interpretar_portas("top") == list(PORTAS_FREQUENTES)
+    # Sem repetição, na ordem em que aparecem
+    assert interpretar_portas("443, top3 ,22,,80") == [443, 80, 23, 22]
+
+
+@pytest.mark.parametrize("especificacao", ["0", "65536", "1-70000", "ssh", "22a", "topx"])
+def test_interpretar_portas_invalidas(especificacao):
+    with pytest.raises(ValueError):
+        interpretar_portas(especificacao)
+
+
+# ---------- Varredura ----------
+def test_portas_aberta_e_fechada(servidor_banner, porta_fechada):
+    resultados = {
+        resultado.porta: resultado
+        for resultado in varrer_portas(["127.0.0.1"], [servidor_banner, porta_fechada], tempo_limite=1.0)
+    }
+    assert resultados[servidor_banner].estado == ESTADO_ABERTA
+    assert resultados[servidor_banner].rtt is not None
+    assert resultados[servidor_banner].servico is None
+    assert resultados[porta_fechada].estado == ESTADO_FECHADA
+
+
+def test_falha_na_identificacao_mantem_a_porta_aberta(servidor_banner, monkeypatch):
+    async def identificar_com_erro(*_argumentos):
+        raise RuntimeError("falha simulada")
+
+    monkeypatch.setattr(portas, "identificar_servico_async", identificar_com_erro)
+    resultado, = varrer_portas(["127.0.0.1"], [servidor_banner], identificar_servicos=True)
+    assert resultado.estado == ESTADO_ABERTA
+    assert (resultado.servico, resultado.banner) == ("indisponivel", "")
@@ -0,0 +1,81 @@
+"""
+Importação dos registros MA-L/MA-M/MA-S do IEEE para o índice OUI:
+bloco mais específico, nomes unificados e reimportação.
+"""
+
+import json
+
+from indice_oui import IndiceOui, mac_para_inteiro
+from registro_ieee import DiferencaIndice, importar_registros
+
+CABECALHO_CSV = "Registry,Assignment,Organization Name,Organization Address\n"
+
+
+def escrever_csv(caminho, linhas):
+    caminho.write_text(CABECALHO_CSV + "".join(f"{linha}\n" for linha in linhas), encoding="utf-8")
+    return str(caminho)
+
+
+def test_importacao_e_busca_pelo_bloco_mais_especifico(tmp_path):
+    oui_csv = escrever_csv(tmp_path / "oui.csv", [
+        'MA-L,001122,"Fabricante  Grande, Inc",Rua A',
+        "MA-L,AABBCC,Outro Fabricante,Rua B",
+        "MA-L,XYZ123,Prefixo Inválido,Rua C",
+        "CID,001123,Registro Ignorado,Rua D",
+    ])
+    mam_csv = escrever_csv(tmp_path / "mam.csv", ["MA-M,0011225,Fabricante Médio,Rua E"])
+    oui36_csv = escrever_csv(tmp_path / "oui36.csv", ["MA-S,001122567,Fabricante Pequeno,Rua F"])
+    caminho_indice = str(tmp_path / "oui.idx")
+
+    diferenca = importar_registros([oui_csv, mam_csv, oui36_csv], caminho_indice)
+    assert diferenca == DiferencaIndice(4, 4, 0, 0, True)
+
+    indice = IndiceOui.abrir(caminho_indice)
+    assert indice.buscar(mac_para_inteiro("00:11:22:56:78:9A")) == "Fabricante Pequeno"
+    assert indice.buscar(mac_para_inteiro("00:11:22:55:00:00")) == "Fabricante Médio"
+    assert indice.buscar(mac_para_inteiro("00-11-22-00-00-01")) == "Fabricante Grande, Inc"
+    assert indice.buscar(mac_para_inteiro("AA:BB:CC:00:00:01")) == "Outro Fabricante"
+    assert indice.buscar(mac_para_inteiro("00:11:23:00:00:01")) is None
+
+
+def test_nomes_unificados_e_json_com_precedencia(tmp_path):
+    caminho_json = tmp_path / "oui.json"
+    caminho_json.write_text(json.dumps({"00-11-22": "Nome Antigo"}), encoding="utf-8")
+    oui_csv = escrever_csv(tmp_path / "oui.csv", [
+        "MA-L,001122,Nome Novo,Rua A",
+        "MA-L,000001,Cisco Systems,Rua B",
+        "MA-L,000002,\"Cisco Systems, Inc\",Rua C",
+        "MA-L,000003,Cisco Systems Inc.,Rua D",
+    ])
+    caminho_indice = str(tmp_path / "oui.idx")
+
+    importar_registros([oui_csv], caminho_indice, str(caminho_json))
+
+    nomes = {prefixo: nome for prefixo, _bits, nome in IndiceOui.abrir(caminho_indice).entradas()}
+    assert nomes[0x001122] == "Nome Antigo"
+    assert nomes[0x000002] == nomes[0x000003] == "Cisco Systems, Inc"
+    assert nomes[0x000001] == "Cisco Systems"
+
+
+def test_reimportacao_informa_a_diferenca_e_troca_o_arquivo(tmp_path):
+    caminho_indice = str(tmp_path / "oui.idx")
+    importar_registros([escrever_csv(tmp_path / "v1.csv", [
+        "MA-L,000001,Um,Rua",
+        "MA-L,000002,Dois,Rua",
+        "MA-L,000003,Três,Rua",
+    ])], caminho_indice)
+    indice_aberto = IndiceOui.abrir(caminho_indice)
+
+    csv_v2 = escrever_csv(tmp_path / "v2.csv", [
+        "MA-L,000001,Um,Rua",
+        "MA-L,000002,Dois Renomeado,Rua",
+        "MA-L,000004,Quatro,Rua",
+        "MA-L,000005,Cinco,Rua",
+    ])
+    assert importar_registros([csv_v2], caminho_indice) == DiferencaIndice(4, 2, 1, 1, True)
+    # Sem mudança: nada é regravado
+    assert importar_registros([csv_v2], caminho_indice) == DiferencaIndice(4, 0, 0, 0, False)
+
+    # Quem já tinha o índice aberto (mmap) continua lendo a versão antiga
+    assert indice_aberto.buscar(mac_para_inteiro("00:00:03:00:00:01")) == "Três"
+    assert IndiceOui.abrir(caminho_indice).buscar(mac_para_inteiro("00:00:03:00:00:01")) is None
@@ -0,0 +1,136 @@
+"""
+Pontos de retomada: mapa de bits gravado e relido, alvos pendentes,
+varredura retomada depois de uma interrupção e arquivos rejeitados.
+"""
+
+import json
+
+import pytest
+
+import retomada
+from net import AlvosVarredura, CacheVizinhos, ResultadoHost, TransporteIcmpSimulado, varrer_rede
+from retomada import PontoRetomada, varrer_com_retomada
+
+HOSTS_ATIVOS = {"10.0.0.7", "10.0.0.100", "10.0.0.200", "10.0.0.254"}
+# Com o MAC na tabela de vizinhos, os ativos saem assim que respondem
+TABELA_VIZINHOS = {ip: f"AA:BB:CC:00:00:{int(ip.split('.')[-1]):02X}" for ip in HOSTS_ATIVOS}
+
+
+def resultado(ip, ativo=False):
+    return ResultadoHost(
+        ip, "Ativo" if ativo else "Inativo", "Host", "Desconhecido", "Desconhecido",
+        0.002 if ativo else None, "icmp", 1000.0, 1000.5, "10.0.0.1"
+    )
+
+
+@pytest.fixture
+def alvos():
+    # Vários intervalos, com bytes do mapa inteiros e pela metade
+    return AlvosVarredura(["10.0.0.0/24", "10.0.2.0-10.0.2.20"], ["10.0.0.50-10.0.0.60"])
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "ponto.json")
+
+
+def test_mapa_de_bits_sobrevive_a_gravacao(alvos, caminho):
+    ponto = PontoRetomada(caminho, alvos)
+    concluidos = [ip for indice, ip in enumerate(alvos) if indice % 3 == 0 or 64 <= indice < 128]
+    for ip in concluidos:
+        ponto.registrar(resultado(ip, ativo=ip.endswith("7")))
+    ponto.salvar()
+
+    reaberto = PontoRetomada.abrir(caminho, alvos)
+    assert reaberto.concluidos == ponto.concluidos
+    assert reaberto.quantidade_concluidos == len(concluidos)
+    assert reaberto.resultados == ponto.resultados
+    assert reaberto.resultados and all(r.status == "Ativo" for r in reaberto.resultados)
+    assert [ip for ip in alvos if reaberto.concluido(ip)] == concluidos
+    assert not reaberto.concluido("10.0.0.55")  # excluído: fora dos alvos
+
+
+def test_pendentes_pula_os_concluidos(alvos, caminho):
+    ponto = PontoRetomada(caminho, alvos)
+    for indice, ip in enumerate(alvos):
+        if indice % 5 == 0 or 16 <= indice < 40 or indice == len(alvos) - 1:
+            ponto.registrar(resultado(ip))
+
+    pendentes = ponto.pendentes()
+    assert list(pendentes) == [ip for ip in alvos if not ponto.concluido(ip)]
+    assert len(pendentes) == ponto.quantidade - ponto.quantidade_concluidos
+
+    for ip in list(pendentes):
+        ponto.registrar(resultado(ip))
+    assert ponto.completo
+    assert len(ponto.pendentes()) == 0
+
+
+def test_retomada_so_sonda_o_que_faltou(caminho):
+    alvos = AlvosVarredura(["10.0.0.0/24"])
+    transportes = []
+
+    def varrer(alvos_pendentes):
+        transporte = TransporteIcmpSimulado(HOSTS_ATIVOS)
+        transportes.append(transporte)
+        return varrer_rede(
+            "10.0.0.1", "24", alvos=alvos_pendentes, transporte=transporte,
+            cache_vizinhos=CacheVizinhos(funcao_leitura=lambda: dict(TABELA_VIZINHOS)),
+            tempo_limite=0.05, tentativas=1
+        )
+
+    # Primeira execução: interrompida depois de 100 resultados
+    primeira = varrer_com_retomada(PontoRetomada.abrir(caminho, alvos), varrer)
+    vistos = [next(primeira) for _ in range(100)]
+    primeira.close()
+    with open(caminho, encoding="utf-8") as arquivo_ponto:
+        assert json.load(arquivo_ponto)["quantidade"] == 254
+
+    ponto = PontoRetomada.abrir(caminho, alvos)
+    assert ponto.quantidade_concluidos == 100
+    salvos = [r.ip for r in ponto.resultados]
+    assert salvos and sorted(salvos) == sorted(r.ip for r in vistos if r.status == "Ativo")
+
+    segunda = list(varrer_com_retomada(ponto, varrer))
+    assert transportes[1].pacotes_enviados == 254 - 100
+    # Os ativos já salvos vêm primeiro; no total, cada ativo uma vez
+    assert [r.ip for r in segunda[:len(salvos)]] == salvos
+    assert sorted(r.ip for r in segunda if r.status == "Ativo") == sorted(HOSTS_ATIVOS)
+    assert len(segunda) == len(salvos) + 154
+    # Concluída: o arquivo some
+    assert PontoRetomada.abrir(caminho, alvos).quantidade_concluidos == 0
+
+
+@pytest.mark.parametrize("alterar", [
+    lambda dados: "{ isto não é json",
+    lambda dados: json.dumps([dados]),
+    lambda dados: json.dumps(dict(dados, concluidos="não é base64!")),
+    lambda dados: json.dumps(dict(dados, concluidos="AAAA")),
+    lambda dados: json.dumps(dict(dados, resultados=[["10.0.0.7", "Ativo"]])),
+    lambda dados: json.dumps(dict(dados, identificador="0" * 40)),
+    lambda dados: json.dumps(dict(dados, versao=retomada.VERSAO_FORMATO + 1)),
+    lambda dados: json.dumps(dict(dados, campos=["ip", "status"])),
+    lambda dados: json.dumps(dict(dados, atualizado_em=dados["atualizado_em"] - retomada.VALIDADE_PONTO - 1)),
+])
+def test_ponto_corrompido_ou_de_outros_alvos_e_recusado(alvos, caminho, alterar):
+    ponto = PontoRetomada(caminho, alvos)
+    for ip in list(alvos)[:40]:
+        ponto.registrar(resultado(ip, ativo=True))
+    ponto.salvar()
+    with open(caminho, encoding="utf-8") as arquivo_ponto:
+        dados = json.load(arquivo_ponto)
+    with open(caminho, "w", encoding="utf-8") as arquivo_ponto:
+        arquivo_ponto.write(alterar(dados))
+
+    reaberto = PontoRetomada.abrir(caminho, alvos)
+    assert reaberto.quantidade_concluidos == 0
+    assert reaberto.resultados == []
+    assert len(reaberto.pendentes()) == len(alvos)
+
+
+def test_ponto_de_outros_alvos_e_recusado(alvos, caminho):
+    ponto = PontoRetomada(caminho, alvos)
+    ponto.registrar(resultado("10.0.0.1"))
+    ponto.salvar()
+    outros_alvos = AlvosVarredura(["10.0.0.0/24"])
+    assert PontoRetomada.abrir(caminho, outros_alvos).quantidade_concluidos == 0
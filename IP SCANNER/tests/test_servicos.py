@@ -0,0 +1,87 @@
+"""
+Identificação de serviços: banners contra um servidor TCP local, leitura
+das respostas e o cache (MAC, porta) -> serviço.
+"""
+
+import asyncio
+import socket
+import struct
+import time
+
+from portas import varrer_portas
+from servicos import CacheServicos, ServicoPorta, identificar_servico_async, interpretar_resposta
+
+
+def test_servico_identificado_e_guardado_no_cache(servidor_banner):
+    cache = CacheServicos()
+    macs = {"127.0.0.1": "aa:bb:cc:00:00:01"}
+
+    resultado, = varrer_portas(
+        ["127.0.0.1"], [servidor_banner], identificar_servicos=True, cache_servicos=cache, macs=macs
+    )
+    assert resultado.servico == "ssh"
+    assert resultado.banner == "SSH-2.0-OpenSSH_9.6 Ubuntu"
+    assert cache.obter("127.0.0.1", "AA:BB:CC:00:00:01", servidor_banner) == ServicoPorta(
+        "ssh", "SSH-2.0-OpenSSH_9.6 Ubuntu"
+    )
+
+    # Segunda vez: vem do cache
+    acertos = cache.acertos
+    resultado, = varrer_portas(
+        ["127.0.0.1"], [servidor_banner], identificar_servicos=True, cache_servicos=cache, macs=macs
+    )
+    assert resultado.servico == "ssh"
+    assert cache.acertos == acertos + 1
+
+
+def test_interpretar_resposta():
+    assert interpretar_resposta(b"") == ServicoPorta("sem_banner", "")
+    assert interpretar_resposta(b"SSH-2.0-dropbear\r\nlixo") == ServicoPorta("ssh", "SSH-2.0-dropbear")
+
+    http = interpretar_resposta(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nServer: nginx/1.24\r\n\r\n")
+    assert http == ServicoPorta("http", "HTTP/1.1 200 OK | nginx/1.24")
+
+    cabecalho_smb2 = b"\x00\x00\x00\x80" + b"\xfeSMB" + bytes(60) + struct.pack("<HHH", 65, 1, 0x0311)
+    assert interpretar_resposta(cabecalho_smb2) == ServicoPorta("smb", "SMB2 (dialeto 0x0311)")
+    assert interpretar_resposta(b"\x00\x00\x00\x40\xffSMBr") == ServicoPorta("smb", "SMB1")
+
+    desconhecido = interpretar_resposta(b"220 \x01servidor\tFTP\r\n")
+    assert desconhecido == ServicoPorta("desconhecido", "220 servidor FTP")
+
+
+def test_cache_servicos_validade_e_capacidade(monkeypatch):
+    instante = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: instante[0])
+    cache = CacheServicos(tempo_vida=60.0, capacidade=2)
+
+    cache.guardar("10.0.0.1", "aa:bb:cc:00:00:01", 22, ServicoPorta("ssh", "a"))
+    cache.guardar("10.0.0.2", "Desconhecido", 22, ServicoPorta("ssh", "b"))
+    # Mesmo MAC em outro IP (DHCP): mesma entrada
+    assert cache.obter("10.0.0.9", "AA:BB:CC:00:00:01", 22) == ServicoPorta("ssh", "a")
+    # Sem MAC, a chave é o IP
+    assert cache.obter("10.0.0.2", None, 22) == ServicoPorta("ssh", "b")
+
+    cache.guardar("10.0.0.3", None, 80, ServicoPorta("http", "c"))
+    assert len(cache) == 2
+    assert cache.obter("10.0.0.1", "AA:BB:CC:00:00:01", 22) is None
+
+    instante[0] += 61.0
+    assert cache.obter("10.0.0.3", None, 80) is None
+
+
+def test_conexao_fechada_ao_terminar():
+    servidor = socket.create_server(("127.0.0.1", 0))
+    servidor.settimeout(2.0)
+
+    async def identificar():
+        return await identificar_servico_async("127.0.0.1", servidor.getsockname()[1], tempo_limite=0.3)
+
+    with servidor:
+        servico_porta = asyncio.run(identificar())
+        conexao, _endereco = servidor.accept()
+        with conexao:
+            conexao.settimeout(1.0)
+            # O cliente mandou a sonda HTTP (não houve banner) e já fechou o socket
+            assert conexao.recv(4096).startswith(b"HEAD / HTTP/1.0")
+            assert conexao.recv(4096) == b""
+    assert servico_porta == ServicoPorta("sem_banner", "")
@@ -0,0 +1,130 @@
+"""
+Motor de sondagem ICMP assíncrono, sobre o transporte simulado.
+"""
+
+import asyncio
+import struct
+import time
+
+from net import (
+    CacheVizinhos,
+    TransporteIcmpSimulado,
+    calcular_checksum_icmp,
+    interpretar_resposta_echo,
+    montar_pacote_echo,
+    sondar_enderecos_async,
+    varrer_rede,
+)
+
+TEMPO_LIMITE = 0.2
+
+
+def cache_fixo(tabela):
+    return CacheVizinhos(funcao_leitura=lambda: dict(tabela), intervalo_minimo=0.0)
+
+
+def sondar(enderecos, transporte, **opcoes):
+    async def coletar():
+        return [resultado async for resultado in sondar_enderecos_async(enderecos, transporte=transporte, **opcoes)]
+
+    return {endereco_ip: rtt for endereco_ip, rtt, _inicio in asyncio.run(coletar())}
+
+
+# ---------- Pacotes ----------
+def test_pacote_echo_com_checksum_valido():
+    pacote = montar_pacote_echo(0x1234, 7)
+    assert pacote[0] == 8
+    assert struct.unpack("!HH", pacote[4:8]) == (0x1234, 7)
+    # O checksum de um pacote íntegro, recalculado, dá zero
+    assert calcular_checksum_icmp(pacote) == 0
+    assert calcular_checksum_icmp(pacote + b"x") != 0
+
+
+def test_interpretar_resposta_echo():
+    resposta = b"\x00" + montar_pacote_echo(0x1234, 7)[1:]
+    assert interpretar_resposta_echo(resposta, possui_cabecalho_ip=False) == (0x1234, 7)
+
+    cabecalho_ip = bytes([0x45]) + bytes(19)
+    assert interpretar_resposta_echo(cabecalho_ip + resposta, possui_cabecalho_ip=True) == (0x1234, 7)
+    # Echo Request (o próprio pacote ecoado na loopback) e pacotes curtos são ignorados
+    assert interpretar_resposta_echo(montar_pacote_echo(1, 1), possui_cabecalho_ip=False) is None
+    assert interpretar_resposta_echo(b"\x00\x00", possui_cabecalho_ip=False) is None
+    assert interpretar_resposta_echo(b"", possui_cabecalho_ip=True) is None
+
+
+# ---------- Sondagem ----------
+def test_sondagem_um_resultado_por_endereco():
+    transporte = TransporteIcmpSimulado({"10.0.0.2": 0.001, "10.0.0.3": 0.005})
+    rtts = sondar(["10.0.0.1", "10.0.0.2", "10.0.0.3"], transporte, tempo_limite=TEMPO_LIMITE, tentativas=2)
+
+    assert set(rtts) == {"10.0.0.1", "10.0.0.2", "10.0.0.3"}
+    assert rtts["10.0.0.1"] is None
+    assert 0.001 <= rtts["10.0.0.2"] < TEMPO_LIMITE
+    assert 0.005 <= rtts["10.0.0.3"] < TEMPO_LIMITE
+    # Quem não responde recebe todas as tentativas
+    assert transporte.pacotes_enviados == 1 + 1 + 2
+
+
+def test_retentativa_recupera_perdas():
+    enderecos = [f"10.0.0.{final}" for final in range(1, 21)]
+    transporte = TransporteIcmpSimulado(enderecos, taxa_perda=0.5, semente=3)
+    rtts = sondar(enderecos, transporte, tempo_limite=0.05, tentativas=8)
+    # Metade dos pacotes se perde, mas todos os hosts acabam respondendo
+    assert all(rtts[endereco_ip] is not None for endereco_ip in enderecos)
+    assert transporte.pacotes_enviados > len(enderecos)
+
+
+def test_tempo_limite_por_alvo():
+    transporte = TransporteIcmpSimulado({"10.0.0.2": 0.05})
+    instante_inicio = time.monotonic()
+    rtts = sondar(
+        ["10.0.0.2"], transporte,
+        tempo_limite=1.0, tentativas=1,
+        tempo_limite_por_alvo=lambda endereco_ip: 0.01
+    )
+    assert rtts["10.0.0.2"] is None
+    assert time.monotonic() - instante_inicio < 0.5
+
+
+# ---------- varrer_rede ----------
+def test_varredura_icmp_um_resultado_por_alvo():
+    transporte = TransporteIcmpSimulado({"10.0.0.2": 0.001, "10.0.0.5": 0.003})
+    resultados = {resultado.ip: resultado for resultado in varrer_rede(
+        "10.0.0.1", "29",
+        transporte=transporte,
+        cache_vizinhos=cache_fixo({"10.0.0.2": "AA:BB:CC:00:00:02"}),
+        tempo_limite=TEMPO_LIMITE,
+        tentativas=2
+    )}
+
+    assert sorted(resultados) == [f"10.0.0.{final}" for final in range(1, 7)]
+    assert {ip for ip, resultado in resultados.items() if resultado.status == "Ativo"} == {"10.0.0.2", "10.0.0.5"}
+
+    ativo = resultados["10.0.0.2"]
+    assert ativo.metodo == "icmp"
+    assert ativo.mac == "AA:BB:CC:00:00:02"
+    assert ativo.origem == "10.0.0.1"
+    assert ativo.inicio <= ativo.fim
+
+    # Ativo fora da tabela de vizinhos: sai, mas sem MAC
+    assert resultados["10.0.0.5"].mac == "Desconhecido"
+    assert resultados["10.0.0.3"].rtt is None
+    assert transporte.pacotes_enviados == 2 + 4 * 2
+
+
+def test_interromper_a_iteracao_encerra_a_varredura():
+    transporte = TransporteIcmpSimulado({"10.0.0.1"})
+    resultados = varrer_rede(
+        "10.0.0.1", "16",
+        transporte=transporte,
+        cache_vizinhos=cache_fixo({}),
+        tempo_limite=TEMPO_LIMITE,
+        max_em_voo=64
+    )
+    next(resultados)
+    resultados.close()
+    enviados = transporte.pacotes_enviados
+    assert enviados < 65534
+    # Nenhuma sondagem sai depois do close()
+    time.sleep(0.05)
+    assert transporte.pacotes_enviados == enviados
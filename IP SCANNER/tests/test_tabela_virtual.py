@@ -0,0 +1,64 @@
+"""
+Dados da tabela virtual (sem janela): índice por chave, remoção,
+ordenação e janela visível.
+"""
+
+from tabela_virtual import DadosTabela, chave_natural
+
+
+def dados_com(*ips):
+    dados = DadosTabela()
+    dados.definir_linhas((ip, (ip, "Ativo")) for ip in ips)
+    return dados
+
+
+def conferir_indice(dados):
+    assert len(dados.linhas) == len(dados.chaves) == len(dados.indice_por_chave)
+    for posicao, chave in enumerate(dados.chaves):
+        assert dados.indice_por_chave[chave] == posicao
+
+
+def test_inserir_e_atualizar_pela_chave():
+    dados = dados_com("10.0.0.1", "10.0.0.2")
+    assert dados.inserir_ou_atualizar("10.0.0.1", ("10.0.0.1", "Inativo")) == 0
+    assert dados.inserir_ou_atualizar("10.0.0.3", ("10.0.0.3", "Ativo")) == 2
+    assert dados.linhas == [("10.0.0.1", "Inativo"), ("10.0.0.2", "Ativo"), ("10.0.0.3", "Ativo")]
+    conferir_indice(dados)
+
+
+def test_remover_move_a_ultima_linha_para_o_lugar():
+    dados = dados_com("10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4")
+    assert dados.remover("10.0.0.2") == (1, 3)
+    assert dados.chaves == ["10.0.0.1", "10.0.0.4", "10.0.0.3"]
+    conferir_indice(dados)
+
+    assert dados.remover("10.0.0.3") == (2, 2)  # a última: nada se move
+    assert dados.remover("10.0.0.9") is None
+    assert dados.chaves == ["10.0.0.1", "10.0.0.4"]
+    conferir_indice(dados)
+
+
+def test_ordenar_ips_pelo_valor_numerico():
+    dados = dados_com("10.0.0.10", "10.0.0.9", "10.0.0.100", "10.0.0.1")
+    dados.ordenar(0)
+    assert dados.chaves == ["10.0.0.1", "10.0.0.9", "10.0.0.10", "10.0.0.100"]
+    conferir_indice(dados)
+    dados.ordenar(0, decrescente=True)
+    assert dados.chaves[0] == "10.0.0.100"
+    conferir_indice(dados)
+
+
+def test_chave_natural():
+    assert sorted(["b", "10", "A", "9.5", "::1", "10.0.0.2"], key=chave_natural) == [
+        "10.0.0.2", "::1", "9.5", "10", "A", "b"
+    ]
+    assert chave_natural("12.5 ms") < chave_natural("100 ms")
+
+
+def test_janela_visivel_e_limite_da_rolagem():
+    dados = dados_com(*(f"10.0.0.{i}" for i in range(1, 11)))
+    assert [posicao for posicao, _ in dados.janela(8, 4)] == [8, 9]
+    assert dados.janela(2, 2) == [(2, ("10.0.0.3", "Ativo")), (3, ("10.0.0.4", "Ativo"))]
+    assert dados.limitar_primeira_linha(9, 4) == 6
+    assert dados.limitar_primeira_linha(-3, 4) == 0
+    assert dados.limitar_primeira_linha(5, 20) == 0
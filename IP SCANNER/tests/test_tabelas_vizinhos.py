@@ -0,0 +1,80 @@
+"""
+Leitura da tabela de vizinhos IPv4 a partir de saídas capturadas
+de cada sistema.
+"""
+
+from net import CacheVizinhos, analisar_tabela_vizinhos
+
+PROC_NET_ARP = """\
+IP address       HW type     Flags       HW address            Mask     Device
+192.168.0.1      0x1         0x2         aa:bb:cc:00:00:01     *        eth0
+192.168.0.7      0x1         0x0         00:00:00:00:00:00     *        eth0
+192.168.0.9      0x1         0x6         aa:bb:cc:00:00:09     *        eth0
+"""
+
+IP_NEIGH = """\
+192.168.0.1 dev eth0 lladdr aa:bb:cc:00:00:01 REACHABLE
+192.168.0.7 dev eth0  FAILED
+192.168.0.8 dev eth0 lladdr aa:bb:cc:00:00:08 STALE
+192.168.0.9 dev eth0  INCOMPLETE
+"""
+
+ARP_A_WINDOWS = """\
+
+Interface: 192.168.0.10 --- 0xb
+  Endereço IP           Endereço físico       Tipo
+  192.168.0.1           aa-bb-cc-00-00-01     dinâmico
+  192.168.0.255         ff-ff-ff-ff-ff-ff     estático
+  224.0.0.22            01-00-5e-00-00-16     estático
+"""
+
+ARP_A_MACOS = """\
+? (192.168.0.1) at aa:bb:cc:00:00:01 on en0 ifscope [ethernet]
+? (192.168.0.3) at (incomplete) on en0 ifscope [ethernet]
+"""
+
+def test_proc_net_arp_ignora_incompletas():
+    assert analisar_tabela_vizinhos(PROC_NET_ARP) == {
+        "192.168.0.1": "AA:BB:CC:00:00:01",
+        "192.168.0.9": "AA:BB:CC:00:00:09",
+    }
+
+
+def test_ip_neigh_ignora_falhas():
+    assert analisar_tabela_vizinhos(IP_NEIGH) == {
+        "192.168.0.1": "AA:BB:CC:00:00:01",
+        "192.168.0.8": "AA:BB:CC:00:00:08",
+    }
+
+
+def test_arp_a_windows_ignora_broadcast():
+    tabela = analisar_tabela_vizinhos(ARP_A_WINDOWS)
+    assert tabela["192.168.0.1"] == "AA:BB:CC:00:00:01"
+    assert "192.168.0.255" not in tabela
+
+
+def test_arp_a_macos():
+    assert analisar_tabela_vizinhos(ARP_A_MACOS) == {"192.168.0.1": "AA:BB:CC:00:00:01"}
+
+
+def test_cache_vizinhos_le_a_tabela_uma_vez():
+    leituras = []
+
+    def ler_tabela():
+        leituras.append(1)
+        return analisar_tabela_vizinhos(IP_NEIGH)
+
+    cache = CacheVizinhos(funcao_leitura=ler_tabela, intervalo_minimo=60.0)
+    assert cache.obter("192.168.0.1") == "AA:BB:CC:00:00:01"
+    assert cache.obter("192.168.0.8") == "AA:BB:CC:00:00:08"
+    # Ausente, mas a última leitura é recente: não relê a tabela
+    assert cache.obter("192.168.0.99") == "Desconhecido"
+    assert len(leituras) == 1
+
+
+def test_cache_de_tabela_capturada(tmp_path):
+    caminho_tabela = tmp_path / "arp.txt"
+    caminho_tabela.write_text(PROC_NET_ARP, encoding="utf-8")
+    cache = CacheVizinhos.de_arquivo(str(caminho_tabela))
+    assert cache.obter("192.168.0.9") == "AA:BB:CC:00:00:09"
+    assert cache.obter("192.168.0.7") == "Desconhecido"
@@ -0,0 +1,85 @@
+"""
+Varredura ARP sobre o transporte de quadros simulado: o MAC vem da própria
+resposta, sem tabela de vizinhos e sem root.
+"""
+
+import pytest
+
+from net import (
+    ARP_REQUISICAO,
+    ARP_RESPOSTA,
+    MAC_BROADCAST,
+    MAC_ORIGEM_SIMULADO,
+    CacheVizinhos,
+    TransporteIcmpSimulado,
+    TransporteQuadrosSimulado,
+    interpretar_quadro_arp,
+    montar_quadro_arp,
+    varrer_rede,
+)
+
+TEMPO_LIMITE = 0.2
+MAC_LOCAL = bytes.fromhex("020000000001")
+MAC_REMOTO = bytes.fromhex("aabbcc000003")
+
+
+def test_quadros_arp_ida_e_volta():
+    requisicao = montar_quadro_arp(ARP_REQUISICAO, MAC_LOCAL, "10.0.0.1", b"\x00" * 6, "10.0.0.3")
+    assert len(requisicao) == 42
+    assert requisicao[:6] == MAC_BROADCAST
+    assert interpretar_quadro_arp(requisicao) == (ARP_REQUISICAO, "10.0.0.1", "02:00:00:00:00:01")
+
+    resposta = montar_quadro_arp(ARP_RESPOSTA, MAC_REMOTO, "10.0.0.3", MAC_LOCAL, "10.0.0.1")
+    assert resposta[:6] == MAC_LOCAL
+    assert interpretar_quadro_arp(resposta) == (ARP_RESPOSTA, "10.0.0.3", "AA:BB:CC:00:00:03")
+
+
+def test_quadros_que_nao_sao_arp_sao_ignorados():
+    resposta = montar_quadro_arp(ARP_RESPOSTA, MAC_REMOTO, "10.0.0.3", MAC_LOCAL, "10.0.0.1")
+    assert interpretar_quadro_arp(resposta[:41]) is None
+    assert interpretar_quadro_arp(resposta[:12] + b"\x08\x00" + resposta[14:]) is None
+
+
+def test_arp_mac_vem_do_quadro():
+    transporte = TransporteQuadrosSimulado({
+        "10.0.0.3": "AA:BB:CC:00:00:03",
+        "10.0.0.6": "aa-bb-cc-00-00-06",
+    })
+    resultados = {resultado.ip: resultado for resultado in varrer_rede(
+        "10.0.0.1", "29", metodo="arp", transporte=transporte, tempo_limite=TEMPO_LIMITE
+    )}
+
+    assert len(resultados) == 6
+    assert all(resultado.metodo == "arp" for resultado in resultados.values())
+    assert resultados["10.0.0.3"].mac == "AA:BB:CC:00:00:03"
+    assert resultados["10.0.0.6"].mac == "AA:BB:CC:00:00:06"
+    assert resultados["10.0.0.3"].rtt is not None
+    assert resultados["10.0.0.4"].status == "Inativo"
+    # O próprio IP aparece com o MAC da interface simulada
+    assert resultados["10.0.0.1"].mac == MAC_ORIGEM_SIMULADO.upper()
+
+
+def test_auto_escolhe_pelo_transporte():
+    quadros = varrer_rede(
+        "10.0.0.1", "30", metodo="auto",
+        transporte=TransporteQuadrosSimulado({"10.0.0.2": "AA:BB:CC:00:00:02"}),
+        tempo_limite=TEMPO_LIMITE
+    )
+    assert {resultado.metodo for resultado in quadros} == {"arp"}
+
+    icmp = varrer_rede(
+        "10.0.0.1", "30", metodo="auto",
+        transporte=TransporteIcmpSimulado({"10.0.0.2"}),
+        cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+        tempo_limite=TEMPO_LIMITE
+    )
+    assert {resultado.metodo for resultado in icmp} == {"icmp"}
+
+
+def test_arp_com_transporte_icmp_e_erro():
+    with pytest.raises(ValueError):
+        list(varrer_rede(
+            "10.0.0.1", "30", metodo="arp",
+            transporte=TransporteIcmpSimulado({"10.0.0.2"}),
+            tempo_limite=TEMPO_LIMITE
+        ))
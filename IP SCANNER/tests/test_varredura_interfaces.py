@@ -0,0 +1,39 @@
+"""
+Várias interfaces em paralelo: cada IP sai uma vez só, pela interface que
+o alcançou, e as sub-redes sobrepostas contam uma vez.
+"""
+
+from net import CacheVizinhos, TransporteIcmpSimulado, contar_alvos_interfaces, varrer_interfaces
+
+TEMPO_LIMITE = 0.2
+
+
+def test_interfaces_na_mesma_rede_sem_repeticao():
+    # Cabo e Wi-Fi na mesma LAN: o host só responde pelo Wi-Fi
+    transportes = {
+        "10.0.0.1": TransporteIcmpSimulado(set()),
+        "10.0.0.2": TransporteIcmpSimulado({"10.0.0.5"}),
+        "10.1.0.1": TransporteIcmpSimulado({"10.1.0.2"}),
+    }
+    resultados = list(varrer_interfaces(
+        [("10.0.0.1", "29"), ("10.0.0.2", "29"), ("10.1.0.1", "30")],
+        transportes=transportes,
+        cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+        tempo_limite=TEMPO_LIMITE,
+        tentativas=1
+    ))
+
+    enderecos = [resultado.ip for resultado in resultados]
+    assert len(enderecos) == len(set(enderecos)) == 6 + 2
+    ativos = {resultado.ip: resultado.origem for resultado in resultados if resultado.status == "Ativo"}
+    assert ativos == {"10.0.0.5": "10.0.0.2", "10.1.0.2": "10.1.0.1"}
+
+
+def test_contar_alvos_de_redes_sobrepostas():
+    interfaces = [
+        {"ip": "10.0.0.1", "mascara": "24"},
+        {"ip": "10.0.0.200", "mascara": "255.255.255.128"},  # dentro do /24 acima
+        ("10.1.0.1", "30"),
+    ]
+    assert contar_alvos_interfaces(interfaces) == 254 + 2
+    assert contar_alvos_interfaces(interfaces, exclusoes=["10.0.0.1-10"]) == 244 + 2
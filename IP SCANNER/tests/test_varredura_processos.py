@@ -0,0 +1,51 @@
+"""
+Varredura dividida entre processos: registros binários,
+resultado igual ao da varredura em um só processo e a opção do cli.
+"""
+
+import cli
+from net import CacheVizinhos, ResultadoHost, TransporteIcmpSimulado, varrer_rede
+from varredura_processos import codificar_resultado, decodificar_registros, varrer_rede_processos
+
+
+def test_registros_ida_e_volta():
+    resultados = [
+        ResultadoHost("10.0.0.2", "Ativo", "Roteador/Switch", "Fabricante Ç", "AA:BB:CC:00:00:02",
+                      0.0125, "arp", 1000.5, 1000.75, "10.0.0.1", "roteador.lan"),
+        ResultadoHost("10.0.0.3", "Inativo", "Host", "Desconhecido", "Desconhecido",
+                      None, "icmp", 1001.0, 1002.0, "10.0.0.1"),
+        ResultadoHost("10.0.0.4", "Ativo", "Host", "Desconhecido", "Desconhecido",
+                      0.0, "icmp", 1001.0, 1001.0, "10.0.0.1"),
+    ]
+    dados = b"".join(codificar_resultado(resultado) for resultado in resultados)
+    assert list(decodificar_registros(dados, "10.0.0.1")) == resultados
+
+
+def test_processos_produzem_o_mesmo_que_um_processo():
+    hosts_ativos = {f"10.0.{terceiro}.{quarto}" for terceiro in range(2) for quarto in (1, 7, 200)}
+    opcoes = {"tempo_limite": 0.2, "tentativas": 1}
+
+    def resumo(resultados):
+        return sorted((resultado.ip, resultado.status, resultado.metodo, resultado.origem)
+                      for resultado in resultados)
+
+    esperado = resumo(varrer_rede(
+        "10.0.0.10", "23",
+        transporte=TransporteIcmpSimulado(hosts_ativos),
+        cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+        **opcoes
+    ))
+    obtido = resumo(varrer_rede_processos(
+        "10.0.0.10", "23",
+        processos=2,
+        transporte=TransporteIcmpSimulado(hosts_ativos),
+        cache_vizinhos=CacheVizinhos(funcao_leitura=dict),
+        **opcoes
+    ))
+    assert len(obtido) == 510
+    assert obtido == esperado
+
+
+def test_cli_recusa_processos_com_varias_interfaces(capsys):
+    assert cli.main(["--interface", "10.0.0.1", "--processos", "2"]) == 2
+    assert "--processos" in capsys.readouterr().err
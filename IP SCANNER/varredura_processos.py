@@ -0,0 +1,225 @@
+"""
+varredura_processos.py
+Varredura dividida entre vários processos, para faixas muito grandes (/16 a /8).
+
+Os alvos são repartidos em blocos (ver AlvosVarredura.dividir); cada
+processo roda o seu próprio event loop com varrer_rede_async, inclusive a
+identificação do fabricante e a classificação, e manda os resultados ao
+processo principal por um Pipe, em registros binários compactos agrupados
+em lotes. O principal junta os lotes na ordem em que chegam e reconstrói
+ResultadoHost idênticos aos de uma varredura em um único processo.
+
+Formato de um registro (little-endian):
+    cabeçalho "<IBB6sdddHHH": ip, sinalizadores, método, MAC, rtt, início,
+    fim, tamanhos do tipo, do fabricante e do nome; em seguida os textos do
+    tipo, do fabricante e do nome do host em UTF-8 (nome vazio = sem nome).
+O campo 'ipv6' não viaja: ele só é preenchido depois, no processo principal
+(descoberta_ipv6.mesclar_por_mac).
+Cada mensagem começa com um byte: b"R" (lote de registros), b"E" (erro,
+texto) ou b"F" (fim do fragmento).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import socket
+import struct
+import time
+from multiprocessing.connection import wait
+
+from net import AlvosVarredura, ControleConcorrencia, ResultadoHost, montar_alvos, varrer_rede_async
+
+FORMATO_REGISTRO = "<IBB6sdddHHH"
+TAMANHO_REGISTRO = struct.calcsize(FORMATO_REGISTRO)
+
+SINAL_ATIVO = 1
+SINAL_MAC_CONHECIDO = 2
+SINAL_RTT = 4
+
+METODOS = ("icmp", "arp")
+MAC_DESCONHECIDO = "Desconhecido"
+
+MENSAGEM_REGISTROS = b"R"
+MENSAGEM_ERRO = b"E"
+MENSAGEM_FIM = b"F"
+
+# Um lote sai quando junta tantos registros ou quando passa esse tempo
+REGISTROS_POR_LOTE = 256
+INTERVALO_LOTE_SEGUNDOS = 0.05
+
+
+# ---------- Codificação dos registros ----------
+def codificar_resultado(resultado):
+    sinalizadores = 0
+    if resultado.status == "Ativo":
+        sinalizadores |= SINAL_ATIVO
+    if resultado.rtt is not None:
+        sinalizadores |= SINAL_RTT
+
+    mac_binario = b"\x00" * 6
+    if resultado.mac != MAC_DESCONHECIDO:
+        mac_binario = bytes.fromhex(resultado.mac.replace(":", "").replace("-", ""))
+        sinalizadores |= SINAL_MAC_CONHECIDO
+
+    texto_tipo = resultado.tipo.encode("utf-8")
+    texto_fabricante = resultado.fabricante.encode("utf-8")
+    texto_nome = (resultado.nome or "").encode("utf-8")
+    return struct.pack(
+        FORMATO_REGISTRO,
+        int.from_bytes(socket.inet_aton(resultado.ip), "big"),
+        sinalizadores,
+        METODOS.index(resultado.metodo),
+        mac_binario,
+        resultado.rtt or 0.0,
+        resultado.inicio,
+        resultado.fim,
+        len(texto_tipo),
+        len(texto_fabricante),
+        len(texto_nome)
+    ) + texto_tipo + texto_fabricante + texto_nome
+
+
+def decodificar_registros(dados, origem=None):
+    """
+    Gera os ResultadoHost de um lote de registros.
+    """
+    visao = memoryview(dados)
+    posicao = 0
+    while posicao < len(visao):
+        (endereco, sinalizadores, indice_metodo, mac_binario, rtt, instante_inicio,
+         instante_fim, tamanho_tipo, tamanho_fabricante, tamanho_nome) = struct.unpack_from(
+            FORMATO_REGISTRO, visao, posicao
+        )
+        posicao += TAMANHO_REGISTRO
+        tipo = bytes(visao[posicao:posicao + tamanho_tipo]).decode("utf-8")
+        posicao += tamanho_tipo
+        fabricante = bytes(visao[posicao:posicao + tamanho_fabricante]).decode("utf-8")
+        posicao += tamanho_fabricante
+        nome = bytes(visao[posicao:posicao + tamanho_nome]).decode("utf-8") or None
+        posicao += tamanho_nome
+
+        yield ResultadoHost(
+            socket.inet_ntoa(endereco.to_bytes(4, "big")),
+            "Ativo" if sinalizadores & SINAL_ATIVO else "Inativo",
+            tipo,
+            fabricante,
+            mac_binario.hex(":").upper() if sinalizadores & SINAL_MAC_CONHECIDO else MAC_DESCONHECIDO,
+            rtt if sinalizadores & SINAL_RTT else None,
+            METODOS[indice_metodo],
+            instante_inicio,
+            instante_fim,
+            origem,
+            nome
+        )
+
+
+# ---------- Processo trabalhador ----------
+def _executar_fragmento(conexao, intervalos, endereco_ip_local, mascara_rede, opcoes):
+    """
+    Ponto de entrada de cada processo: varre os intervalos recebidos e
+    envia os resultados em lotes pela 'conexao'.
+    """
+    async def varrer():
+        lote = bytearray()
+        quantidade_lote = 0
+        instante_lote = time.monotonic()
+
+        async for resultado in varrer_rede_async(
+                endereco_ip_local,
+                mascara_rede,
+                alvos=AlvosVarredura.de_intervalos(intervalos),
+                **opcoes):
+            lote += codificar_resultado(resultado)
+            quantidade_lote += 1
+            if (quantidade_lote >= REGISTROS_POR_LOTE or
+                    time.monotonic() - instante_lote >= INTERVALO_LOTE_SEGUNDOS):
+                conexao.send_bytes(MENSAGEM_REGISTROS + lote)
+                lote = bytearray()
+                quantidade_lote = 0
+                instante_lote = time.monotonic()
+
+        if lote:
+            conexao.send_bytes(MENSAGEM_REGISTROS + lote)
+
+    try:
+        asyncio.run(varrer())
+    except Exception as erro_fragmento:
+        conexao.send_bytes(MENSAGEM_ERRO + str(erro_fragmento).encode("utf-8"))
+    finally:
+        conexao.send_bytes(MENSAGEM_FIM)
+        conexao.close()
+
+
+# ---------- Processo principal ----------
+def varrer_rede_processos(endereco_ip_local, mascara_rede, alvos=None, exclusoes=None,
+                          processos=None, max_em_voo=256, taxa_maxima=None, **opcoes):
+    """
+    Gerador com o mesmo resultado de varrer_rede, mas dividindo os alvos
+    entre 'processos' processos (padrão: número de CPUs). Cada processo tem
+    o seu próprio ControleConcorrencia, com uma fatia de 'max_em_voo' e de
+    'taxa_maxima'. As demais opções vão para varrer_rede_async e precisam
+    ser serializáveis (ex.: um TransporteIcmpSimulado ou um
+    ResolvedorNomes, copiado para cada processo; não um socket).
+    Interromper a iteração encerra os processos.
+    """
+    enderecos = montar_alvos(endereco_ip_local, mascara_rede, alvos, exclusoes)
+    quantidade_processos = max(1, processos or os.cpu_count() or 1)
+    fragmentos = enderecos.dividir(quantidade_processos)
+    if not fragmentos:
+        return
+
+    contexto = multiprocessing.get_context("spawn")
+    conexoes = {}
+    trabalhadores = []
+    try:
+        for intervalos in fragmentos:
+            opcoes_fragmento = dict(opcoes)
+            opcoes_fragmento["controle"] = ControleConcorrencia(
+                janela_maxima=max(1, max_em_voo // len(fragmentos)),
+                taxa_maxima=taxa_maxima / len(fragmentos) if taxa_maxima else None
+            )
+            conexao_leitura, conexao_escrita = contexto.Pipe(duplex=False)
+            trabalhador = contexto.Process(
+                target=_executar_fragmento,
+                args=(conexao_escrita, intervalos, endereco_ip_local, mascara_rede, opcoes_fragmento),
+                daemon=True
+            )
+            trabalhador.start()
+            conexao_escrita.close()
+            conexoes[conexao_leitura] = trabalhador
+            trabalhadores.append(trabalhador)
+
+        erros = []
+        while conexoes:
+            for conexao in wait(list(conexoes)):
+                try:
+                    mensagem = conexao.recv_bytes()
+                except EOFError:
+                    # O processo morreu sem mandar MENSAGEM_FIM: os hosts
+                    # desse fragmento ficariam faltando sem aviso
+                    trabalhador = conexoes.pop(conexao)
+                    conexao.close()
+                    trabalhador.join()
+                    erros.append(
+                        f"processo {trabalhador.pid} encerrou sem concluir (código {trabalhador.exitcode})"
+                    )
+                    continue
+
+                tipo_mensagem, conteudo = mensagem[:1], mensagem[1:]
+                if tipo_mensagem == MENSAGEM_REGISTROS:
+                    yield from decodificar_registros(conteudo, endereco_ip_local)
+                elif tipo_mensagem == MENSAGEM_ERRO:
+                    erros.append(conteudo.decode("utf-8", errors="replace"))
+                else:
+                    conexoes.pop(conexao).join()
+                    conexao.close()
+
+        if erros:
+            raise RuntimeError("Falha em um dos processos de varredura: " + "; ".join(erros))
+    finally:
+        for conexao in conexoes:
+            conexao.close()
+        for trabalhador in trabalhadores:
+            if trabalhador.is_alive():
+                trabalhador.terminate()
+            trabalhador.join()